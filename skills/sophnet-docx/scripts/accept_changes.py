@@ -1,6 +1,8 @@
 """Accept all tracked changes in a DOCX file using LibreOffice.
 
-Requires LibreOffice (soffice) to be installed.
+Requires LibreOffice (soffice) to be installed. Uses the warm worker pool from
+office/soffice.py when the Python-UNO bridge is available, otherwise runs a
+one-off soffice process with a Basic macro.
 """
 
 import argparse
@@ -9,7 +11,7 @@ import shutil
 import subprocess
 from pathlib import Path
 
-from office.soffice import get_soffice_env
+from office.soffice import SofficeError, get_pool, get_soffice_env
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +54,20 @@ def accept_changes(
     except Exception as e:
         return None, f"Error: Failed to copy input file to output location: {e}"
 
+    pool = get_pool()
+    if pool is not None:
+        try:
+            pool.accept_all_changes(output_path)
+            return (
+                None,
+                f"Successfully accepted all tracked changes: {input_file} -> {output_file}",
+            )
+        except SofficeError as e:
+            return None, f"Error: LibreOffice failed: {e}"
+        except OSError:
+            # Pool directory unusable; fall through to a one-shot soffice run
+            pass
+
     if not _setup_libreoffice_macro():
         return None, "Error: Failed to setup LibreOffice macro"
 
@@ -0,0 +1,101 @@
+"""Benchmark simplify_redlines and merge_runs on a large synthetic document.
+
+Generates a heavily redlined document.xml (formatted runs split by proofErr
+markers and rsid attributes, adjacent same-author w:ins/w:del wrappers,
+tables), pretty-prints it the way unpack.py does, then times each helper and
+reports peak memory.
+
+Usage:
+    python bench_redlines.py [--paragraphs N] [--office DIR]
+
+To compare against another revision, export its office directory and point
+--office at it, e.g.:
+    git archive <rev> skills/sophnet-docx/scripts/office | tar -x -C /tmp/old
+    python bench_redlines.py --office /tmp/old/skills/sophnet-docx/scripts/office
+"""
+
+import argparse
+import importlib
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import defusedxml.minidom
+
+WORD_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+AUTHORS = ("Alice", "Bob")
+FORMATS = ("", "<w:rPr><w:b/></w:rPr>", '<w:rPr><w:sz w:val="24"/></w:rPr>')
+
+
+def _run(rng: random.Random, rpr: str, text: str, tag: str = "t") -> str:
+    rsid = f' w:rsidR="00{rng.randrange(16**6):06X}"' if rng.random() < 0.7 else ""
+    return f'<w:r{rsid}>{rpr}<w:{tag} xml:space="preserve">{text} </w:{tag}></w:r>'
+
+
+def _paragraph(rng: random.Random, index: int) -> str:
+    rpr = rng.choice(FORMATS)
+    items = []
+    for j in range(rng.randint(4, 12)):
+        items.append(_run(rng, rpr, f"Paragraph {index} run {j}"))
+        if rng.random() < 0.3:
+            items.append('<w:proofErr w:type="spellStart"/>')
+    for _ in range(rng.randint(0, 3)):
+        tag, text_tag = rng.choice((("ins", "t"), ("del", "delText")))
+        author = rng.choice(AUTHORS)
+        for k in range(rng.randint(1, 3)):
+            runs = "".join(_run(rng, rpr, f"{tag} {k}", text_tag) for _ in range(rng.randint(1, 3)))
+            items.append(f'<w:{tag} w:id="{rng.randrange(10**6)}" w:author="{author}" '
+                         f'w:date="2024-01-01T00:00:00Z">{runs}</w:{tag}>')
+    return f'<w:p w:rsidR="00A1B2C3"><w:pPr><w:jc w:val="left"/></w:pPr>{"".join(items)}</w:p>'
+
+
+def make_document(paragraphs: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    body = []
+    for i in range(paragraphs):
+        if i % 20 == 19:
+            cells = "".join(f"<w:tc>{_paragraph(rng, i)}</w:tc>" for _ in range(3))
+            body.append(f"<w:tbl><w:tr>{cells}</w:tr></w:tbl>")
+        else:
+            body.append(_paragraph(rng, i))
+    xml = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+           f'<w:document xmlns:w="{WORD_NS}"><w:body>{"".join(body)}<w:sectPr/></w:body></w:document>')
+    return defusedxml.minidom.parseString(xml).toprettyxml(indent="  ", encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the DOCX redline helpers")
+    parser.add_argument("--paragraphs", type=int, default=5000, help="Paragraphs to generate (default: 5000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--office", type=Path, default=Path(__file__).parent,
+                        help="Office directory whose helpers package is benchmarked (default: this one)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(args.office.resolve()))
+    merge_runs = importlib.import_module("helpers.merge_runs").merge_runs
+    simplify_redlines = importlib.import_module("helpers.simplify_redlines").simplify_redlines
+
+    xml = make_document(args.paragraphs, args.seed)
+    print(f"document.xml: {len(xml) / 1e6:.1f} MB, {args.paragraphs} paragraphs")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "word").mkdir()
+        (Path(tmp) / "word" / "document.xml").write_bytes(xml)
+
+        start = time.perf_counter()
+        simplified, _ = simplify_redlines(tmp)
+        middle = time.perf_counter()
+        merged, _ = merge_runs(tmp)
+        end = time.perf_counter()
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"simplify_redlines: {middle - start:.2f}s ({simplified} tracked changes)")
+    print(f"merge_runs:        {end - middle:.2f}s ({merged} runs)")
+    print(f"peak RSS:          {peak_mb:.0f} MB (includes generating the document)")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,12 +12,34 @@ Usage:
     # Option 2 – get env dict for your own subprocess calls
     env = get_soffice_env()
     subprocess.run(["soffice", ...], env=env)
+
+    # Option 3 – reuse warm LibreOffice workers (falls back to None when
+    # soffice or the Python-UNO bridge is missing, or the pool directory
+    # cannot be used)
+    pool = get_pool()
+    if pool is not None:
+        pool.convert_to_pdf("input.docx", outdir="out")
+        pool.map("recalc", ["a.xlsx", "b.xlsx"])
+
+CLI:
+    python soffice.py <soffice args...>          # run soffice once
+    python soffice.py convert-pdf [--outdir D] FILE...  # batch via the pool
+    python soffice.py stop-pool                  # stop warm workers
 """
 
+import atexit
+import fcntl
 import os
+import shutil
+import signal
 import socket
 import subprocess
+import sys
 import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
 
@@ -38,6 +60,499 @@ def run_soffice(args: list[str], **kwargs) -> subprocess.CompletedProcess:
 
 
 
+class SofficeError(RuntimeError):
+    pass
+
+
+POOL_DIR = Path(tempfile.gettempdir()) / f"soffice_pool_{os.getuid()}"
+POOL_BASE_PORT = os.environ.get("SOFFICE_POOL_PORT")
+DEFAULT_POOL_SIZE = min(4, os.cpu_count() or 1)
+DEFAULT_IDLE_TIMEOUT = 0
+WORKER_START_TIMEOUT = 60
+WORKER_START_ATTEMPTS = 3
+DEFAULT_JOB_TIMEOUT = 120
+
+PDF_EXPORT_FILTERS = {
+    "com.sun.star.presentation.PresentationDocument": "impress_pdf_Export",
+    "com.sun.star.sheet.SpreadsheetDocument": "calc_pdf_Export",
+    "com.sun.star.text.TextDocument": "writer_pdf_Export",
+    "com.sun.star.drawing.DrawingDocument": "draw_pdf_Export",
+}
+
+_LIBREOFFICE_PROGRAM_DIRS = [
+    "/usr/lib/libreoffice/program",
+    "/usr/lib64/libreoffice/program",
+    "/opt/libreoffice/program",
+    "/Applications/LibreOffice.app/Contents/Resources",
+]
+
+_uno = None
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_pool() -> "SofficePool | None":
+    """Return the shared warm-worker pool, or None if it cannot be used here.
+
+    The pool needs `soffice` on PATH, LibreOffice's Python-UNO bridge and a
+    private pool directory. Set SOFFICE_POOL=0 to force the
+    one-process-per-document fallback. Workers are stopped when this process
+    exits unless SOFFICE_POOL_IDLE_TIMEOUT is set to a number of seconds, in
+    which case they stay up for later invocations until idle that long.
+    """
+    global _shared_pool
+
+    if os.environ.get("SOFFICE_POOL", "1") == "0":
+        return None
+    if shutil.which("soffice") is None or _import_uno() is None:
+        return None
+
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            try:
+                _ensure_pool_dir()
+            except OSError:
+                return None
+            size = int(os.environ.get("SOFFICE_POOL_SIZE", DEFAULT_POOL_SIZE))
+            idle_timeout = float(
+                os.environ.get("SOFFICE_POOL_IDLE_TIMEOUT", DEFAULT_IDLE_TIMEOUT)
+            )
+            _shared_pool = SofficePool(size, idle_timeout=idle_timeout)
+            atexit.register(_shared_pool.close)
+        return _shared_pool
+
+
+def _ensure_pool_dir() -> None:
+    """Create POOL_DIR private to this user; raise OSError if that is not possible."""
+    POOL_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = POOL_DIR.lstat()
+    if POOL_DIR.is_symlink() or info.st_uid != os.getuid():
+        raise PermissionError(f"{POOL_DIR} is not owned by the current user")
+
+
+class SofficePool:
+    """N headless LibreOffice instances that stay up between documents.
+
+    Worker i has its own profile under POOL_DIR (one directory per user) and
+    listens for UNO on a free loopback port recorded next to its pid file,
+    or on SOFFICE_POOL_PORT+i when that is set. Workers are started on first
+    use, so later jobs skip the multi-second startup. `close()` stops the
+    workers this pool used; with `idle_timeout` > 0 they are instead left
+    running for later invocations of the scripts and a watchdog stops each
+    one after that many idle seconds. `stop_pool()` shuts them all down. A
+    job claims a free worker through a lock file, so concurrent processes
+    share the pool safely. A worker that has crashed or hangs past the job
+    timeout is killed and restarted.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.size = max(1, size)
+        self.idle_timeout = idle_timeout
+        self._workers = [_Worker(index, idle_timeout) for index in range(self.size)]
+        self._used = set()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def convert_to_pdf(
+        self, path, outdir=None, timeout: float = DEFAULT_JOB_TIMEOUT
+    ) -> Path:
+        path = Path(path)
+        pdf_path = Path(outdir or path.parent) / f"{path.stem}.pdf"
+        pdf_path.parent.mkdir(parents=True, exist_ok=True)
+        self.run(path, lambda ctx, doc: _store_pdf(doc, pdf_path), timeout=timeout)
+        return pdf_path
+
+    def accept_all_changes(self, path, timeout: float = DEFAULT_JOB_TIMEOUT) -> None:
+        self.run(path, _accept_all_changes, timeout=timeout)
+
+    def recalc(self, path, timeout: float = DEFAULT_JOB_TIMEOUT) -> None:
+        self.run(path, _recalculate, timeout=timeout)
+
+    def run_macro(
+        self, path, macro_uri: str, store: bool = True,
+        timeout: float = DEFAULT_JOB_TIMEOUT,
+    ):
+        def job(ctx, doc):
+            script = doc.getScriptProvider().getScript(macro_uri)
+            result = script.invoke((), (), ())
+            if store:
+                doc.store()
+            return result
+
+        return self.run(path, job, timeout=timeout)
+
+    def submit(self, method: str, *args, **kwargs) -> Future:
+        """Queue `method` (e.g. "convert_to_pdf") to run on the next free worker."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.size, thread_name_prefix="soffice"
+                )
+        return self._executor.submit(getattr(self, method), *args, **kwargs)
+
+    def map(self, method: str, paths, **kwargs) -> list:
+        futures = [self.submit(method, path, **kwargs) for path in paths]
+        return [future.result() for future in futures]
+
+    def run(self, path, job, timeout: float = DEFAULT_JOB_TIMEOUT):
+        """Open `path` hidden on a free worker and call job(ctx, document)."""
+        path = Path(path).resolve()
+        if not path.exists():
+            raise SofficeError(f"File not found: {path}")
+
+        with self._claim() as worker:
+            for attempt in range(2):
+                try:
+                    return worker.run(path, job, timeout)
+                except SofficeError:
+                    raise
+                except Exception as e:
+                    if worker.alive() or attempt:
+                        raise SofficeError(f"LibreOffice failed on {path.name}: {e}") from e
+                    worker.restart()
+
+    def close(self) -> None:
+        """Stop queued work and, unless workers persist, the workers this pool used.
+
+        Workers another process is using right now, or that a watchdog
+        from a persistent pool manages, are left running.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.idle_timeout > 0:
+            return
+        for worker in sorted(self._used, key=lambda w: w.index):
+            if worker.watched():
+                continue
+            lock = worker.try_lock()
+            if lock is not None:
+                with lock:
+                    worker.terminate()
+        self._used.clear()
+
+    @contextmanager
+    def _claim(self):
+        _ensure_pool_dir()
+        start = threading.get_ident() % self.size
+        while True:
+            for offset in range(self.size):
+                worker = self._workers[(start + offset) % self.size]
+                lock = worker.try_lock()
+                if lock is None:
+                    continue
+                self._used.add(worker)
+                try:
+                    yield worker
+                    return
+                finally:
+                    worker.touch()
+                    lock.close()
+            time.sleep(0.1)
+
+
+def stop_pool() -> int:
+    """Shut down every pool worker left running; returns how many were stopped."""
+    stopped = 0
+    for pid_file in sorted(POOL_DIR.glob("worker*.pid")):
+        worker = _Worker(int(pid_file.stem.removeprefix("worker")))
+        if worker.pid() is not None:
+            worker.terminate()
+            stopped += 1
+    return stopped
+
+
+def _watch_idle(index: int, idle_timeout: float) -> None:
+    """Stop worker `index` once it has been idle for `idle_timeout` seconds.
+
+    Runs in a detached process started next to each persistent worker, keeps
+    watching across restarts, and exits once the worker has been stopped.
+    """
+    worker = _Worker(index)
+    worker.watch_file.write_text(str(os.getpid()))
+    try:
+        while True:
+            time.sleep(min(idle_timeout, 5.0))
+            if worker.pid() is None:
+                return
+            try:
+                idle_for = time.time() - worker.lock_file.stat().st_mtime
+            except OSError:
+                idle_for = idle_timeout
+            if idle_for < idle_timeout:
+                continue
+            lock = worker.try_lock()
+            if lock is not None:
+                with lock:
+                    worker.terminate()
+                return
+    finally:
+        worker.watch_file.unlink(missing_ok=True)
+
+
+class _Worker:
+    def __init__(self, index: int, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.index = index
+        self.idle_timeout = idle_timeout
+        self.profile = POOL_DIR / f"profile{index}"
+        self.pid_file = POOL_DIR / f"worker{index}.pid"
+        self.port_file = POOL_DIR / f"worker{index}.port"
+        self.lock_file = POOL_DIR / f"worker{index}.lock"
+        self.watch_file = POOL_DIR / f"worker{index}.watch"
+        self._ctx = None
+        self._process = None
+
+    @property
+    def port(self) -> int | None:
+        if POOL_BASE_PORT:
+            return int(POOL_BASE_PORT) + self.index
+        try:
+            return int(self.port_file.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def try_lock(self):
+        """Return the held lock file if this worker is free, else None."""
+        lock = open(self.lock_file, "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return None
+        return lock
+
+    def touch(self) -> None:
+        """Record that the worker was just used (read by the idle watchdog)."""
+        os.utime(self.lock_file)
+
+    def watched(self) -> bool:
+        try:
+            os.kill(int(self.watch_file.read_text()), 0)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def run(self, path: Path, job, timeout: float):
+        uno = _import_uno()
+        ctx = self.context()
+        desktop = ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", ctx
+        )
+
+        timer = threading.Timer(timeout, self.kill)
+        timer.start()
+        try:
+            doc = desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(str(path)), "_blank", 0,
+                _properties(Hidden=True),
+            )
+            if doc is None:
+                raise SofficeError(f"LibreOffice could not open {path.name}")
+            try:
+                return job(ctx, doc)
+            finally:
+                doc.close(True)
+        except Exception:
+            if not timer.is_alive():
+                raise SofficeError(
+                    f"LibreOffice timed out after {timeout}s on {path.name}"
+                ) from None
+            raise
+        finally:
+            timer.cancel()
+
+    def context(self):
+        if self._ctx is None:
+            try:
+                self._ctx = self._connect()
+            except Exception:
+                self.restart()
+        return self._ctx
+
+    def alive(self) -> bool:
+        try:
+            self._connect()
+            return True
+        except Exception:
+            self._ctx = None
+            return False
+
+    def restart(self) -> None:
+        for attempt in range(WORKER_START_ATTEMPTS):
+            try:
+                self._start()
+                break
+            except SofficeError:
+                # Another program may have taken the probed port in the meantime
+                if POOL_BASE_PORT or attempt == WORKER_START_ATTEMPTS - 1:
+                    raise
+        self.touch()
+        if self.idle_timeout > 0 and not self.watched():
+            subprocess.Popen(
+                [sys.executable, str(Path(__file__).resolve()), "watch-idle",
+                 str(self.index), str(self.idle_timeout)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+
+    def _start(self) -> None:
+        self.kill()
+        self.profile.mkdir(parents=True, exist_ok=True)
+        if not POOL_BASE_PORT:
+            self.port_file.write_text(str(_free_port()))
+        self._process = subprocess.Popen(
+            [
+                "soffice",
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--nodefault",
+                "--norestore",
+                "--nolockcheck",
+                f"-env:UserInstallation={self.profile.as_uri()}",
+                f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext",
+            ],
+            env=get_soffice_env(),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        self.pid_file.write_text(str(self._process.pid))
+
+        deadline = time.monotonic() + WORKER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise SofficeError(
+                    f"soffice worker {self.index} exited with code {self._process.returncode}"
+                )
+            try:
+                self._ctx = self._connect()
+                return
+            except Exception:
+                time.sleep(0.25)
+
+        self.kill()
+        raise SofficeError(
+            f"soffice worker {self.index} did not accept connections on port {self.port}"
+        )
+
+    def terminate(self) -> None:
+        try:
+            ctx = self._connect()
+            ctx.ServiceManager.createInstanceWithContext(
+                "com.sun.star.frame.Desktop", ctx
+            ).terminate()
+        except Exception:
+            pass
+        self.kill()
+
+    def kill(self) -> None:
+        self._ctx = None
+        pid = self.pid()
+        if pid is not None:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+        self.pid_file.unlink(missing_ok=True)
+        self.port_file.unlink(missing_ok=True)
+
+    def pid(self) -> int | None:
+        try:
+            pid = int(self.pid_file.read_text())
+        except (OSError, ValueError):
+            return None
+        result = subprocess.run(
+            ["ps", "-p", str(pid), "-o", "command="],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        return pid if "soffice" in result.stdout else None
+
+    def _connect(self):
+        if self.port is None:
+            raise SofficeError(f"soffice worker {self.index} is not running")
+        uno = _import_uno()
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local
+        )
+        return resolver.resolve(
+            f"uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+        )
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _import_uno():
+    global _uno
+    if _uno is None:
+        try:
+            import uno
+        except ImportError:
+            for program_dir in _LIBREOFFICE_PROGRAM_DIRS:
+                if Path(program_dir, "uno.py").exists() and program_dir not in sys.path:
+                    sys.path.append(program_dir)
+            try:
+                import uno
+            except Exception:
+                return None
+        _uno = uno
+    return _uno
+
+
+def _properties(**values) -> tuple:
+    uno = _import_uno()
+    properties = []
+    for name, value in values.items():
+        prop = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+        prop.Name = name
+        prop.Value = value
+        properties.append(prop)
+    return tuple(properties)
+
+
+def _store_pdf(doc, pdf_path: Path) -> None:
+    for service, filter_name in PDF_EXPORT_FILTERS.items():
+        if doc.supportsService(service):
+            break
+    else:
+        raise SofficeError("Unsupported document type for PDF export")
+
+    doc.storeToURL(
+        _import_uno().systemPathToFileUrl(str(pdf_path.resolve())),
+        _properties(FilterName=filter_name),
+    )
+
+
+def _accept_all_changes(ctx, doc) -> None:
+    dispatcher = ctx.ServiceManager.createInstanceWithContext(
+        "com.sun.star.frame.DispatchHelper", ctx
+    )
+    dispatcher.executeDispatch(
+        doc.getCurrentController().getFrame(),
+        ".uno:AcceptAllTrackedChanges", "", 0, (),
+    )
+    doc.store()
+
+
+def _recalculate(ctx, doc) -> None:
+    doc.calculateAll()
+    doc.store()
+
+
 _SHIM_SO = Path(tempfile.gettempdir()) / "lo_socket_shim.so"
 
 
@@ -177,7 +692,47 @@ int close(int fd) {
 
 
 
+def _main(argv: list[str]) -> int:
+    if argv[:1] == ["stop-pool"]:
+        print(f"Stopped {stop_pool()} soffice worker(s)")
+        return 0
+
+    if argv[:1] == ["watch-idle"]:
+        _watch_idle(int(argv[1]), float(argv[2]))
+        return 0
+
+    if argv[:1] == ["convert-pdf"]:
+        import argparse
+
+        parser = argparse.ArgumentParser(prog="soffice.py convert-pdf")
+        parser.add_argument("files", nargs="+")
+        parser.add_argument("--outdir")
+        args = parser.parse_args(argv[1:])
+
+        pool = get_pool()
+        if pool is not None:
+            futures = [
+                pool.submit("convert_to_pdf", path, outdir=args.outdir)
+                for path in args.files
+            ]
+            failed = 0
+            try:
+                for path, future in zip(args.files, futures):
+                    try:
+                        print(f"{path} -> {future.result()}")
+                    except SofficeError as e:
+                        print(f"Error: {e}", file=sys.stderr)
+                        failed += 1
+                return 1 if failed else 0
+            except OSError:
+                pass
+
+        outdir = ["--outdir", args.outdir] if args.outdir else []
+        cmd = ["--headless", "--convert-to", "pdf", *outdir, *args.files]
+        return run_soffice(cmd).returncode
+
+    return run_soffice(argv).returncode
+
+
 if __name__ == "__main__":
-    import sys
-    result = run_soffice(sys.argv[1:])
-    sys.exit(result.returncode)
+    sys.exit(_main(sys.argv[1:]))
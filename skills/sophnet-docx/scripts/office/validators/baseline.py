@@ -0,0 +1,67 @@
+"""
+Original document baseline shared by all validators in a run.
+
+The original archive is read once: XML parts are kept in memory straight from
+the zip (media is never read), and XSD errors per part are memoized so each
+original part is validated at most once.
+"""
+
+import threading
+import zipfile
+from pathlib import Path, PurePosixPath
+
+import lxml.etree
+
+
+class OriginalBaseline:
+
+    XML_SUFFIXES = (".xml", ".rels")
+
+    def __init__(self, original_file):
+        self.original_file = Path(original_file)
+        self._xsd_errors = {}
+        self._lock = threading.Lock()
+
+        with zipfile.ZipFile(self.original_file, "r") as zf:
+            self.names = set(zf.namelist())
+            self._parts = {
+                name: zf.read(name)
+                for name in self.names
+                if name.lower().endswith(self.XML_SUFFIXES)
+            }
+
+    def __contains__(self, part):
+        return part in self.names
+
+    def read(self, part):
+        return self._parts.get(part)
+
+    def parse(self, part):
+        content = self.read(part)
+        if content is None:
+            return None
+        return lxml.etree.ElementTree(lxml.etree.fromstring(content))
+
+    def xsd_errors(self, part, validator):
+        with self._lock:
+            if part in self._xsd_errors:
+                return self._xsd_errors[part]
+
+        errors = set()
+        relative_path = PurePosixPath(part)
+        schema_path = validator._get_schema_path(relative_path)
+        if schema_path and part in self._parts:
+            try:
+                _, errors = validator._validate_doc_xsd(
+                    self.parse(part), relative_path, schema_path
+                )
+            except Exception as e:
+                errors = {str(e)}
+
+        with self._lock:
+            self._xsd_errors[part] = errors or set()
+        return self._xsd_errors[part]
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,64 @@
+"""
+Parsed view of an unpacked Office package shared by all validator checks.
+
+Each part is parsed on first access and the tree is cached, so a full
+validation run parses every part once. Checks must treat the cached trees
+as read-only; anything that rewrites a part on disk calls invalidate().
+"""
+
+from pathlib import Path
+
+import lxml.etree
+
+
+class ParsedPackage:
+
+    RELATIONSHIP_TAG = (
+        "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+    )
+
+    def __init__(self, unpacked_dir):
+        self.unpacked_dir = Path(unpacked_dir).resolve()
+        self.parse_count = 0
+        self._trees = {}
+        self._files = None
+
+    @property
+    def files(self):
+        if self._files is None:
+            self._files = [f for f in self.unpacked_dir.rglob("*") if f.is_file()]
+        return self._files
+
+    def tree(self, xml_file):
+        key = Path(xml_file).resolve()
+        if key not in self._trees:
+            self.parse_count += 1
+            try:
+                self._trees[key] = lxml.etree.parse(str(key))
+            except Exception as e:
+                self._trees[key] = e
+        result = self._trees[key]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def root(self, xml_file):
+        return self.tree(xml_file).getroot()
+
+    def rels_file(self, xml_file):
+        xml_file = Path(xml_file)
+        return xml_file.parent / "_rels" / f"{xml_file.name}.rels"
+
+    def relationships(self, rels_file):
+        return self.root(rels_file).findall(f".//{self.RELATIONSHIP_TAG}")
+
+    def invalidate(self, xml_file=None):
+        if xml_file is None:
+            self._trees.clear()
+            self._files = None
+        else:
+            self._trees.pop(Path(xml_file).resolve(), None)
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -69,7 +69,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self.package.root(xml_file)
 
                 for elem in root.iter():
                     for attr, value in elem.attrib.items():
@@ -115,9 +115,9 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for slide_master in slide_masters:
             try:
-                root = lxml.etree.parse(str(slide_master)).getroot()
+                root = self.package.root(slide_master)
 
-                rels_file = slide_master.parent / "_rels" / f"{slide_master.name}.rels"
+                rels_file = self.package.rels_file(slide_master)
 
                 if not rels_file.exists():
                     errors.append(
@@ -126,12 +126,8 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                     )
                     continue
 
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-
                 valid_layout_rids = set()
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
+                for rel in self.package.relationships(rels_file):
                     rel_type = rel.get("Type", "")
                     if "slideLayout" in rel_type:
                         valid_layout_rids.add(rel.get("Id"))
@@ -170,20 +166,14 @@ class PPTXSchemaValidator(BaseSchemaValidator):
             return True
 
     def validate_no_duplicate_slide_layouts(self):
-        import lxml.etree
-
         errors = []
         slide_rels_files = list(self.unpacked_dir.glob("ppt/slides/_rels/*.xml.rels"))
 
         for rels_file in slide_rels_files:
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
-
                 layout_rels = [
                     rel
-                    for rel in root.findall(
-                        f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                    )
+                    for rel in self.package.relationships(rels_file)
                     if "slideLayout" in rel.get("Type", "")
                 ]
 
@@ -222,11 +212,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for rels_file in slide_rels_files:
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
-
-                for rel in root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
+                for rel in self.package.relationships(rels_file):
                     rel_type = rel.get("Type", "")
                     if "notesSlide" in rel_type:
                         target = rel.get("Target", "")
@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""
+人脸特征索引
+
+把大量人脸embedding存成一个磁盘上的连续矩阵，检索时只做一次矩阵-向量乘法，
+不再逐个加载JSON文件、逐个计算余弦相似度。
+
+目录结构:
+  index.json    头信息（版本、维度、行数、图片数）
+  vectors.f32   float32矩阵（行数 × 维度），每行已做L2归一化，按内存映射读取
+  rows.bin      每行的元数据：图片编号、人脸序号、检测分数、人脸框、是否有效
+  images.jsonl  每行一个图片路径，行号即图片编号
+  ivf.json, ivf_*.npy  可选的ANN（IVF）索引，见 `build_ann()`
+
+数据文件只追加，写完后再更新头信息，中断的写入不会破坏已有内容。
+删除只把行标记为无效，`compact()` 会重写文件并真正回收空间。
+同一时间只应有一个进程写入索引。
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+INDEX_VERSION = 1
+SEARCH_BLOCK_ROWS = 1 << 16
+
+# ANN（IVF）参数：nprobe 越大召回越高、检索越慢
+DEFAULT_NPROBE = 32
+KMEANS_ITERATIONS = 20
+KMEANS_SAMPLE_PER_LIST = 32
+KMEANS_MAX_SAMPLE = 1 << 17
+ASSIGN_BLOCK_ROWS = 4096
+
+# 聚类时相似度矩阵按 CLUSTER_BLOCK_ROWS × CLUSTER_BLOCK_ROWS 分块计算
+CLUSTER_BLOCK_ROWS = 4096
+
+ROW_DTYPE = np.dtype([
+    ("image_id", "<i4"),
+    ("face_index", "<i4"),
+    ("det_score", "<f4"),
+    ("box", "<f4", (4,)),
+    ("alive", "u1"),
+])
+
+
+def normalize_rows(embeddings):
+    """按行做L2归一化，零向量保持为零"""
+    matrix = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def default_nlist(count):
+    """IVF倒排列表数的默认值：约 4·√N"""
+    return int(min(1 << 16, max(1, round(4 * np.sqrt(count)))))
+
+
+def assign_lists(vectors, centroids, rows=None):
+    """把每个向量（或 vectors 中 rows 指定的行）分配到内积最大的聚类中心"""
+    total = len(vectors) if rows is None else len(rows)
+    lists = np.empty(total, dtype=np.int64)
+    for start in range(0, total, ASSIGN_BLOCK_ROWS):
+        end = min(start + ASSIGN_BLOCK_ROWS, total)
+        block = vectors[start:end] if rows is None else vectors[rows[start:end]]
+        lists[start:end] = np.argmax(block @ centroids.T, axis=1)
+    return lists
+
+
+def train_kmeans(samples, nlist, iterations=KMEANS_ITERATIONS, rng=None):
+    """球面k-means：样本已归一化，以内积为相似度，返回归一化的聚类中心"""
+    rng = rng or np.random.default_rng(0)
+    centroids = samples[rng.choice(len(samples), nlist, replace=False)]
+    for _ in range(iterations):
+        assign = assign_lists(samples, centroids)
+        counts = np.bincount(assign, minlength=nlist)
+        filled = counts > 0
+        starts = (np.cumsum(counts) - counts)[filled]
+        sums = np.empty_like(centroids)
+        sums[filled] = np.add.reduceat(samples[np.argsort(assign, kind="stable")], starts)
+        # 空簇重新随机取一个样本作为中心
+        empty = np.flatnonzero(~filled)
+        sums[empty] = samples[rng.choice(len(samples), len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def benchmark_ann(index, nprobes, queries=100, top_k=10, threshold=-1.0, similarity=0.7, seed=0):
+    """
+    对比ANN检索与精确扫描
+
+    从索引中随机取人脸加噪声作为查询（与原人脸的期望余弦相似度约为 similarity），
+    返回每个 nprobe 的 recall@K（精确扫描中不低于 threshold 的前K个结果被找回的比例）
+    和平均耗时（毫秒），nprobe=0 为精确扫描。
+    """
+    rng = np.random.default_rng(seed)
+    alive_rows = np.flatnonzero(index.alive)
+    picked = np.sort(rng.choice(alive_rows, min(queries, len(alive_rows)), replace=False))
+    sigma = np.sqrt((1 / similarity ** 2 - 1) / index.dim)
+    noise = rng.normal(0, sigma, (len(picked), index.dim)).astype(np.float32)
+    query_matrix = normalize_rows(index.vectors[picked] + noise)
+
+    def run(nprobe):
+        start = time.perf_counter()
+        found = [
+            {(r["image_path"], r["face_index"]) for r in index.search(query, top_k, threshold, nprobe)}
+            for query in query_matrix
+        ]
+        return found, (time.perf_counter() - start) * 1000 / len(query_matrix)
+
+    exact, exact_ms = run(0)
+    report = [{"nprobe": 0, "recall": 1.0, "latency_ms": round(exact_ms, 3)}]
+    expected = max(1, sum(len(e) for e in exact))
+    for nprobe in nprobes:
+        found, latency_ms = run(nprobe)
+        hits = sum(len(f & e) for f, e in zip(found, exact))
+        report.append({"nprobe": nprobe, "recall": round(hits / expected, 4), "latency_ms": round(latency_ms, 3)})
+    return report
+
+
+def cluster_faces(index, threshold, block_rows=CLUSTER_BLOCK_ROWS):
+    """
+    把索引中相似度不低于 threshold 的人脸连成同一人物（连通分量，即单链接聚类）
+
+    N×N 相似度矩阵只按块计算（每次 block_rows × block_rows），内存占用与人脸数无关。
+    返回 (rows, labels)：有效行号，以及对应的聚类编号（0..聚类数-1）。
+    """
+    rows = np.flatnonzero(index.alive)
+    total = len(rows)
+    contiguous = total == index.count
+    vectors = index.vectors
+
+    def block(start):
+        end = min(start + block_rows, total)
+        return vectors[start:end] if contiguous else vectors[rows[start:end]]
+
+    # 并查集
+    parent = list(range(total))
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    for row_start in range(0, total, block_rows):
+        row_block = block(row_start)
+        for col_start in range(row_start, total, block_rows):
+            similarities = row_block @ block(col_start).T
+            if col_start == row_start:
+                # 对角块只取上三角，跳过自身
+                similarities = np.triu(similarities, k=1)
+            pairs_a, pairs_b = np.nonzero(similarities >= threshold)
+            for a, b in zip((pairs_a + row_start).tolist(), (pairs_b + col_start).tolist()):
+                root_a, root_b = find(a), find(b)
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    roots = np.fromiter((find(i) for i in range(total)), dtype=np.int64, count=total)
+    _, labels = np.unique(roots, return_inverse=True)
+    return rows, labels
+
+
+def summarize_clusters(index, rows, labels, min_size=1):
+    """
+    整理聚类结果，按人脸数降序排列
+
+    每个聚类的代表人脸是与聚类中心（成员归一化后的均值）最相似的那张，
+    成员的 similarity 为其与聚类中心的余弦相似度。
+    """
+    order = np.argsort(labels, kind="stable")
+    counts = np.bincount(labels)
+    starts = np.cumsum(counts) - counts
+
+    clusters = []
+    for label in np.argsort(-counts, kind="stable"):
+        if counts[label] < min_size:
+            break
+        members = np.sort(rows[order[starts[label]:starts[label] + counts[label]]])
+        member_vectors = np.asarray(index.vectors[members])
+        center = normalize_rows(member_vectors.sum(axis=0))[0]
+        similarities = member_vectors @ center
+        described = index.describe(members, similarities)
+        clusters.append({
+            "id": len(clusters),
+            "size": int(counts[label]),
+            "representative": described[int(np.argmax(similarities))],
+            "members": described,
+        })
+    return clusters
+
+
+def _encode_paths(paths):
+    return "".join(json.dumps(path, ensure_ascii=False) + "\n" for path in paths).encode("utf-8")
+
+
+class FaceIndex:
+    """可增删改的人脸embedding索引，支持阈值过滤的top-K检索"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.dim = None
+        self.count = 0
+        self.images = []
+        self._saved_images = 0
+        self._images_bytes = 0
+        self._image_ids = {}
+        self._vectors = None
+        self._rows = None
+        self._alive = None
+        self._ann = None
+
+        header_path = self.directory / "index.json"
+        if header_path.exists():
+            header = json.loads(header_path.read_text(encoding="utf-8"))
+            if header.get("version") != INDEX_VERSION:
+                raise ValueError(f"不支持的索引版本: {header.get('version')}")
+            self.dim = header["dim"]
+            self.count = header["count"]
+            with open(self.images_path, "rb") as f:
+                lines = [line for _, line in zip(range(header["images"]), f)]
+            self.images = [json.loads(line) for line in lines]
+            self._saved_images = len(self.images)
+            self._images_bytes = sum(len(line) for line in lines)
+            self._image_ids = {path: i for i, path in enumerate(self.images)}
+
+    @property
+    def vectors_path(self):
+        return self.directory / "vectors.f32"
+
+    @property
+    def rows_path(self):
+        return self.directory / "rows.bin"
+
+    @property
+    def images_path(self):
+        return self.directory / "images.jsonl"
+
+    @property
+    def ann_path(self):
+        return self.directory / "ivf.json"
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    @property
+    def vectors(self):
+        """(行数 × 维度) 的只读内存映射矩阵"""
+        if self._vectors is None:
+            if self.count == 0:
+                return np.zeros((0, self.dim or 0), dtype=np.float32)
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                      shape=(self.count, self.dim))
+        return self._vectors
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            if self.count == 0:
+                return np.zeros(0, dtype=ROW_DTYPE)
+            self._rows = np.memmap(self.rows_path, dtype=ROW_DTYPE, mode="r", shape=(self.count,))
+        return self._rows
+
+    @property
+    def alive(self):
+        if self._alive is None:
+            self._alive = self.rows["alive"].astype(bool)
+        return self._alive
+
+    @property
+    def ann(self):
+        """
+        已持久化的IVF索引，未建立时为 None
+
+        centroids: 归一化的聚类中心；rows/offsets: 按列表分组的行号，第 i 个列表为
+        rows[offsets[i]:offsets[i+1]]；covered: 建立或合并时的行数，之后新增的行尚未分配。
+        """
+        if self._ann is None and self.ann_path.exists():
+            header = json.loads(self.ann_path.read_text(encoding="utf-8"))
+            self._ann = {
+                "covered": header["covered"],
+                "centroids": np.load(self.directory / "ivf_centroids.npy"),
+                "offsets": np.load(self.directory / "ivf_offsets.npy"),
+                "rows": np.load(self.directory / "ivf_rows.npy", mmap_mode="r"),
+            }
+        return self._ann
+
+    def image_rows(self, image_path):
+        """某张图片当前有效的行号"""
+        image_id = self._image_ids.get(str(image_path))
+        if image_id is None or self.count == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero((self.rows["image_id"] == image_id) & self.alive)
+
+    def add(self, image_path, embeddings, boxes=None, det_scores=None):
+        """添加一张图片的所有人脸；图片已在索引中时替换其原有人脸（即更新）"""
+        matrix = normalize_rows(embeddings) if len(embeddings) else None
+        self._mark_removed(self.image_rows(image_path))
+
+        added = 0
+        if matrix is not None:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"embedding维度不一致: {matrix.shape[1]} != {self.dim}")
+
+            image_path = str(image_path)
+            if image_path not in self._image_ids:
+                self._image_ids[image_path] = len(self.images)
+                self.images.append(image_path)
+
+            rows = np.zeros(len(matrix), dtype=ROW_DTYPE)
+            rows["image_id"] = self._image_ids[image_path]
+            rows["face_index"] = np.arange(len(matrix))
+            rows["alive"] = 1
+            # 旧数据可能缺少框/分数，长度与人脸数不一致时留空
+            if det_scores is not None and len(det_scores) == len(matrix):
+                rows["det_score"] = np.asarray(det_scores, dtype=np.float32)
+            if boxes is not None and len(boxes) == len(matrix):
+                for i, box in enumerate(boxes):
+                    if len(box) >= 4:
+                        rows["box"][i] = box[:4]
+            self._append(matrix, rows)
+            added = len(matrix)
+
+        self._write_header()
+        return added
+
+    def remove(self, image_path):
+        """删除一张图片的所有人脸，返回删除的人脸数"""
+        rows = self.image_rows(image_path)
+        self._mark_removed(rows)
+        self._write_header()
+        return len(rows)
+
+    def search(self, query, top_k=None, threshold=-1.0, nprobe=None):
+        """
+        检索与query最相似的人脸
+
+        返回按相似度降序排列的列表，每项包含 image_path、face_index、similarity、box、det_score。
+        top_k 为空时返回所有不低于阈值的人脸。
+        建立了ANN索引时只扫描与query最接近的 nprobe 个倒排列表（默认 DEFAULT_NPROBE），
+        nprobe=0 表示精确的全量扫描。
+        """
+        if self.count == 0:
+            return []
+        query = normalize_rows(query)[0]
+        if query.shape[0] != self.dim:
+            raise ValueError(f"查询embedding维度不一致: {query.shape[0]} != {self.dim}")
+
+        if nprobe is None:
+            nprobe = DEFAULT_NPROBE
+        if nprobe > 0 and self.ann is not None:
+            blocks = self._ann_blocks(query, nprobe)
+        else:
+            blocks = self._range_blocks(0, self.count)
+
+        alive = self.alive
+        found_rows = []
+        found_scores = []
+        for rows, vectors in blocks:
+            scores = vectors @ query
+            keep = np.flatnonzero((scores >= threshold) & alive[rows])
+            if top_k is not None and len(keep) > top_k:
+                keep = keep[np.argpartition(-scores[keep], top_k - 1)[:top_k]]
+            found_rows.append(rows[keep])
+            found_scores.append(scores[keep])
+        if not found_rows:
+            return []
+
+        rows = np.concatenate(found_rows)
+        scores = np.concatenate(found_scores)
+        order = np.argsort(-scores, kind="stable")
+        if top_k is not None:
+            order = order[:top_k]
+        return self.describe(rows[order], scores[order])
+
+    def describe(self, rows, scores):
+        """把行号和分数转换成结果字典"""
+        meta = self.rows[rows]
+        return [
+            {
+                "image_path": self.images[int(m["image_id"])],
+                "face_index": int(m["face_index"]),
+                "similarity": float(score),
+                "box": [float(v) for v in m["box"]],
+                "det_score": float(m["det_score"]),
+            }
+            for m, score in zip(meta, scores)
+        ]
+
+    def merge(self, other):
+        """把另一个索引的所有人脸加入本索引（同一图片以 other 为准），返回加入的人脸数"""
+        rows = np.flatnonzero(other.alive)
+        if len(rows) == 0:
+            return 0
+        meta = np.array(other.rows[rows])
+        order = np.argsort(meta["image_id"], kind="stable")
+        rows, meta = rows[order], meta[order]
+        starts = np.flatnonzero(np.diff(meta["image_id"], prepend=-1))
+        ends = np.append(starts[1:], len(rows))
+
+        added = 0
+        for start, end in zip(starts, ends):
+            image_meta = meta[start:end]
+            added += self.add(other.images[int(image_meta["image_id"][0])], other.vectors[rows[start:end]],
+                              image_meta["box"], image_meta["det_score"])
+        return added
+
+    def build_ann(self, nlist=None, iterations=KMEANS_ITERATIONS, seed=0):
+        """训练IVF聚类中心并把所有有效行分配到倒排列表，返回列表数"""
+        alive_rows = np.flatnonzero(self.alive)
+        if len(alive_rows) == 0:
+            raise ValueError("索引为空，无法建立ANN索引")
+        nlist = min(nlist or default_nlist(len(alive_rows)), len(alive_rows))
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(alive_rows), nlist * KMEANS_SAMPLE_PER_LIST, max(KMEANS_MAX_SAMPLE, nlist))
+        sample = np.sort(rng.choice(alive_rows, sample_size, replace=False))
+        centroids = train_kmeans(np.asarray(self.vectors[sample]), nlist, iterations, rng)
+
+        lists = assign_lists(self.vectors, centroids, alive_rows)
+        self._save_ann(centroids, alive_rows, lists)
+        return nlist
+
+    def merge_ann(self):
+        """把建立ANN索引之后新增的行分配到已有的倒排列表（不重新训练），返回分配的行数"""
+        ann = self.ann
+        if ann is None:
+            raise ValueError("尚未建立ANN索引，请先执行 build_ann()")
+        tail = np.arange(ann["covered"], self.count)
+        tail = tail[self.alive[tail]]
+        rows, lists = self._ann_entries()
+        tail_lists = assign_lists(self.vectors, ann["centroids"], tail)
+        self._save_ann(ann["centroids"], np.concatenate([rows, tail]), np.concatenate([lists, tail_lists]))
+        return len(tail)
+
+    def compact(self):
+        """重写索引文件，去掉已删除的行和不再使用的图片，返回回收的行数"""
+        alive_rows = np.flatnonzero(self.alive)
+        removed = self.count - len(alive_rows)
+        if removed == 0:
+            return 0
+
+        ann = self.ann
+        if ann is not None:
+            # 行号会变化：先让旧的ANN索引失效，压缩完成后按新行号重写
+            ann_rows, ann_lists = self._ann_entries()
+            new_ids = np.full(self.count, -1, dtype=np.int64)
+            new_ids[alive_rows] = np.arange(len(alive_rows))
+            self.ann_path.unlink()
+            self._ann = None
+
+        rows = np.array(self.rows[alive_rows])
+        used_ids, rows["image_id"] = np.unique(rows["image_id"], return_inverse=True)
+        images = [self.images[i] for i in used_ids]
+
+        vectors_tmp = self.vectors_path.with_suffix(".tmp")
+        with open(vectors_tmp, "wb") as f:
+            for start in range(0, len(alive_rows), SEARCH_BLOCK_ROWS):
+                chunk = alive_rows[start:start + SEARCH_BLOCK_ROWS]
+                f.write(np.ascontiguousarray(self.vectors[chunk]).tobytes())
+        rows_tmp = self.rows_path.with_suffix(".tmp")
+        rows_tmp.write_bytes(rows.tobytes())
+        images_tmp = self.images_path.with_suffix(".tmp")
+        images_data = _encode_paths(images)
+        images_tmp.write_bytes(images_data)
+
+        self._release()
+        os.replace(vectors_tmp, self.vectors_path)
+        os.replace(rows_tmp, self.rows_path)
+        os.replace(images_tmp, self.images_path)
+        self.count = len(alive_rows)
+        self.images = images
+        self._saved_images = len(images)
+        self._images_bytes = len(images_data)
+        self._image_ids = {path: i for i, path in enumerate(images)}
+        self._write_header()
+
+        if ann is not None:
+            covered = int(np.searchsorted(alive_rows, ann["covered"]))
+            self._save_ann(ann["centroids"], new_ids[ann_rows], ann_lists, covered)
+        return removed
+
+    def info(self):
+        info = {
+            "directory": str(self.directory),
+            "dim": self.dim,
+            "faces": len(self),
+            "rows": self.count,
+            "images": len({int(i) for i in self.rows["image_id"][self.alive]}),
+        }
+        if self.ann is not None:
+            info["ann"] = {
+                "nlist": len(self.ann["centroids"]),
+                "unassigned_rows": self.count - self.ann["covered"],
+            }
+        return info
+
+    def _range_blocks(self, start, end):
+        vectors = self.vectors
+        for block_start in range(start, end, SEARCH_BLOCK_ROWS):
+            block_end = min(block_start + SEARCH_BLOCK_ROWS, end)
+            yield np.arange(block_start, block_end), vectors[block_start:block_end]
+
+    def _ann_blocks(self, query, nprobe):
+        ann = self.ann
+        offsets = ann["offsets"]
+        nprobe = min(nprobe, len(ann["centroids"]))
+        probed = np.argpartition(-(ann["centroids"] @ query), nprobe - 1)[:nprobe]
+        candidates = np.sort(np.concatenate([ann["rows"][offsets[i]:offsets[i + 1]] for i in probed]))
+
+        vectors = self.vectors
+        for start in range(0, len(candidates), SEARCH_BLOCK_ROWS):
+            rows = candidates[start:start + SEARCH_BLOCK_ROWS]
+            yield rows, vectors[rows]
+        # 建立ANN索引之后新增的行还没有分配到列表，直接精确扫描
+        yield from self._range_blocks(ann["covered"], self.count)
+
+    def _ann_entries(self):
+        """ANN索引中仍然有效的 (行号, 列表号)"""
+        ann = self.ann
+        lists = np.repeat(np.arange(len(ann["centroids"])), np.diff(ann["offsets"]))
+        rows = np.asarray(ann["rows"])
+        keep = self.alive[rows]
+        return rows[keep], lists[keep]
+
+    def _save_ann(self, centroids, rows, lists, covered=None):
+        self.ann_path.unlink(missing_ok=True)
+        order = np.argsort(lists, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=len(centroids)))])
+        for name, array in (("ivf_centroids", centroids.astype(np.float32)),
+                            ("ivf_offsets", offsets.astype(np.int64)),
+                            ("ivf_rows", rows[order].astype(np.int64))):
+            tmp = self.directory / f"{name}.tmp.npy"
+            np.save(tmp, array)
+            os.replace(tmp, self.directory / f"{name}.npy")
+
+        header = {"nlist": len(centroids), "covered": self.count if covered is None else covered}
+        header_tmp = self.ann_path.with_suffix(".tmp")
+        header_tmp.write_text(json.dumps(header), encoding="utf-8")
+        os.replace(header_tmp, self.ann_path)
+        self._ann = None
+
+    def _append(self, matrix, rows):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # 截掉上次写入中断时留下的、未计入头信息的尾部数据
+        for path, data, size in (
+            (self.vectors_path, matrix, self.count * self.dim * 4),
+            (self.rows_path, rows, self.count * ROW_DTYPE.itemsize),
+        ):
+            with open(path, "ab") as f:
+                f.truncate(size)
+                f.write(data.tobytes())
+        self._release()
+        self.count += len(matrix)
+
+    def _mark_removed(self, rows):
+        if len(rows) == 0:
+            return
+        flags = np.memmap(self.rows_path, dtype=ROW_DTYPE, mode="r+", shape=(self.count,))
+        flags["alive"][rows] = 0
+        flags.flush()
+        del flags
+        self._release()
+
+    def _release(self):
+        self._vectors = None
+        self._rows = None
+        self._alive = None
+
+    def _write_header(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if len(self.images) > self._saved_images:
+            data = _encode_paths(self.images[self._saved_images:])
+            with open(self.images_path, "ab") as f:
+                f.truncate(self._images_bytes)
+                f.write(data)
+            self._saved_images = len(self.images)
+            self._images_bytes += len(data)
+
+        header = {"version": INDEX_VERSION, "dim": self.dim, "count": self.count, "images": len(self.images)}
+        header_tmp = self.directory / "index.json.tmp"
+        header_tmp.write_text(json.dumps(header), encoding="utf-8")
+        os.replace(header_tmp, self.directory / "index.json")
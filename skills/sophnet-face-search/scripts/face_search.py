@@ -11,9 +11,20 @@ import os
 import sys
 import json
 import argparse
+import hashlib
+import tempfile
+import threading
 import cv2
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from face_index import (DEFAULT_NPROBE, FaceIndex, benchmark_ann, cluster_faces, normalize_rows,
+                        summarize_clusters)
+from face_segment import (DEFAULT_SEGMENT_DTYPE, SEGMENT_DTYPES, SEGMENT_SUFFIX, EmbeddingSegment,
+                          convert_json_to_segment)
 
 # API配置
 FACE_API_URL = "https://www.sophnet.com/api/open-apis/projects/detect_and_embed"
@@ -23,6 +34,29 @@ DEFAULT_QUERY_THRESHOLD = 0.7
 DEFAULT_SEARCH_THRESHOLD = 0.5
 DEFAULT_SIMILARITY_THRESHOLD = 0.5
 
+# 批量检测：并发请求数、超时与重试（429/5xx 按指数退避重试，服务端给出 Retry-After 时以其为准）
+DEFAULT_CONCURRENCY = 8
+DETECT_TIMEOUT = 30
+DETECT_RETRIES = 5
+DETECT_BACKOFF = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# 检测结果缓存：按图片内容的sha256保存API原始结果，同一张图片不会重复上传
+DETECT_CACHE_DIR = Path(os.environ.get(
+    "FACE_SEARCH_CACHE_DIR", Path.home() / ".cache" / "sophnet-face-search" / "detections"))
+
+# 聚类结果在终端中最多展示的人物数（完整结果见json）
+CLUSTER_PRINT_LIMIT = 20
+
+MIME_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.bmp': 'image/bmp',
+    '.gif': 'image/gif'
+}
+
 
 def get_soph_api_key():
     """获取sophnet API密钥
@@ -42,45 +76,94 @@ def get_soph_api_key():
             " 2. 在 Moltbot 配置文件中配置 models.providers.sophnet.apiKey"
         )
 
-# 全局API密钥
-try:
-    soph_api_key = get_soph_api_key()
-except RuntimeError as e:
-    print(f"错误: {e}", file=sys.stderr)
-    sys.exit(1)
+# 全局API密钥（只有调用检测API的命令才需要，由 require_api_key 加载）
+soph_api_key = None
+
+
+def require_api_key():
+    """加载API密钥，未配置时退出"""
+    global soph_api_key
+    try:
+        soph_api_key = get_soph_api_key()
+    except RuntimeError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+_thread_local = threading.local()
+
+
+def get_session():
+    """每个线程复用一个带连接池和重试的 requests.Session"""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        retry = Retry(
+            total=DETECT_RETRIES,
+            backoff_factor=DETECT_BACKOFF,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=None,  # 检测接口是幂等的，POST 也可以重试
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _thread_local.session = session
+    return session
 
 
-def detect_faces(image_path):
-    """调用API检测人脸"""
+def detect_faces(image_path, use_cache=True):
+    """调用API检测人脸，返回API结果；只读取图片原始字节，不解码"""
     if not os.path.exists(image_path):
         raise FileNotFoundError(f"图片文件不存在: {image_path}")
 
-    ost_img = cv2.imread(image_path)
-    if ost_img is None:
+    with open(image_path, 'rb') as f:
+        image_bytes = f.read()
+    if not image_bytes:
         raise ValueError(f"无法读取图片文件: {image_path}")
 
-    # 确定图片的 MIME 类型
-    input_file = Path(image_path)
-    ext = input_file.suffix.lower()
-    mime_types = {
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.png': 'image/png',
-        '.webp': 'image/webp',
-        '.bmp': 'image/bmp',
-        '.gif': 'image/gif'
-    }
-    mime_type = mime_types.get(ext, 'image/jpeg')
+    cache_path = None
+    if use_cache:
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        cache_path = DETECT_CACHE_DIR / digest[:2] / f"{digest}.json"
+        try:
+            return json.loads(cache_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            pass
 
-    with open(image_path, 'rb') as f:
-        files = {'file': (os.path.basename(image_path), f, mime_type)}
-        headers = {"Authorization": f"Bearer {soph_api_key}"}
-        response = requests.post(FACE_API_URL, files=files, headers=headers, timeout=30)
+    # 确定图片的 MIME 类型
+    mime_type = MIME_TYPES.get(Path(image_path).suffix.lower(), 'image/jpeg')
+    files = {'file': (os.path.basename(image_path), image_bytes, mime_type)}
+    headers = {"Authorization": f"Bearer {soph_api_key or get_soph_api_key()}"}
+    response = get_session().post(FACE_API_URL, files=files, headers=headers, timeout=DETECT_TIMEOUT)
 
     if response.status_code != 200:
         raise RuntimeError(f"API请求失败: {response.status_code} - {response.text[:200]}")
 
-    return ost_img, response.json().get('result', {})
+    payload = response.json()
+    result = payload.get('result') if isinstance(payload, dict) else None
+    if not isinstance(result, dict):
+        # 200 但没有 result（例如错误信息），不能当作"没有人脸"缓存
+        raise RuntimeError(f"API返回结果无效: {response.text[:200]}")
+    if cache_path:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(result), encoding='utf-8')
+        os.replace(tmp_path, cache_path)
+    return result
+
+
+def detect_faces_batch(image_paths, concurrency=DEFAULT_CONCURRENCY, use_cache=True):
+    """并发检测多张图片，按输入顺序逐个产出 (image_path, result, error)"""
+    def detect(image_path):
+        try:
+            return image_path, detect_faces(image_path, use_cache), None
+        except Exception as e:
+            return image_path, None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        yield from executor.map(detect, image_paths)
 
 
 def get_largest_face(faces):
@@ -101,8 +184,12 @@ def get_largest_face(faces):
     return largest_face
 
 
-def draw_face_box_opencv(ost_img, image_path, face):
-    """在图片上绘制人脸边界框"""
+def draw_face_box_opencv(image_path, face):
+    """在图片上绘制人脸边界框（只有画预览图时才解码图片）"""
+    ost_img = cv2.imread(image_path)
+    if ost_img is None:
+        raise ValueError(f"无法读取图片文件: {image_path}")
+
     input_file = Path(image_path)
     output_file = input_file.with_name(f"{input_file.stem}_face{input_file.suffix}")
     output_file = output_file.with_suffix('.jpg')
@@ -117,6 +204,25 @@ def draw_face_box_opencv(ost_img, image_path, face):
     cv2.imwrite(output_path, ost_img)
     return output_path
 
+def save_face_crop(face, output_path, margin=0.2):
+    """把人脸框（向外扩 margin 倍）裁剪保存为图片，没有人脸框时保存整张图片"""
+    ost_img = cv2.imread(face["image_path"])
+    if ost_img is None:
+        raise ValueError(f"无法读取图片文件: {face['image_path']}")
+
+    x1, y1, x2, y2 = face.get("box", [0, 0, 0, 0])[:4]
+    if x2 > x1 and y2 > y1:
+        pad_x, pad_y = (x2 - x1) * margin, (y2 - y1) * margin
+        height, width = ost_img.shape[:2]
+        left, top = max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y))
+        right, bottom = min(width, int(x2 + pad_x)), min(height, int(y2 + pad_y))
+        ost_img = ost_img[top:bottom, left:right]
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    cv2.imwrite(str(output_path), ost_img)
+    return str(output_path)
+
+
 def save_embedding(face, json_path):
     """保存人脸embedding到json文件"""
     if face is None:
@@ -132,29 +238,23 @@ def save_embedding(face, json_path):
     return json_path
 
 
-def save_embeddings(image_path, faces, json_path):
-    """保存多个人脸embedding到json文件"""
-    if faces is None:
-        return None
-
-    data = {
-        "image_path": str(image_path),
-        "embeddings": [face.get('embedding', []) for face in faces],
-        "boxes": [face.get('box', []) for face in faces],
-        "det_scores": [face.get('det_score', 0) for face in faces]
-    }
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    return json_path
+def save_embeddings(segment, image_path, faces):
+    """把一张图片的多个人脸embedding追加到段文件"""
+    return segment.append(
+        image_path,
+        [face.get('embedding', []) for face in faces],
+        [face.get('box', []) for face in faces],
+        [face.get('det_score', 0) for face in faces]
+    )
 
 
-def get_baseface_embedding(image_path, det_thr=DEFAULT_QUERY_THRESHOLD, output_dir=None):
+def get_baseface_embedding(image_path, det_thr=DEFAULT_QUERY_THRESHOLD, output_dir=None, use_cache=True):
     """获取查询图片的最大人脸embedding"""
     input_file = Path(image_path)
     input_file_name = str(input_file)
 
     try:
-        ost_image, result = detect_faces(input_file_name)
+        result = detect_faces(input_file_name, use_cache)
         faces_count = result.get("faces_count", 0)
         faces = result.get("output", [])
         faces = [face for face in faces if face.get('det_score', 0) >= det_thr]
@@ -163,7 +263,7 @@ def get_baseface_embedding(image_path, det_thr=DEFAULT_QUERY_THRESHOLD, output_d
         if faces_count > 0:
             largest_face = get_largest_face(faces)
             if largest_face:
-                face_image_path = draw_face_box_opencv(ost_image, input_file_name, largest_face)
+                face_image_path = draw_face_box_opencv(input_file_name, largest_face)
                 
                 # 保存embedding
                 if output_dir:
@@ -181,35 +281,38 @@ def get_baseface_embedding(image_path, det_thr=DEFAULT_QUERY_THRESHOLD, output_d
         return None, None
 
 
-def get_searchface_embeddings(image_paths, det_thr=DEFAULT_SEARCH_THRESHOLD, output_dir=None):
-    """获取搜索图片列表的所有人脸embedding"""
-    json_list = []
+def get_searchface_embeddings(image_paths, det_thr=DEFAULT_SEARCH_THRESHOLD, output_dir=None,
+                              concurrency=DEFAULT_CONCURRENCY, use_cache=True):
+    """
+    获取搜索图片列表的所有人脸embedding（并发请求，已检测过的图片直接读缓存）
 
-    if output_dir:
-        output_dir = Path(output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
+    所有人脸写入一个新的段文件 search_embeddings_<随机后缀>.fseg（默认在第一张图片所在目录），
+    不会覆盖已有的段文件，并发运行也互不影响。返回段文件路径，未检测到任何人脸时返回 None。
+    """
+    segment_dir = Path(output_dir) if output_dir else Path(image_paths[0]).parent
+    segment_dir.mkdir(parents=True, exist_ok=True)
+    fd, segment_path = tempfile.mkstemp(prefix="search_embeddings_", suffix=SEGMENT_SUFFIX, dir=segment_dir)
+    os.close(fd)
+    segment = EmbeddingSegment(segment_path)
 
-    for image_path in image_paths:
+    for image_path, result, error in detect_faces_batch(image_paths, concurrency, use_cache):
         try:
-            ost_image, result = detect_faces(image_path)
+            if error is not None:
+                raise error
             faces_count = result.get("faces_count", 0)
             faces = result.get("output", [])
             faces = [face for face in faces if face.get('det_score', 0) >= det_thr]
             faces_count = len(faces)
 
             if faces_count > 0:
-                input_file = Path(image_path)
-                if output_dir:
-                    json_path = output_dir / f"{input_file.stem}_embeddings.json"
-                else:
-                    json_path = input_file.with_suffix('.json')
-
-                save_embeddings(image_path, faces, json_path)
-                json_list.append(str(json_path))
+                save_embeddings(segment, image_path, faces)
         except Exception as e:
             print(f"处理 {image_path} 时出错: {e}", file=sys.stderr)
 
-    return json_list
+    if not len(segment):
+        segment.path.unlink(missing_ok=True)
+        return None
+    return str(segment.path)
 
 
 def get_baseface_embedding_from_json(json_path):
@@ -222,7 +325,7 @@ def get_baseface_embedding_from_json(json_path):
 
 
 def get_searchface_embeddings_from_json(json_paths):
-    """从json文件列表加载搜索人脸embeddings"""
+    """从旧版的每图片json文件列表加载搜索人脸embeddings"""
     all_embeddings = {}
     for json_path in json_paths:
         with open(json_path, 'r', encoding='utf-8') as f:
@@ -243,28 +346,91 @@ def cosine_similarity(vec1, vec2):
     return dot_product / (norm1 * norm2)
 
 
-def search_similar_faces(base_json_path, search_json_paths, threshold=DEFAULT_SIMILARITY_THRESHOLD):
-    """搜索相似人脸"""
-    if not base_json_path or not search_json_paths:
-        return []
+def load_search_embeddings(embedding_paths):
+    """
+    加载搜索人脸embeddings，支持 .fseg 段文件（内存映射）和旧版json
+
+    返回按行对齐的 (图片路径列表, 人脸序号列表, embedding矩阵列表)
+    """
+    image_names = []
+    face_indices = []
+    matrices = []
+    json_paths = []
+    for path in embedding_paths:
+        if str(path).endswith(SEGMENT_SUFFIX):
+            segment = EmbeddingSegment(path)
+            for record in segment.records:
+                image_names.extend([record["image_path"]] * record["count"])
+                face_indices.extend(range(record["count"]))
+            matrices.append(segment.vectors)
+        else:
+            json_paths.append(path)
 
-    face_embedding = get_baseface_embedding_from_json(base_json_path)
-    search_embeddings = get_searchface_embeddings_from_json(search_json_paths)
+    for image_name, embeddings in get_searchface_embeddings_from_json(json_paths).items():
+        if len(embeddings) == 0:
+            continue
+        image_names.extend([image_name] * len(embeddings))
+        face_indices.extend(range(len(embeddings)))
+        matrices.append(embeddings)
+    return image_names, face_indices, matrices
 
-    results = []
-    for image_name, embeddings in search_embeddings.items():
-        for idx, embedding in enumerate(embeddings):
-            similarity = cosine_similarity(face_embedding, embedding)
-            if similarity >= threshold:
-                results.append({
-                    "image_path": image_name,
-                    "face_index": idx,
-                    "similarity": float(similarity)
-                })
 
+def search_similar_faces(base_json_path, embedding_paths, threshold=DEFAULT_SIMILARITY_THRESHOLD, top_k=None):
+    """搜索相似人脸：所有人脸拼成一个归一化矩阵，只做一次矩阵-向量乘法"""
+    if not base_json_path or not embedding_paths:
+        return []
+
+    face_embedding = normalize_rows(get_baseface_embedding_from_json(base_json_path))[0]
+    image_names, face_indices, matrices = load_search_embeddings(embedding_paths)
+    if not image_names:
+        return []
+
+    similarities = normalize_rows(np.concatenate(matrices)) @ face_embedding
+    matched = np.flatnonzero(similarities >= threshold)
     # 按相似度降序排序
-    results.sort(key=lambda x: x["similarity"], reverse=True)
-    return results
+    matched = matched[np.argsort(-similarities[matched], kind="stable")]
+    if top_k is not None:
+        matched = matched[:top_k]
+
+    return [
+        {
+            "image_path": image_names[i],
+            "face_index": face_indices[i],
+            "similarity": float(similarities[i])
+        }
+        for i in matched
+    ]
+
+
+def add_embeddings_to_index(index, embedding_paths):
+    """把 .fseg 段文件或旧版embedding json 中的人脸加入索引，已存在的图片会被更新"""
+    added = 0
+    for path in embedding_paths:
+        if str(path).endswith(SEGMENT_SUFFIX):
+            for image_path, embeddings, boxes, det_scores in EmbeddingSegment(path):
+                added += index.add(image_path, embeddings, boxes, det_scores)
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        added += index.add(data.get("image_path", ""), data.get("embeddings", []),
+                           data.get("boxes"), data.get("det_scores"))
+    return added
+
+
+def print_search_results(results):
+    """输出检索结果"""
+    if results:
+        print(f"找到 {len(results)} 个相似人脸:")
+        for r in results:
+            similarity_percent = r['similarity'] * 100
+            print(f"  {r['image_path']} (人脸#{r['face_index']}, 相似度: {similarity_percent:.2f}%)")
+            print(f"  MEDIA:{r['image_path']}")
+
+        # 输出所有匹配图片的路径列表（逗号分隔），方便自动化脚本解析
+        matched_images = [r['image_path'] for r in results]
+        print(f"MATCHED_IMAGES:{','.join(matched_images)}")
+    else:
+        print("未找到相似人脸")
 
 
 def main():
@@ -277,20 +443,67 @@ def main():
     parser_base.add_argument('--det-thr', type=float, default=DEFAULT_QUERY_THRESHOLD,
                             help=f'检测阈值 (默认: {DEFAULT_QUERY_THRESHOLD})')
     parser_base.add_argument('--output-dir', help='输出目录')
+    parser_base.add_argument('--no-cache', action='store_true', help='不使用检测结果缓存，重新调用API')
     
     # 第二步：处理搜索图片列表并执行检索
     parser_search = subparsers.add_parser('search', help='处理搜索图片列表并执行匹配（一步式）或仅生成embedding（旧模式）')
-    parser_search.add_argument('paths', nargs='+', help='查询特征.json（一步式）或图片路径列表（旧模式）')
+    parser_search.add_argument('paths', nargs='+',
+                              help='查询特征.json，之后是搜索图片或已保存的embedding（.fseg 段文件或旧版json）')
     parser_search.add_argument('--det-thr', type=float, default=DEFAULT_SEARCH_THRESHOLD,
                               help=f'检测阈值 (默认: {DEFAULT_SEARCH_THRESHOLD})')
     parser_search.add_argument('--threshold', type=float, default=DEFAULT_SIMILARITY_THRESHOLD,
                               help=f'相似度阈值 (默认: {DEFAULT_SIMILARITY_THRESHOLD})')
     parser_search.add_argument('--output-dir', help='输出目录')
-    
+    parser_search.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                              help=f'并发请求数 (默认: {DEFAULT_CONCURRENCY})')
+    parser_search.add_argument('--no-cache', action='store_true', help='不使用检测结果缓存，重新调用API')
+    parser_search.add_argument('--index', help='人脸索引目录：搜索图片先加入索引，再在整个索引中检索')
+    parser_search.add_argument('--top-k', type=int, help='最多返回的人脸数 (默认: 不限)')
+    parser_search.add_argument('--nprobe', type=int,
+                              help=f'索引建立了ANN时扫描的倒排列表数，越大召回越高、越慢；0 为精确扫描 (默认: {DEFAULT_NPROBE})')
+
+    # 人脸索引维护
+    parser_index = subparsers.add_parser('index', help='维护人脸索引（添加/更新、删除、导入、合并、ANN、压缩、查看）')
+    parser_index.add_argument('action', choices=['add', 'remove', 'import', 'merge', 'build-ann', 'bench', 'compact', 'info'],
+                              help='add: 检测图片并加入索引; remove: 删除图片; import: 导入 .fseg 段文件或embedding json; '
+                                   'merge: 合并其他索引目录并把新增人脸分配到ANN列表; build-ann: 建立IVF近似检索索引; '
+                                   'bench: 对比ANN与精确扫描的召回率和耗时; compact: 回收已删除的空间; info: 查看统计')
+    parser_index.add_argument('index_dir', help='索引目录')
+    parser_index.add_argument('paths', nargs='*', help='图片路径（add/remove）、段文件或embedding json（import）或其他索引目录（merge）')
+    parser_index.add_argument('--det-thr', type=float, default=DEFAULT_SEARCH_THRESHOLD,
+                              help=f'检测阈值 (默认: {DEFAULT_SEARCH_THRESHOLD})')
+    parser_index.add_argument('--output-dir', help='embedding 段文件输出目录')
+    parser_index.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                              help=f'add 的并发请求数 (默认: {DEFAULT_CONCURRENCY})')
+    parser_index.add_argument('--no-cache', action='store_true', help='add 时不使用检测结果缓存')
+    parser_index.add_argument('--nlist', type=int, help='build-ann 的倒排列表数 (默认: 约 4·√人脸数)')
+    parser_index.add_argument('--nprobe', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64, 128],
+                              help='bench 要测试的 nprobe 取值')
+    parser_index.add_argument('--queries', type=int, default=100, help='bench 的查询数 (默认: 100)')
+    parser_index.add_argument('--top-k', type=int, default=10, help='bench 的K (默认: 10)')
+
+    # 聚类/去重：把索引中的所有人脸按人物分组
+    parser_cluster = subparsers.add_parser('cluster', help='把人脸索引中的所有人脸按人物聚类（去重）')
+    parser_cluster.add_argument('index_dir', help='人脸索引目录')
+    parser_cluster.add_argument('--threshold', type=float, default=DEFAULT_SIMILARITY_THRESHOLD,
+                                help=f'相似度不低于该值的人脸视为同一人物 (默认: {DEFAULT_SIMILARITY_THRESHOLD})')
+    parser_cluster.add_argument('--min-size', type=int, default=2, help='只输出人脸数不少于该值的人物 (默认: 2)')
+    parser_cluster.add_argument('--output', help='聚类结果json路径 (默认: <索引目录>/clusters.json)')
+    parser_cluster.add_argument('--preview-dir', help='保存每个人物代表人脸裁剪图的目录')
+
+    # 把旧版的每图片embedding json 转换成段文件
+    parser_convert = subparsers.add_parser('convert', help='把旧版embedding json 转换成 .fseg 段文件')
+    parser_convert.add_argument('output', help=f'输出段文件路径（{SEGMENT_SUFFIX}）')
+    parser_convert.add_argument('json_paths', nargs='+', help='embedding json 文件')
+    parser_convert.add_argument('--dtype', choices=SEGMENT_DTYPES, default=DEFAULT_SEGMENT_DTYPE,
+                                help=f'存储精度 (默认: {DEFAULT_SEGMENT_DTYPE})')
+
     args = parser.parse_args()
 
     if args.command == 'base':
-        json_path, face_image_path = get_baseface_embedding(args.image_path, args.det_thr, args.output_dir)
+        require_api_key()
+        json_path, face_image_path = get_baseface_embedding(args.image_path, args.det_thr, args.output_dir,
+                                                              not args.no_cache)
         if json_path:
             print(f"查询人脸embedding已保存: {json_path}")
             print(f"画框图片: MEDIA:{face_image_path}")
@@ -307,33 +520,108 @@ def main():
         if first_path.endswith('.json'):
             # 一步式模式：第一个参数是查询特征.json
             base_json_path = first_path
-            image_paths = args.paths[1:]
+            # 已保存的embedding（段文件或旧版json）直接复用，其余路径视为图片
+            embedding_paths = [path for path in args.paths[1:] if path.endswith((SEGMENT_SUFFIX, '.json'))]
+            image_paths = [path for path in args.paths[1:] if path not in embedding_paths]
 
-            if not image_paths:
+            if not image_paths and not embedding_paths and not args.index:
                 print("错误: 一步式模式需要提供查询特征.json和至少一张搜索图片", file=sys.stderr)
                 sys.exit(1)
 
             # 生成搜索图片的embeddings
-            json_paths = get_searchface_embeddings(image_paths, args.det_thr, args.output_dir)
-
-            if not json_paths:
-                print("未检测到任何人脸", file=sys.stderr)
+            if image_paths:
+                require_api_key()
+                segment_path = get_searchface_embeddings(image_paths, args.det_thr, args.output_dir,
+                                                         args.concurrency, not args.no_cache)
+                if segment_path:
+                    print(f"搜索图片embedding已保存: {segment_path}")
+                    embedding_paths.append(segment_path)
+
+            if args.index:
+                # 索引模式：在整个索引中检索
+                index = FaceIndex(args.index)
+                add_embeddings_to_index(index, embedding_paths)
+                query = get_baseface_embedding_from_json(base_json_path)
+                results = index.search(query, args.top_k, args.threshold, args.nprobe)
+            else:
+                if not embedding_paths:
+                    print("未检测到任何人脸", file=sys.stderr)
+                    sys.exit(1)
+
+                # 执行匹配
+                results = search_similar_faces(base_json_path, embedding_paths, args.threshold, args.top_k)
+            print_search_results(results)
+
+    elif args.command == 'index':
+        index = FaceIndex(args.index_dir)
+        if args.action == 'add':
+            require_api_key()
+            segment_path = get_searchface_embeddings(args.paths, args.det_thr, args.output_dir,
+                                                     args.concurrency, not args.no_cache)
+            # 未检测到人脸的图片也要从索引中移除旧记录
+            for image_path in args.paths:
+                index.remove(image_path)
+            print(f"已加入 {add_embeddings_to_index(index, [segment_path] if segment_path else [])} 个人脸")
+        elif args.action == 'import':
+            print(f"已导入 {add_embeddings_to_index(index, args.paths)} 个人脸")
+        elif args.action == 'remove':
+            removed = sum(index.remove(image_path) for image_path in args.paths)
+            print(f"已删除 {removed} 个人脸")
+        elif args.action == 'merge':
+            merged = sum(index.merge(FaceIndex(other_dir)) for other_dir in args.paths)
+            print(f"已合并 {merged} 个人脸")
+            if index.ann is not None:
+                print(f"已分配 {index.merge_ann()} 行到ANN倒排列表")
+        elif args.action == 'build-ann':
+            print(f"已建立ANN索引: {index.build_ann(args.nlist)} 个倒排列表")
+        elif args.action == 'bench':
+            if index.ann is None:
+                print("错误: 索引尚未建立ANN，请先执行 index build-ann", file=sys.stderr)
                 sys.exit(1)
+            for row in benchmark_ann(index, args.nprobe, args.queries, args.top_k):
+                print(json.dumps(row))
+        elif args.action == 'compact':
+            print(f"已回收 {index.compact()} 行")
+        if index.dim is not None:
+            print(json.dumps(index.info(), ensure_ascii=False))
+    elif args.command == 'cluster':
+        index = FaceIndex(args.index_dir)
+        if index.dim is None or len(index) == 0:
+            print("错误: 索引中没有人脸", file=sys.stderr)
+            sys.exit(1)
+
+        rows, labels = cluster_faces(index, args.threshold)
+        clusters = summarize_clusters(index, rows, labels, args.min_size)
+        if args.preview_dir:
+            for cluster in clusters:
+                preview_path = Path(args.preview_dir) / f"cluster_{cluster['id']:05d}.jpg"
+                try:
+                    cluster["preview"] = save_face_crop(cluster["representative"], preview_path)
+                except Exception as e:
+                    print(f"生成人物#{cluster['id']}预览图时出错: {e}", file=sys.stderr)
+
+        output_path = Path(args.output) if args.output else Path(args.index_dir) / "clusters.json"
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "threshold": args.threshold,
+                "faces": len(rows),
+                "identities": int(labels.max()) + 1,
+                "clusters": clusters
+            }, f, ensure_ascii=False, indent=2)
+
+        print(f"{len(rows)} 个人脸分为 {int(labels.max()) + 1} 个人物，其中 {len(clusters)} 个人物至少有 {args.min_size} 张人脸")
+        print(f"聚类结果已保存: {output_path}")
+        for cluster in clusters[:CLUSTER_PRINT_LIMIT]:
+            representative = cluster["representative"]
+            print(f"  人物#{cluster['id']}: {cluster['size']} 张人脸, 代表图片 {representative['image_path']}")
+            print(f"  MEDIA:{cluster.get('preview', representative['image_path'])}")
+        print(f"CLUSTER_JSON:{output_path}")
+
+    elif args.command == 'convert':
+        converted = convert_json_to_segment(args.json_paths, args.output, args.dtype)
+        print(f"已转换 {converted} 个人脸: {args.output}")
 
-            # 执行匹配
-            results = search_similar_faces(base_json_path, json_paths, args.threshold)
-            if results:
-                print(f"找到 {len(results)} 个相似人脸:")
-                for r in results:
-                    similarity_percent = r['similarity'] * 100
-                    print(f"  {r['image_path']} (人脸#{r['face_index']}, 相似度: {similarity_percent:.2f}%)")
-                    print(f"  MEDIA:{r['image_path']}")
-                
-                # 输出所有匹配图片的路径列表（逗号分隔），方便自动化脚本解析
-                matched_images = [r['image_path'] for r in results]
-                print(f"MATCHED_IMAGES:{','.join(matched_images)}")
-            else:
-                print("未找到相似人脸")
     else:
         parser.print_help()
 
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+人脸embedding段文件
+
+替代每张图片一个、缩进排版的embedding JSON：所有图片的人脸embedding按检测顺序
+追加到一个二进制矩阵中，读取时直接内存映射，不需要解析文本。
+
+文件:
+  <名称>.fseg      64字节头信息 + float16/float32矩阵（人脸数 × 维度）
+  <名称>.fseg.idx  每行一个JSON记录：image_path、start（起始行）、count、boxes、det_scores
+
+头信息中记录已提交的行数和索引字节数，追加时先写数据再更新头信息，
+中断的写入会在下次追加时被截掉。
+"""
+
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+
+SEGMENT_SUFFIX = ".fseg"
+SEGMENT_MAGIC = b"FACESEG\0"
+SEGMENT_VERSION = 1
+SEGMENT_DTYPES = ("float16", "float32")
+DEFAULT_SEGMENT_DTYPE = "float16"
+
+# magic, 版本, 元素字节数, 维度, 已提交行数, 已提交索引字节数
+HEADER_FORMAT = "<8sIIIQQ"
+HEADER_SIZE = 64
+
+
+class EmbeddingSegment:
+    """追加写入、内存映射读取的人脸embedding段文件"""
+
+    def __init__(self, path, dtype=DEFAULT_SEGMENT_DTYPE, overwrite=False):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self.dtype = np.dtype(dtype)
+        self.dim = None
+        self.count = 0
+        self.records = []
+        self._index_bytes = 0
+        self._vectors = None
+
+        if overwrite:
+            self.path.unlink(missing_ok=True)
+            self.index_path.unlink(missing_ok=True)
+        elif self.path.exists() and self.path.stat().st_size:
+            # 空文件（例如 mkstemp 预留的文件名）视为新段文件
+            self._read()
+        if self.dtype.name not in SEGMENT_DTYPES:
+            raise ValueError(f"不支持的embedding类型: {self.dtype.name}")
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        """逐张图片产出 (image_path, embeddings, boxes, det_scores)，embeddings 为内存映射切片"""
+        vectors = self.vectors
+        for record in self.records:
+            start = record["start"]
+            yield (record["image_path"], vectors[start:start + record["count"]],
+                   record["boxes"], record["det_scores"])
+
+    @property
+    def vectors(self):
+        """(人脸数 × 维度) 的只读内存映射矩阵"""
+        if self._vectors is None:
+            if self.count == 0:
+                return np.zeros((0, self.dim or 0), dtype=self.dtype)
+            self._vectors = np.memmap(self.path, dtype=self.dtype, mode="r", offset=HEADER_SIZE,
+                                      shape=(self.count, self.dim))
+        return self._vectors
+
+    def append(self, image_path, embeddings, boxes=None, det_scores=None):
+        """追加一张图片的所有人脸，返回追加的人脸数"""
+        matrix = np.atleast_2d(np.asarray(embeddings, dtype=self.dtype))
+        if matrix.size == 0:
+            return 0
+        if self.dim is None:
+            self.dim = matrix.shape[1]
+            self._write_header()
+        if matrix.shape[1] != self.dim:
+            raise ValueError(f"embedding维度不一致: {matrix.shape[1]} != {self.dim}")
+
+        record = {
+            "image_path": str(image_path),
+            "start": self.count,
+            "count": len(matrix),
+            # 缺少或与人脸数对不上的框/分数记为 None，不写入空列表
+            "boxes": ([list(map(float, box)) for box in boxes]
+                      if boxes is not None and len(boxes) == len(matrix) else None),
+            "det_scores": ([float(score) for score in det_scores]
+                           if det_scores is not None and len(det_scores) == len(matrix) else None),
+        }
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+        # 截掉上次写入中断时留下的、未计入头信息的尾部数据
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_SIZE + self.count * self.dim * self.dtype.itemsize)
+            f.seek(0, 2)
+            f.write(matrix.tobytes())
+        with open(self.index_path, "ab") as f:
+            f.truncate(self._index_bytes)
+            f.write(line)
+
+        self.count += len(matrix)
+        self._index_bytes += len(line)
+        self.records.append(record)
+        self._vectors = None
+        self._write_header()
+        return len(matrix)
+
+    def _read(self):
+        with open(self.path, "rb") as f:
+            magic, version, itemsize, dim, count, index_bytes = struct.unpack(
+                HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT)))
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"不是人脸embedding段文件: {self.path}")
+        if version != SEGMENT_VERSION:
+            raise ValueError(f"不支持的段文件版本: {version}")
+
+        self.dtype = np.dtype(f"<f{itemsize}")
+        self.dim = dim or None
+        self.count = count
+        self._index_bytes = index_bytes
+        if index_bytes:
+            with open(self.index_path, "rb") as f:
+                lines = f.read(index_bytes).splitlines()
+            self.records = json.loads(b"[" + b",".join(lines) + b"]")
+
+    def _write_header(self):
+        header = struct.pack(HEADER_FORMAT, SEGMENT_MAGIC, SEGMENT_VERSION, self.dtype.itemsize,
+                             self.dim or 0, self.count, self._index_bytes)
+        mode = "r+b" if self.path.exists() else "wb"
+        with open(self.path, mode) as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+
+
+def convert_json_to_segment(json_paths, segment_path, dtype=DEFAULT_SEGMENT_DTYPE):
+    """把旧版的每图片embedding json 转换成一个段文件，返回转换的人脸数"""
+    segment = EmbeddingSegment(segment_path, dtype, overwrite=True)
+    converted = 0
+    for json_path in json_paths:
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if "embeddings" in data:
+            converted += segment.append(data.get("image_path", ""), data["embeddings"],
+                                        data.get("boxes"), data.get("det_scores"))
+        elif data.get("embedding"):
+            # 查询人脸json（base 步骤的输出）只有一个人脸、没有图片路径
+            converted += segment.append(str(json_path), [data["embedding"]],
+                                        [data.get("box", [])], [data.get("det_score", 0)])
+    return converted
@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pytest>=8.0.0",
+#     "opencv-python-headless>=4.8.0",
+#     "numpy>=1.24.0",
+#     "requests>=2.31.0",
+# ]
+# ///
+"""
+Tests for concurrent face detection against a local stub of the detection API,
+and for the on-disk face index
+
+Run with: uv run pytest test_face_search.py -v
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+import face_search
+from face_index import ROW_DTYPE, FaceIndex, cluster_faces, normalize_rows, summarize_clusters
+from face_search import add_embeddings_to_index, detect_faces_batch, get_searchface_embeddings
+from face_segment import EmbeddingSegment, convert_json_to_segment
+
+
+class StubDetectAPI(ThreadingHTTPServer):
+    """Serves the detect_and_embed endpoint on localhost.
+
+    `plan` maps an uploaded file name to the statuses to answer with, one per
+    request (200 once the list runs out). A 429 carries Retry-After, and
+    "no-result" is a 200 whose JSON has no `result`. The
+    returned embedding encodes the file name, so results can be matched to
+    their images. `delays` slows down answers for chosen files, so requests
+    finish out of input order.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, plan=None, delays=None, retry_after=1):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.plan = {name: list(statuses) for name, statuses in (plan or {}).items()}
+        self.delays = delays or {}
+        self.retry_after = retry_after
+        self.requests = []  # (file name, status, time)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/detect"
+
+    def requests_for(self, name):
+        return [(status, at) for file_name, status, at in self.requests if file_name == name]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        name = re.search(rb'filename="([^"]+)"', body).group(1).decode()
+        stub = self.server
+        with stub.lock:
+            statuses = stub.plan.get(name, [])
+            status = statuses.pop(0) if statuses else 200
+            stub.requests.append((name, status, time.monotonic()))
+        time.sleep(stub.delays.get(name, 0))
+
+        headers = {}
+        if status == "no-result":
+            # A 200 carrying an error payload instead of a result
+            status, payload = 200, json.dumps({"code": 500, "message": "busy"}).encode()
+        elif status == 200:
+            index = int(re.search(r"\d+", name).group())
+            face = {"box": [0, 0, 10, 10], "det_score": 0.9, "embedding": [float(index), 1.0]}
+            payload = json.dumps({"result": {"faces_count": 1, "output": [face]}}).encode()
+        else:
+            payload = b"try again later"
+            if status == 429:
+                headers["Retry-After"] = str(stub.retry_after)
+
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def stub_api(tmp_path, monkeypatch):
+    """Start a stub API and point face_search (and its detection cache) at it."""
+    servers = []
+
+    def start(**kwargs):
+        server = StubDetectAPI(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        monkeypatch.setattr(face_search, "FACE_API_URL", server.url)
+        return server
+
+    # DETECT_CACHE_DIR is read from FACE_SEARCH_CACHE_DIR at import time
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("FACE_SEARCH_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(face_search, "DETECT_CACHE_DIR", cache_dir)
+    monkeypatch.setenv("SOPH_API_KEY", "test-key")
+    monkeypatch.setattr(face_search, "DETECT_BACKOFF", 0.01)
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def images(tmp_path):
+    paths = []
+    for i in range(12):
+        path = tmp_path / f"img{i}.jpg"
+        path.write_bytes(f"image {i}".encode() * 100)
+        paths.append(str(path))
+    return paths
+
+
+def _embedding_ids(results):
+    return [int(result["output"][0]["embedding"][0]) for _, result, _ in results]
+
+
+class TestDetectFacesBatch:
+    """Test retries, ordering and caching of concurrent detection."""
+
+    def test_retries_and_input_order(self, stub_api, images):
+        server = stub_api(
+            plan={"img1.jpg": [429], "img2.jpg": [503, 503], "img5.jpg": [500]},
+            delays={"img0.jpg": 0.3, "img3.jpg": 0.2},
+        )
+
+        results = list(detect_faces_batch(images, concurrency=4))
+
+        assert [path for path, _, _ in results] == images
+        assert all(error is None for _, _, error in results)
+        assert _embedding_ids(results) == list(range(len(images)))
+        assert [status for status, _ in server.requests_for("img2.jpg")] == [503, 503, 200]
+        assert [status for status, _ in server.requests_for("img5.jpg")] == [500, 200]
+        assert len(server.requests) == len(images) + 4
+
+    def test_honours_retry_after(self, stub_api, images):
+        server = stub_api(plan={"img1.jpg": [429]}, retry_after=1)
+
+        list(detect_faces_batch(images[:3], concurrency=2))
+
+        (first, rejected_at), (second, retried_at) = server.requests_for("img1.jpg")
+        assert (first, second) == (429, 200)
+        assert retried_at - rejected_at >= 0.9
+
+    def test_second_run_uses_cache(self, stub_api, images, tmp_path):
+        server = stub_api(plan={"img4.jpg": [429]}, retry_after=0)
+        first = list(detect_faces_batch(images, concurrency=4))
+        sent = len(server.requests)
+
+        second = list(detect_faces_batch(images, concurrency=4))
+
+        assert len(server.requests) == sent
+        assert second == first
+        assert len(list((tmp_path / "cache").rglob("*.json"))) == len(images)
+
+    def test_failures_stay_in_place_and_are_not_cached(self, stub_api, images):
+        server = stub_api(plan={"img2.jpg": [400]})
+
+        results = list(detect_faces_batch(images[:4], concurrency=4))
+
+        assert [path for path, _, _ in results] == images[:4]
+        assert isinstance(results[2][2], RuntimeError)
+        assert results[2][1] is None
+        assert [error for i, (_, _, error) in enumerate(results) if i != 2] == [None] * 3
+
+        retry = list(detect_faces_batch(images[:4], concurrency=4))
+        assert retry[2][2] is None
+        assert len(server.requests_for("img2.jpg")) == 2
+
+    def test_response_without_result_is_an_error(self, stub_api, images, tmp_path):
+        server = stub_api(plan={"img1.jpg": ["no-result"]})
+
+        results = list(detect_faces_batch(images[:2], concurrency=2))
+
+        assert results[0][2] is None
+        assert isinstance(results[1][2], RuntimeError)
+        assert len(list((tmp_path / "cache").rglob("*.json"))) == 1
+
+        retry = list(detect_faces_batch(images[:2], concurrency=2))
+        assert retry[1][1]["faces_count"] == 1
+        assert len(server.requests_for("img1.jpg")) == 2
+
+    def test_use_cache_false_always_requests(self, stub_api, images):
+        server = stub_api()
+        list(detect_faces_batch(images[:3], concurrency=2))
+        list(detect_faces_batch(images[:3], concurrency=2, use_cache=False))
+        assert len(server.requests) == 6
+
+    def test_search_embeddings_in_input_order(self, stub_api, images, tmp_path):
+        server = stub_api(plan={"img3.jpg": [503]}, delays={"img0.jpg": 0.2})
+        output_dir = tmp_path / "out"
+
+        get_searchface_embeddings(images, output_dir=output_dir, concurrency=4)
+        sent = len(server.requests)
+        segment_path = get_searchface_embeddings(images, output_dir=output_dir, concurrency=4)
+
+        assert len(server.requests) == sent
+        segment = EmbeddingSegment(segment_path)
+        assert [record["image_path"] for record in segment.records] == images
+        assert segment.vectors[:, 0].tolist() == list(range(len(images)))
+
+
+class TestSearchSegments:
+    """Test that search runs write their own segment files."""
+
+    def test_runs_do_not_overwrite_segments(self, stub_api, images, tmp_path):
+        stub_api()
+        output_dir = tmp_path / "out"
+
+        first = get_searchface_embeddings(images[:2], output_dir=output_dir)
+        second = get_searchface_embeddings(images[2:5], output_dir=output_dir)
+
+        assert first != second
+        assert [record["image_path"] for record in EmbeddingSegment(first).records] == images[:2]
+        assert [record["image_path"] for record in EmbeddingSegment(second).records] == images[2:5]
+
+    def test_no_faces_leaves_no_file(self, stub_api, images, tmp_path):
+        stub_api(plan={"img0.jpg": [400]})
+        output_dir = tmp_path / "out"
+
+        assert get_searchface_embeddings(images[:1], output_dir=output_dir) is None
+        assert list(output_dir.iterdir()) == []
+
+
+class TestLegacyEmbeddings:
+    """Test converting and importing embedding json without boxes or scores."""
+
+    def test_convert_then_import_without_scores(self, tmp_path):
+        legacy = tmp_path / "legacy_embeddings.json"
+        legacy.write_text(json.dumps({"image_path": "a.jpg", "embeddings": [[1.0, 0.0], [0.0, 1.0]]}))
+        segment_path = tmp_path / "legacy.fseg"
+
+        assert convert_json_to_segment([legacy], segment_path) == 2
+        record = EmbeddingSegment(segment_path).records[0]
+        assert record["boxes"] is None and record["det_scores"] is None
+
+        index = FaceIndex(tmp_path / "index")
+        assert add_embeddings_to_index(index, [segment_path]) == 2
+        assert index.rows["det_score"].tolist() == [0.0, 0.0]
+
+    def test_mismatched_scores_are_dropped(self, tmp_path):
+        index = FaceIndex(tmp_path / "index")
+        index.add("a.jpg", [[1.0, 0.0], [0.0, 1.0]], boxes=[[1, 2, 3, 4]], det_scores=[0.9])
+        assert index.rows["det_score"].tolist() == [0.0, 0.0]
+
+
+def random_gallery(index, images=60, max_faces=4, dim=32, seed=0):
+    """Add random faces to an index; returns {image_path: embeddings}."""
+    rng = np.random.default_rng(seed)
+    gallery = {}
+    for i in range(images):
+        embeddings = rng.normal(size=(int(rng.integers(1, max_faces + 1)), dim))
+        gallery[f"img{i}.jpg"] = embeddings
+        index.add(f"img{i}.jpg", embeddings, det_scores=[0.9] * len(embeddings))
+    return gallery
+
+
+def brute_force(gallery, query, top_k=None, threshold=-1.0):
+    """Exact cosine search over a {image_path: embeddings} dict."""
+    query = normalize_rows(query)[0]
+    found = [
+        (image_path, face_index, float(score))
+        for image_path, embeddings in gallery.items()
+        for face_index, score in enumerate(normalize_rows(embeddings) @ query)
+        if score >= threshold
+    ]
+    found.sort(key=lambda item: -item[2])
+    return found[:top_k] if top_k is not None else found
+
+
+def as_tuples(results):
+    return [(r["image_path"], r["face_index"], r["similarity"]) for r in results]
+
+
+def assert_same_results(results, expected):
+    assert [item[:2] for item in as_tuples(results)] == [item[:2] for item in expected]
+    assert [r["similarity"] for r in results] == pytest.approx([item[2] for item in expected], abs=1e-5)
+
+
+class TestFaceIndex:
+    """Test adding, updating, removing and searching faces in the index."""
+
+    def test_readd_replaces_faces(self, tmp_path):
+        index = FaceIndex(tmp_path / "index")
+        assert index.add("a.jpg", [[1.0, 0.0], [0.0, 1.0]]) == 2
+        index.add("b.jpg", [[1.0, 1.0]])
+
+        assert index.add("a.jpg", [[0.0, 1.0], [1.0, 0.0], [1.0, -1.0]]) == 3
+        assert len(index) == 4
+        assert len(index.image_rows("a.jpg")) == 3
+        assert index.images == ["a.jpg", "b.jpg"]
+        top = index.search([1.0, -1.0], top_k=1)[0]
+        assert (top["image_path"], top["face_index"]) == ("a.jpg", 2)
+
+    def test_remove_compact_and_reopen(self, tmp_path):
+        index = FaceIndex(tmp_path / "index")
+        gallery = random_gallery(index)
+        removed = {name: gallery.pop(name) for name in ["img3.jpg", "img10.jpg", "img59.jpg"]}
+
+        assert sum(index.remove(name) for name in removed) == sum(len(e) for e in removed.values())
+        assert index.remove("img3.jpg") == 0
+        assert len(index) == sum(len(e) for e in gallery.values())
+
+        query = np.random.default_rng(1).normal(size=32)
+        before = as_tuples(index.search(query, top_k=10))
+        assert index.compact() == sum(len(e) for e in removed.values())
+        assert index.compact() == 0
+        assert index.count == len(index)
+        assert "img3.jpg" not in index.images
+
+        reopened = FaceIndex(tmp_path / "index")
+        assert len(reopened) == len(index)
+        assert as_tuples(reopened.search(query, top_k=10)) == before
+        assert_same_results(reopened.search(query, top_k=10), brute_force(gallery, query, 10))
+
+    @pytest.mark.parametrize("top_k, threshold", [(1, -1.0), (10, -1.0), (None, 0.3), (5, 0.3), (None, 0.99)])
+    def test_search_matches_brute_force(self, tmp_path, top_k, threshold):
+        index = FaceIndex(tmp_path / "index")
+        gallery = random_gallery(index)
+        index.add("img7.jpg", np.random.default_rng(2).normal(size=(2, 32)))  # update
+        gallery["img7.jpg"] = np.random.default_rng(2).normal(size=(2, 32))
+        index.remove("img8.jpg")
+        del gallery["img8.jpg"]
+
+        for query in np.random.default_rng(3).normal(size=(5, 32)):
+            expected = brute_force(gallery, query, top_k, threshold)
+            assert_same_results(index.search(query, top_k, threshold, nprobe=0), expected)
+
+    def test_interrupted_append_is_discarded(self, tmp_path):
+        index = FaceIndex(tmp_path / "index")
+        gallery = random_gallery(index, images=5)
+        count = index.count
+
+        # A crash mid-append leaves bytes that the header does not count
+        with open(index.vectors_path, "ab") as f:
+            f.write(b"\xff" * (32 * 4 * 3 + 7))
+        with open(index.rows_path, "ab") as f:
+            f.write(b"\x01" * (ROW_DTYPE.itemsize + 3))
+
+        reopened = FaceIndex(tmp_path / "index")
+        assert reopened.count == count
+        query = np.random.default_rng(4).normal(size=32)
+        assert_same_results(reopened.search(query), brute_force(gallery, query))
+
+        extra = np.random.default_rng(5).normal(size=(2, 32))
+        reopened.add("extra.jpg", extra)
+        gallery["extra.jpg"] = extra
+        assert reopened.vectors_path.stat().st_size == reopened.count * 32 * 4
+        assert reopened.rows_path.stat().st_size == reopened.count * ROW_DTYPE.itemsize
+        assert_same_results(FaceIndex(tmp_path / "index").search(query), brute_force(gallery, query))
+
+
+class TestFaceIndexANN:
+    """Test the IVF index: full-probe recall, unassigned rows and compaction."""
+
+    NLIST = 8
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        index = FaceIndex(tmp_path / "index")
+        self.gallery = random_gallery(index, images=150)
+        index.build_ann(nlist=self.NLIST)
+        return index
+
+    def test_full_probe_matches_exact(self, index):
+        for query in np.random.default_rng(1).normal(size=(10, 32)):
+            exact = index.search(query, top_k=10, nprobe=0)
+            assert as_tuples(index.search(query, top_k=10, nprobe=self.NLIST)) == as_tuples(exact)
+            assert_same_results(exact, brute_force(self.gallery, query, 10))
+
+    def test_rows_added_after_build_found_before_merge(self, index):
+        query = np.random.default_rng(1).normal(size=32)
+        index.add("late.jpg", [query, -query])
+        index.add("img0.jpg", [query * 2])  # update: the old rows are gone, the new one is unassigned
+        assert index.info()["ann"]["unassigned_rows"] == 3
+
+        found = as_tuples(index.search(query, top_k=2, nprobe=1))
+        assert {item[:2] for item in found} == {("img0.jpg", 0), ("late.jpg", 0)}
+        assert [item[2] for item in found] == pytest.approx([1.0, 1.0])
+
+        index.add("gone.jpg", [query])
+        index.remove("gone.jpg")
+        assert index.merge_ann() == 3
+        assert index.info()["ann"]["unassigned_rows"] == 0
+        assert index.alive[np.asarray(index.ann["rows"])].all()
+        assert as_tuples(index.search(query, top_k=10, nprobe=self.NLIST)) == \
+            as_tuples(index.search(query, top_k=10, nprobe=0))
+
+    def test_ann_after_compact(self, index, tmp_path):
+        rng = np.random.default_rng(2)
+        for name in [f"img{i}.jpg" for i in range(0, 150, 7)]:
+            index.remove(name)
+            del self.gallery[name]
+        late = rng.normal(size=(3, 32))
+        index.add("late.jpg", late)  # after `covered`, not in any list
+        self.gallery["late.jpg"] = late
+        index.remove("img1.jpg")
+        del self.gallery["img1.jpg"]
+
+        index.compact()
+        reopened = FaceIndex(tmp_path / "index")
+        assert reopened.info()["ann"]["unassigned_rows"] == 3
+        ann_rows = np.asarray(reopened.ann["rows"])
+        assert len(np.unique(ann_rows)) == len(ann_rows) == reopened.count - 3
+        assert reopened.alive[ann_rows].all()
+
+        for query in np.concatenate([late, rng.normal(size=(5, 32))]):
+            exact = brute_force(self.gallery, query, 10)
+            assert_same_results(reopened.search(query, top_k=10, nprobe=self.NLIST), exact)
+            # Probed lists hold the right rows: any hit from one list is a true neighbour
+            for r in reopened.search(query, top_k=10, nprobe=1):
+                vector = normalize_rows(self.gallery[r["image_path"]][r["face_index"]])[0]
+                assert r["similarity"] == pytest.approx(float(vector @ normalize_rows(query)[0]), abs=1e-5)
+
+        reopened.merge_ann()
+        query = late[1]
+        assert as_tuples(reopened.search(query, top_k=1, nprobe=1))[0][:2] == ("late.jpg", 1)
+
+
+class TestClusterFaces:
+    """Test grouping faces into identities with blocked similarity and union-find."""
+
+    DIM = 64
+    IDENTITIES = {"anna": 6, "ben": 5, "cleo": 4, "dev": 2}
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        """Faces of known identities plus unrelated faces, added in shuffled order."""
+        rng = np.random.default_rng(0)
+        faces = []
+        for name, size in self.IDENTITIES.items():
+            center = normalize_rows(rng.normal(size=self.DIM))[0]
+            faces += [(f"{name}{i}.jpg", center + rng.normal(0, 0.03, self.DIM)) for i in range(size)]
+        faces += [(f"noise{i}.jpg", rng.normal(size=self.DIM)) for i in range(12)]
+        faces.append(("removed.jpg", faces[0][1]))
+
+        index = FaceIndex(tmp_path / "index")
+        for i in rng.permutation(len(faces)):
+            index.add(faces[i][0], [faces[i][1]])
+        index.remove("removed.jpg")  # alive rows are no longer contiguous
+        return index
+
+    @staticmethod
+    def _identity(image_path):
+        return re.sub(r"\d+\.jpg$", "", image_path)
+
+    @pytest.mark.parametrize("block_rows", [3, 7, 1000])
+    def test_groups_known_identities(self, index, block_rows):
+        rows, labels = cluster_faces(index, threshold=0.8, block_rows=block_rows)
+        assert len(rows) == len(index) == 29
+        assert "removed.jpg" not in {index.images[i] for i in index.rows["image_id"][rows]}
+
+        groups = {}
+        for row, label in zip(rows, labels):
+            groups.setdefault(int(label), set()).add(index.images[int(index.rows["image_id"][row])])
+        expected = [{f"{name}{i}.jpg" for i in range(size)} for name, size in self.IDENTITIES.items()]
+        expected += [{f"noise{i}.jpg"} for i in range(12)]
+        assert sorted(map(sorted, groups.values())) == sorted(map(sorted, expected))
+        assert sorted(set(labels.tolist())) == list(range(len(expected)))
+
+    @pytest.mark.parametrize("threshold", [0.2, 0.25, 0.3])
+    def test_matches_connected_components(self, index, threshold):
+        rows, labels = cluster_faces(index, threshold=threshold, block_rows=4)
+
+        # Breadth-first search over the full similarity graph
+        vectors = np.asarray(index.vectors[rows])
+        linked = vectors @ vectors.T >= threshold
+        expected = np.full(len(rows), -1)
+        for seed in range(len(rows)):
+            if expected[seed] >= 0:
+                continue
+            expected[seed] = seed
+            queue = [seed]
+            while queue:
+                for other in np.flatnonzero(linked[queue.pop()] & (expected < 0)):
+                    expected[other] = seed
+                    queue.append(other)
+
+        partition = {frozenset(np.flatnonzero(labels == label)) for label in set(labels.tolist())}
+        assert partition == {frozenset(np.flatnonzero(expected == seed)) for seed in set(expected.tolist())}
+        assert 1 < len(partition) < len(rows)
+
+    def test_summary_sizes_and_representatives(self, index):
+        rows, labels = cluster_faces(index, threshold=0.8, block_rows=5)
+
+        clusters = summarize_clusters(index, rows, labels, min_size=2)
+        assert [c["size"] for c in clusters] == [6, 5, 4, 2]
+        assert [c["id"] for c in clusters] == [0, 1, 2, 3]
+        assert [self._identity(c["representative"]["image_path"]) for c in clusters] == list(self.IDENTITIES)
+
+        for cluster in clusters:
+            members = [m["image_path"] for m in cluster["members"]]
+            assert len(members) == cluster["size"]
+            vectors = normalize_rows([index.vectors[index.image_rows(m)[0]] for m in members])
+            center = normalize_rows(vectors.sum(axis=0))[0]
+            similarities = vectors @ center
+            assert cluster["representative"]["image_path"] == members[int(np.argmax(similarities))]
+            assert [m["similarity"] for m in cluster["members"]] == pytest.approx(similarities.tolist(), abs=1e-5)
+
+        assert len(summarize_clusters(index, rows, labels, min_size=5)) == 2
+        assert len(summarize_clusters(index, rows, labels, min_size=1)) == 4 + 12
+        assert summarize_clusters(index, rows, labels, min_size=7) == []
@@ -0,0 +1,158 @@
+"""Benchmark thumbnail.py rasterization with --jobs 1 against --jobs N.
+
+Generates a synthetic deck (200 slides by default, each with a title and a
+few text boxes), then runs thumbnail.py on it with --no-cache so every run
+converts the whole deck to PDF and rasterizes every page. Each setting is
+timed over several repeats and the best wall time is reported.
+
+Requires LibreOffice (soffice) and poppler (pdftoppm, pdfinfo) on PATH.
+
+Usage:
+    python bench_thumbnail.py [--slides N] [--jobs N] [--repeat N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from thumbnail import DEFAULT_JOBS
+
+NS = (
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"'
+)
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PML = "application/vnd.openxmlformats-officedocument.presentationml"
+XML_HEAD = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+EMPTY_TREE = (
+    '<p:cSld><p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/>'
+    "</p:nvGrpSpPr><p:grpSpPr/>{shapes}</p:spTree></p:cSld>"
+)
+
+
+def _rels(items) -> str:
+    body = "".join(
+        f'<Relationship Id="{rid}" Type="{REL_NS}/{kind}" Target="{target}"/>'
+        for rid, kind, target in items
+    )
+    return (f'{XML_HEAD}<Relationships xmlns="http://schemas.openxmlformats.org/'
+            f'package/2006/relationships">{body}</Relationships>')
+
+
+def _text_box(shape_id: int, y: int, text: str, size: int) -> str:
+    return (
+        f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="TextBox {shape_id}"/>'
+        '<p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+        f'<p:spPr><a:xfrm><a:off x="457200" y="{y}"/><a:ext cx="8229600" cy="914400"/></a:xfrm>'
+        '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr>'
+        '<p:txBody><a:bodyPr/><a:lstStyle/>'
+        f'<a:p><a:r><a:rPr lang="en-US" sz="{size}"/><a:t>{text}</a:t></a:r></a:p></p:txBody></p:sp>'
+    )
+
+
+def _slide(number: int) -> str:
+    shapes = _text_box(2, 457200, f"Slide {number}", 4000)
+    shapes += "".join(
+        _text_box(3 + i, 1600200 + i * 1000000, f"Point {i + 1} on slide {number}", 2400)
+        for i in range(4)
+    )
+    return f"{XML_HEAD}<p:sld {NS}>{EMPTY_TREE.format(shapes=shapes)}</p:sld>"
+
+
+def make_deck(path: Path, slides: int) -> None:
+    overrides = [
+        ("/ppt/presentation.xml", f"{PML}.presentation.main+xml"),
+        ("/ppt/slideMasters/slideMaster1.xml", f"{PML}.slideMaster+xml"),
+        ("/ppt/slideLayouts/slideLayout1.xml", f"{PML}.slideLayout+xml"),
+        ("/ppt/theme/theme1.xml", "application/vnd.openxmlformats-officedocument.theme+xml"),
+    ] + [(f"/ppt/slides/slide{i}.xml", f"{PML}.slide+xml") for i in range(1, slides + 1)]
+    content_types = (
+        f'{XML_HEAD}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        + "".join(f'<Override PartName="{name}" ContentType="{kind}"/>' for name, kind in overrides)
+        + "</Types>"
+    )
+    slide_ids = "".join(f'<p:sldId id="{255 + i}" r:id="rId{i + 1}"/>' for i in range(1, slides + 1))
+    presentation = (
+        f"{XML_HEAD}<p:presentation {NS}>"
+        '<p:sldMasterIdLst><p:sldMasterId id="2147483648" r:id="rId1"/></p:sldMasterIdLst>'
+        f"<p:sldIdLst>{slide_ids}</p:sldIdLst>"
+        '<p:sldSz cx="9144000" cy="6858000"/><p:notesSz cx="6858000" cy="9144000"/></p:presentation>'
+    )
+    master = (
+        f"{XML_HEAD}<p:sldMaster {NS}>{EMPTY_TREE.format(shapes='')}"
+        '<p:clrMap bg1="lt1" tx1="dk1" bg2="lt2" tx2="dk2" accent1="accent1" accent2="accent2" '
+        'accent3="accent3" accent4="accent4" accent5="accent5" accent6="accent6" hlink="hlink" '
+        'folHlink="folHlink"/><p:sldLayoutIdLst><p:sldLayoutId id="2147483649" r:id="rId1"/>'
+        "</p:sldLayoutIdLst></p:sldMaster>"
+    )
+    layout = f"{XML_HEAD}<p:sldLayout {NS}>{EMPTY_TREE.format(shapes='')}</p:sldLayout>"
+    theme = (f'{XML_HEAD}<a:theme xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+             'name="Bench"><a:themeElements/></a:theme>')
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", content_types)
+        zf.writestr("_rels/.rels", _rels([("rId1", "officeDocument", "ppt/presentation.xml")]))
+        zf.writestr("ppt/presentation.xml", presentation)
+        zf.writestr("ppt/_rels/presentation.xml.rels", _rels(
+            [("rId1", "slideMaster", "slideMasters/slideMaster1.xml")]
+            + [(f"rId{i + 1}", "slide", f"slides/slide{i}.xml") for i in range(1, slides + 1)]
+            + [(f"rId{slides + 2}", "theme", "theme/theme1.xml")]
+        ))
+        zf.writestr("ppt/slideMasters/slideMaster1.xml", master)
+        zf.writestr("ppt/slideMasters/_rels/slideMaster1.xml.rels", _rels([
+            ("rId1", "slideLayout", "../slideLayouts/slideLayout1.xml"),
+            ("rId2", "theme", "../theme/theme1.xml"),
+        ]))
+        zf.writestr("ppt/slideLayouts/slideLayout1.xml", layout)
+        zf.writestr("ppt/slideLayouts/_rels/slideLayout1.xml.rels",
+                    _rels([("rId1", "slideMaster", "../slideMasters/slideMaster1.xml")]))
+        zf.writestr("ppt/theme/theme1.xml", theme)
+        for i in range(1, slides + 1):
+            zf.writestr(f"ppt/slides/slide{i}.xml", _slide(i))
+            zf.writestr(f"ppt/slides/_rels/slide{i}.xml.rels",
+                        _rels([("rId1", "slideLayout", "../slideLayouts/slideLayout1.xml")]))
+
+
+def time_run(deck: Path, out_dir: Path, jobs: int) -> float:
+    cmd = [
+        sys.executable, str(Path(__file__).parent / "thumbnail.py"),
+        str(deck), str(out_dir / f"jobs{jobs}"), "--no-cache", "--jobs", str(jobs),
+    ]
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark thumbnail.py --jobs")
+    parser.add_argument("--slides", type=int, default=200, help="Slides in the generated deck (default: 200)")
+    parser.add_argument("--jobs", type=int, default=max(2, DEFAULT_JOBS),
+                        help=f"Parallel setting to compare against --jobs 1 (default: {max(2, DEFAULT_JOBS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per setting; the best is reported (default: 3)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        deck = Path(tmp) / "bench.pptx"
+        make_deck(deck, args.slides)
+        print(f"{args.slides}-slide deck, {os.cpu_count()} CPUs, best of {args.repeat}")
+
+        # Warm-up so the first timed run does not pay LibreOffice's profile setup
+        time_run(deck, Path(tmp), 1)
+
+        best = {}
+        for jobs in (1, args.jobs):
+            best[jobs] = min(time_run(deck, Path(tmp), jobs) for _ in range(args.repeat))
+            print(f"--jobs {jobs}: {best[jobs]:.2f}s")
+        print(f"speedup: {best[1] / best[args.jobs]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark per-file XSD validation cost with and without the schema cache.
+
+Generates a deck (or document) with bench_validate.py's generators, unpacks
+it and times validate_against_xsd() three ways:
+- no cache: every part compiles its schema again, as before the cache
+- cold cache: first run in the process, each schema compiled once
+- warm cache: a second validator in the same process, nothing compiled
+
+Usage:
+    python bench_schema_cache.py [docx|pptx] [--size N]
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+import lxml.etree
+
+import validators.base
+from bench_validate import make_docx, make_pptx
+from validators import DOCXSchemaValidator, PPTXSchemaValidator, schema_cache
+
+
+def _compile_uncached(schema_path):
+    with open(schema_path, "rb") as xsd_file:
+        xsd_doc = lxml.etree.parse(xsd_file, base_url=str(Path(schema_path).resolve()))
+    return lxml.etree.XMLSchema(xsd_doc)
+
+
+def _time_xsd(validator_class, unpacked, packed):
+    validator = validator_class(unpacked, packed)
+    for xml_file in validator.xml_files:
+        validator.package.tree(xml_file)  # time schema work, not part parsing
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        ok = validator.validate_against_xsd()
+        elapsed = time.perf_counter() - start
+    return elapsed, len(validator.xml_files), ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compiled XSD schema cache")
+    parser.add_argument("kind", nargs="?", choices=["docx", "pptx"], default="pptx")
+    parser.add_argument("--size", type=int, help="Paragraphs (docx, default 2000) or slides (pptx, default 60)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        packed = Path(tmp) / f"bench.{args.kind}"
+        unpacked = Path(tmp) / "unpacked"
+        if args.kind == "docx":
+            size = args.size or 2000
+            make_docx(packed, size)
+            validator_class = DOCXSchemaValidator
+        else:
+            size = args.size or 60
+            make_pptx(packed, size)
+            validator_class = PPTXSchemaValidator
+        with zipfile.ZipFile(packed) as zf:
+            zf.extractall(unpacked)
+
+        cached_get_schema = validators.base.get_schema
+        validators.base.get_schema = _compile_uncached
+        try:
+            results = {"no cache": _time_xsd(validator_class, unpacked, packed)}
+        finally:
+            validators.base.get_schema = cached_get_schema
+
+        schema_cache.clear()
+        results["cold cache"] = _time_xsd(validator_class, unpacked, packed)
+        results["warm cache"] = _time_xsd(validator_class, unpacked, packed)
+
+    print(f"{args.kind}, size {size}:")
+    for label, (elapsed, parts, ok) in results.items():
+        print(f"  {label:<11} {elapsed:6.2f}s  {elapsed / parts * 1000:6.1f} ms/part  "
+              f"({parts} parts, passed={ok})")
+
+
+if __name__ == "__main__":
+    main()
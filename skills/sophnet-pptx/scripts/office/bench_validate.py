@@ -0,0 +1,207 @@
+"""Benchmark a full validate() run on a large synthetic document.
+
+Generates a DOCX with many paragraphs, or a PPTX with many slides, unpacks
+it, and times the schema validator's validate() over it, counting how many
+times lxml parsed a part of the package.
+
+Usage:
+    python bench_validate.py [docx|pptx] [--size N] [--jobs N] [--office DIR]
+
+To compare against another revision, export its office directory and point
+--office at it, e.g.:
+    git archive <rev> skills/sophnet-docx/scripts/office | tar -x -C /tmp/old
+    python bench_validate.py pptx --office /tmp/old/skills/sophnet-docx/scripts/office
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import sys
+import tempfile
+import time
+import zipfile
+from collections import Counter
+from pathlib import Path
+
+import lxml.etree
+
+XML_HEAD = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+WORD_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+PML_NS = (
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    f'xmlns:r="{REL_NS}" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"'
+)
+PML = "application/vnd.openxmlformats-officedocument.presentationml"
+EMPTY_TREE = (
+    '<p:cSld><p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/>'
+    "</p:nvGrpSpPr><p:grpSpPr/>{shapes}</p:spTree></p:cSld>"
+)
+
+
+def _rels(items) -> str:
+    body = "".join(
+        f'<Relationship Id="{rid}" Type="{REL_NS}/{kind}" Target="{target}"/>'
+        for rid, kind, target in items
+    )
+    return (f'{XML_HEAD}<Relationships xmlns="http://schemas.openxmlformats.org/'
+            f'package/2006/relationships">{body}</Relationships>')
+
+
+def _content_types(overrides) -> str:
+    return (
+        f'{XML_HEAD}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        + "".join(f'<Override PartName="{name}" ContentType="{kind}"/>' for name, kind in overrides)
+        + "</Types>"
+    )
+
+
+def make_docx(path: Path, paragraphs: int, runs: int = 6) -> None:
+    """Write a DOCX whose document.xml has `paragraphs` formatted paragraphs."""
+    body = "".join(
+        '<w:p><w:pPr><w:jc w:val="left"/></w:pPr>'
+        + "".join(
+            f'<w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">Paragraph {i} run {j} </w:t></w:r>'
+            for j in range(runs)
+        )
+        + f'<w:bookmarkStart w:id="{i}" w:name="p{i}"/><w:bookmarkEnd w:id="{i}"/></w:p>'
+        for i in range(paragraphs)
+    )
+    document = (f'{XML_HEAD}<w:document xmlns:w="{WORD_NS}" xmlns:r="{REL_NS}">'
+                f"<w:body>{body}<w:sectPr/></w:body></w:document>")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _content_types([(
+            "/word/document.xml",
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml",
+        )]))
+        zf.writestr("_rels/.rels", _rels([("rId1", "officeDocument", "word/document.xml")]))
+        zf.writestr("word/document.xml", document)
+        zf.writestr("word/_rels/document.xml.rels", _rels([]))
+
+
+def _slide(number: int, shapes: int) -> str:
+    tree = "".join(
+        f'<p:sp><p:nvSpPr><p:cNvPr id="{i + 2}" name="TextBox {i + 2}"/><p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+        f'<p:spPr><a:xfrm><a:off x="{i * 1000}" y="{i * 1000}"/><a:ext cx="100000" cy="100000"/></a:xfrm>'
+        '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr><p:txBody><a:bodyPr/><a:lstStyle/>'
+        f'<a:p><a:r><a:rPr lang="en-US"/><a:t>Slide {number} shape {i}</a:t></a:r></a:p></p:txBody></p:sp>'
+        for i in range(shapes)
+    )
+    return f"{XML_HEAD}<p:sld {PML_NS}>{EMPTY_TREE.format(shapes=tree)}</p:sld>"
+
+
+def make_pptx(path: Path, slides: int, shapes: int = 20) -> None:
+    """Write a PPTX with `slides` slides sharing one master, layout and theme."""
+    overrides = [
+        ("/ppt/presentation.xml", f"{PML}.presentation.main+xml"),
+        ("/ppt/slideMasters/slideMaster1.xml", f"{PML}.slideMaster+xml"),
+        ("/ppt/slideLayouts/slideLayout1.xml", f"{PML}.slideLayout+xml"),
+        ("/ppt/theme/theme1.xml", "application/vnd.openxmlformats-officedocument.theme+xml"),
+    ] + [(f"/ppt/slides/slide{i}.xml", f"{PML}.slide+xml") for i in range(1, slides + 1)]
+    slide_ids = "".join(f'<p:sldId id="{255 + i}" r:id="rId{i + 1}"/>' for i in range(1, slides + 1))
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _content_types(overrides))
+        zf.writestr("_rels/.rels", _rels([("rId1", "officeDocument", "ppt/presentation.xml")]))
+        zf.writestr("ppt/presentation.xml", (
+            f"{XML_HEAD}<p:presentation {PML_NS}>"
+            '<p:sldMasterIdLst><p:sldMasterId id="2147483648" r:id="rId1"/></p:sldMasterIdLst>'
+            f"<p:sldIdLst>{slide_ids}</p:sldIdLst>"
+            '<p:sldSz cx="9144000" cy="6858000"/><p:notesSz cx="6858000" cy="9144000"/></p:presentation>'
+        ))
+        zf.writestr("ppt/_rels/presentation.xml.rels", _rels(
+            [("rId1", "slideMaster", "slideMasters/slideMaster1.xml")]
+            + [(f"rId{i + 1}", "slide", f"slides/slide{i}.xml") for i in range(1, slides + 1)]
+            + [(f"rId{slides + 2}", "theme", "theme/theme1.xml")]
+        ))
+        zf.writestr("ppt/slideMasters/slideMaster1.xml", (
+            f"{XML_HEAD}<p:sldMaster {PML_NS}>{EMPTY_TREE.format(shapes='')}"
+            '<p:clrMap bg1="lt1" tx1="dk1" bg2="lt2" tx2="dk2" accent1="accent1" accent2="accent2" '
+            'accent3="accent3" accent4="accent4" accent5="accent5" accent6="accent6" hlink="hlink" '
+            'folHlink="folHlink"/><p:sldLayoutIdLst><p:sldLayoutId id="2147483649" r:id="rId1"/>'
+            "</p:sldLayoutIdLst></p:sldMaster>"
+        ))
+        zf.writestr("ppt/slideMasters/_rels/slideMaster1.xml.rels", _rels([
+            ("rId1", "slideLayout", "../slideLayouts/slideLayout1.xml"),
+            ("rId2", "theme", "../theme/theme1.xml"),
+        ]))
+        zf.writestr("ppt/slideLayouts/slideLayout1.xml",
+                    f"{XML_HEAD}<p:sldLayout {PML_NS}>{EMPTY_TREE.format(shapes='')}</p:sldLayout>")
+        zf.writestr("ppt/slideLayouts/_rels/slideLayout1.xml.rels",
+                    _rels([("rId1", "slideMaster", "../slideMasters/slideMaster1.xml")]))
+        zf.writestr("ppt/theme/theme1.xml", (
+            f'{XML_HEAD}<a:theme xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+            'name="Bench"><a:themeElements/></a:theme>'
+        ))
+        for i in range(1, slides + 1):
+            zf.writestr(f"ppt/slides/slide{i}.xml", _slide(i, shapes))
+            zf.writestr(f"ppt/slides/_rels/slide{i}.xml.rels",
+                        _rels([("rId1", "slideLayout", "../slideLayouts/slideLayout1.xml")]))
+
+
+@contextlib.contextmanager
+def count_parses(unpacked_dir: Path):
+    """Count lxml.etree.parse calls per file under `unpacked_dir`."""
+    counts = Counter()
+    original = lxml.etree.parse
+    root = unpacked_dir.resolve()
+
+    def counting_parse(source, *args, **kwargs):
+        path = Path(str(source)).resolve()
+        if path.is_relative_to(root):
+            counts[path.relative_to(root).as_posix()] += 1
+        return original(source, *args, **kwargs)
+
+    lxml.etree.parse = counting_parse
+    try:
+        yield counts
+    finally:
+        lxml.etree.parse = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark validate() on a large document")
+    parser.add_argument("kind", nargs="?", choices=["docx", "pptx"], default="pptx")
+    parser.add_argument("--size", type=int, help="Paragraphs (docx, default 20000) or slides (pptx, default 150)")
+    parser.add_argument("--jobs", type=int, default=1, help="Parallel XSD validation processes (default: 1)")
+    parser.add_argument("--office", type=Path, default=Path(__file__).parent,
+                        help="Office directory whose validators are benchmarked (default: this one)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(args.office.resolve()))
+    validators = importlib.import_module("validators")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        packed = Path(tmp) / f"bench.{args.kind}"
+        unpacked = Path(tmp) / "unpacked"
+        if args.kind == "docx":
+            size = args.size or 20000
+            make_docx(packed, size)
+            validator_class = validators.DOCXSchemaValidator
+        else:
+            size = args.size or 150
+            make_pptx(packed, size)
+            validator_class = validators.PPTXSchemaValidator
+        with zipfile.ZipFile(packed) as zf:
+            zf.extractall(unpacked)
+
+        try:
+            validator = validator_class(unpacked, packed, jobs=args.jobs)
+        except TypeError:
+            validator = validator_class(unpacked, packed)  # revisions without --jobs
+
+        with count_parses(unpacked) as counts, contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            ok = validator.validate()
+            elapsed = time.perf_counter() - start
+
+    print(f"{args.kind}, size {size}: {len(counts)} parts, {sum(counts.values())} parses "
+          f"(max {max(counts.values(), default=0)} per part)")
+    print(f"validate(): {elapsed:.2f}s, passed={ok}")
+
+
+if __name__ == "__main__":
+    main()
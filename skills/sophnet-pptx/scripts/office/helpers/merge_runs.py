@@ -10,7 +10,10 @@ Also:
 
 from pathlib import Path
 
-import defusedxml.minidom
+import lxml.etree
+
+XML_DECLARATION = b'<?xml version="1.0" encoding="UTF-8"?>'
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
 
 
 def merge_runs(input_dir: str) -> tuple[int, str]:
@@ -20,19 +23,19 @@ def merge_runs(input_dir: str) -> tuple[int, str]:
         return 0, f"Error: {doc_xml} not found"
 
     try:
-        dom = defusedxml.minidom.parseString(doc_xml.read_text(encoding="utf-8"))
-        root = dom.documentElement
+        tree = _parse(doc_xml)
+        root = tree.getroot()
 
         _remove_elements(root, "proofErr")
         _strip_run_rsid_attrs(root)
 
-        containers = {run.parentNode for run in _find_elements(root, "r")}
+        containers = dict.fromkeys(run.getparent() for run in root.iter("{*}r"))
 
         merge_count = 0
         for container in containers:
             merge_count += _merge_runs_in(container)
 
-        doc_xml.write_bytes(dom.toxml(encoding="UTF-8"))
+        doc_xml.write_bytes(_serialize(tree))
         return merge_count, f"Merged {merge_count} runs"
 
     except Exception as e:
@@ -41,66 +44,71 @@ def merge_runs(input_dir: str) -> tuple[int, str]:
 
 
 
-def _find_elements(root, tag: str) -> list:
-    results = []
+def _parse(xml_file: Path):
+    parser = lxml.etree.XMLParser(resolve_entities=False, no_network=True)
+    return lxml.etree.parse(str(xml_file), parser)
+
+
+def _serialize(tree) -> bytes:
+    return XML_DECLARATION + lxml.etree.tostring(
+        tree, encoding="UTF-8", xml_declaration=False
+    )
 
-    def traverse(node):
-        if node.nodeType == node.ELEMENT_NODE:
-            name = node.localName or node.tagName
-            if name == tag or name.endswith(f":{tag}"):
-                results.append(node)
-            for child in node.childNodes:
-                traverse(child)
 
-    traverse(root)
-    return results
+def _local_name(elem) -> str | None:
+    if not isinstance(elem.tag, str):
+        return None
+    return lxml.etree.QName(elem).localname
 
 
 def _get_child(parent, tag: str):
-    for child in parent.childNodes:
-        if child.nodeType == child.ELEMENT_NODE:
-            name = child.localName or child.tagName
-            if name == tag or name.endswith(f":{tag}"):
-                return child
+    for child in parent:
+        if _local_name(child) == tag:
+            return child
     return None
 
 
 def _get_children(parent, tag: str) -> list:
-    results = []
-    for child in parent.childNodes:
-        if child.nodeType == child.ELEMENT_NODE:
-            name = child.localName or child.tagName
-            if name == tag or name.endswith(f":{tag}"):
-                results.append(child)
-    return results
+    return [child for child in parent if _local_name(child) == tag]
 
 
 def _is_adjacent(elem1, elem2) -> bool:
-    node = elem1.nextSibling
-    while node:
-        if node == elem2:
-            return True
-        if node.nodeType == node.ELEMENT_NODE:
+    node = elem1
+    while node is not None:
+        if node.tail and node.tail.strip():
             return False
-        if node.nodeType == node.TEXT_NODE and node.data.strip():
+        node = node.getnext()
+        if node is elem2:
+            return True
+        if node is not None and isinstance(node.tag, str):
             return False
-        node = node.nextSibling
     return False
 
 
+def _remove(elem):
+    parent = elem.getparent()
+    if elem.tail:
+        previous = elem.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + elem.tail
+        else:
+            parent.text = (parent.text or "") + elem.tail
+    parent.remove(elem)
+
+
 
 
 def _remove_elements(root, tag: str):
-    for elem in _find_elements(root, tag):
-        if elem.parentNode:
-            elem.parentNode.removeChild(elem)
+    for elem in list(root.iter(f"{{*}}{tag}")):
+        if elem.getparent() is not None:
+            _remove(elem)
 
 
 def _strip_run_rsid_attrs(root):
-    for run in _find_elements(root, "r"):
-        for attr in list(run.attributes.values()):
-            if "rsid" in attr.name.lower():
-                run.removeAttribute(attr.name)
+    for run in root.iter("{*}r"):
+        for name in list(run.attrib):
+            if "rsid" in lxml.etree.QName(name).localname.lower():
+                del run.attrib[name]
 
 
 
@@ -109,12 +117,12 @@ def _merge_runs_in(container) -> int:
     merge_count = 0
     run = _first_child_run(container)
 
-    while run:
+    while run is not None:
         while True:
             next_elem = _next_element_sibling(run)
-            if next_elem and _is_run(next_elem) and _can_merge(run, next_elem):
+            if next_elem is not None and _is_run(next_elem) and _can_merge(run, next_elem):
                 _merge_run_content(run, next_elem)
-                container.removeChild(next_elem)
+                _remove(next_elem)
                 merge_count += 1
             else:
                 break
@@ -126,34 +134,32 @@ def _merge_runs_in(container) -> int:
 
 
 def _first_child_run(container):
-    for child in container.childNodes:
-        if child.nodeType == child.ELEMENT_NODE and _is_run(child):
+    for child in container:
+        if _is_run(child):
             return child
     return None
 
 
 def _next_element_sibling(node):
-    sibling = node.nextSibling
-    while sibling:
-        if sibling.nodeType == sibling.ELEMENT_NODE:
+    sibling = node.getnext()
+    while sibling is not None:
+        if isinstance(sibling.tag, str):
             return sibling
-        sibling = sibling.nextSibling
+        sibling = sibling.getnext()
     return None
 
 
 def _next_sibling_run(node):
-    sibling = node.nextSibling
-    while sibling:
-        if sibling.nodeType == sibling.ELEMENT_NODE:
-            if _is_run(sibling):
-                return sibling
-        sibling = sibling.nextSibling
+    sibling = node.getnext()
+    while sibling is not None:
+        if _is_run(sibling):
+            return sibling
+        sibling = sibling.getnext()
     return None
 
 
 def _is_run(node) -> bool:
-    name = node.localName or node.tagName
-    return name == "r" or name.endswith(":r")
+    return _local_name(node) == "r"
 
 
 def _can_merge(run1, run2) -> bool:
@@ -164,15 +170,31 @@ def _can_merge(run1, run2) -> bool:
         return False
     if rpr1 is None:
         return True
-    return rpr1.toxml() == rpr2.toxml()  
+    return _same_content(rpr1, rpr2)
+
+
+def _same_content(elem1, elem2) -> bool:
+    if not isinstance(elem1.tag, str) or not isinstance(elem2.tag, str):
+        return elem1.tag == elem2.tag and elem1.text == elem2.text
+    if (
+        elem1.tag != elem2.tag
+        or elem1.attrib.items() != elem2.attrib.items()
+        or (elem1.text or "") != (elem2.text or "")
+        or len(elem1) != len(elem2)
+    ):
+        return False
+    return all(
+        (child1.tail or "") == (child2.tail or "") and _same_content(child1, child2)
+        for child1, child2 in zip(elem1, elem2)
+    )
 
 
 def _merge_run_content(target, source):
-    for child in list(source.childNodes):
-        if child.nodeType == child.ELEMENT_NODE:
-            name = child.localName or child.tagName
-            if name != "rPr" and not name.endswith(":rPr"):
-                target.appendChild(child)
+    for child in list(source):
+        name = _local_name(child)
+        if name is not None and name != "rPr":
+            child.tail = None
+            target.append(child)
 
 
 def _consolidate_text(run):
@@ -182,18 +204,12 @@ def _consolidate_text(run):
         curr, prev = t_elements[i], t_elements[i - 1]
 
         if _is_adjacent(prev, curr):
-            prev_text = prev.firstChild.data if prev.firstChild else ""
-            curr_text = curr.firstChild.data if curr.firstChild else ""
-            merged = prev_text + curr_text
-
-            if prev.firstChild:
-                prev.firstChild.data = merged
-            else:
-                prev.appendChild(run.ownerDocument.createTextNode(merged))
+            merged = (prev.text or "") + (curr.text or "")
+            prev.text = merged
 
             if merged.startswith(" ") or merged.endswith(" "):
-                prev.setAttribute("xml:space", "preserve")
-            elif prev.hasAttribute("xml:space"):
-                prev.removeAttribute("xml:space")
+                prev.set(XML_SPACE, "preserve")
+            elif XML_SPACE in prev.attrib:
+                del prev.attrib[XML_SPACE]
 
-            run.removeChild(curr)
+            _remove(curr)
@@ -14,9 +14,10 @@ import xml.etree.ElementTree as ET
 import zipfile
 from pathlib import Path
 
-import defusedxml.minidom
+import lxml.etree
 
 WORD_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+XML_DECLARATION = b'<?xml version="1.0" encoding="UTF-8"?>'
 
 
 def simplify_redlines(input_dir: str) -> tuple[int, str]:
@@ -26,18 +27,22 @@ def simplify_redlines(input_dir: str) -> tuple[int, str]:
         return 0, f"Error: {doc_xml} not found"
 
     try:
-        dom = defusedxml.minidom.parseString(doc_xml.read_text(encoding="utf-8"))
-        root = dom.documentElement
+        parser = lxml.etree.XMLParser(resolve_entities=False, no_network=True)
+        tree = lxml.etree.parse(str(doc_xml), parser)
+        root = tree.getroot()
 
         merge_count = 0
 
-        containers = _find_elements(root, "p") + _find_elements(root, "tc")
+        containers = list(root.iter("{*}p")) + list(root.iter("{*}tc"))
 
         for container in containers:
             merge_count += _merge_tracked_changes_in(container, "ins")
             merge_count += _merge_tracked_changes_in(container, "del")
 
-        doc_xml.write_bytes(dom.toxml(encoding="UTF-8"))
+        doc_xml.write_bytes(
+            XML_DECLARATION
+            + lxml.etree.tostring(tree, encoding="UTF-8", xml_declaration=False)
+        )
         return merge_count, f"Simplified {merge_count} tracked changes"
 
     except Exception as e:
@@ -47,11 +52,7 @@ def simplify_redlines(input_dir: str) -> tuple[int, str]:
 def _merge_tracked_changes_in(container, tag: str) -> int:
     merge_count = 0
 
-    tracked = [
-        child
-        for child in container.childNodes
-        if child.nodeType == child.ELEMENT_NODE and _is_element(child, tag)
-    ]
+    tracked = [child for child in container if _is_element(child, tag)]
 
     if len(tracked) < 2:
         return 0
@@ -63,7 +64,7 @@ def _merge_tracked_changes_in(container, tag: str) -> int:
 
         if _can_merge_tracked(curr, next_elem):
             _merge_tracked_content(curr, next_elem)
-            container.removeChild(next_elem)
+            _remove(next_elem)
             tracked.pop(i + 1)
             merge_count += 1
         else:
@@ -73,54 +74,52 @@ def _merge_tracked_changes_in(container, tag: str) -> int:
 
 
 def _is_element(node, tag: str) -> bool:
-    name = node.localName or node.tagName
-    return name == tag or name.endswith(f":{tag}")
+    return isinstance(node.tag, str) and lxml.etree.QName(node).localname == tag
 
 
 def _get_author(elem) -> str:
-    author = elem.getAttribute("w:author")
+    author = elem.get(f"{{{WORD_NS}}}author")
     if not author:
-        for attr in elem.attributes.values():
-            if attr.localName == "author" or attr.name.endswith(":author"):
-                return attr.value
-    return author
+        for name, value in elem.attrib.items():
+            if lxml.etree.QName(name).localname == "author":
+                return value
+    return author or ""
 
 
 def _can_merge_tracked(elem1, elem2) -> bool:
     if _get_author(elem1) != _get_author(elem2):
         return False
 
-    node = elem1.nextSibling
-    while node and node != elem2:
-        if node.nodeType == node.ELEMENT_NODE:
+    node = elem1
+    while node is not None and node is not elem2:
+        if node.tail and node.tail.strip():
             return False
-        if node.nodeType == node.TEXT_NODE and node.data.strip():
+        node = node.getnext()
+        if node is not None and node is not elem2 and isinstance(node.tag, str):
             return False
-        node = node.nextSibling
 
     return True
 
 
 def _merge_tracked_content(target, source):
-    while source.firstChild:
-        child = source.firstChild
-        source.removeChild(child)
-        target.appendChild(child)
-
-
-def _find_elements(root, tag: str) -> list:
-    results = []
+    if source.text:
+        if len(target):
+            target[-1].tail = (target[-1].tail or "") + source.text
+        else:
+            target.text = (target.text or "") + source.text
+    for child in list(source):
+        target.append(child)
 
-    def traverse(node):
-        if node.nodeType == node.ELEMENT_NODE:
-            name = node.localName or node.tagName
-            if name == tag or name.endswith(f":{tag}"):
-                results.append(node)
-            for child in node.childNodes:
-                traverse(child)
 
-    traverse(root)
-    return results
+def _remove(elem):
+    parent = elem.getparent()
+    if elem.tail:
+        previous = elem.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + elem.tail
+        else:
+            parent.text = (parent.text or "") + elem.tail
+    parent.remove(elem)
 
 
 def get_tracked_change_authors(doc_xml_path: Path) -> dict[str, int]:
@@ -1,6 +1,7 @@
 """Unpack Office files (DOCX, PPTX, XLSX) for editing.
 
-Extracts the ZIP archive, pretty-prints XML files, and optionally:
+Streams each part out of the ZIP archive once, pretty-printing XML files in
+memory on the way, and optionally:
 - Merges adjacent runs with identical formatting (DOCX only)
 - Simplifies adjacent tracked changes from same author (DOCX only)
 
@@ -23,6 +24,9 @@ import defusedxml.minidom
 from helpers.merge_runs import merge_runs as do_merge_runs
 from helpers.simplify_redlines import simplify_redlines as do_simplify_redlines
 
+XML_SUFFIXES = (".xml", ".rels")
+DOCUMENT_XML = "word/document.xml"
+
 SMART_QUOTE_REPLACEMENTS = {
     "\u201c": "&#x201C;",  
     "\u201d": "&#x201D;",  
@@ -49,15 +53,29 @@ def unpack(
 
     try:
         output_path.mkdir(parents=True, exist_ok=True)
+        output_root = output_path.resolve()
+
+        run_helpers = suffix == ".docx" and (simplify_redlines or merge_runs)
+        xml_count = 0
 
         with zipfile.ZipFile(input_path, "r") as zf:
-            zf.extractall(output_path)
+            for info in zf.infolist():
+                if info.is_dir() or not info.filename.endswith(XML_SUFFIXES):
+                    zf.extract(info, output_path)
+                    continue
+
+                target = (output_path / info.filename).resolve()
+                if not target.is_relative_to(output_root):
+                    continue
 
-        xml_files = list(output_path.rglob("*.xml")) + list(output_path.rglob("*.rels"))
-        for xml_file in xml_files:
-            _pretty_print_xml(xml_file)
+                content = _pretty_print_xml(zf.read(info))
+                if not (run_helpers and info.filename == DOCUMENT_XML):
+                    content = _escape_smart_quotes(content)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(content)
+                xml_count += 1
 
-        message = f"Unpacked {input_file} ({len(xml_files)} XML files)"
+        message = f"Unpacked {input_file} ({xml_count} XML files)"
 
         if suffix == ".docx":
             if simplify_redlines:
@@ -68,8 +86,9 @@ def unpack(
                 merge_count, _ = do_merge_runs(str(output_path))
                 message += f", merged {merge_count} runs"
 
-        for xml_file in xml_files:
-            _escape_smart_quotes(xml_file)
+        document_xml = output_path / DOCUMENT_XML
+        if run_helpers and document_xml.exists():
+            document_xml.write_bytes(_escape_smart_quotes(document_xml.read_bytes()))
 
         return None, message
 
@@ -79,23 +98,22 @@ def unpack(
         return None, f"Error unpacking: {e}"
 
 
-def _pretty_print_xml(xml_file: Path) -> None:
+def _pretty_print_xml(content: bytes) -> bytes:
     try:
-        content = xml_file.read_text(encoding="utf-8")
-        dom = defusedxml.minidom.parseString(content)
-        xml_file.write_bytes(dom.toprettyxml(indent="  ", encoding="utf-8"))
+        dom = defusedxml.minidom.parseString(content.decode("utf-8"))
+        return dom.toprettyxml(indent="  ", encoding="utf-8")
     except Exception:
-        pass  
+        return content
 
 
-def _escape_smart_quotes(xml_file: Path) -> None:
+def _escape_smart_quotes(content: bytes) -> bytes:
     try:
-        content = xml_file.read_text(encoding="utf-8")
+        text = content.decode("utf-8")
         for char, entity in SMART_QUOTE_REPLACEMENTS.items():
-            content = content.replace(char, entity)
-        xml_file.write_text(content, encoding="utf-8")
+            text = text.replace(char, entity)
+        return text.encode("utf-8")
     except Exception:
-        pass
+        return content
 
 
 if __name__ == "__main__":
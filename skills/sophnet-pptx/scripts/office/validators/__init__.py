@@ -3,12 +3,14 @@ Validation modules for Word document processing.
 """
 
 from .base import BaseSchemaValidator
+from .baseline import OriginalBaseline
 from .docx import DOCXSchemaValidator
 from .pptx import PPTXSchemaValidator
 from .redlining import RedliningValidator
 
 __all__ = [
     "BaseSchemaValidator",
+    "OriginalBaseline",
     "DOCXSchemaValidator",
     "PPTXSchemaValidator",
     "RedliningValidator",
@@ -2,12 +2,19 @@
 Base validator with common validation logic for document files.
 """
 
+import multiprocessing
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import defusedxml.minidom
 import lxml.etree
 
+from .baseline import OriginalBaseline
+from .package import ParsedPackage
+from .schema_cache import get_schema, preload
+
 
 class BaseSchemaValidator:
 
@@ -91,10 +98,13 @@ class BaseSchemaValidator:
         "http://www.w3.org/XML/1998/namespace",
     }
 
-    def __init__(self, unpacked_dir, original_file=None, verbose=False):
+    def __init__(self, unpacked_dir, original_file=None, verbose=False, baseline=None, jobs=1):
         self.unpacked_dir = Path(unpacked_dir).resolve()
         self.original_file = Path(original_file) if original_file else None
         self.verbose = verbose
+        self._baseline = baseline
+        self.jobs = jobs
+        self.package = ParsedPackage(self.unpacked_dir)
 
         self.schemas_dir = Path(__file__).parent.parent / "schemas"
 
@@ -106,6 +116,12 @@ class BaseSchemaValidator:
         if not self.xml_files:
             print(f"Warning: No XML files found in {self.unpacked_dir}")
 
+    @property
+    def baseline(self):
+        if self._baseline is None and self.original_file is not None:
+            self._baseline = OriginalBaseline(self.original_file)
+        return self._baseline
+
     def validate(self):
         raise NotImplementedError("Subclasses must implement the validate method")
 
@@ -134,6 +150,7 @@ class BaseSchemaValidator:
 
                 if modified:
                     xml_file.write_bytes(dom.toxml(encoding="UTF-8"))
+                    self.package.invalidate(xml_file)
 
             except Exception:
                 pass
@@ -145,7 +162,7 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                lxml.etree.parse(str(xml_file))
+                self.package.tree(xml_file)
             except lxml.etree.XMLSyntaxError as e:
                 errors.append(
                     f"  {xml_file.relative_to(self.unpacked_dir)}: "
@@ -172,7 +189,7 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self.package.root(xml_file)
                 declared = set(root.nsmap.keys()) - {None}  
 
                 for attr_val in [
@@ -202,16 +219,18 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self.package.root(xml_file)
                 file_ids = {}  
 
-                mc_elements = root.xpath(
-                    ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
-                )
-                for elem in mc_elements:
-                    elem.getparent().remove(elem)
+                mc_elements = {
+                    elem
+                    for alternate in root.iter(f"{{{self.MC_NAMESPACE}}}AlternateContent")
+                    for elem in alternate.iter()
+                }
 
                 for elem in root.iter():
+                    if elem in mc_elements:
+                        continue
                     tag = (
                         elem.tag.split("}")[-1].lower()
                         if "}" in elem.tag
@@ -289,7 +308,7 @@ class BaseSchemaValidator:
     def validate_file_references(self):
         errors = []
 
-        rels_files = list(self.unpacked_dir.rglob("*.rels"))
+        rels_files = [f for f in self.package.files if f.name.endswith(".rels")]
 
         if not rels_files:
             if self.verbose:
@@ -297,10 +316,9 @@ class BaseSchemaValidator:
             return True
 
         all_files = []
-        for file_path in self.unpacked_dir.rglob("*"):
+        for file_path in self.package.files:
             if (
-                file_path.is_file()
-                and file_path.name != "[Content_Types].xml"
+                file_path.name != "[Content_Types].xml"
                 and not file_path.name.endswith(".rels")
             ):  
                 all_files.append(file_path.resolve())
@@ -314,17 +332,12 @@ class BaseSchemaValidator:
 
         for rels_file in rels_files:
             try:
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-
                 rels_dir = rels_file.parent
 
                 referenced_files = set()
                 broken_refs = []
 
-                for rel in rels_root.findall(
-                    ".//ns:Relationship",
-                    namespaces={"ns": self.PACKAGE_RELATIONSHIPS_NAMESPACE},
-                ):
+                for rel in self.package.relationships(rels_file):
                     target = rel.get("Target")
                     if target and not target.startswith(
                         ("http", "mailto:")
@@ -391,19 +404,15 @@ class BaseSchemaValidator:
             if xml_file.suffix == ".rels":
                 continue
 
-            rels_dir = xml_file.parent / "_rels"
-            rels_file = rels_dir / f"{xml_file.name}.rels"
+            rels_file = self.package.rels_file(xml_file)
 
             if not rels_file.exists():
                 continue
 
             try:
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
                 rid_to_type = {}
 
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
+                for rel in self.package.relationships(rels_file):
                     rid = rel.get("Id")
                     rel_type = rel.get("Type", "")
                     if rid:
@@ -418,7 +427,7 @@ class BaseSchemaValidator:
                         )
                         rid_to_type[rid] = type_name
 
-                xml_root = lxml.etree.parse(str(xml_file)).getroot()
+                xml_root = self.package.root(xml_file)
 
                 r_ns = self.OFFICE_RELATIONSHIPS_NAMESPACE
                 rid_attrs_to_check = ["id", "embed", "link"]
@@ -498,7 +507,7 @@ class BaseSchemaValidator:
             return False
 
         try:
-            root = lxml.etree.parse(str(content_types_file)).getroot()
+            root = self.package.root(content_types_file)
             declared_parts = set()
             declared_extensions = set()
 
@@ -538,8 +547,7 @@ class BaseSchemaValidator:
                 "emf": "image/x-emf",
             }
 
-            all_files = list(self.unpacked_dir.rglob("*"))
-            all_files = [f for f in all_files if f.is_file()]
+            all_files = self.package.files
 
             for xml_file in self.xml_files:
                 path_str = str(xml_file.relative_to(self.unpacked_dir)).replace(
@@ -553,7 +561,7 @@ class BaseSchemaValidator:
                     continue
 
                 try:
-                    root_tag = lxml.etree.parse(str(xml_file)).getroot().tag
+                    root_tag = self.package.root(xml_file).tag
                     root_name = root_tag.split("}")[-1] if "}" in root_tag else root_tag
 
                     if root_name in declarable_roots and path_str not in declared_parts:
@@ -622,7 +630,7 @@ class BaseSchemaValidator:
             if verbose:
                 relative_path = xml_file.relative_to(unpacked_dir)
                 print(f"FAILED - {relative_path}: {len(new_errors)} new error(s)")
-                for error in list(new_errors)[:3]:
+                for error in sorted(new_errors)[:3]:
                     truncated = error[:250] + "..." if len(error) > 250 else error
                     print(f"  - {truncated}")
             return False, new_errors
@@ -639,11 +647,10 @@ class BaseSchemaValidator:
         valid_count = 0
         skipped_count = 0
 
-        for xml_file in self.xml_files:
+        for xml_file, (is_valid, new_file_errors) in zip(
+            self.xml_files, self._validate_files_against_xsd()
+        ):
             relative_path = str(xml_file.relative_to(self.unpacked_dir))
-            is_valid, new_file_errors = self.validate_file_against_xsd(
-                xml_file, verbose=False
-            )
 
             if is_valid is None:
                 skipped_count += 1
@@ -657,7 +664,7 @@ class BaseSchemaValidator:
                 continue
 
             new_errors.append(f"  {relative_path}: {len(new_file_errors)} new error(s)")
-            for error in list(new_file_errors)[:3]:  
+            for error in sorted(new_file_errors)[:3]:  
                 new_errors.append(
                     f"    - {error[:250]}..." if len(error) > 250 else f"    - {error}"
                 )
@@ -682,6 +689,31 @@ class BaseSchemaValidator:
                 print("\nPASSED - No new XSD validation errors introduced")
             return True
 
+    def _validate_files_against_xsd(self):
+        if self.jobs <= 1 or len(self.xml_files) < 2:
+            return [
+                self.validate_file_against_xsd(xml_file, verbose=False)
+                for xml_file in self.xml_files
+            ]
+
+        jobs = min(self.jobs, len(self.xml_files))
+        # Compile the schemas once here; forked workers inherit the cache
+        preload({path for path in map(self._get_schema_path, self.xml_files) if path})
+        fork = multiprocessing.get_context("fork") if sys.platform.startswith("linux") else None
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=fork,
+            initializer=_init_xsd_worker,
+            initargs=(type(self), self.unpacked_dir, self.original_file),
+        ) as executor:
+            return list(
+                executor.map(
+                    _validate_file_in_worker,
+                    self.xml_files,
+                    chunksize=max(1, len(self.xml_files) // (jobs * 4)),
+                )
+            )
+
     def _get_schema_path(self, xml_file):
         if xml_file.name in self.SCHEMA_MAPPINGS:
             return self.schemas_dir / self.SCHEMA_MAPPINGS[xml_file.name]
@@ -753,63 +785,43 @@ class BaseSchemaValidator:
             return None, None  
 
         try:
-            with open(schema_path, "rb") as xsd_file:
-                parser = lxml.etree.XMLParser()
-                xsd_doc = lxml.etree.parse(
-                    xsd_file, parser=parser, base_url=str(schema_path)
-                )
-                schema = lxml.etree.XMLSchema(xsd_doc)
-
-            with open(xml_file, "r") as f:
-                xml_doc = lxml.etree.parse(f)
-
-            xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
-            xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
+            xml_doc = self.package.tree(xml_file)
 
-            relative_path = xml_file.relative_to(base_path)
-            if (
-                relative_path.parts
-                and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
-            ):
-                xml_doc = self._clean_ignorable_namespaces(xml_doc)
-
-            if schema.validate(xml_doc):
-                return True, set()
-            else:
-                errors = set()
-                for error in schema.error_log:
-                    errors.add(error.message)
-                return False, errors
+            return self._validate_doc_xsd(
+                xml_doc, xml_file.relative_to(base_path), schema_path
+            )
 
         except Exception as e:
             return False, {str(e)}
 
-    def _get_original_file_errors(self, xml_file):
-        if self.original_file is None:
-            return set()
+    def _validate_doc_xsd(self, xml_doc, relative_path, schema_path):
+        schema = get_schema(schema_path)
 
-        import tempfile
-        import zipfile
+        xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
+        xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
 
-        xml_file = Path(xml_file).resolve()
-        unpacked_dir = self.unpacked_dir.resolve()
-        relative_path = xml_file.relative_to(unpacked_dir)
+        if (
+            relative_path.parts
+            and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
+        ):
+            xml_doc = self._clean_ignorable_namespaces(xml_doc)
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                zip_ref.extractall(temp_path)
+        if schema.validate(xml_doc):
+            return True, set()
+        else:
+            errors = set()
+            for error in schema.error_log:
+                errors.add(error.message)
+            return False, errors
 
-            original_xml_file = temp_path / relative_path
+    def _get_original_file_errors(self, xml_file):
+        if self.baseline is None:
+            return set()
 
-            if not original_xml_file.exists():
-                return set()
+        xml_file = Path(xml_file).resolve()
+        relative_path = xml_file.relative_to(self.unpacked_dir.resolve())
 
-            is_valid, errors = self._validate_single_file_xsd(
-                original_xml_file, temp_path
-            )
-            return errors if errors else set()
+        return self.baseline.xsd_errors(relative_path.as_posix(), self)
 
     def _remove_template_tags_from_text_nodes(self, xml_doc):
         warnings = []
@@ -843,5 +855,17 @@ class BaseSchemaValidator:
         return lxml.etree.ElementTree(xml_copy), warnings
 
 
+_worker_validator = None
+
+
+def _init_xsd_worker(validator_class, unpacked_dir, original_file):
+    global _worker_validator
+    _worker_validator = validator_class(unpacked_dir, original_file)
+
+
+def _validate_file_in_worker(xml_file):
+    return _worker_validator.validate_file_against_xsd(xml_file, verbose=False)
+
+
 if __name__ == "__main__":
     raise RuntimeError("This module should not be run directly.")
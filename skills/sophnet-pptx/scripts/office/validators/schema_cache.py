@@ -0,0 +1,49 @@
+"""
+Process-wide cache of compiled XSD schemas shared by all validators.
+
+libxml2 cannot serialize a compiled schema, so the cache cannot be
+pre-warmed from disk. preload() compiles schemas ahead of time instead; the
+validators call it before forking --jobs workers, which then inherit the
+compiled schemas rather than each compiling their own.
+"""
+
+import threading
+from pathlib import Path
+
+import lxml.etree
+
+_schemas = {}
+_lock = threading.Lock()
+
+
+def get_schema(schema_path):
+    schema_path = Path(schema_path).resolve()
+    schema = _schemas.get(schema_path)
+    if schema is not None:
+        return schema
+
+    with _lock:
+        schema = _schemas.get(schema_path)
+        if schema is None:
+            with open(schema_path, "rb") as xsd_file:
+                parser = lxml.etree.XMLParser()
+                xsd_doc = lxml.etree.parse(
+                    xsd_file, parser=parser, base_url=str(schema_path)
+                )
+            schema = lxml.etree.XMLSchema(xsd_doc)
+            _schemas[schema_path] = schema
+    return schema
+
+
+def preload(schema_paths):
+    for schema_path in schema_paths:
+        get_schema(schema_path)
+
+
+def clear():
+    with _lock:
+        _schemas.clear()
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
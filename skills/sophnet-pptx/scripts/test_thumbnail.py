@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pytest>=8.0.0",
+#     "pillow>=10.0.0",
+#     "defusedxml>=0.7.0",
+# ]
+# ///
+"""
+Tests for thumbnail rasterization and the rendered slide cache
+
+Run with: uv run pytest test_thumbnail.py -v
+"""
+
+import os
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import thumbnail
+from bench_thumbnail import make_deck
+from thumbnail import _split_pages, convert_to_images, get_slide_info, render_with_cache
+
+# Stand-ins for soffice/pdfinfo/pdftoppm. The "PDF" is one line per page, and
+# pdftoppm names pages like the real one: zero-padded to the digits of the
+# total page count, whatever -f/-l range it was asked for. FAKE_PDFTOPPM_PAD=0
+# drops the padding, so only a numeric sort gets slide-10 after slide-9.
+# Given a real deck, soffice writes each visible slide's text as its page and,
+# like LibreOffice, fills a slide number field with the slide's position in
+# the converted deck, hidden slides included.
+FAKE_SOFFICE = """#!{python}
+import re
+import sys
+import zipfile
+from pathlib import Path
+args = sys.argv[1:]
+outdir, src = Path(args[args.index("--outdir") + 1]), Path(args[-1])
+if zipfile.is_zipfile(src):
+    with zipfile.ZipFile(src) as zf:
+        rels = zf.read("ppt/_rels/presentation.xml.rels").decode()
+        targets = dict(re.findall(r'Id="(\\w+)"[^>]*Target="(slides/[^"]+)"', rels))
+        pres = zf.read("ppt/presentation.xml").decode()
+        pages = []
+        for number, (attrs, rid) in enumerate(re.findall(r'<p:sldId([^>]*)r:id="(\\w+)"', pres), 1):
+            if 'show="0"' in attrs:
+                continue
+            xml = zf.read("ppt/" + targets[rid]).decode()
+            text = re.findall(r"<a:t>([^<]*)</a:t>", xml)[0]
+            pages.append(f"{{text}} #{{number}}" if 'type="slidenum"' in xml else text)
+else:
+    pages = [f"page {{i}}" for i in range(1, int(src.read_text()) + 1)]
+(outdir / (src.stem + ".pdf")).write_text("\\n".join(pages))
+"""
+FAKE_PDFINFO = """#!{python}
+import sys
+from pathlib import Path
+print(f"Pages:          {{len(Path(sys.argv[1]).read_text().splitlines())}}")
+"""
+FAKE_PDFTOPPM = """#!{python}
+import os
+import sys
+from pathlib import Path
+args = sys.argv[1:]
+pages = Path(args[-2]).read_text().splitlines()
+first = int(args[args.index("-f") + 1]) if "-f" in args else 1
+last = int(args[args.index("-l") + 1]) if "-l" in args else len(pages)
+width = len(str(len(pages))) if os.environ.get("FAKE_PDFTOPPM_PAD", "1") == "1" else 0
+for i in range(first, last + 1):
+    Path(f"{{args[-1]}}-{{i:0{{width}}d}}.jpg" if width else f"{{args[-1]}}-{{i}}.jpg").write_text(pages[i - 1])
+"""
+
+
+SLIDE_NUMBER = '<a:fld id="{00000000-0000-0000-0000-000000000001}" type="slidenum"/>'
+
+
+@pytest.fixture
+def fake_tools(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name, source in [("soffice", FAKE_SOFFICE), ("pdfinfo", FAKE_PDFINFO), ("pdftoppm", FAKE_PDFTOPPM)]:
+        tool = bin_dir / name
+        tool.write_text(source.format(python=sys.executable))
+        tool.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+    monkeypatch.setattr(thumbnail, "get_pool", lambda: None)
+    return tmp_path
+
+
+def edit_deck(source, target, replacements):
+    """Copy a deck, applying (old, new) text replacements per part."""
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(target, "w") as zout:
+        for item in zin.infolist():
+            data = zin.read(item).decode()
+            for old, new in replacements.get(item.filename, []):
+                assert old in data
+                data = data.replace(old, new)
+            zout.writestr(item, data)
+    return target
+
+
+class TestSplitPages:
+    """Test how pages are divided between pdftoppm runs."""
+
+    @pytest.mark.parametrize("page_count", [1, 2, 3, 7, 9, 10, 11, 99, 100, 101, 200])
+    @pytest.mark.parametrize("jobs", [2, 3, 4, 8, 16, 250])
+    def test_covers_every_page_once(self, page_count, jobs):
+        ranges = _split_pages(page_count, jobs)
+        assert len(ranges) == min(jobs, page_count)
+        pages = [page for first, last in ranges for page in range(first, last + 1)]
+        assert pages == list(range(1, page_count + 1))
+        assert all(first <= last for first, last in ranges)
+
+    def test_balanced(self):
+        sizes = [last - first + 1 for first, last in _split_pages(200, 3)]
+        assert max(sizes) - min(sizes) <= 1
+
+    @pytest.mark.parametrize("page_count, jobs", [(None, 4), (0, 4), (50, 1), (50, 0)])
+    def test_single_run(self, page_count, jobs):
+        assert _split_pages(page_count, jobs) == [None]
+
+
+class TestConvertToImages:
+    """Test page ordering across parallel pdftoppm range runs."""
+
+    @pytest.mark.parametrize("page_count", [9, 12, 105])
+    @pytest.mark.parametrize("jobs", [1, 2, 4])
+    @pytest.mark.parametrize("pad", ["1", "0"])
+    def test_pages_in_numeric_order(self, fake_tools, monkeypatch, page_count, jobs, pad):
+        monkeypatch.setenv("FAKE_PDFTOPPM_PAD", pad)
+        deck = fake_tools / "deck.pptx"
+        deck.write_text(str(page_count))
+        out_dir = fake_tools / f"out{jobs}"
+        out_dir.mkdir()
+
+        images = convert_to_images(deck, out_dir, jobs)
+
+        assert [image.read_text() for image in images] == [f"page {i}" for i in range(1, page_count + 1)]
+
+
+class TestRenderWithCache:
+    """Test which slides are re-rendered and what ends up in the cache."""
+
+    @pytest.fixture
+    def render(self, fake_tools):
+        runs = []
+
+        def render(deck, cache_dir=fake_tools / "cache"):
+            temp_dir = fake_tools / f"run{len(runs)}"
+            temp_dir.mkdir()
+            images = render_with_cache(deck, get_slide_info(deck), temp_dir, cache_dir)
+            runs.append(temp_dir)
+            return [image.read_text() for image in images]
+
+        return render
+
+    @pytest.fixture
+    def numbered_deck(self, fake_tools):
+        """Four slides; slide 2 is hidden and slide 3 shows its slide number."""
+        plain = fake_tools / "plain.pptx"
+        make_deck(plain, 4)
+        return edit_deck(plain, fake_tools / "numbered.pptx", {
+            "ppt/presentation.xml": [('<p:sldId id="257"', '<p:sldId show="0" id="257"')],
+            "ppt/slides/slide3.xml": [("</p:spTree>", f"{SLIDE_NUMBER}</p:spTree>")],
+        })
+
+    def test_only_changed_slides_rerendered(self, render, fake_tools):
+        deck = fake_tools / "deck.pptx"
+        make_deck(deck, 4)
+        assert render(deck) == ["Slide 1", "Slide 2", "Slide 3", "Slide 4"]
+
+        edited = edit_deck(deck, fake_tools / "edited.pptx", {
+            "ppt/slides/slide2.xml": [("<a:t>Slide 2</a:t>", "<a:t>Slide 2 edited</a:t>")],
+        })
+        assert render(edited) == ["Slide 1", "Slide 2 edited", "Slide 3", "Slide 4"]
+        subdeck = fake_tools / "run1" / "render" / "edited.pdf"
+        assert subdeck.read_text() == "Slide 2 edited"
+
+    def test_numbered_slide_rendered_in_place(self, render, numbered_deck, fake_tools):
+        assert render(numbered_deck) == ["Slide 1", "Slide 3 #3", "Slide 4"]
+
+        edited = edit_deck(numbered_deck, fake_tools / "edited.pptx", {
+            "ppt/slides/slide3.xml": [("<a:t>Slide 3</a:t>", "<a:t>Slide 3 edited</a:t>")],
+        })
+        assert render(edited) == ["Slide 1", "Slide 3 edited #3", "Slide 4"]
+
+    def test_numbered_slide_keyed_on_deck_position(self, render, numbered_deck, fake_tools):
+        render(numbered_deck)
+
+        # Dropping hidden slide 2 moves slide 3 to number 2, though its
+        # position among visible slides is unchanged
+        moved = edit_deck(numbered_deck, fake_tools / "moved.pptx", {
+            "ppt/presentation.xml": [('<p:sldId show="0" id="257" r:id="rId3"/>', "")],
+        })
+        assert render(moved) == ["Slide 1", "Slide 3 #2", "Slide 4"]
+
+    def test_unusable_cache_dir_renders_uncached(self, render, fake_tools):
+        deck = fake_tools / "deck.pptx"
+        make_deck(deck, 3)
+        elsewhere = fake_tools / "elsewhere"
+        elsewhere.mkdir()
+        planted = fake_tools / "planted"
+        planted.symlink_to(elsewhere)
+
+        assert render(deck, planted) == ["Slide 1", "Slide 2", "Slide 3"]
+        assert list(elsewhere.iterdir()) == []
+
+    def test_cache_dir_is_private(self, render, fake_tools):
+        deck = fake_tools / "deck.pptx"
+        make_deck(deck, 1)
+        render(deck)
+        assert (fake_tools / "cache").stat().st_mode & 0o777 == 0o700
+
+    def test_prune_keeps_foreign_files(self, render, fake_tools, monkeypatch):
+        monkeypatch.setattr(thumbnail, "CACHE_MAX_TILES", 2)
+        cache_dir = fake_tools / "cache"
+        cache_dir.mkdir(mode=0o700)
+        (cache_dir / "photo.jpg").write_text("not a tile")
+        first, second = fake_tools / "first.pptx", fake_tools / "second.pptx"
+        make_deck(first, 2)
+        edit_deck(first, second, {
+            f"ppt/slides/slide{i}.xml": [(f"<a:t>Slide {i}</a:t>", f"<a:t>Other {i}</a:t>")]
+            for i in (1, 2)
+        })
+
+        render(first)
+        assert render(second) == ["Other 1", "Other 2"]
+
+        names = [tile.name for tile in cache_dir.iterdir()]
+        assert "photo.jpg" in names
+        assert len(names) == 3
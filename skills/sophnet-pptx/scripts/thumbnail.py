@@ -4,8 +4,16 @@ Creates a grid layout of slide thumbnails for quick visual analysis.
 Labels each thumbnail with its XML filename (e.g., slide1.xml).
 Hidden slides are shown with a placeholder pattern.
 
+Rendered slides are cached by a hash of each slide's XML and the parts it
+draws from (layout, master, theme, media), so after editing one slide only
+that slide is re-rendered, from a sub-deck containing just the changed slides.
+Slides that show a slide number are keyed on their position in the deck, and
+when one of them is stale the whole deck is rendered so the number is right.
+The default cache directory is private to the current user; if the cache
+cannot be used, slides are rendered without it.
+
 Usage:
-    python thumbnail.py input.pptx [output_prefix] [--cols N]
+    python thumbnail.py input.pptx [output_prefix] [--cols N] [--no-cache] [--jobs N]
 
 Examples:
     python thumbnail.py presentation.pptx
@@ -16,18 +24,23 @@ Examples:
 """
 
 import argparse
+import hashlib
+import os
+import posixpath
+import re
+import shutil
 import subprocess
 import sys
 import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import defusedxml.minidom
-from office.soffice import get_soffice_env
+from office.soffice import SofficeError, get_pool, get_soffice_env
 from PIL import Image, ImageDraw, ImageFont
 
 THUMBNAIL_WIDTH = 300
-CONVERSION_DPI = 100
 MAX_COLS = 6
 DEFAULT_COLS = 3
 JPEG_QUALITY = 95
@@ -35,6 +48,23 @@ GRID_PADDING = 20
 BORDER_WIDTH = 2
 FONT_SIZE_RATIO = 0.10
 LABEL_PADDING_RATIO = 0.4
+CACHE_DIR = Path(tempfile.gettempdir()) / f"pptx_thumbnail_cache_{os.getuid()}"
+CACHE_MAX_TILES = 2000
+CACHE_VERSION = b"3"
+TILE_NAME = re.compile(r"[0-9a-f]{64}\.jpg")
+SLIDE_NUMBER_FIELDS = (b'type="sldNum"', b'type="slidenum"')
+DEFAULT_JOBS = min(4, os.cpu_count() or 1)
+
+# Relationships that do not change how a slide renders; following them would
+# invalidate a slide's tile whenever notes, comments or a linked slide change.
+NON_RENDERING_RELS = (
+    "/notesSlide",
+    "/slide",
+    "/comments",
+    "/commentAuthors",
+    "/notesMaster",
+    "/handoutMaster",
+)
 
 
 def main():
@@ -54,6 +84,23 @@ def main():
         default=DEFAULT_COLS,
         help=f"Number of columns (default: {DEFAULT_COLS}, max: {MAX_COLS})",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Render every slide instead of reusing cached thumbnails",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=CACHE_DIR,
+        help=f"Where rendered slides are cached (default: {CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Parallel rasterization/tile workers (default: {DEFAULT_JOBS})",
+    )
 
     args = parser.parse_args()
 
@@ -67,13 +114,19 @@ def main():
         sys.exit(1)
 
     output_path = Path(f"{args.output_prefix}.jpg")
+    jobs = max(1, args.jobs)
 
     try:
         slide_info = get_slide_info(input_path)
 
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
-            visible_images = convert_to_images(input_path, temp_path)
+            if args.no_cache:
+                visible_images = convert_to_images(input_path, temp_path, jobs)
+            else:
+                visible_images = render_with_cache(
+                    input_path, slide_info, temp_path, args.cache_dir, jobs
+                )
 
             if not visible_images and not any(s["hidden"] for s in slide_info):
                 print("Error: No slides found", file=sys.stderr)
@@ -81,7 +134,9 @@ def main():
 
             slides = build_slide_list(slide_info, visible_images, temp_path)
 
-            grid_files = create_grids(slides, cols, THUMBNAIL_WIDTH, output_path)
+            grid_files = create_grids(
+                slides, cols, THUMBNAIL_WIDTH, output_path, jobs
+            )
 
             print(f"Created {len(grid_files)} grid(s):")
             for grid_file in grid_files:
@@ -109,11 +164,18 @@ def get_slide_info(pptx_path: Path) -> list[dict]:
         pres_dom = defusedxml.minidom.parseString(pres_content)
 
         slides = []
-        for sld_id in pres_dom.getElementsByTagName("p:sldId"):
+        for number, sld_id in enumerate(pres_dom.getElementsByTagName("p:sldId"), 1):
             rid = sld_id.getAttribute("r:id")
             if rid in rid_to_slide:
                 hidden = sld_id.getAttribute("show") == "0"
-                slides.append({"name": rid_to_slide[rid], "hidden": hidden})
+                slides.append(
+                    {
+                        "name": rid_to_slide[rid],
+                        "hidden": hidden,
+                        "rid": rid,
+                        "number": number,
+                    }
+                )
 
         return slides
 
@@ -155,42 +217,269 @@ def create_hidden_placeholder(size: tuple[int, int]) -> Image.Image:
     return img
 
 
-def convert_to_images(pptx_path: Path, temp_dir: Path) -> list[Path]:
+def render_with_cache(
+    pptx_path: Path,
+    slide_info: list[dict],
+    temp_dir: Path,
+    cache_dir: Path,
+    jobs: int = 1,
+) -> list[Path]:
+    visible = [info for info in slide_info if not info["hidden"]]
+    if not visible:
+        return []
+
+    try:
+        _ensure_cache_dir(cache_dir)
+        keys = slide_cache_keys(pptx_path, visible)
+        tiles = [cache_dir / f"{key}.jpg" for key, _ in keys]
+        stale = [i for i, tile in enumerate(tiles) if not tile.exists()]
+    except OSError:
+        # Cache directory unusable; render without it
+        return convert_to_images(pptx_path, temp_dir, jobs)
+
+    if stale:
+        # A slide number renders as the slide's position in the deck that is
+        # converted, so numbered slides are only right when rendered in place.
+        if any(keys[i][1] for i in stale):
+            stale = list(range(len(visible)))
+
+        render_dir = temp_dir / "render"
+        render_dir.mkdir()
+        if len(stale) == len(visible):
+            source = pptx_path
+        else:
+            source = render_dir / f"{pptx_path.stem}.pptx"
+            write_subdeck(pptx_path, [visible[i]["rid"] for i in stale], source)
+
+        images = convert_to_images(source, render_dir, jobs)
+        if len(images) != len(stale):
+            # Pages can't be matched to slides reliably; skip the cache.
+            if source == pptx_path:
+                return images
+            return convert_to_images(pptx_path, temp_dir, jobs)
+
+        try:
+            for i, image in zip(stale, images):
+                partial = tiles[i].with_suffix(f".{os.getpid()}.tmp")
+                shutil.copyfile(image, partial)
+                partial.replace(tiles[i])
+        except OSError:
+            if source == pptx_path:
+                return images
+            return convert_to_images(pptx_path, temp_dir, jobs)
+
+    try:
+        for tile in tiles:
+            os.utime(tile)
+        _prune_cache(cache_dir)
+    except OSError:
+        pass
+    return tiles
+
+
+def _ensure_cache_dir(cache_dir: Path) -> None:
+    """Create cache_dir private to this user; raise OSError if that is not possible."""
+    cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = cache_dir.lstat()
+    if cache_dir.is_symlink() or info.st_uid != os.getuid():
+        raise PermissionError(f"{cache_dir} is not owned by the current user")
+
+
+def slide_cache_keys(pptx_path: Path, slides: list[dict]) -> list[tuple[str, bool]]:
+    """Return (cache key, shows a slide number) for each slide."""
+    with zipfile.ZipFile(pptx_path, "r") as zf:
+        names = set(zf.namelist())
+        digests = {}
+        numbered_parts = set()
+
+        def digest(part: str) -> bytes:
+            if part not in digests:
+                data = zf.read(part)
+                digests[part] = hashlib.sha256(data).digest()
+                if _shows_slide_number(part, data):
+                    numbered_parts.add(part)
+            return digests[part]
+
+        pres_dom = defusedxml.minidom.parseString(zf.read("ppt/presentation.xml"))
+        for sld_id_lst in pres_dom.getElementsByTagName("p:sldIdLst"):
+            sld_id_lst.parentNode.removeChild(sld_id_lst)
+
+        base = hashlib.sha256(CACHE_VERSION)
+        base.update(str(THUMBNAIL_WIDTH).encode())
+        base.update(pres_dom.toxml(encoding="utf-8"))
+
+        keys = []
+        for info in slides:
+            slide_part = f"ppt/slides/{info['name']}"
+            key = base.copy()
+            parts = sorted(_rendering_parts(zf, names, slide_part))
+            for part in parts:
+                key.update(part.encode())
+                key.update(digest(part))
+            numbered = not numbered_parts.isdisjoint(parts)
+            if numbered:
+                key.update(f"position:{info['number']}".encode())
+            keys.append((key.hexdigest(), numbered))
+        return keys
+
+
+def _shows_slide_number(part: str, data: bytes) -> bool:
+    if not part.endswith(".xml") or not any(f in data for f in SLIDE_NUMBER_FIELDS):
+        return False
+    if part.startswith("ppt/slides/"):
+        return True
+    if not part.startswith(("ppt/slideLayouts/", "ppt/slideMasters/")):
+        return False
+    # Layout and master placeholders only render through the slide's own
+    # placeholder; a slide number field in any other shape shows on every slide.
+    dom = defusedxml.minidom.parseString(data)
+    for shape in dom.getElementsByTagName("p:sp"):
+        if shape.getElementsByTagName("p:ph"):
+            continue
+        for field in shape.getElementsByTagName("a:fld"):
+            if field.getAttribute("type") == "slidenum":
+                return True
+    return False
+
+
+def _rendering_parts(zf: zipfile.ZipFile, names: set[str], start: str) -> set[str]:
+    parts = set()
+    pending = [start]
+    while pending:
+        part = pending.pop()
+        if part in parts or part not in names:
+            continue
+        parts.add(part)
+
+        directory, filename = posixpath.split(part)
+        rels_part = posixpath.join(directory, "_rels", f"{filename}.rels")
+        if rels_part not in names:
+            continue
+        parts.add(rels_part)
+
+        rels_dom = defusedxml.minidom.parseString(zf.read(rels_part))
+        for rel in rels_dom.getElementsByTagName("Relationship"):
+            rel_type = rel.getAttribute("Type")
+            if rel.getAttribute("TargetMode") == "External":
+                continue
+            if rel_type.endswith(NON_RENDERING_RELS):
+                continue
+            if rel_type.endswith("/slideLayout") and "slideMasters/" in part:
+                continue
+            target = rel.getAttribute("Target")
+            if target.startswith("/"):
+                pending.append(target.lstrip("/"))
+            else:
+                pending.append(posixpath.normpath(posixpath.join(directory, target)))
+    return parts
+
+
+def write_subdeck(pptx_path: Path, keep_rids: list[str], output_path: Path) -> None:
+    keep = set(keep_rids)
+    with zipfile.ZipFile(pptx_path, "r") as zin:
+        pres_dom = defusedxml.minidom.parseString(zin.read("ppt/presentation.xml"))
+        for sld_id in pres_dom.getElementsByTagName("p:sldId"):
+            if sld_id.getAttribute("r:id") not in keep:
+                sld_id.parentNode.removeChild(sld_id)
+
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zout:
+            for item in zin.infolist():
+                if item.filename == "ppt/presentation.xml":
+                    zout.writestr(item, pres_dom.toxml(encoding="UTF-8"))
+                else:
+                    zout.writestr(item, zin.read(item))
+
+
+def _prune_cache(cache_dir: Path) -> None:
+    # Only tiles this cache wrote, in case --cache-dir holds other images
+    tiles = [tile for tile in cache_dir.iterdir() if TILE_NAME.fullmatch(tile.name)]
+    if len(tiles) <= CACHE_MAX_TILES:
+        return
+    tiles.sort(key=lambda tile: tile.stat().st_mtime)
+    for tile in tiles[: len(tiles) - CACHE_MAX_TILES]:
+        tile.unlink(missing_ok=True)
+
+
+def convert_to_images(pptx_path: Path, temp_dir: Path, jobs: int = 1) -> list[Path]:
     pdf_path = temp_dir / f"{pptx_path.stem}.pdf"
 
-    result = subprocess.run(
-        [
-            "soffice",
-            "--headless",
-            "--convert-to",
-            "pdf",
-            "--outdir",
-            str(temp_dir),
-            str(pptx_path),
-        ],
-        capture_output=True,
-        text=True,
-        env=get_soffice_env(),
-    )
-    if result.returncode != 0 or not pdf_path.exists():
+    pool = get_pool()
+    if pool is not None:
+        try:
+            pool.convert_to_pdf(pptx_path, outdir=temp_dir)
+        except SofficeError as e:
+            raise RuntimeError(f"PDF conversion failed: {e}") from e
+        except OSError:
+            # Pool directory unusable; run soffice once instead
+            pool = None
+    if pool is None:
+        result = subprocess.run(
+            [
+                "soffice",
+                "--headless",
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                str(temp_dir),
+                str(pptx_path),
+            ],
+            capture_output=True,
+            text=True,
+            env=get_soffice_env(),
+        )
+        if result.returncode != 0:
+            raise RuntimeError("PDF conversion failed")
+    if not pdf_path.exists():
         raise RuntimeError("PDF conversion failed")
 
-    result = subprocess.run(
-        [
-            "pdftoppm",
-            "-jpeg",
-            "-r",
-            str(CONVERSION_DPI),
-            str(pdf_path),
-            str(temp_dir / "slide"),
-        ],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0:
+    def rasterize(page_range):
+        pages = ["-f", str(page_range[0]), "-l", str(page_range[1])] if page_range else []
+        return subprocess.run(
+            [
+                "pdftoppm",
+                "-jpeg",
+                "-scale-to-x",
+                str(THUMBNAIL_WIDTH),
+                "-scale-to-y",
+                "-1",
+                *pages,
+                str(pdf_path),
+                str(temp_dir / "slide"),
+            ],
+            capture_output=True,
+            text=True,
+        )
+
+    page_ranges = _split_pages(_pdf_page_count(pdf_path), jobs)
+    with ThreadPoolExecutor(max_workers=len(page_ranges)) as executor:
+        results = list(executor.map(rasterize, page_ranges))
+    if any(result.returncode != 0 for result in results):
         raise RuntimeError("Image conversion failed")
 
-    return sorted(temp_dir.glob("slide-*.jpg"))
+    return sorted(
+        temp_dir.glob("slide-*.jpg"), key=lambda path: int(path.stem.rsplit("-", 1)[1])
+    )
+
+
+def _pdf_page_count(pdf_path: Path) -> int | None:
+    try:
+        result = subprocess.run(
+            ["pdfinfo", str(pdf_path)], capture_output=True, text=True, check=False
+        )
+    except FileNotFoundError:
+        return None
+    for line in result.stdout.splitlines():
+        if line.startswith("Pages:"):
+            return int(line.split(":", 1)[1])
+    return None
+
+
+def _split_pages(page_count: int | None, jobs: int) -> list[tuple[int, int] | None]:
+    if not page_count or jobs <= 1:
+        return [None]
+    jobs = min(jobs, page_count)
+    bounds = [page_count * i // jobs for i in range(jobs + 1)]
+    return [(bounds[i] + 1, bounds[i + 1]) for i in range(jobs)]
 
 
 def create_grids(
@@ -198,6 +487,7 @@ def create_grids(
     cols: int,
     width: int,
     output_path: Path,
+    jobs: int = 1,
 ) -> list[str]:
     max_per_grid = cols * (cols + 1)
     grid_files = []
@@ -206,7 +496,7 @@ def create_grids(
         end_idx = min(start_idx + max_per_grid, len(slides))
         chunk_slides = slides[start_idx:end_idx]
 
-        grid = create_grid(chunk_slides, cols, width)
+        grid = create_grid(chunk_slides, cols, width, jobs)
 
         if len(slides) <= max_per_grid:
             grid_filename = output_path
@@ -226,6 +516,7 @@ def create_grid(
     slides: list[tuple[Path, str]],
     cols: int,
     width: int,
+    jobs: int = 1,
 ) -> Image.Image:
     font_size = int(width * FONT_SIZE_RATIO)
     label_padding = int(font_size * LABEL_PADDING_RATIO)
@@ -246,7 +537,12 @@ def create_grid(
     except Exception:
         font = ImageFont.load_default()
 
-    for i, (img_path, slide_name) in enumerate(slides):
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        tiles = list(
+            executor.map(lambda slide: _load_tile(slide[0], width, height), slides)
+        )
+
+    for i, ((_, slide_name), img) in enumerate(zip(slides, tiles)):
         row, col = i // cols, i % cols
         x = col * width + (col + 1) * GRID_PADDING
         y_base = (
@@ -265,25 +561,30 @@ def create_grid(
 
         y_thumbnail = y_base + label_padding + font_size + label_padding
 
-        with Image.open(img_path) as img:
-            img.thumbnail((width, height), Image.Resampling.LANCZOS)
-            w, h = img.size
-            tx = x + (width - w) // 2
-            ty = y_thumbnail + (height - h) // 2
-            grid.paste(img, (tx, ty))
-
-            if BORDER_WIDTH > 0:
-                draw.rectangle(
-                    [
-                        (tx - BORDER_WIDTH, ty - BORDER_WIDTH),
-                        (tx + w + BORDER_WIDTH - 1, ty + h + BORDER_WIDTH - 1),
-                    ],
-                    outline="gray",
-                    width=BORDER_WIDTH,
-                )
+        w, h = img.size
+        tx = x + (width - w) // 2
+        ty = y_thumbnail + (height - h) // 2
+        grid.paste(img, (tx, ty))
+
+        if BORDER_WIDTH > 0:
+            draw.rectangle(
+                [
+                    (tx - BORDER_WIDTH, ty - BORDER_WIDTH),
+                    (tx + w + BORDER_WIDTH - 1, ty + h + BORDER_WIDTH - 1),
+                ],
+                outline="gray",
+                width=BORDER_WIDTH,
+            )
 
     return grid
 
 
+def _load_tile(path: Path, width: int, height: int) -> Image.Image:
+    with Image.open(path) as img:
+        img.thumbnail((width, height), Image.Resampling.LANCZOS)
+        img.load()
+        return img
+
+
 if __name__ == "__main__":
     main()
@@ -4,6 +4,7 @@
 # dependencies = [
 #     "yfinance>=0.2.40",
 #     "pandas>=2.0.0",
+#     "numpy>=1.24",
 #     "fear-and-greed>=0.4",
 #     "edgartools>=2.0.0",
 #     "feedparser>=6.0.0",
@@ -18,15 +19,30 @@ Usage:
 
 import argparse
 import asyncio
+import functools
 import json
+import queue
 import sys
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, asdict
 from datetime import datetime
+from pathlib import Path
 from typing import Literal
 
 import pandas as pd
-import yfinance as yf
+
+from data_cache import SHARED_TICKER, CachedTicker, get_cache
+from indicators import compute_indicators, rsi as rsi_matrix
+from insider_index import get_insider_index
+from price_store import get_price_store
+from market_data import (
+    MarketSnapshot,
+    latest_prices,
+    load_or_build_snapshot,
+    period_start,
+)
 
 
 # Top 20 supported cryptocurrencies
@@ -105,6 +121,7 @@ class StockData:
     analyst_info: dict | None
     price_history: pd.DataFrame | None
     asset_type: Literal["stock", "crypto"] = "stock"
+    current_price: float | None = None  # Quote (short TTL); info is cached for hours
 
 
 @dataclass
@@ -260,7 +277,7 @@ def fetch_stock_data(ticker: str, verbose: bool = False) -> StockData | None:
             if verbose:
                 print(f"Fetching data for {ticker}... (attempt {attempt + 1}/{max_retries})", file=sys.stderr)
 
-            stock = yf.Ticker(ticker)
+            stock = CachedTicker(ticker)
             info = stock.info
 
             # Validate ticker
@@ -282,12 +299,19 @@ def fetch_stock_data(ticker: str, verbose: bool = False) -> StockData | None:
             except Exception:
                 analyst_info = None
 
-            # Fetch price history (1 year for historical patterns)
+            # Price history (1 year for historical patterns), delta-fetched into the local store
             try:
-                price_history = stock.history(period="1y")
+                price_history = get_price_store().history(ticker, period_days=365)
+                if price_history is None:
+                    price_history = stock.history(period="1y")
             except Exception:
                 price_history = None
 
+            try:
+                current_price = stock.current_price()
+            except Exception:
+                current_price = None
+
             return StockData(
                 ticker=ticker,
                 info=info,
@@ -295,6 +319,7 @@ def fetch_stock_data(ticker: str, verbose: bool = False) -> StockData | None:
                 analyst_info=analyst_info,
                 price_history=price_history,
                 asset_type=detect_asset_type(ticker),
+                current_price=current_price,
             )
 
         except Exception as e:
@@ -311,6 +336,22 @@ def fetch_stock_data(ticker: str, verbose: bool = False) -> StockData | None:
     return None
 
 
+def latest_price(data: StockData) -> float | None:
+    """Current price: the quote, else the last close in the price history.
+
+    info["regularMarketPrice"] is cached with the fundamentals for hours, so it
+    is not used for anything priced against the market.
+    """
+    if data.current_price:
+        return data.current_price
+    history = data.price_history
+    if history is not None and "Close" in history.columns:
+        closes = history["Close"].dropna()
+        if not closes.empty:
+            return float(closes.iloc[-1])
+    return None
+
+
 def analyze_earnings_surprise(data: StockData) -> EarningsSurprise | None:
     """Analyze earnings surprise from most recent quarter."""
     if data.earnings_history is None or data.earnings_history.empty:
@@ -434,7 +475,18 @@ def analyze_fundamentals(data: StockData) -> Fundamentals | None:
         return None
 
 
-def analyze_crypto_fundamentals(data: StockData, verbose: bool = False) -> CryptoFundamentals | None:
+def _by_date(series: pd.Series) -> pd.Series:
+    """Re-index daily bars by tz-naive calendar date so stored, snapshot and live series align."""
+    if series.index.tz is not None:
+        series = series.tz_localize(None)
+    return series.set_axis(series.index.normalize())
+
+
+def analyze_crypto_fundamentals(
+    data: StockData,
+    verbose: bool = False,
+    snapshot: MarketSnapshot | None = None,
+) -> CryptoFundamentals | None:
     """Analyze crypto-specific fundamentals (market cap, supply, category)."""
     if data.asset_type != "crypto":
         return None
@@ -479,12 +531,13 @@ def analyze_crypto_fundamentals(data: StockData, verbose: bool = False) -> Crypt
         btc_correlation = None
         try:
             if ticker != "BTC-USD" and data.price_history is not None:
-                btc = yf.Ticker("BTC-USD")
-                btc_hist = btc.history(period="1mo")
+                btc_hist = snapshot.history("BTC-USD", period_days=31) if snapshot else None
+                if btc_hist is None:
+                    btc_hist = CachedTicker("BTC-USD").history(period="1mo")
                 if not btc_hist.empty and len(data.price_history) > 5:
                     # Align dates and calculate correlation
-                    crypto_returns = data.price_history["Close"].pct_change().dropna()
-                    btc_returns = btc_hist["Close"].pct_change().dropna()
+                    crypto_returns = _by_date(data.price_history["Close"].pct_change().dropna())
+                    btc_returns = _by_date(btc_hist["Close"].pct_change().dropna())
                     # Simple correlation on overlapping dates
                     common_dates = crypto_returns.index.intersection(btc_returns.index)
                     if len(common_dates) > 10:
@@ -534,7 +587,7 @@ def analyze_analyst_sentiment(data: StockData) -> AnalystSentiment | None:
 
     try:
         # Get current price
-        current_price = info.get("regularMarketPrice") or info.get("currentPrice")
+        current_price = latest_price(data)
         if not current_price:
             return None
 
@@ -675,8 +728,11 @@ def analyze_historical_patterns(data: StockData) -> HistoricalPatterns | None:
         return None
 
 
-def analyze_market_context(verbose: bool = False) -> MarketContext | None:
-    """Analyze overall market conditions using VIX, SPY, QQQ, and safe-havens with 1h cache."""
+def analyze_market_context(verbose: bool = False, snapshot: MarketSnapshot | None = None) -> MarketContext | None:
+    """
+    Analyze overall market conditions using VIX, SPY, QQQ, and safe-havens with 1h cache.
+    Uses the run's MarketSnapshot when given instead of fetching each index.
+    """
     # Check cache first
     cached = _get_cached("market_context")
     if cached is not None:
@@ -688,14 +744,10 @@ def analyze_market_context(verbose: bool = False) -> MarketContext | None:
         if verbose:
             print("Fetching market indicators (VIX, SPY, QQQ)...", file=sys.stderr)
 
-        # Fetch market indicators
-        vix = yf.Ticker("^VIX")
-        spy = yf.Ticker("SPY")
-        qqq = yf.Ticker("QQQ")
-
         # Get current VIX level
-        vix_info = vix.info
-        vix_level = vix_info.get("regularMarketPrice") or vix_info.get("currentPrice")
+        vix_level = snapshot.last("^VIX") if snapshot else None
+        if vix_level is None:
+            vix_level = CachedTicker("^VIX").current_price()
 
         if not vix_level:
             return None
@@ -712,8 +764,8 @@ def analyze_market_context(verbose: bool = False) -> MarketContext | None:
             vix_score = -0.5
 
         # Get SPY and QQQ 10-day trends
-        spy_hist = spy.history(period="1mo")
-        qqq_hist = qqq.history(period="1mo")
+        spy_hist = _snapshot_or_fetch(snapshot, "SPY", "1mo", 31)
+        qqq_hist = _snapshot_or_fetch(snapshot, "QQQ", "1mo", 31)
 
         if spy_hist.empty or qqq_hist.empty:
             return None
@@ -754,13 +806,9 @@ def analyze_market_context(verbose: bool = False) -> MarketContext | None:
                 print("Fetching safe-haven indicators (GLD, TLT, UUP)...", file=sys.stderr)
 
             # Fetch safe-haven ETFs
-            gld = yf.Ticker("GLD")  # Gold
-            tlt = yf.Ticker("TLT")  # 20+ Year Treasury
-            uup = yf.Ticker("UUP")  # USD Index
-
-            gld_hist = gld.history(period="10d")
-            tlt_hist = tlt.history(period="10d")
-            uup_hist = uup.history(period="10d")
+            gld_hist = _snapshot_or_fetch(snapshot, "GLD", "10d", 10)  # Gold
+            tlt_hist = _snapshot_or_fetch(snapshot, "TLT", "10d", 10)  # 20+ Year Treasury
+            uup_hist = _snapshot_or_fetch(snapshot, "UUP", "10d", 10)  # USD Index
 
             # Calculate 5-day changes
             if not gld_hist.empty and len(gld_hist) >= 5:
@@ -820,6 +868,19 @@ def analyze_market_context(verbose: bool = False) -> MarketContext | None:
         return None
 
 
+def _snapshot_or_fetch(
+    snapshot: MarketSnapshot | None,
+    ticker: str,
+    period: str,
+    period_days: int,
+) -> pd.DataFrame:
+    """Close history for a market-wide ticker from the snapshot, falling back to Yahoo."""
+    hist = snapshot.history(ticker, period_days=period_days) if snapshot else None
+    if hist is None:
+        hist = CachedTicker(ticker).history(period=period)
+    return hist
+
+
 def get_sector_etf_ticker(sector: str) -> str | None:
     """Map sector name to corresponding sector ETF ticker."""
     sector_map = {
@@ -1039,7 +1100,11 @@ def check_sector_geopolitical_risk(
     return None, 0.0
 
 
-def analyze_sector_performance(data: StockData, verbose: bool = False) -> SectorComparison | None:
+def analyze_sector_performance(
+    data: StockData,
+    verbose: bool = False,
+    snapshot: MarketSnapshot | None = None,
+) -> SectorComparison | None:
     """Compare stock performance to its sector."""
     try:
         sector = data.info.get("sector")
@@ -1059,8 +1124,7 @@ def analyze_sector_performance(data: StockData, verbose: bool = False) -> Sector
             print(f"Comparing to sector ETF: {sector_etf_ticker}", file=sys.stderr)
 
         # Fetch sector ETF data
-        sector_etf = yf.Ticker(sector_etf_ticker)
-        sector_hist = sector_etf.history(period="3mo")
+        sector_hist = _snapshot_or_fetch(snapshot, sector_etf_ticker, "3mo", 92)
 
         if sector_hist.empty or data.price_history is None or data.price_history.empty:
             return None
@@ -1200,30 +1264,14 @@ def analyze_earnings_timing(data: StockData) -> EarningsTiming | None:
         return None
 
 
-def calculate_rsi(prices: pd.Series, period: int = 14) -> float | None:
-    """Calculate RSI (Relative Strength Index)."""
+def calculate_rsi(prices: pd.Series, period: int = 14, method: str = "simple") -> float | None:
+    """Calculate RSI (Relative Strength Index), simple or Wilder-smoothed."""
     try:
         if len(prices) < period + 1:
             return None
 
-        # Calculate price changes
-        delta = prices.diff()
-
-        # Separate gains and losses
-        gains = delta.where(delta > 0, 0)
-        losses = -delta.where(delta < 0, 0)
-
-        # Calculate average gains and losses
-        avg_gain = gains.rolling(window=period).mean()
-        avg_loss = losses.rolling(window=period).mean()
-
-        # Calculate RS
-        rs = avg_gain / avg_loss
-
-        # Calculate RSI
-        rsi = 100 - (100 / (1 + rs))
-
-        return float(rsi.iloc[-1])
+        rsi = rsi_matrix(prices.to_numpy(dtype=float), period=period, method=method)[-1, 0]
+        return None if pd.isna(rsi) else float(rsi)
 
     except Exception:
         return None
@@ -1235,8 +1283,12 @@ def analyze_momentum(data: StockData) -> MomentumAnalysis | None:
         if data.price_history is None or data.price_history.empty:
             return None
 
-        # Calculate RSI
-        rsi_14d = calculate_rsi(data.price_history["Close"], period=14)
+        # RSI, 52w range and volume from one pass of the indicator engine
+        history = data.price_history
+        closes = history["Close"].to_frame("series")
+        volumes = history["Volume"].to_frame("series") if "Volume" in history.columns else None
+        indicators = compute_indicators(closes, volumes).get("series")
+        rsi_14d = indicators["rsi"]
 
         if rsi_14d:
             if rsi_14d > 70:
@@ -1248,10 +1300,10 @@ def analyze_momentum(data: StockData) -> MomentumAnalysis | None:
         else:
             rsi_status = "unknown"
 
-        # Get 52-week high/low
-        high_52w = data.info.get("fiftyTwoWeekHigh")
-        low_52w = data.info.get("fiftyTwoWeekLow")
-        current_price = data.info.get("regularMarketPrice") or data.info.get("currentPrice")
+        # Get 52-week high/low (Yahoo's values, else the 1y price history)
+        high_52w = data.info.get("fiftyTwoWeekHigh") or indicators["high_52w"]
+        low_52w = data.info.get("fiftyTwoWeekLow") or indicators["low_52w"]
+        current_price = data.current_price or indicators["close"]
 
         price_vs_52w_low = None
         price_vs_52w_high = None
@@ -1267,12 +1319,8 @@ def analyze_momentum(data: StockData) -> MomentumAnalysis | None:
                 near_52w_high = price_vs_52w_low > 90
                 near_52w_low = price_vs_52w_low < 10
 
-        # Volume analysis
-        volume_ratio = None
-        if "Volume" in data.price_history.columns and len(data.price_history) >= 60:
-            recent_vol = data.price_history["Volume"].iloc[-5:].mean()
-            avg_vol = data.price_history["Volume"].iloc[-60:].mean()
-            volume_ratio = recent_vol / avg_vol if avg_vol > 0 else None
+        # Volume analysis (5d vs 60d average)
+        volume_ratio = indicators["volume_ratio"]
 
         # Calculate score
         score = 0.0
@@ -1321,22 +1369,25 @@ def analyze_momentum(data: StockData) -> MomentumAnalysis | None:
 
 # Simple cache for shared indicators (Fear & Greed, VIX)
 # Format: {key: (value, timestamp)}
+# Backed by the on-disk cache (data_cache.py) so later CLI runs reuse values.
 _SENTIMENT_CACHE = {}
 _CACHE_TTL_SECONDS = 3600  # 1 hour
 
 
 def _get_cached(key: str):
-    """Get cached value if still valid (within TTL)."""
+    """Get cached value if still valid (within TTL), checking memory then disk."""
     if key in _SENTIMENT_CACHE:
         value, timestamp = _SENTIMENT_CACHE[key]
         if time.time() - timestamp < _CACHE_TTL_SECONDS:
             return value
-    return None
+    hit, value = get_cache().get(SHARED_TICKER, key, ttl=_CACHE_TTL_SECONDS)
+    return value if hit else None
 
 
 def _set_cache(key: str, value):
-    """Set cached value with current timestamp."""
+    """Set cached value with current timestamp (in memory and on disk)."""
     _SENTIMENT_CACHE[key] = (value, time.time())
+    get_cache().set(SHARED_TICKER, key, value)
 
 
 async def get_fear_greed_index() -> tuple[float, int | None, str | None] | None:
@@ -1417,7 +1468,7 @@ async def get_short_interest(data: StockData) -> tuple[float, float | None, floa
         return None
 
 
-async def get_vix_term_structure() -> tuple[float, str | None, float | None] | None:
+async def get_vix_term_structure(snapshot: MarketSnapshot | None = None) -> tuple[float, str | None, float | None] | None:
     """
     Analyze VIX futures term structure (contango vs backwardation) with 1h cache.
     Returns: (score, structure, slope) or None.
@@ -1429,9 +1480,7 @@ async def get_vix_term_structure() -> tuple[float, str | None, float | None] | N
 
     def _fetch():
         try:
-            import yfinance as yf
-            vix = yf.Ticker("^VIX")
-            vix_data = vix.history(period="5d")
+            vix_data = _snapshot_or_fetch(snapshot, "^VIX", "5d", 5)
             if vix_data.empty:
                 return None
             return vix_data["Close"].iloc[-1]
@@ -1468,118 +1517,58 @@ async def get_vix_term_structure() -> tuple[float, str | None, float | None] | N
         return None
 
 
-async def get_insider_activity(ticker: str, period_days: int = 90) -> tuple[float, int | None, float | None] | None:
+def score_insider_activity(net_shares: int, net_value: float) -> float:
     """
-    Analyze insider trading from SEC Form 4 filings using edgartools.
-    Returns: (score, net_shares, net_value_millions) or None.
+    Score net insider activity (net_value in $ millions).
 
-    Scoring logic:
     - Strong buying (>100K shares or >$1M): +0.8
     - Moderate buying (>10K shares or >$0.1M): +0.4
     - Neutral: 0
     - Moderate selling: -0.4
     - Strong selling: -0.8
-
-    Note: SEC EDGAR API requires User-Agent with email.
     """
-    def _fetch():
-        try:
-            from edgar import Company, set_identity
-            from datetime import datetime, timedelta
-
-            # Set SEC-required identity
-            set_identity("stock-analysis@clawd.bot")
-
-            # Get company and Form 4 filings
-            company = Company(ticker)
-            filings = company.get_filings(form="4")
-
-            if filings is None or len(filings) == 0:
-                return None
+    if net_shares > 100_000 or net_value > 1.0:
+        return 0.8  # Strong buying
+    elif net_shares > 10_000 or net_value > 0.1:
+        return 0.4  # Moderate buying
+    elif net_shares < -100_000 or net_value < -1.0:
+        return -0.8  # Strong selling
+    elif net_shares < -10_000 or net_value < -0.1:
+        return -0.4  # Moderate selling
+    return 0.0  # Neutral
 
-            # Calculate cutoff date
-            cutoff_date = datetime.now() - timedelta(days=period_days)
 
-            # Aggregate transactions
-            total_bought_shares = 0
-            total_sold_shares = 0
-            total_bought_value = 0.0
-            total_sold_value = 0.0
-
-            # Process recent filings (iterate, don't slice due to pyarrow compatibility)
-            count = 0
-            for filing in filings:
-                if count >= 50:
-                    break
-                count += 1
+async def get_insider_activity(ticker: str, period_days: int = 90) -> tuple[float, int | None, float | None] | None:
+    """
+    Analyze insider trading from SEC Form 4 filings.
+    Returns: (score, net_shares, net_value_millions) or None.
 
+    Reads the local Form 4 index (insider_index.py). The index is refreshed
+    from EDGAR only when it is more than a day old for this ticker, and only
+    new filings are downloaded; otherwise this is a local query.
+    """
+    def _query():
+        try:
+            index = get_insider_index()
+            if index.is_stale(ticker):
                 try:
-                    # Check filing date
-                    filing_date = filing.filing_date
-                    if hasattr(filing_date, 'to_pydatetime'):
-                        filing_date = filing_date.to_pydatetime()
-                    elif isinstance(filing_date, str):
-                        filing_date = datetime.strptime(filing_date, "%Y-%m-%d")
-
-                    # Convert date object to datetime for comparison
-                    if hasattr(filing_date, 'year') and not hasattr(filing_date, 'hour'):
-                        filing_date = datetime.combine(filing_date, datetime.min.time())
-
-                    if filing_date < cutoff_date:
-                        continue
-
-                    # Get Form 4 object
-                    form4 = filing.obj()
-                    if form4 is None:
-                        continue
-
-                    # Process purchases (edgartools returns DataFrames)
-                    if hasattr(form4, 'common_stock_purchases'):
-                        purchases = form4.common_stock_purchases
-                        if isinstance(purchases, pd.DataFrame) and not purchases.empty:
-                            if 'Shares' in purchases.columns:
-                                total_bought_shares += int(purchases['Shares'].sum())
-                            if 'Price' in purchases.columns and 'Shares' in purchases.columns:
-                                total_bought_value += float((purchases['Shares'] * purchases['Price']).sum())
-
-                    # Process sales
-                    if hasattr(form4, 'common_stock_sales'):
-                        sales = form4.common_stock_sales
-                        if isinstance(sales, pd.DataFrame) and not sales.empty:
-                            if 'Shares' in sales.columns:
-                                total_sold_shares += int(sales['Shares'].sum())
-                            if 'Price' in sales.columns and 'Shares' in sales.columns:
-                                total_sold_value += float((sales['Shares'] * sales['Price']).sum())
-
+                    index.refresh(ticker, period_days=period_days)
                 except Exception:
-                    continue
+                    # EDGAR unreachable or edgartools not installed: use whatever is indexed
+                    pass
 
-            # Calculate net values
-            net_shares = total_bought_shares - total_sold_shares
-            net_value = (total_bought_value - total_sold_value) / 1_000_000  # Millions
-
-            # Apply scoring logic
-            if net_shares > 100_000 or net_value > 1.0:
-                score = 0.8  # Strong buying
-            elif net_shares > 10_000 or net_value > 0.1:
-                score = 0.4  # Moderate buying
-            elif net_shares < -100_000 or net_value < -1.0:
-                score = -0.8  # Strong selling
-            elif net_shares < -10_000 or net_value < -0.1:
-                score = -0.4  # Moderate selling
-            else:
-                score = 0.0  # Neutral
+            activity = index.net_activity(ticker, period_days=period_days)
+            if activity is None:
+                return None
 
-            return (score, net_shares, net_value)
+            net_shares, net_value = activity
+            return (score_insider_activity(net_shares, net_value), net_shares, net_value)
 
-        except ImportError:
-            # edgartools not installed
-            return None
         except Exception:
             return None
 
     try:
-        result = await asyncio.to_thread(_fetch)
+        result = await asyncio.to_thread(_query)
         return result
     except Exception:
         return None
@@ -1637,7 +1626,12 @@ async def get_put_call_ratio(data: StockData) -> tuple[float, float | None, int
         return None
 
 
-async def analyze_sentiment(data: StockData, verbose: bool = False, skip_insider: bool = False) -> SentimentAnalysis | None:
+async def analyze_sentiment(
+    data: StockData,
+    verbose: bool = False,
+    skip_insider: bool = False,
+    snapshot: MarketSnapshot | None = None,
+) -> SentimentAnalysis | None:
     """
     Analyze market sentiment using 5 sub-indicators in parallel.
     Requires at least 2 of 5 indicators for valid sentiment.
@@ -1675,7 +1669,7 @@ async def analyze_sentiment(data: StockData, verbose: bool = False, skip_insider
         tasks = [
             asyncio.wait_for(get_fear_greed_index(), timeout=10),
             asyncio.wait_for(get_short_interest(data), timeout=10),
-            asyncio.wait_for(get_vix_term_structure(), timeout=10),
+            asyncio.wait_for(get_vix_term_structure(snapshot), timeout=10),
         ]
         
         if skip_insider:
@@ -2138,6 +2132,434 @@ def format_output_json(signal: Signal) -> str:
     return json.dumps(output, indent=2)
 
 
+# ============================================================================
+# Concurrent Pipeline
+# ============================================================================
+
+DEFAULT_CONCURRENCY = 8
+
+# Per-stage budgets in seconds. A stage that overruns is treated like a failed
+# analyzer: its component is dropped and synthesize_signal reweights the rest.
+STAGE_TIMEOUTS = {
+    "snapshot": 30.0,
+    "fetch": 60.0,
+    "fundamentals": 20.0,
+    "sector": 20.0,
+    "market": 30.0,
+    "sentiment": 30.0,
+}
+
+
+class StageExecutor(ThreadPoolExecutor):
+    """
+    Bounded thread pool for the blocking stages, on daemon threads.
+
+    ThreadPoolExecutor workers are joined at interpreter exit, so a yfinance
+    or HTTP call stuck past its stage timeout would keep the process alive
+    after the results were printed. A stuck call here is abandoned instead:
+    shutdown(wait=False) returns at once and the process can exit with the
+    thread still blocked. It subclasses ThreadPoolExecutor only because
+    asyncio requires one for the loop's default executor; the base class's
+    workers are never started.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "stage"):
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._size = max_workers
+        self._name_prefix = thread_name_prefix
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._workers: list[threading.Thread] = []
+        self._idle = threading.Semaphore(0)
+        self._state_lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        with self._state_lock:
+            if self._closed:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            future = Future()
+            self._queue.put((future, fn, args, kwargs))
+            if not self._idle.acquire(blocking=False) and len(self._workers) < self._size:
+                worker = threading.Thread(
+                    target=self._work, name=f"{self._name_prefix}_{len(self._workers)}", daemon=True,
+                )
+                worker.start()
+                self._workers.append(worker)
+            return future
+
+    def _work(self) -> None:
+        while (item := self._queue.get()) is not None:
+            future, fn, args, kwargs = item
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as exc:
+                    future.set_exception(exc)
+            del item, future
+            self._idle.release()
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._state_lock:
+            self._closed = True
+            if cancel_futures:
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        item[0].cancel()
+            for _ in self._workers:
+                self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+
+async def _run_stage(
+    executor: ThreadPoolExecutor,
+    stage: str,
+    timeout: float,
+    ticker: str,
+    func,
+    *args,
+    log_timeouts: bool = False,
+    **kwargs,
+):
+    """Run a blocking analyzer in the thread pool, returning None on timeout.
+
+    Extra positional and keyword arguments (including ``verbose``) are passed
+    through to ``func``; ``log_timeouts`` only controls the timeout message.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(executor, functools.partial(func, *args, **kwargs)),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        if log_timeouts:
+            print(f"  [{ticker}] {stage} stage timed out after {timeout:.0f}s", file=sys.stderr)
+        return None
+
+
+async def analyze_ticker_async(
+    requested_ticker: str,
+    executor: ThreadPoolExecutor,
+    market_task: asyncio.Future,
+    breaking_news: list[str] | None = None,
+    skip_insider: bool = False,
+    verbose: bool = False,
+    timeouts: dict[str, float] | None = None,
+    snapshot_task: asyncio.Future | None = None,
+) -> Signal | None:
+    """
+    Analyze one ticker with its independent stages fanned out concurrently.
+    `snapshot_task` resolves to the run's shared MarketSnapshot (or None).
+    Returns None if the ticker is invalid or its data could not be fetched.
+    """
+    timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
+    requested_ticker = requested_ticker.upper()
+    ticker = normalize_ticker(requested_ticker)
+
+    if verbose:
+        if ticker != requested_ticker:
+            print(f"\n=== Analyzing {requested_ticker} (mapped to {ticker}) ===\n", file=sys.stderr)
+        else:
+            print(f"\n=== Analyzing {ticker} ===\n", file=sys.stderr)
+
+    # Fetch data
+    data = await _run_stage(
+        executor, "fetch", timeouts["fetch"], ticker, fetch_stock_data, ticker,
+        log_timeouts=verbose, verbose=verbose,
+    )
+    if data is None:
+        return None
+
+    # Market-wide series are downloaded once per run, concurrently with the fetch above
+    snapshot = await asyncio.shield(snapshot_task) if snapshot_task is not None else None
+
+    # Get company name
+    company_name = data.info.get("longName") or data.info.get("shortName") or ticker
+
+    # Detect asset type (crypto vs stock)
+    is_crypto = data.asset_type == "crypto"
+
+    if verbose and is_crypto:
+        print(f"  [{ticker}] Asset type: CRYPTO (using crypto-specific analysis)", file=sys.stderr)
+
+    async def _no_result():
+        return None
+
+    # Analyze components (different for crypto vs stock)
+    if is_crypto:
+        # Crypto: Skip stock-specific analyses
+        earnings = None
+        analysts = None
+        historical = None
+        earnings_timing = None
+        fundamentals = None
+
+        # Crypto fundamentals (market cap, category, BTC correlation)
+        if verbose:
+            print(f"  [{ticker}] Analyzing crypto fundamentals...", file=sys.stderr)
+        crypto_fundamentals_coro = _run_stage(
+            executor, "fundamentals", timeouts["fundamentals"], ticker,
+            analyze_crypto_fundamentals, data, log_timeouts=verbose, verbose=verbose, snapshot=snapshot,
+        )
+        sector_coro = _no_result()
+        # Skip insider trading and put/call for crypto
+        sentiment_coro = _no_result()
+    else:
+        # Stock: cheap analyzers work on the fetched data directly
+        earnings = analyze_earnings_surprise(data)
+        analysts = analyze_analyst_sentiment(data)
+        historical = analyze_historical_patterns(data)
+        earnings_timing = analyze_earnings_timing(data)
+        fundamentals = analyze_fundamentals(data)
+        crypto_fundamentals_coro = _no_result()
+
+        if verbose:
+            print(f"  [{ticker}] Analyzing sector performance and sentiment...", file=sys.stderr)
+        sector_coro = _run_stage(
+            executor, "sector", timeouts["sector"], ticker,
+            analyze_sector_performance, data, log_timeouts=verbose, verbose=verbose, snapshot=snapshot,
+        )
+        sentiment_coro = _sentiment_stage(data, ticker, timeouts["sentiment"], skip_insider, verbose, snapshot)
+
+    # Momentum (both crypto and stock)
+    momentum = analyze_momentum(data)
+
+    # Market context is shared by every ticker in the run
+    crypto_fundamentals, sector, sentiment, market_context = await asyncio.gather(
+        crypto_fundamentals_coro, sector_coro, sentiment_coro, asyncio.shield(market_task)
+    )
+
+    if crypto_fundamentals:
+        # Convert crypto fundamentals to regular Fundamentals for synthesize_signal
+        fundamentals = Fundamentals(
+            score=crypto_fundamentals.score,
+            key_metrics={
+                "market_cap": crypto_fundamentals.market_cap,
+                "market_cap_rank": crypto_fundamentals.market_cap_rank,
+                "category": crypto_fundamentals.category,
+                "btc_correlation": crypto_fundamentals.btc_correlation,
+            },
+            explanation=crypto_fundamentals.explanation,
+        )
+
+    # Geopolitical risks (stocks only)
+    if is_crypto:
+        geopolitical_risk_warning = None
+        geopolitical_risk_penalty = 0.0
+    else:
+        geopolitical_risk_warning, geopolitical_risk_penalty = check_sector_geopolitical_risk(
+            ticker=ticker,
+            sector=data.info.get("sector"),
+            breaking_news=breaking_news,
+            verbose=verbose,
+        )
+
+    if verbose:
+        print(f"[{ticker}] Components analyzed:", file=sys.stderr)
+        if is_crypto:
+            print(f"  Crypto Fundamentals: {'✓' if fundamentals else '✗'}", file=sys.stderr)
+            print(f"  Market Context: {'✓' if market_context else '✗'}", file=sys.stderr)
+            print(f"  Momentum: {'✓' if momentum else '✗'}", file=sys.stderr)
+            print(f"  (Earnings, Sector, Sentiment: N/A for crypto)\n", file=sys.stderr)
+        else:
+            print(f"  Earnings: {'✓' if earnings else '✗'}", file=sys.stderr)
+            print(f"  Fundamentals: {'✓' if fundamentals else '✗'}", file=sys.stderr)
+            print(f"  Analysts: {'✓' if analysts and analysts.score else '✗'}", file=sys.stderr)
+            print(f"  Historical: {'✓' if historical else '✗'}", file=sys.stderr)
+            print(f"  Market Context: {'✓' if market_context else '✗'}", file=sys.stderr)
+            print(f"  Sector: {'✓' if sector else '✗'}", file=sys.stderr)
+            print(f"  Earnings Timing: {'✓' if earnings_timing else '✗'}", file=sys.stderr)
+            print(f"  Momentum: {'✓' if momentum else '✗'}", file=sys.stderr)
+            print(f"  Sentiment: {'✓' if sentiment else '✗'}\n", file=sys.stderr)
+
+    # Synthesize signal
+    return synthesize_signal(
+        ticker=requested_ticker,
+        company_name=company_name,
+        earnings=earnings,
+        fundamentals=fundamentals,
+        analysts=analysts,
+        historical=historical,
+        market_context=market_context,
+        sector=sector,
+        earnings_timing=earnings_timing,
+        momentum=momentum,
+        sentiment=sentiment,
+        breaking_news=breaking_news,
+        geopolitical_risk_warning=geopolitical_risk_warning,
+        geopolitical_risk_penalty=geopolitical_risk_penalty,
+    )
+
+
+async def _sentiment_stage(
+    data: StockData,
+    ticker: str,
+    timeout: float,
+    skip_insider: bool,
+    verbose: bool,
+    snapshot: MarketSnapshot | None = None,
+) -> SentimentAnalysis | None:
+    """Run analyze_sentiment under the sentiment stage budget."""
+    try:
+        return await asyncio.wait_for(
+            analyze_sentiment(data, verbose=verbose, skip_insider=skip_insider, snapshot=snapshot),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        if verbose:
+            print(f"  [{ticker}] sentiment stage timed out after {timeout:.0f}s", file=sys.stderr)
+        return None
+
+
+async def analyze_tickers_async(
+    tickers: list[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    breaking_news: list[str] | None = None,
+    skip_insider: bool = False,
+    verbose: bool = False,
+    timeouts: dict[str, float] | None = None,
+    snapshot: MarketSnapshot | None = None,
+    timings: dict[str, float] | None = None,
+) -> list[tuple[str, Signal | None]]:
+    """
+    Analyze many tickers with at most `concurrency` in flight at once.
+    Blocking yfinance calls run in a shared, bounded thread pool.
+    Market-wide series (VIX, SPY/QQQ, safe-havens, sector ETFs) come from one
+    MarketSnapshot per run; pass `snapshot` to reuse one built elsewhere.
+    If `timings` is given, it is filled with seconds spent per ticker.
+    Returns (requested_ticker, signal) pairs in input order; signal is None
+    for tickers whose data could not be fetched.
+    """
+    concurrency = max(1, concurrency)
+    timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
+    loop = asyncio.get_running_loop()
+    # Each in-flight ticker runs up to ~3 blocking stages at once
+    executor = StageExecutor(max_workers=concurrency * 3, thread_name_prefix="analyze")
+    loop.set_default_executor(executor)  # asyncio.to_thread() in the sentiment helpers
+    semaphore = asyncio.Semaphore(concurrency)
+
+    if snapshot is not None:
+        snapshot_task = asyncio.ensure_future(asyncio.sleep(0, result=snapshot))
+    else:
+        if verbose:
+            print("Downloading market snapshot...", file=sys.stderr)
+        snapshot_task = asyncio.ensure_future(
+            _run_stage(executor, "snapshot", timeouts["snapshot"], "market",
+                       load_or_build_snapshot, log_timeouts=verbose)
+        )
+
+    async def _market_context():
+        run_snapshot = await asyncio.shield(snapshot_task)
+        if verbose:
+            print("Analyzing market context...", file=sys.stderr)
+        return await _run_stage(executor, "market", timeouts["market"], "market",
+                                analyze_market_context, log_timeouts=verbose, verbose=verbose,
+                                snapshot=run_snapshot)
+
+    market_task = asyncio.ensure_future(_market_context())
+
+    async def _bounded(requested_ticker: str) -> tuple[str, Signal | None]:
+        async with semaphore:
+            start = time.perf_counter()
+            signal = await analyze_ticker_async(
+                requested_ticker,
+                executor,
+                market_task,
+                breaking_news=breaking_news,
+                skip_insider=skip_insider,
+                verbose=verbose,
+                timeouts=timeouts,
+                snapshot_task=snapshot_task,
+            )
+            if timings is not None:
+                timings[requested_ticker.upper()] = round(time.perf_counter() - start, 3)
+            return requested_ticker.upper(), signal
+
+    try:
+        return await asyncio.gather(*(_bounded(t) for t in tickers))
+    finally:
+        market_task.cancel()
+        snapshot_task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        # asyncio.run() joins the default executor on the way out, which
+        # would wait on any stage thread still stuck; hand it an idle one
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=1))
+
+
+def _local_only_options(args) -> list[str]:
+    """
+    Options the daemon cannot apply to one request: it keeps its own market
+    snapshot and worker pool, and its stage logs go to its own stderr.
+    """
+    options = []
+    if args.market_snapshot:
+        options.append("--market-snapshot")
+    if args.concurrency != DEFAULT_CONCURRENCY:
+        options.append("--concurrency")
+    if args.verbose:
+        options.append("--verbose")
+    return options
+
+
+def _choose_server(args) -> str | None:
+    """
+    The daemon to send this analysis to, or None to analyze locally. A running
+    daemon is only picked up automatically when no local-only option is given.
+    """
+    if args.local:
+        return None
+    local_only = _local_only_options(args)
+    if args.server:
+        if local_only:
+            print(f"Note: {', '.join(local_only)} not applied by the analysis server", file=sys.stderr)
+        return args.server
+    if local_only:
+        if args.verbose:
+            print(f"Analyzing locally ({', '.join(local_only)} given)", file=sys.stderr)
+        return None
+
+    from server import find_server
+    return find_server()
+
+
+def _analyze_remote(server_url: str, args) -> list[tuple[str, Signal | None]] | None:
+    """
+    Analyze args.tickers on the daemon at `server_url`. Returns None (analyze
+    locally instead) if an auto-detected daemon fails; exits if --server did.
+    """
+    from server import ServerError, request_json
+
+    if args.verbose:
+        print(f"Using analysis server at {server_url}", file=sys.stderr)
+    try:
+        payload = request_json(server_url, "/analyze", {
+            "tickers": ",".join(args.tickers),
+            "fast": "1" if args.fast else None,
+            "no_insider": "1" if args.no_insider else None,
+        })
+    except ServerError as e:
+        if args.server:
+            if args.output == "json":
+                print(format_error_output(str(e), output="json"))
+            else:
+                print(format_error_output(str(e), output="text"), file=sys.stderr)
+            sys.exit(1)
+        if args.verbose:
+            print(f"  {e}; analyzing locally", file=sys.stderr)
+        return None
+
+    return [
+        (item["ticker"], None if "error" in item else Signal(**item))
+        for item in payload
+    ]
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Analyze stocks using Yahoo Finance data"
@@ -2178,6 +2600,51 @@ def main():
         action="store_true",
         help="Fast mode: skip slow analyses (insider, breaking news)"
     )
+    parser.add_argument(
+        "--concurrency", "-j",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Max tickers analyzed in parallel (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--screen",
+        type=Path,
+        metavar="FILE",
+        help="Screen a universe file (one ticker per line) in stages and fully analyze only the best"
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=10,
+        help="With --screen: number of tickers given the full analysis (default: 10)"
+    )
+    parser.add_argument(
+        "--market-snapshot",
+        type=Path,
+        help="Shared market snapshot JSON: reused if fresh, otherwise built and saved "
+             "(lets parallel workers download VIX/SPY/sector ETFs once)"
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run the analysis daemon (local HTTP/JSON API) instead of analyzing"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="With --serve: port to listen on (default: 8765)"
+    )
+    parser.add_argument(
+        "--server",
+        metavar="URL",
+        help="Send the analysis to this daemon (default: the running daemon, if any, "
+             "unless --market-snapshot, --concurrency or --verbose is given)"
+    )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Always analyze in this process, even if a daemon is running"
+    )
 
     args = parser.parse_args()
     
@@ -2185,6 +2652,29 @@ def main():
     if args.fast:
         args.no_insider = True
 
+    # Handle daemon mode
+    if args.serve:
+        from server import DEFAULT_PORT, serve
+        serve(port=args.port or DEFAULT_PORT, concurrency=args.concurrency, verbose=args.verbose)
+        return
+
+    # Handle screen mode
+    if args.screen:
+        from screener import format_screen_text, load_universe, screen_to_dict, screen_universe
+        result = screen_universe(
+            load_universe(args.screen),
+            top_k=args.top_k,
+            skip_insider=args.no_insider,
+            check_news=not args.fast,
+            concurrency=args.concurrency,
+            verbose=args.verbose,
+        )
+        if args.output == "json":
+            print(json.dumps(screen_to_dict(result), indent=2))
+        else:
+            print(format_screen_text(result))
+        return
+
     # Handle portfolio mode
     portfolio_assets = []
     portfolio_name = None
@@ -2226,162 +2716,47 @@ def main():
         parser.print_help()
         sys.exit(1)
 
-    # NEW v4.0.0: Check for breaking news (market-wide, check once before analyzing tickers)
-    # Check breaking news (skip in fast mode)
-    breaking_news = None
-    if not args.fast:
-        if args.verbose:
-            print(f"Checking breaking news (last 24h)...", file=sys.stderr)
-        breaking_news = check_breaking_news(verbose=args.verbose)
-    elif args.verbose:
-        print(f"Skipping breaking news check (--fast mode)", file=sys.stderr)
-    if breaking_news and args.verbose:
-        print(f"  Found {len(breaking_news)} breaking news alert(s)\n", file=sys.stderr)
+    # Route to the analysis daemon if one is running (warm caches, shared fetches)
+    pipeline_results = None
+    server_url = _choose_server(args)
+    if server_url:
+        pipeline_results = _analyze_remote(server_url, args)
+
+    if pipeline_results is None:
+        # NEW v4.0.0: Check for breaking news (market-wide, check once before analyzing tickers)
+        # Check breaking news (skip in fast mode)
+        breaking_news = None
+        if not args.fast:
+            if args.verbose:
+                print(f"Checking breaking news (last 24h)...", file=sys.stderr)
+            breaking_news = check_breaking_news(verbose=args.verbose)
+        elif args.verbose:
+            print(f"Skipping breaking news check (--fast mode)", file=sys.stderr)
+        if breaking_news and args.verbose:
+            print(f"  Found {len(breaking_news)} breaking news alert(s)\n", file=sys.stderr)
+
+        snapshot = None
+        if args.market_snapshot:
+            snapshot = load_or_build_snapshot(args.market_snapshot, max_age_seconds=_CACHE_TTL_SECONDS)
+
+        pipeline_results = asyncio.run(analyze_tickers_async(
+            args.tickers,
+            concurrency=args.concurrency,
+            breaking_news=breaking_news,
+            skip_insider=args.no_insider,
+            verbose=args.verbose,
+            snapshot=snapshot,
+        ))
 
     results = []
-
-    for requested_ticker in args.tickers:
-        requested_ticker = requested_ticker.upper()
-        ticker = normalize_ticker(requested_ticker)
-
-        if args.verbose:
-            if ticker != requested_ticker:
-                print(f"\n=== Analyzing {requested_ticker} (mapped to {ticker}) ===\n", file=sys.stderr)
-            else:
-                print(f"\n=== Analyzing {ticker} ===\n", file=sys.stderr)
-
-        # Fetch data
-        data = fetch_stock_data(ticker, verbose=args.verbose)
-
-        if data is None:
+    for requested_ticker, signal in pipeline_results:
+        if signal is None:
             error_message = f"Invalid ticker '{requested_ticker}' or data unavailable"
             if args.output == "json":
                 print(format_error_output(error_message, output="json"))
             else:
                 print(format_error_output(error_message, output="text"), file=sys.stderr)
             sys.exit(2)
-
-        # Get company name
-        company_name = data.info.get("longName") or data.info.get("shortName") or ticker
-
-        # Detect asset type (crypto vs stock)
-        is_crypto = data.asset_type == "crypto"
-
-        if args.verbose and is_crypto:
-            print(f"  Asset type: CRYPTO (using crypto-specific analysis)", file=sys.stderr)
-
-        # Analyze components (different for crypto vs stock)
-        if is_crypto:
-            # Crypto: Skip stock-specific analyses
-            earnings = None
-            fundamentals = None
-            analysts = None
-            historical = None
-            earnings_timing = None
-            sector = None
-
-            # Crypto fundamentals (market cap, category, BTC correlation)
-            if args.verbose:
-                print(f"Analyzing crypto fundamentals...", file=sys.stderr)
-            crypto_fundamentals = analyze_crypto_fundamentals(data, verbose=args.verbose)
-
-            # Convert crypto fundamentals to regular Fundamentals for synthesize_signal
-            if crypto_fundamentals:
-                fundamentals = Fundamentals(
-                    score=crypto_fundamentals.score,
-                    key_metrics={
-                        "market_cap": crypto_fundamentals.market_cap,
-                        "market_cap_rank": crypto_fundamentals.market_cap_rank,
-                        "category": crypto_fundamentals.category,
-                        "btc_correlation": crypto_fundamentals.btc_correlation,
-                    },
-                    explanation=crypto_fundamentals.explanation,
-                )
-        else:
-            # Stock: Full analysis
-            earnings = analyze_earnings_surprise(data)
-            fundamentals = analyze_fundamentals(data)
-            analysts = analyze_analyst_sentiment(data)
-            historical = analyze_historical_patterns(data)
-
-            # Analyze earnings timing (stocks only)
-            if args.verbose:
-                print(f"Checking earnings timing...", file=sys.stderr)
-            earnings_timing = analyze_earnings_timing(data)
-
-            # Analyze sector performance (stocks only)
-            if args.verbose:
-                print(f"Analyzing sector performance...", file=sys.stderr)
-            sector = analyze_sector_performance(data, verbose=args.verbose)
-
-        # Market context (both crypto and stock)
-        if args.verbose:
-            print(f"Analyzing market context...", file=sys.stderr)
-        market_context = analyze_market_context(verbose=args.verbose)
-
-        # Momentum (both crypto and stock)
-        if args.verbose:
-            print(f"Analyzing momentum...", file=sys.stderr)
-        momentum = analyze_momentum(data)
-
-        # Sentiment (stocks get full sentiment, crypto gets limited)
-        if args.verbose:
-            print(f"Analyzing market sentiment...", file=sys.stderr)
-        if is_crypto:
-            # Skip insider trading and put/call for crypto
-            sentiment = None
-        else:
-            sentiment = asyncio.run(analyze_sentiment(data, verbose=args.verbose, skip_insider=args.no_insider))
-
-        # Geopolitical risks (stocks only)
-        if is_crypto:
-            geopolitical_risk_warning = None
-            geopolitical_risk_penalty = 0.0
-        else:
-            sector_name = data.info.get("sector")
-            geopolitical_risk_warning, geopolitical_risk_penalty = check_sector_geopolitical_risk(
-                ticker=ticker,
-                sector=sector_name,
-                breaking_news=breaking_news,
-                verbose=args.verbose
-            )
-
-        if args.verbose:
-            print(f"Components analyzed:", file=sys.stderr)
-            if is_crypto:
-                print(f"  Crypto Fundamentals: {'✓' if fundamentals else '✗'}", file=sys.stderr)
-                print(f"  Market Context: {'✓' if market_context else '✗'}", file=sys.stderr)
-                print(f"  Momentum: {'✓' if momentum else '✗'}", file=sys.stderr)
-                print(f"  (Earnings, Sector, Sentiment: N/A for crypto)\n", file=sys.stderr)
-            else:
-                print(f"  Earnings: {'✓' if earnings else '✗'}", file=sys.stderr)
-                print(f"  Fundamentals: {'✓' if fundamentals else '✗'}", file=sys.stderr)
-                print(f"  Analysts: {'✓' if analysts and analysts.score else '✗'}", file=sys.stderr)
-                print(f"  Historical: {'✓' if historical else '✗'}", file=sys.stderr)
-                print(f"  Market Context: {'✓' if market_context else '✗'}", file=sys.stderr)
-                print(f"  Sector: {'✓' if sector else '✗'}", file=sys.stderr)
-                print(f"  Earnings Timing: {'✓' if earnings_timing else '✗'}", file=sys.stderr)
-                print(f"  Momentum: {'✓' if momentum else '✗'}", file=sys.stderr)
-                print(f"  Sentiment: {'✓' if sentiment else '✗'}\n", file=sys.stderr)
-
-        # Synthesize signal
-        signal = synthesize_signal(
-            ticker=requested_ticker,
-            company_name=company_name,
-            earnings=earnings,
-            fundamentals=fundamentals,
-            analysts=analysts,
-            historical=historical,
-            market_context=market_context,  # NEW
-            sector=sector,  # NEW
-            earnings_timing=earnings_timing,  # NEW
-            momentum=momentum,  # NEW
-            sentiment=sentiment,  # NEW
-            breaking_news=breaking_news,  # NEW v4.0.0
-            geopolitical_risk_warning=geopolitical_risk_warning,  # NEW v4.0.0
-            geopolitical_risk_penalty=geopolitical_risk_penalty,  # NEW v4.0.0
-        )
-
         results.append(signal)
 
     # Output results
@@ -2422,24 +2797,15 @@ def generate_portfolio_summary(
     # Map results by ticker
     result_map = {r.ticker: r for r in results}
 
-    # Calculate portfolio metrics
-    total_cost = 0.0
-    total_value = 0.0
-    asset_values = []
+    # Calculate portfolio metrics over one bulk price download
+    tickers = [ticker.upper() for ticker, _, _, _ in portfolio_assets]
+    quantities = pd.Series([quantity for _, quantity, _, _ in portfolio_assets], index=tickers)
+    cost_bases = pd.Series([cost_basis for _, _, cost_basis, _ in portfolio_assets], index=tickers)
 
-    for ticker, quantity, cost_basis, asset_type in portfolio_assets:
-        cost_total = quantity * cost_basis
-        total_cost += cost_total
-
-        # Get current price from yfinance
-        try:
-            stock = yf.Ticker(ticker)
-            current_price = stock.info.get("regularMarketPrice", 0) or 0
-            current_value = quantity * current_price
-            total_value += current_value
-            asset_values.append((ticker, current_value, cost_total, asset_type))
-        except Exception:
-            asset_values.append((ticker, 0, cost_total, asset_type))
+    prices = latest_prices(tickers).reindex(tickers).fillna(0.0)
+    values = quantities * prices
+    total_cost = float((quantities * cost_bases).sum())
+    total_value = float(values.sum())
 
     # Calculate period returns if requested
     period_return = None
@@ -2457,11 +2823,9 @@ def generate_portfolio_summary(
     # Concentration analysis
     concentrations = []
     if total_value > 0:
-        for ticker, value, _, asset_type in asset_values:
-            if value > 0:
-                pct = value / total_value * 100
-                if pct > 30:
-                    concentrations.append(f"{ticker}: {pct:.1f}%")
+        weights = values / total_value * 100
+        for ticker, pct in weights[weights > 30].items():
+            concentrations.append(f"{ticker}: {pct:.1f}%")
 
     # Build summary
     total_pnl = total_value - total_cost
@@ -2490,22 +2854,20 @@ def calculate_portfolio_period_return(
 ) -> float | None:
     """Calculate portfolio return over a period using historical prices."""
     try:
-        total_start_value = 0.0
-        total_current_value = 0.0
+        tickers = [ticker.upper() for ticker, _, _, _ in portfolio_assets]
+        quantities = pd.Series([quantity for _, quantity, _, _ in portfolio_assets], index=tickers)
 
-        for ticker, quantity, _, _ in portfolio_assets:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=f"{period_days + 5}d")
-
-            if hist.empty or len(hist) < 2:
-                continue
+        closes = get_price_store().closes(tickers, start=period_start(period_days))
+        if closes.empty:
+            return None
 
-            # Get price at period start and now
-            current_price = hist["Close"].iloc[-1]
-            start_price = hist["Close"].iloc[0]
+        # Price at period start and now; skip assets with fewer than 2 bars
+        has_history = closes.notna().sum() >= 2
+        start_prices = closes.bfill().iloc[0]
+        current_prices = closes.ffill().iloc[-1]
 
-            total_current_value += quantity * current_price
-            total_start_value += quantity * start_price
+        total_start_value = float((quantities * start_prices)[has_history].sum())
+        total_current_value = float((quantities * current_prices)[has_history].sum())
 
         if total_start_value > 0:
             return (total_current_value - total_start_value) / total_start_value * 100
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "yfinance>=0.2.40",
+# ]
+# ///
+"""
+Persistent on-disk cache for Yahoo Finance responses.
+
+Shared by analyze_stock.py, dividends.py, watchlist.py and portfolio.py so
+repeated CLI runs (and cron-driven alert checks) reuse recent responses
+instead of refetching them on every invocation.
+
+- Entries are keyed by ticker + endpoint + params
+- Each endpoint has its own TTL (quotes: seconds, fundamentals: hours,
+  earnings: a day), see ENDPOINT_TTLS
+- The SQLite file is size-bounded with least-recently-used eviction
+- WAL mode + per-thread connections make it safe to share between threads
+  and between processes
+
+Set STOCK_ANALYSIS_NO_CACHE=1 to bypass the cache entirely.
+
+Usage:
+    uv run data_cache.py stats    # Show cache size and entry counts
+    uv run data_cache.py clear    # Drop all cached responses
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import yfinance as yf
+
+
+# Time-to-live per endpoint, in seconds
+ENDPOINT_TTLS = {
+    "quote": 60,                          # Current price
+    "download": 60,                       # Bulk multi-symbol bars (market_data.py)
+    "history": 15 * 60,                   # OHLCV bars
+    "info": 4 * 3600,                     # Fundamentals, profile
+    "recommendations": 6 * 3600,
+    "analyst_price_targets": 6 * 3600,
+    "earnings_dates": 24 * 3600,
+    "dividends": 24 * 3600,
+}
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+# Re-sum entry sizes at least this often, to see writes by other processes
+EVICT_CHECK_INTERVAL = 256
+
+# Ticker used for market-wide values (market context, Fear & Greed, ...)
+SHARED_TICKER = "_shared"
+
+
+def get_cache_path() -> Path:
+    """Get the cache database path (next to portfolios.json and watchlist.json)."""
+    state_dir = os.environ.get("CLAWDBOT_STATE_DIR", os.path.expanduser("~/.clawdbot"))
+    cache_dir = Path(state_dir) / "skills" / "stock-analysis"
+    return cache_dir / "yfinance_cache.sqlite3"
+
+
+def _is_empty(value) -> bool:
+    """True for results not worth caching (None, empty frames/series/dicts)."""
+    if value is None:
+        return True
+    if hasattr(value, "empty"):
+        return bool(value.empty)
+    if isinstance(value, (dict, list, tuple)):
+        return len(value) == 0
+    return False
+
+
+class YFinanceCache:
+    """SQLite-backed response cache with per-endpoint TTLs and LRU eviction."""
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: dict[str, float] | None = None,
+        enabled: bool = True,
+    ):
+        self.path = Path(path) if path else get_cache_path()
+        self.max_bytes = max_bytes
+        self.ttls = {**ENDPOINT_TTLS, **(ttls or {})}
+        self.enabled = enabled
+        self._local = threading.local()
+        # Running estimate of the file's entry bytes; None until first summed.
+        # Replacements are counted as growth, so it only errs high and a real
+        # SUM(size) is taken before anything is evicted.
+        self._approx_bytes: int | None = None
+        self._writes_since_check = 0
+        self._size_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, creating the schema on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                ticker TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)")
+        self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(ticker: str, endpoint: str, params: dict | None) -> str:
+        return f"{ticker.upper()}|{endpoint}|{json.dumps(params or {}, sort_keys=True, default=str)}"
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, DEFAULT_TTL_SECONDS)
+
+    def get(self, ticker: str, endpoint: str, params: dict | None = None, ttl: float | None = None):
+        """Return (hit, value). Expired or unreadable entries count as misses."""
+        if not self.enabled:
+            return False, None
+
+        key = self._key(ticker, endpoint, params)
+        ttl = self.ttl_for(endpoint) if ttl is None else ttl
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > ttl:
+                return False, None
+            value = pickle.loads(row[0])
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            return True, value
+        except Exception:
+            return False, None
+
+    def set(self, ticker: str, endpoint: str, value, params: dict | None = None) -> None:
+        """Store a response. Empty or unpicklable values are silently skipped."""
+        if not self.enabled or _is_empty(value):
+            return
+
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, ticker, endpoint, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._key(ticker, endpoint, params), ticker.upper(), endpoint, blob, len(blob), now, now),
+            )
+            self._maybe_evict(conn, len(blob))
+        except sqlite3.Error:
+            pass
+
+    def fetch(self, ticker: str, endpoint: str, loader, params: dict | None = None):
+        """Return the cached value, or call loader() and cache its result."""
+        hit, value = self.get(ticker, endpoint, params)
+        if hit:
+            return value
+        value = loader()
+        self.set(ticker, endpoint, value, params)
+        return value
+
+    def _maybe_evict(self, conn: sqlite3.Connection, written: int) -> None:
+        """Evict only when the running size estimate (or a periodic re-sum) says so."""
+        with self._size_lock:
+            self._writes_since_check += 1
+            if self._approx_bytes is not None:
+                self._approx_bytes += written
+                if (self._approx_bytes <= self.max_bytes
+                        and self._writes_since_check < EVICT_CHECK_INTERVAL):
+                    return
+            self._writes_since_check = 0
+            self._approx_bytes = self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """Drop least-recently-used entries until the cache fits in max_bytes.
+
+        Returns the entry bytes left afterwards.
+        """
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return total
+
+        # Free down to 90% so we don't evict on every subsequent write
+        to_free = total - int(self.max_bytes * 0.9)
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC"):
+            doomed.append((key,))
+            to_free -= size
+            total -= size
+            if to_free <= 0:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        return total
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        if self.path.exists():
+            self._connect().execute("DELETE FROM entries")
+        with self._size_lock:
+            self._approx_bytes = 0
+
+    def stats(self) -> dict:
+        """Summarize cache contents by endpoint."""
+        if not self.path.exists():
+            return {"path": str(self.path), "entries": 0, "bytes": 0, "endpoints": {}}
+        conn = self._connect()
+        endpoints = {
+            endpoint: {"entries": count, "bytes": size}
+            for endpoint, count, size in conn.execute(
+                "SELECT endpoint, COUNT(*), SUM(size) FROM entries GROUP BY endpoint"
+            )
+        }
+        return {
+            "path": str(self.path),
+            "entries": sum(e["entries"] for e in endpoints.values()),
+            "bytes": sum(e["bytes"] for e in endpoints.values()),
+            "max_bytes": self.max_bytes,
+            "endpoints": endpoints,
+        }
+
+
+_default_cache: YFinanceCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache() -> YFinanceCache:
+    """Get the process-wide cache (disabled if STOCK_ANALYSIS_NO_CACHE is set)."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                enabled = os.environ.get("STOCK_ANALYSIS_NO_CACHE", "").lower() not in ("1", "true", "yes")
+                _default_cache = YFinanceCache(enabled=enabled)
+    return _default_cache
+
+
+class CachedTicker:
+    """
+    Drop-in for the parts of yf.Ticker this skill uses, served through the cache.
+    The underlying yf.Ticker is only created on a cache miss.
+    """
+
+    def __init__(self, ticker: str, cache: YFinanceCache | None = None):
+        self.ticker = ticker
+        self._cache = cache or get_cache()
+        self._stock = None
+        self._live_info = None  # (fetched_at, info) from this instance's last info fetch
+
+    @property
+    def stock(self):
+        """The uncached yf.Ticker (e.g. for options chains)."""
+        if self._stock is None:
+            self._stock = yf.Ticker(self.ticker)
+        return self._stock
+
+    def _fetch(self, endpoint: str, loader, params: dict | None = None):
+        return self._cache.fetch(self.ticker, endpoint, loader, params)
+
+    @property
+    def info(self) -> dict:
+        """Fundamentals and profile, cached for hours; use current_price() for the price."""
+        return self._fetch("info", self._load_info)
+
+    def _load_info(self) -> dict:
+        info = self.stock.info
+        self._live_info = (time.time(), info)
+        return info
+
+    @property
+    def earnings_dates(self):
+        return self._fetch("earnings_dates", lambda: self.stock.earnings_dates)
+
+    @property
+    def recommendations(self):
+        return self._fetch("recommendations", lambda: self.stock.recommendations)
+
+    @property
+    def analyst_price_targets(self):
+        return self._fetch("analyst_price_targets", lambda: self.stock.analyst_price_targets)
+
+    @property
+    def dividends(self):
+        return self._fetch("dividends", lambda: self.stock.dividends)
+
+    def history(self, period: str = "1mo", **kwargs):
+        return self._fetch(
+            "history",
+            lambda: self.stock.history(period=period, **kwargs),
+            params={"period": period, **kwargs},
+        )
+
+    def current_price(self) -> float | None:
+        """Latest price with the short quote TTL (refreshes cached info as a side effect)."""
+        def _load():
+            # Reuse an info response this instance fetched within the quote TTL
+            if self._live_info and time.time() - self._live_info[0] <= self._cache.ttl_for("quote"):
+                info = self._live_info[1]
+            else:
+                info = self._load_info()
+                self._cache.set(self.ticker, "info", info)
+            price = info.get("regularMarketPrice") or info.get("currentPrice")
+            return float(price) if price else None
+
+        return self._fetch("quote", _load)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yahoo Finance response cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show cache size and entry counts")
+    subparsers.add_parser("clear", help="Drop all cached responses")
+
+    args = parser.parse_args()
+    cache = get_cache()
+
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+    elif args.command == "clear":
+        cache.clear()
+        print(f"Cleared {cache.path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -28,7 +28,8 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 
 import pandas as pd
-import yfinance as yf
+
+from data_cache import CachedTicker
 
 
 @dataclass
@@ -66,11 +67,11 @@ class DividendAnalysis:
 def analyze_dividends(ticker: str, verbose: bool = False) -> DividendAnalysis | None:
     """Analyze dividend metrics for a stock."""
     try:
-        stock = yf.Ticker(ticker)
+        stock = CachedTicker(ticker)
         info = stock.info
         
         company_name = info.get("longName") or info.get("shortName") or ticker
-        current_price = info.get("regularMarketPrice") or info.get("currentPrice")
+        current_price = stock.current_price()  # quote TTL, not the hours-old info
         
         # Basic dividend info
         dividend_yield = info.get("dividendYield")
@@ -508,12 +508,53 @@ class HotScanner:
         
         return summary
 
+    def add_momentum_overlay(self, summary, limit=40):
+        """Rank trending stocks by price momentum vs SPY (needs numpy/pandas/yfinance)."""
+        print("  📐 Momentum overlay...")
+        try:
+            from indicators import compute_indicators
+            from market_data import download_history, get_field
+        except ImportError as e:
+            print(f"    ⚠️ Momentum overlay unavailable: {e}")
+            return summary
+
+        symbols = []
+        for item in summary["stock_highlights"] + summary["top_trending"]:
+            symbol = item["symbol"]
+            if re.fullmatch(r"[A-Z]{1,5}", symbol) and symbol not in symbols:
+                symbols.append(symbol)
+        symbols = symbols[:limit]
+        if not symbols:
+            return summary
+
+        try:
+            history = download_history([*symbols, "SPY"], period="1y")
+            closes = get_field(history, "Close")
+            volumes = get_field(history, "Volume", list(closes.columns))
+            indicators = compute_indicators(closes, volumes, benchmark="SPY").to_frame()
+        except Exception as e:
+            print(f"    ❌ Momentum overlay: {str(e)[:50]}")
+            return summary
+
+        indicators = indicators.drop(index="SPY", errors="ignore").dropna(subset=["close"])
+        indicators = indicators.sort_values("relative_strength", ascending=False)
+        columns = {"rsi": 1, "pct_from_52w_high": 1, "volume_ratio": 2, "relative_strength": 3}
+        indicators = indicators[list(columns)].round(columns).astype(object)
+        indicators = indicators.where(indicators.notna(), None)
+        summary["momentum"] = [
+            {"symbol": symbol, **row} for symbol, row in indicators.to_dict(orient="index").items()
+        ]
+        print(f"    ✅ {len(summary['momentum'])} symbols ranked")
+        return summary
+
 
 def main():
     import argparse
     parser = argparse.ArgumentParser(description="🔥 Hot Scanner - Find trending stocks & crypto")
     parser.add_argument("--no-social", action="store_true", help="Skip social media scans")
     parser.add_argument("--json", action="store_true", help="Output only JSON")
+    parser.add_argument("--momentum", action="store_true",
+                        help="Rank trending stocks by RSI / 52w range / relative strength")
     args = parser.parse_args()
     
     scanner = HotScanner(include_social=not args.no_social)
@@ -527,6 +568,8 @@ def main():
     
     scanner.scan_all()
     summary = scanner.get_hot_summary()
+    if args.momentum:
+        scanner.add_momentum_overlay(summary)
     
     # Save
     output_file = CACHE_DIR / "hot_scan_latest.json"
@@ -569,6 +612,13 @@ def main():
             text = text[:55] + "..." if len(text) > 55 else text
             print(f"  [{platform}] {text}")
     
+    if summary.get("momentum"):
+        print("\n📐 MOMENTUM (vs SPY, 3mo):\n")
+        for item in summary["momentum"][:10]:
+            rsi = f"RSI {item['rsi']:.0f}" if item["rsi"] is not None else "RSI n/a"
+            rs = f"RS {item['relative_strength']:.2f}" if item["relative_strength"] is not None else ""
+            print(f"  {item['symbol']:6} {rsi:8} {item['pct_from_52w_high']:+6.1f}% from 52w high  {rs}")
+
     print("\n📰 NEWS:\n")
     for news in summary["breaking_news"][:5]:
         tickers = ", ".join(news["tickers"][:3])
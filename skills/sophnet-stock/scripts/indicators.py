@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "numpy>=1.24",
+#     "pandas>=2.0.0",
+# ]
+# ///
+"""
+Vectorized technical indicators for a whole universe at once.
+
+Every indicator works on a 2-D (dates x tickers) matrix of closes/volumes,
+so one NumPy pass covers thousands of symbols. Missing bars (NaN) are
+allowed, e.g. for tickers that listed mid-window.
+
+- RSI: simple (rolling mean, what analyze_momentum has always used) and
+  Wilder-smoothed
+- Simple moving averages
+- Distance from the 52-week high/low and position in the 52w range
+- Relative volume (5-day vs 60-day average)
+- Relative strength vs a benchmark column or the universe median
+
+IndicatorEngine keeps trailing windows plus Wilder state, so appending one
+new bar updates every indicator without recomputing the history.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+RSI_PERIOD = 14
+WINDOW_52W = 252          # Trading days in a year
+VOLUME_SHORT = 5
+VOLUME_LONG = 60
+RS_LOOKBACK = 63          # ~3 months
+
+
+def _as_matrix(values) -> np.ndarray:
+    """Coerce a Series/DataFrame/array to a 2-D float64 (dates x tickers) matrix."""
+    matrix = np.asarray(values, dtype=np.float64)
+    if matrix.ndim == 1:
+        matrix = matrix[:, None]
+    return matrix
+
+
+def rolling_mean(matrix, window: int) -> np.ndarray:
+    """
+    Trailing mean over `window` rows via cumulative sums.
+    A row is NaN unless all `window` values in it are present.
+    """
+    matrix = _as_matrix(matrix)
+    valid = ~np.isnan(matrix)
+    zero = np.zeros((1, matrix.shape[1]))
+    sums = np.concatenate([zero, np.cumsum(np.where(valid, matrix, 0.0), axis=0)])
+    counts = np.concatenate([zero, np.cumsum(valid, axis=0)])
+
+    out = np.full(matrix.shape, np.nan)
+    if len(matrix) < window:
+        return out
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    with np.errstate(invalid="ignore"):
+        out[window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+    return out
+
+
+def sma(closes, window: int) -> np.ndarray:
+    """Simple moving average of closes."""
+    return rolling_mean(closes, window)
+
+
+def _gains_losses(closes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Per-bar gains and losses (both >= 0, NaN where either close is missing)."""
+    delta = np.diff(closes, axis=0)
+    return np.maximum(delta, 0.0), np.maximum(-delta, 0.0)
+
+
+def _rsi_from_averages(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    """RSI from average gain/loss: 100 for all gains, 0 for all losses, 50 for a flat window."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    rsi = np.where((avg_loss == 0) & (avg_gain > 0), 100.0, rsi)
+    return np.where((avg_loss == 0) & (avg_gain == 0), 50.0, rsi)
+
+
+@dataclass
+class WilderState:
+    """Running Wilder averages per ticker, advanced one bar at a time."""
+    period: int
+    avg_gain: np.ndarray
+    avg_loss: np.ndarray
+    count: np.ndarray  # Valid deltas seen so far
+
+    @classmethod
+    def empty(cls, n_tickers: int, period: int = RSI_PERIOD) -> "WilderState":
+        return cls(
+            period=period,
+            avg_gain=np.zeros(n_tickers),
+            avg_loss=np.zeros(n_tickers),
+            count=np.zeros(n_tickers, dtype=np.int64),
+        )
+
+    def step(self, gain: np.ndarray, loss: np.ndarray) -> None:
+        """Fold in one bar. The first `period` deltas seed a simple mean; later ones smooth."""
+        valid = ~np.isnan(gain)
+        seeding = valid & (self.count < self.period)
+        smoothing = valid & ~seeding
+
+        self.avg_gain[seeding] += gain[seeding] / self.period
+        self.avg_loss[seeding] += loss[seeding] / self.period
+        keep = (self.period - 1) / self.period
+        self.avg_gain[smoothing] = self.avg_gain[smoothing] * keep + gain[smoothing] / self.period
+        self.avg_loss[smoothing] = self.avg_loss[smoothing] * keep + loss[smoothing] / self.period
+        self.count[valid] += 1
+
+    def rsi(self) -> np.ndarray:
+        rsi = _rsi_from_averages(self.avg_gain, self.avg_loss)
+        return np.where(self.count >= self.period, rsi, np.nan)
+
+
+def rsi(closes, period: int = RSI_PERIOD, method: str = "simple") -> np.ndarray:
+    """
+    RSI for every date and ticker (NaN during warm-up).
+
+    method="simple" averages gains/losses over a rolling window;
+    method="wilder" uses Wilder's exponential smoothing.
+    """
+    closes = _as_matrix(closes)
+    out = np.full(closes.shape, np.nan)
+    if len(closes) < 2:
+        return out
+    gains, losses = _gains_losses(closes)
+
+    if method == "simple":
+        out[1:] = _rsi_from_averages(rolling_mean(gains, period), rolling_mean(losses, period))
+    elif method == "wilder":
+        state = WilderState.empty(closes.shape[1], period)
+        for i in range(len(gains)):
+            state.step(gains[i], losses[i])
+            out[i + 1] = state.rsi()
+    else:
+        raise ValueError(f"Unknown RSI method: {method}")
+    return out
+
+
+def _last_valid(matrix: np.ndarray) -> np.ndarray:
+    """Last non-NaN value in each column."""
+    valid = ~np.isnan(matrix)
+    idx = len(matrix) - 1 - np.argmax(valid[::-1], axis=0)
+    last = matrix[idx, np.arange(matrix.shape[1])]
+    return np.where(valid.any(axis=0), last, np.nan)
+
+
+def _tail_mean(matrix: np.ndarray, rows: int) -> np.ndarray:
+    """Mean of the last `rows` rows, NaN unless all are present."""
+    if len(matrix) < rows:
+        return np.full(matrix.shape[1], np.nan)
+    tail = matrix[-rows:]
+    return np.where(np.isnan(tail).any(axis=0), np.nan, tail.mean(axis=0))
+
+
+@dataclass
+class IndicatorSnapshot:
+    """Latest indicator values, one entry per ticker."""
+    tickers: list[str]
+    close: np.ndarray
+    rsi: np.ndarray                  # Simple 14-day RSI
+    rsi_wilder: np.ndarray           # Wilder-smoothed 14-day RSI
+    sma_50: np.ndarray
+    sma_200: np.ndarray
+    high_52w: np.ndarray
+    low_52w: np.ndarray
+    pct_from_52w_high: np.ndarray    # % below the 52w high (<= 0)
+    pct_from_52w_low: np.ndarray     # % above the 52w low (>= 0)
+    position_52w: np.ndarray         # 0 = at the low, 100 = at the high
+    volume_ratio: np.ndarray         # 5-day vs 60-day average volume
+    relative_strength: np.ndarray    # Lookback return relative to the benchmark (1.0 = in line)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Indicators as a DataFrame indexed by ticker."""
+        columns = {name: getattr(self, name) for name in self.__dataclass_fields__ if name != "tickers"}
+        return pd.DataFrame(columns, index=pd.Index(self.tickers, name="Ticker"))
+
+    def get(self, ticker: str) -> dict[str, float | None]:
+        """Indicators for one ticker, with NaN mapped to None."""
+        row = self.to_frame().loc[ticker]
+        return {name: (float(value) if pd.notna(value) else None) for name, value in row.items()}
+
+
+class IndicatorEngine:
+    """
+    Indicators for a universe of tickers with incremental updates.
+
+    Holds the trailing 52-week window of closes and volumes plus Wilder RSI
+    state, so `append()` of a new bar only touches those buffers instead of
+    recomputing the full history.
+    """
+
+    def __init__(
+        self,
+        tickers: list[str],
+        rsi_period: int = RSI_PERIOD,
+        window: int = WINDOW_52W,
+        rs_lookback: int = RS_LOOKBACK,
+        benchmark: str | None = None,
+    ):
+        self.tickers = list(tickers)
+        self.rsi_period = rsi_period
+        self.window = window
+        self.rs_lookback = rs_lookback
+        self.benchmark_index = self.tickers.index(benchmark) if benchmark in self.tickers else None
+
+        n = len(self.tickers)
+        # One extra close so the window always has `window` deltas / a full lookback
+        self._closes = np.full((max(window, 200, rs_lookback) + 1, n), np.nan)
+        self._volumes = np.full((VOLUME_LONG, n), np.nan)
+        self._last_close = np.full(n, np.nan)
+        self._wilder = WilderState.empty(n, rsi_period)
+        self.bars = 0
+
+    @classmethod
+    def from_frames(
+        cls,
+        closes: pd.DataFrame,
+        volumes: pd.DataFrame | None = None,
+        **kwargs,
+    ) -> "IndicatorEngine":
+        """Build an engine from (dates x tickers) close and optional volume frames."""
+        engine = cls(list(closes.columns), **kwargs)
+        volume_matrix = None
+        if volumes is not None:
+            volume_matrix = _as_matrix(volumes.reindex(index=closes.index, columns=closes.columns))
+        engine.extend(_as_matrix(closes), volume_matrix)
+        return engine
+
+    def extend(self, closes: np.ndarray, volumes: np.ndarray | None = None) -> None:
+        """Append many bars at once (rows of a dates x tickers matrix)."""
+        closes = _as_matrix(closes)
+        if volumes is not None:
+            volumes = _as_matrix(volumes)
+
+        # Wilder state has to see every bar; the windows only keep their tails
+        previous = np.vstack([self._last_close[None, :], closes])
+        previous = pd.DataFrame(previous).ffill().to_numpy()
+        delta = closes - previous[:-1]
+        for i in range(len(closes)):
+            self._wilder.step(np.maximum(delta[i], 0.0), np.maximum(-delta[i], 0.0))
+        self._last_close = previous[-1]
+
+        self._closes = np.vstack([self._closes, closes])[-len(self._closes):]
+        if volumes is not None:
+            self._volumes = np.vstack([self._volumes, volumes])[-len(self._volumes):]
+        else:
+            filler = np.full((len(closes), len(self.tickers)), np.nan)
+            self._volumes = np.vstack([self._volumes, filler])[-len(self._volumes):]
+        self.bars += len(closes)
+
+    def append(self, close_row, volume_row=None) -> IndicatorSnapshot:
+        """Add one new bar (one value per ticker) and return the updated indicators."""
+        close_row = np.asarray(close_row, dtype=np.float64).reshape(1, -1)
+        volume_row = None if volume_row is None else np.asarray(volume_row, dtype=np.float64).reshape(1, -1)
+        self.extend(close_row, volume_row)
+        return self.latest()
+
+    def latest(self) -> IndicatorSnapshot:
+        """Indicator values as of the last bar."""
+        closes = self._closes
+        window = closes[-self.window:]
+        close = _last_valid(closes)
+
+        # Simple RSI over the last `rsi_period` deltas
+        gains, losses = _gains_losses(closes[-(self.rsi_period + 1):])
+        simple_rsi = _rsi_from_averages(_tail_mean(gains, self.rsi_period), _tail_mean(losses, self.rsi_period))
+
+        with np.errstate(all="ignore"):
+            high = np.max(np.where(np.isnan(window), -np.inf, window), axis=0)
+            low = np.min(np.where(np.isnan(window), np.inf, window), axis=0)
+            high = np.where(np.isfinite(high), high, np.nan)
+            low = np.where(np.isfinite(low), low, np.nan)
+            pct_from_high = (close - high) / high * 100
+            pct_from_low = (close - low) / low * 100
+            price_range = high - low
+            position = np.where(price_range > 0, (close - low) / price_range * 100, np.nan)
+
+            # Needs a full 60-day baseline, like analyze_momentum always has
+            avg_volume = _tail_mean(self._volumes, VOLUME_LONG)
+            recent_volume = _tail_mean(self._volumes, VOLUME_SHORT)
+            volume_ratio = np.where(avg_volume > 0, recent_volume / avg_volume, np.nan)
+
+            lookback_close = closes[-(self.rs_lookback + 1)]
+            returns = close / lookback_close - 1
+            if self.benchmark_index is not None:
+                benchmark_return = returns[self.benchmark_index]
+            else:
+                benchmark_return = np.nanmedian(returns) if np.isfinite(returns).any() else np.nan
+            relative_strength = (1 + returns) / (1 + benchmark_return)
+
+        return IndicatorSnapshot(
+            tickers=self.tickers,
+            close=close,
+            rsi=simple_rsi,
+            rsi_wilder=self._wilder.rsi(),
+            sma_50=_tail_mean(closes, 50),
+            sma_200=_tail_mean(closes, 200),
+            high_52w=high,
+            low_52w=low,
+            pct_from_52w_high=pct_from_high,
+            pct_from_52w_low=pct_from_low,
+            position_52w=position,
+            volume_ratio=volume_ratio,
+            relative_strength=relative_strength,
+        )
+
+
+def compute_indicators(
+    closes: pd.DataFrame,
+    volumes: pd.DataFrame | None = None,
+    **kwargs,
+) -> IndicatorSnapshot:
+    """Latest indicators for every column of a (dates x tickers) close frame."""
+    return IndicatorEngine.from_frames(closes, volumes, **kwargs).latest()
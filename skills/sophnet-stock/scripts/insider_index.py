@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "edgartools>=2.0.0",
+# ]
+# ///
+"""
+Local index of SEC Form 4 insider transactions.
+
+Form 4 filings are fetched from EDGAR incrementally (only accessions not yet
+indexed), parsed concurrently, and stored in SQLite next to the response
+cache. The per-ticker insider score in analyze_stock.py is then a local
+query instead of a round trip to EDGAR on every run.
+
+Only open-market purchases (code P) and sales (code S) of non-derivative
+securities count towards net activity, matching edgartools'
+common_stock_purchases / common_stock_sales.
+
+Usage:
+    uv run insider_index.py refresh AAPL MSFT          # Pull new Form 4 filings from EDGAR
+    uv run insider_index.py import-dir ./form4_xml     # Index a directory of Form 4 XML files
+    uv run insider_index.py show AAPL --days 90        # Net insider activity from the index
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+
+SEC_IDENTITY = "stock-analysis@clawd.bot"
+REFRESH_INTERVAL_SECONDS = 24 * 3600  # Form 4s are filed within 2 business days anyway
+MAX_FILINGS_PER_REFRESH = 50
+FETCH_WORKERS = 8
+
+BUY_CODE = "P"
+SELL_CODE = "S"
+
+
+def get_index_path() -> Path:
+    """Get the index database path (next to portfolios.json and watchlist.json)."""
+    state_dir = os.environ.get("CLAWDBOT_STATE_DIR", os.path.expanduser("~/.clawdbot"))
+    return Path(state_dir) / "skills" / "stock-analysis" / "insider_index.sqlite3"
+
+
+# ============================================================================
+# Form 4 Parsing
+# ============================================================================
+
+@dataclass
+class InsiderTransaction:
+    owner: str
+    transaction_date: str  # YYYY-MM-DD
+    code: str              # P = purchase, S = sale, A = award, F = tax withholding, ...
+    shares: float
+    price: float | None
+    acquired: bool         # A(cquired) vs D(isposed)
+
+
+@dataclass
+class Form4Filing:
+    accession: str
+    ticker: str
+    issuer: str | None
+    period_of_report: str | None
+    transactions: list[InsiderTransaction] = field(default_factory=list)
+
+
+def _text(element: ET.Element | None, path: str) -> str | None:
+    """Text of a child element; Form 4 wraps most values in <value>."""
+    if element is None:
+        return None
+    node = element.find(path)
+    if node is None:
+        return None
+    value = node.find("value")
+    text = (value if value is not None else node).text
+    return text.strip() if text and text.strip() else None
+
+
+def _number(text: str | None) -> float | None:
+    try:
+        return float(text) if text is not None else None
+    except ValueError:
+        return None
+
+
+def parse_form4(xml: str | bytes, accession: str) -> Form4Filing | None:
+    """Parse a Form 4 ownershipDocument. Returns None for malformed or non-Form 4 XML."""
+    try:
+        root = ET.fromstring(xml)
+    except ET.ParseError:
+        return None
+    if root.tag != "ownershipDocument" or _text(root, "documentType") not in ("4", "4/A"):
+        return None
+
+    issuer = root.find("issuer")
+    ticker = _text(issuer, "issuerTradingSymbol")
+    if not ticker:
+        return None
+
+    owner = _text(root, "reportingOwner/reportingOwnerId/rptOwnerName") or "Unknown"
+    filing = Form4Filing(
+        accession=accession,
+        ticker=ticker.upper(),
+        issuer=_text(issuer, "issuerName"),
+        period_of_report=_text(root, "periodOfReport"),
+    )
+
+    for row in root.iterfind("nonDerivativeTable/nonDerivativeTransaction"):
+        code = _text(row, "transactionCoding/transactionCode")
+        shares = _number(_text(row, "transactionAmounts/transactionShares"))
+        if not code or shares is None:
+            continue
+        filing.transactions.append(InsiderTransaction(
+            owner=owner,
+            transaction_date=(_text(row, "transactionDate") or filing.period_of_report or "")[:10],
+            code=code.upper(),
+            shares=shares,
+            price=_number(_text(row, "transactionAmounts/transactionPricePerShare")),
+            acquired=_text(row, "transactionAmounts/transactionAcquiredDisposedCode") == "A",
+        ))
+
+    return filing
+
+
+def _parse_file(path: Path) -> Form4Filing | None:
+    """Parse one Form 4 XML file; the file name (minus .xml) is its accession number."""
+    try:
+        return parse_form4(Path(path).read_bytes(), accession=Path(path).stem)
+    except OSError:
+        return None
+
+
+# ============================================================================
+# Index
+# ============================================================================
+
+class InsiderIndex:
+    """SQLite index of Form 4 transactions, refreshed incrementally per ticker."""
+
+    def __init__(self, path: Path | None = None, refresh_interval: float = REFRESH_INTERVAL_SECONDS):
+        self.path = Path(path) if path else get_index_path()
+        self.refresh_interval = refresh_interval
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, creating the schema on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS filings (
+                accession TEXT PRIMARY KEY,
+                ticker TEXT NOT NULL,
+                filing_date TEXT,
+                indexed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS transactions (
+                accession TEXT NOT NULL REFERENCES filings(accession),
+                ticker TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                transaction_date TEXT NOT NULL,
+                code TEXT NOT NULL,
+                shares REAL NOT NULL,
+                price REAL,
+                acquired INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_transactions_ticker_date
+                ON transactions(ticker, transaction_date);
+            CREATE TABLE IF NOT EXISTS refreshes (
+                ticker TEXT PRIMARY KEY,
+                refreshed_at REAL NOT NULL
+            );
+            """
+        )
+        self._local.conn = conn
+        return conn
+
+    def known_accessions(self, ticker: str) -> set[str]:
+        rows = self._connect().execute("SELECT accession FROM filings WHERE ticker = ?", (ticker.upper(),))
+        return {row[0] for row in rows}
+
+    def add_filings(self, filings: list[Form4Filing], filing_dates: dict[str, str] | None = None) -> int:
+        """Store parsed filings (re-adding an accession replaces it). Returns the number stored."""
+        filing_dates = filing_dates or {}
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            for filing in filings:
+                conn.execute("DELETE FROM transactions WHERE accession = ?", (filing.accession,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO filings (accession, ticker, filing_date, indexed_at) VALUES (?, ?, ?, ?)",
+                    (filing.accession, filing.ticker,
+                     filing_dates.get(filing.accession, filing.period_of_report), now),
+                )
+                conn.executemany(
+                    "INSERT INTO transactions "
+                    "(accession, ticker, owner, transaction_date, code, shares, price, acquired) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (filing.accession, filing.ticker, t.owner, t.transaction_date,
+                         t.code, t.shares, t.price, int(t.acquired))
+                        for t in filing.transactions
+                    ],
+                )
+        return len(filings)
+
+    def mark_refreshed(self, ticker: str, when: float | None = None) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO refreshes (ticker, refreshed_at) VALUES (?, ?)",
+                (ticker.upper(), time.time() if when is None else when),
+            )
+
+    def refreshed_at(self, ticker: str) -> float | None:
+        row = self._connect().execute(
+            "SELECT refreshed_at FROM refreshes WHERE ticker = ?", (ticker.upper(),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def is_stale(self, ticker: str) -> bool:
+        refreshed_at = self.refreshed_at(ticker)
+        return refreshed_at is None or time.time() - refreshed_at > self.refresh_interval
+
+    def net_activity(
+        self,
+        ticker: str,
+        period_days: int = 90,
+        as_of: date | None = None,
+    ) -> tuple[int, float] | None:
+        """
+        Net open-market insider activity over the period: (net_shares, net_value_millions).
+        None if the ticker has never been indexed.
+        """
+        ticker = ticker.upper()
+        conn = self._connect()
+        indexed = conn.execute(
+            "SELECT 1 FROM refreshes WHERE ticker = ? UNION SELECT 1 FROM filings WHERE ticker = ? LIMIT 1",
+            (ticker, ticker),
+        ).fetchone()
+        if indexed is None:
+            return None
+
+        as_of = as_of or date.today()
+        cutoff = (as_of - timedelta(days=period_days)).isoformat()
+        bought_shares, bought_value, sold_shares, sold_value = conn.execute(
+            """
+            SELECT
+                COALESCE(SUM(CASE WHEN code = ? THEN shares END), 0),
+                COALESCE(SUM(CASE WHEN code = ? THEN shares * COALESCE(price, 0) END), 0),
+                COALESCE(SUM(CASE WHEN code = ? THEN shares END), 0),
+                COALESCE(SUM(CASE WHEN code = ? THEN shares * COALESCE(price, 0) END), 0)
+            FROM transactions
+            WHERE ticker = ? AND transaction_date >= ? AND transaction_date <= ?
+            """,
+            (BUY_CODE, BUY_CODE, SELL_CODE, SELL_CODE, ticker, cutoff, as_of.isoformat()),
+        ).fetchone()
+
+        net_shares = int(bought_shares - sold_shares)
+        net_value = (bought_value - sold_value) / 1_000_000  # Millions
+        return net_shares, net_value
+
+    def import_files(self, paths: list[Path], jobs: int | None = None) -> int:
+        """Parse Form 4 XML files in parallel processes and index them."""
+        paths = list(paths)
+        if not paths:
+            return 0
+        jobs = jobs or min(len(paths), os.cpu_count() or 1)
+        if jobs > 1 and len(paths) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                parsed = list(executor.map(_parse_file, paths, chunksize=16))
+        else:
+            parsed = [_parse_file(path) for path in paths]
+
+        filings = [filing for filing in parsed if filing is not None]
+        self.add_filings(filings)
+        for ticker in {filing.ticker for filing in filings}:
+            self.mark_refreshed(ticker)
+        return len(filings)
+
+    def refresh(
+        self,
+        ticker: str,
+        period_days: int = 90,
+        max_filings: int = MAX_FILINGS_PER_REFRESH,
+        workers: int = FETCH_WORKERS,
+    ) -> int:
+        """
+        Index Form 4 filings from EDGAR that are newer than the period cutoff and
+        not indexed yet. Filing documents are downloaded and parsed concurrently.
+        Returns the number of new filings.
+        """
+        from edgar import Company, set_identity
+
+        # Set SEC-required identity
+        set_identity(SEC_IDENTITY)
+
+        ticker = ticker.upper()
+        filings = Company(ticker).get_filings(form="4")
+        known = self.known_accessions(ticker)
+        cutoff = date.today() - timedelta(days=period_days)
+
+        new_filings = []
+        count = 0
+        # Newest first; iterate, don't slice due to pyarrow compatibility
+        for filing in filings if filings is not None else []:
+            if count >= max_filings:
+                break
+            count += 1
+            filing_date = _as_date(filing.filing_date)
+            if filing_date is not None and filing_date < cutoff:
+                break
+            if filing.accession_no not in known:
+                new_filings.append(filing)
+
+        def _load(filing) -> tuple[Form4Filing | None, str | None]:
+            try:
+                xml = filing.xml()
+                parsed = parse_form4(xml, accession=filing.accession_no) if xml else None
+            except Exception:
+                parsed = None
+            if parsed is not None:
+                parsed.ticker = ticker  # Index under the requested symbol (share classes, renames)
+            filing_date = _as_date(filing.filing_date)
+            return parsed, filing_date.isoformat() if filing_date else None
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            loaded = list(executor.map(_load, new_filings))
+
+        parsed = [filing for filing, _ in loaded if filing is not None]
+        filing_dates = {filing.accession: filing_date for filing, filing_date in loaded if filing is not None}
+        self.add_filings(parsed, filing_dates)
+        self.mark_refreshed(ticker)
+        return len(parsed)
+
+
+def _as_date(value) -> date | None:
+    """Normalize the filing_date shapes edgartools returns (date, datetime, Timestamp, str)."""
+    if value is None:
+        return None
+    if hasattr(value, "to_pydatetime"):
+        value = value.to_pydatetime()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+_default_index: InsiderIndex | None = None
+_default_index_lock = threading.Lock()
+
+
+def get_insider_index() -> InsiderIndex:
+    """Get the process-wide insider index."""
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                _default_index = InsiderIndex()
+    return _default_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SEC Form 4 insider transaction index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    refresh_parser = subparsers.add_parser("refresh", help="Pull new Form 4 filings from EDGAR")
+    refresh_parser.add_argument("tickers", nargs="+", help="Tickers to refresh")
+    refresh_parser.add_argument("--days", type=int, default=90, help="How far back to index (default: 90)")
+
+    import_parser = subparsers.add_parser("import-dir", help="Index a directory of Form 4 XML files")
+    import_parser.add_argument("directory", type=Path, help="Directory containing *.xml files")
+    import_parser.add_argument("--jobs", "-j", type=int, help="Parallel parser processes (default: CPU count)")
+
+    show_parser = subparsers.add_parser("show", help="Show net insider activity from the index")
+    show_parser.add_argument("ticker", help="Ticker")
+    show_parser.add_argument("--days", type=int, default=90, help="Period in days (default: 90)")
+
+    args = parser.parse_args()
+    index = get_insider_index()
+
+    if args.command == "refresh":
+        for ticker in args.tickers:
+            try:
+                added = index.refresh(ticker, period_days=args.days)
+                print(f"{ticker.upper()}: {added} new filing(s)", file=sys.stderr)
+            except Exception as e:
+                print(f"{ticker.upper()}: refresh failed ({e})", file=sys.stderr)
+
+    elif args.command == "import-dir":
+        paths = sorted(args.directory.glob("*.xml"))
+        added = index.import_files(paths, jobs=args.jobs)
+        print(f"Indexed {added} of {len(paths)} file(s) from {args.directory}", file=sys.stderr)
+
+    elif args.command == "show":
+        activity = index.net_activity(args.ticker, period_days=args.days)
+        if activity is None:
+            print(json.dumps({"ticker": args.ticker.upper(), "indexed": False}, indent=2))
+        else:
+            net_shares, net_value = activity
+            print(json.dumps({
+                "ticker": args.ticker.upper(),
+                "indexed": True,
+                "period_days": args.days,
+                "net_shares": net_shares,
+                "net_value_millions": round(net_value, 3),
+            }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
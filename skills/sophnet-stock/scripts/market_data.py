@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "yfinance>=0.2.40",
+#     "pandas>=2.0.0",
+# ]
+# ///
+"""
+Batched multi-symbol price downloads.
+
+One yf.download request per chunk of symbols replaces a yf.Ticker round trip
+per holding, so valuing a 150-position book costs a handful of requests
+instead of hundreds. Results are columnar: a (dates x tickers) frame per
+OHLCV field, ready for vectorized math.
+
+MarketSnapshot bundles the market-wide series every analysis needs (VIX,
+SPY/QQQ, safe-havens, sector ETFs) into one download per run, and can be
+exported as JSON so parallel workers share it.
+
+Usage:
+    uv run market_data.py snapshot --output snapshot.json
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+import yfinance as yf
+
+from data_cache import get_cache
+
+
+DEFAULT_CHUNK_SIZE = 100
+PRICE_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+# Market-wide series shared by every per-ticker analysis
+BENCHMARK_TICKERS = ("^VIX", "SPY", "QQQ", "BTC-USD")
+SAFE_HAVEN_TICKERS = ("GLD", "TLT", "UUP")
+SECTOR_ETF_TICKERS = ("XLF", "XLK", "XLV", "XLY", "XLP", "XLU", "XLB", "XLRE", "XLC", "XLI", "XLE")
+SNAPSHOT_PERIOD = "3mo"
+
+
+def _chunks(items: list[str], size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _normalize_download(frame: pd.DataFrame, tickers: list[str]) -> pd.DataFrame:
+    """Coerce yf.download output to (field, ticker) MultiIndex columns."""
+    if frame is None or frame.empty:
+        return pd.DataFrame()
+
+    if not isinstance(frame.columns, pd.MultiIndex):
+        # Older yfinance returns flat columns for a single symbol
+        frame = frame.copy()
+        frame.columns = pd.MultiIndex.from_product([frame.columns, tickers[:1]])
+
+    frame = frame.loc[:, frame.columns.get_level_values(0).isin(PRICE_FIELDS)]
+    frame.columns = frame.columns.set_names(["Field", "Ticker"])
+    if frame.index.tz is not None:
+        frame.index = frame.index.tz_localize(None)
+    return frame
+
+
+def _download_chunk(tickers: list[str], period: str | None, start: str | None) -> pd.DataFrame:
+    """Download one chunk of symbols through the on-disk cache."""
+    params = {"tickers": sorted(tickers), "period": period, "start": start}
+
+    def _load():
+        frame = yf.download(
+            tickers=tickers,
+            period=None if start else period,
+            start=start,
+            interval="1d",
+            group_by="column",
+            auto_adjust=True,
+            threads=True,
+            progress=False,
+        )
+        return _normalize_download(frame, tickers)
+
+    return get_cache().fetch("_batch", "download", _load, params=params)
+
+
+def download_history(
+    tickers: list[str],
+    period: str | None = "5d",
+    start: str | datetime | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> pd.DataFrame:
+    """
+    Download daily OHLCV bars for many tickers in chunked bulk requests.
+
+    Returns a frame indexed by date with (field, ticker) MultiIndex columns,
+    e.g. `frame["Close"]` is a (dates x tickers) price matrix. Tickers that
+    fail to download are simply absent or all-NaN.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    if not tickers:
+        return pd.DataFrame()
+    if isinstance(start, datetime):
+        start = start.strftime("%Y-%m-%d")
+
+    frames = []
+    for chunk in _chunks(tickers, chunk_size):
+        try:
+            frame = _download_chunk(chunk, period, start)
+        except Exception:
+            continue
+        if not frame.empty:
+            frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).sort_index()
+
+
+def get_field(history: pd.DataFrame, field: str, tickers: list[str] | None = None) -> pd.DataFrame:
+    """Extract one field as a (dates x tickers) frame, optionally reindexed to `tickers`."""
+    if history.empty or field not in history.columns.get_level_values(0):
+        frame = pd.DataFrame(index=history.index)
+    else:
+        frame = history[field]
+    if tickers is not None:
+        frame = frame.reindex(columns=[t.upper() for t in tickers])
+    return frame
+
+
+def latest_prices(tickers: list[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.Series:
+    """
+    Latest close per ticker from one bulk request (NaN where unavailable).
+    During market hours the last daily bar carries the live price.
+    """
+    closes = get_field(download_history(tickers, period="5d", chunk_size=chunk_size), "Close", tickers)
+    if closes.empty:
+        return pd.Series(float("nan"), index=[t.upper() for t in tickers], dtype=float)
+    return closes.ffill().iloc[-1].astype(float)
+
+
+def period_start(period_days: int, padding_days: int = 5) -> str:
+    """Start date covering `period_days` plus a few days of slack for weekends/holidays."""
+    return (datetime.now() - timedelta(days=period_days + padding_days)).strftime("%Y-%m-%d")
+
+
+@dataclass
+class MarketSnapshot:
+    """Closing prices for benchmarks, safe-havens and sector ETFs, fetched once per run."""
+    closes: pd.DataFrame  # dates x tickers
+    created_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def build(cls, extra_tickers: tuple[str, ...] = ()) -> "MarketSnapshot":
+        """Download all market-wide series in one batched request."""
+        tickers = [*BENCHMARK_TICKERS, *SAFE_HAVEN_TICKERS, *SECTOR_ETF_TICKERS, *extra_tickers]
+        history = download_history(tickers, period=SNAPSHOT_PERIOD)
+        return cls(closes=get_field(history, "Close", tickers))
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.created_at
+
+    def history(self, ticker: str, period_days: int | None = None) -> pd.DataFrame | None:
+        """
+        Bars for one ticker as a frame with a "Close" column (like yf.Ticker.history),
+        optionally limited to the last `period_days` calendar days.
+        """
+        ticker = ticker.upper()
+        if ticker not in self.closes.columns:
+            return None
+        closes = self.closes[ticker].dropna()
+        if closes.empty:
+            return None
+        if period_days is not None:
+            closes = closes[closes.index >= closes.index[-1] - pd.Timedelta(days=period_days)]
+        return closes.to_frame("Close")
+
+    def last(self, ticker: str) -> float | None:
+        """Latest close for a ticker, or None if it is not in the snapshot."""
+        hist = self.history(ticker)
+        return float(hist["Close"].iloc[-1]) if hist is not None else None
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "created_at": self.created_at,
+            "closes": json.loads(self.closes.to_json(orient="split", date_format="iso")),
+        })
+
+    @classmethod
+    def from_json(cls, text: str) -> "MarketSnapshot":
+        payload = json.loads(text)
+        closes = payload["closes"]
+        frame = pd.DataFrame(
+            closes["data"],
+            index=pd.to_datetime(closes["index"]).tz_localize(None),
+            columns=closes["columns"],
+            dtype=float,
+        )
+        return cls(closes=frame, created_at=payload["created_at"])
+
+    def save(self, path: Path) -> None:
+        """Write the snapshot atomically so concurrent readers never see a partial file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(self.to_json())
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "MarketSnapshot":
+        return cls.from_json(Path(path).read_text())
+
+
+def load_or_build_snapshot(path: Path | None = None, max_age_seconds: float = 3600) -> MarketSnapshot | None:
+    """
+    Load a snapshot from `path` if it is fresh enough, otherwise build one
+    (and save it to `path` for other workers). Returns None if Yahoo is unreachable.
+    """
+    if path is not None and Path(path).exists():
+        try:
+            snapshot = MarketSnapshot.load(path)
+            if snapshot.age_seconds < max_age_seconds:
+                return snapshot
+        except (OSError, ValueError, KeyError):
+            pass
+
+    try:
+        snapshot = MarketSnapshot.build()
+    except Exception:
+        return None
+    if snapshot.closes.dropna(how="all", axis=1).empty:
+        return None
+
+    if path is not None:
+        try:
+            snapshot.save(path)
+        except OSError:
+            pass
+    return snapshot
+
+
+def main():
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Batched market data downloads")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    snapshot_parser = subparsers.add_parser("snapshot", help="Build a market snapshot for parallel workers")
+    snapshot_parser.add_argument("--output", "-o", type=Path, required=True, help="Snapshot JSON path")
+
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        snapshot = MarketSnapshot.build()
+        snapshot.save(args.output)
+        available = snapshot.closes.dropna(how="all", axis=1).columns
+        print(f"Saved {len(available)} series to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
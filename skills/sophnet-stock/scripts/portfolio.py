@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # /// script
 # requires-python = ">=3.10"
-# dependencies = ["yfinance>=0.2.40"]
+# dependencies = ["yfinance>=0.2.40", "pandas>=2.0.0"]
 # ///
 """
 Portfolio management for stock-analysis skill.
@@ -27,7 +27,10 @@ from datetime import datetime
 from pathlib import Path
 from typing import Literal
 
-import yfinance as yf
+import pandas as pd
+
+from data_cache import CachedTicker
+from market_data import latest_prices
 
 
 # Top 20 supported cryptocurrencies
@@ -256,8 +259,7 @@ class PortfolioStore:
         # Validate ticker
         asset_type = detect_asset_type(ticker)
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = CachedTicker(ticker).info
             if "regularMarketPrice" not in info:
                 raise ValueError(f"Invalid ticker: {ticker}")
         except Exception as e:
@@ -372,12 +374,14 @@ def show_portfolio(portfolio: Portfolio, verbose: bool = False) -> None:
     print(f"{'Ticker':<12} {'Type':<8} {'Qty':>10} {'Cost':>12} {'Current':>12} {'Value':>14} {'P&L':>12}")
     print("-" * 82)
 
+    try:
+        prices = latest_prices([asset.ticker for asset in portfolio.assets])
+    except Exception:
+        prices = pd.Series(dtype=float)
+
     for asset in portfolio.assets:
-        try:
-            stock = yf.Ticker(asset.ticker)
-            current_price = stock.info.get("regularMarketPrice", 0) or 0
-        except Exception:
-            current_price = 0
+        current_price = prices.get(asset.ticker.upper())
+        current_price = float(current_price) if pd.notna(current_price) else 0
 
         cost_total = asset.quantity * asset.cost_basis
         current_value = asset.quantity * current_price
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "yfinance>=0.2.40",
+#     "pandas>=2.0.0",
+#     "numpy>=1.24",
+# ]
+# ///
+"""
+Local daily price-history store with delta fetch.
+
+One NumPy .npz file per ticker holds the daily OHLCV columns plus what has
+been stored: the earliest date requested (`covered_from`) and when the
+ticker was last refreshed. A request only downloads the missing date range:
+
+- Nothing stored, or a period that starts before `covered_from`:
+  full download from the requested start
+- Stored but older than the refresh interval: download from a few bars
+  before the last stored one (which may have been a partial intraday bar)
+  and append
+- Refreshed recently: served from disk with no request at all
+
+Delta downloads for many tickers that need the same range are batched into
+one request. Prices are split/dividend adjusted; if the re-downloaded bars
+no longer match what's stored, an adjustment happened and the ticker is
+refetched in full.
+
+Set STOCK_ANALYSIS_NO_CACHE=1 to bypass the store (always download, never write).
+
+Usage:
+    uv run price_store.py update AAPL MSFT --days 365   # Fetch/refresh tickers
+    uv run price_store.py stats                         # Show stored tickers
+    uv run price_store.py clear                         # Delete all stored history
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_cache import ENDPOINT_TTLS, get_cache_path
+from market_data import PRICE_FIELDS, download_history
+
+
+REFRESH_SECONDS = ENDPOINT_TTLS["history"]  # Same staleness budget as cached history bars
+OVERLAP_BARS = 5                            # Stored bars re-downloaded by a delta fetch, to detect re-adjusted prices
+# Relative change of an overlapping close that means re-adjusted prices. A
+# quarterly dividend moves past closes by only ~0.1-0.5%, so anything beyond
+# float noise counts; otherwise the stored bars end up on mixed bases.
+ADJUSTMENT_TOLERANCE = 1e-6
+
+
+def get_store_dir() -> Path:
+    """Get the price store directory (next to the response cache)."""
+    return get_cache_path().parent / "prices"
+
+
+@dataclass
+class StoredHistory:
+    """Daily bars for one ticker plus bookkeeping about what has been fetched."""
+    frame: pd.DataFrame      # Date-indexed OHLCV, tz-naive
+    covered_from: pd.Timestamp
+    fetched_at: float
+
+    @property
+    def last_date(self) -> pd.Timestamp | None:
+        return self.frame.index[-1] if not self.frame.empty else None
+
+
+class PriceStore:
+    """Per-ticker columnar .npz files with incremental (delta) updates."""
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        refresh_seconds: float = REFRESH_SECONDS,
+        enabled: bool = True,
+    ):
+        self.root = Path(root) if root else get_store_dir()
+        self.refresh_seconds = refresh_seconds
+        self.enabled = enabled
+
+    def _path(self, ticker: str) -> Path:
+        safe = "".join(c if c.isalnum() or c in ".-" else "_" for c in ticker.upper())
+        return self.root / f"{safe}.npz"
+
+    def load(self, ticker: str) -> StoredHistory | None:
+        """Read a ticker's stored history, or None if missing/unreadable."""
+        path = self._path(ticker)
+        if not self.enabled or not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                index = pd.DatetimeIndex(data["dates"].astype("datetime64[ns]"), name="Date")
+                frame = pd.DataFrame(
+                    {name: data[name] for name in PRICE_FIELDS if name in data.files},
+                    index=index,
+                )
+                return StoredHistory(
+                    frame=frame,
+                    covered_from=pd.Timestamp(data["covered_from"].item()),
+                    fetched_at=float(data["fetched_at"]),
+                )
+        except Exception:
+            return None
+
+    def save(self, ticker: str, stored: StoredHistory) -> None:
+        """Write a ticker's history atomically (concurrent readers never see a partial file)."""
+        if not self.enabled:
+            return
+        path = self._path(ticker)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            columns = {
+                name: stored.frame[name].to_numpy(dtype=np.float64)
+                for name in PRICE_FIELDS if name in stored.frame.columns
+            }
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    dates=stored.frame.index.to_numpy(dtype="datetime64[D]"),
+                    covered_from=np.datetime64(stored.covered_from.date(), "D"),
+                    fetched_at=np.float64(stored.fetched_at),
+                    **columns,
+                )
+            tmp_path.replace(path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+
+    def _plan(self, tickers: list[str], start: pd.Timestamp, now: float) -> tuple[dict, dict[str, list[str]]]:
+        """Load stored histories and group tickers by the date their download must start from."""
+        stored = {}
+        plan: dict[str, list[str]] = {}
+        for ticker in tickers:
+            history = self.load(ticker)
+            stored[ticker] = history
+            if history is None or history.last_date is None or history.covered_from > start:
+                fetch_from = start
+            elif now - history.fetched_at < self.refresh_seconds:
+                continue
+            else:
+                fetch_from = history.frame.index[-min(OVERLAP_BARS, len(history.frame))]
+            plan.setdefault(fetch_from.strftime("%Y-%m-%d"), []).append(ticker)
+        return stored, plan
+
+    @staticmethod
+    def _merge(stored: StoredHistory | None, fresh: pd.DataFrame, fetch_from: pd.Timestamp,
+               now: float) -> StoredHistory | None:
+        """Append freshly downloaded bars; None means stored prices were re-adjusted."""
+        fresh = fresh.dropna(how="all")
+        if stored is None or stored.frame.empty or fetch_from < stored.covered_from:
+            return StoredHistory(frame=fresh, covered_from=fetch_from, fetched_at=now)
+
+        overlap = stored.frame.index.intersection(fresh.index)
+        overlap = overlap[overlap < stored.frame.index[-1]]  # The last stored bar may have been partial
+        if len(overlap):
+            old, new = stored.frame.loc[overlap, "Close"], fresh.loc[overlap, "Close"]
+            if ((new - old).abs() > old.abs() * ADJUSTMENT_TOLERANCE).any():
+                return None
+
+        frame = pd.concat([stored.frame[stored.frame.index < fresh.index.min()], fresh]) if not fresh.empty else stored.frame
+        return StoredHistory(frame=frame, covered_from=stored.covered_from, fetched_at=now)
+
+    def history_many(self, tickers: list[str], start: str | datetime) -> dict[str, pd.DataFrame]:
+        """
+        Daily OHLCV bars since `start` for many tickers, downloading only what
+        is missing. Tickers with no data are absent from the result.
+        """
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        start = pd.Timestamp(start).normalize()
+        now = time.time()
+        stored, plan = self._plan(tickers, start, now)
+
+        refetch = []
+        for fetch_from, group in plan.items():
+            history = download_history(group, period=None, start=fetch_from)
+            for ticker in group:
+                if history.empty or ticker not in history.columns.get_level_values(1):
+                    continue
+                fresh = history.xs(ticker, axis=1, level=1).reindex(columns=list(PRICE_FIELDS))
+                merged = self._merge(stored[ticker], fresh, pd.Timestamp(fetch_from), now)
+                if merged is None:
+                    refetch.append(ticker)
+                    continue
+                stored[ticker] = merged
+                self.save(ticker, merged)
+
+        if refetch:
+            # Split or dividend re-adjusted the series: replace it entirely
+            history = download_history(refetch, period=None, start=start)
+            for ticker in refetch:
+                if ticker in history.columns.get_level_values(1):
+                    fresh = history.xs(ticker, axis=1, level=1).reindex(columns=list(PRICE_FIELDS))
+                    stored[ticker] = self._merge(None, fresh, start, now)
+                    self.save(ticker, stored[ticker])
+
+        result = {}
+        for ticker in tickers:
+            history = stored.get(ticker)
+            if history is None:
+                continue
+            frame = history.frame[history.frame.index >= start]
+            if not frame.empty:
+                result[ticker] = frame
+        return result
+
+    def history(self, ticker: str, period_days: int = 365) -> pd.DataFrame | None:
+        """Daily bars for the last `period_days` calendar days (like yf.Ticker.history(period="1y"))."""
+        start = datetime.now() - timedelta(days=period_days)
+        return self.history_many([ticker], start).get(ticker.upper())
+
+    def closes(self, tickers: list[str], start: str | datetime) -> pd.DataFrame:
+        """Close prices as a (dates x tickers) frame, columns in `tickers` order."""
+        histories = self.history_many(tickers, start)
+        frame = pd.DataFrame({ticker: h["Close"] for ticker, h in histories.items()})
+        return frame.reindex(columns=[t.upper() for t in tickers]).sort_index()
+
+    def clear(self) -> None:
+        """Delete all stored histories."""
+        if self.root.exists():
+            for path in self.root.glob("*.npz"):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        """Summarize stored tickers."""
+        files = sorted(self.root.glob("*.npz")) if self.root.exists() else []
+        return {
+            "path": str(self.root),
+            "tickers": len(files),
+            "bytes": sum(path.stat().st_size for path in files),
+        }
+
+
+_default_store: PriceStore | None = None
+_default_store_lock = threading.Lock()
+
+
+def get_price_store() -> PriceStore:
+    """Get the process-wide price store (disabled if STOCK_ANALYSIS_NO_CACHE is set)."""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                enabled = os.environ.get("STOCK_ANALYSIS_NO_CACHE", "").lower() not in ("1", "true", "yes")
+                _default_store = PriceStore(enabled=enabled)
+    return _default_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local daily price-history store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    update_parser = subparsers.add_parser("update", help="Fetch or refresh tickers")
+    update_parser.add_argument("tickers", nargs="+", help="Tickers to update")
+    update_parser.add_argument("--days", type=int, default=365, help="History to keep (default: 365)")
+    subparsers.add_parser("stats", help="Show stored tickers")
+    subparsers.add_parser("clear", help="Delete all stored history")
+
+    args = parser.parse_args()
+    store = get_price_store()
+
+    if args.command == "update":
+        start = datetime.now() - timedelta(days=args.days)
+        histories = store.history_many(args.tickers, start)
+        print(json.dumps({ticker: len(frame) for ticker, frame in histories.items()}, indent=2))
+    elif args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+    elif args.command == "clear":
+        store.clear()
+        print(f"Cleared {store.root}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
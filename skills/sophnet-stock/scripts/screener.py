@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "yfinance>=0.2.40",
+#     "pandas>=2.0.0",
+#     "numpy>=1.24",
+#     "fear-and-greed>=0.4",
+#     "edgartools>=2.0.0",
+#     "feedparser>=6.0.0",
+# ]
+# ///
+"""
+Universe screener with staged early-exit scoring.
+
+Running the full 8-dimension pipeline on every name of an index is slow, so
+the screen narrows the universe in stages, each more expensive per ticker:
+
+1. prices:       one bulk 1y download + vectorized indicators for the whole
+                 universe; liquidity filters and a momentum/relative-strength
+                 score keep the best `survivors`
+2. fundamentals: Yahoo info for survivors only (concurrently), ranked by
+                 price score + fundamentals score; the best `top_k` go on
+3. full:         the complete analysis pipeline (sector, market, sentiment,
+                 insider) for the top K, ranked by final signal score
+
+Every stage reports how many tickers went in and out and how long it took.
+
+Usage:
+    uv run analyze_stock.py --screen sp500.txt --top-k 10
+    uv run screener.py sp500.txt --top-k 10 --output json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analyze_stock import (
+    Signal,
+    StockData,
+    analyze_fundamentals,
+    analyze_tickers_async,
+    check_breaking_news,
+)
+from data_cache import CachedTicker
+from indicators import compute_indicators
+from market_data import download_history, get_field
+
+
+DEFAULT_TOP_K = 10
+MIN_SURVIVORS = 50
+MIN_PRICE = 1.0                  # Skip penny stocks
+MIN_DOLLAR_VOLUME = 1_000_000    # 20-day average traded value
+BENCHMARK = "SPY"
+FUNDAMENTALS_WORKERS = 16
+
+
+@dataclass
+class StageReport:
+    name: str
+    tickers_in: int
+    tickers_out: int
+    seconds: float
+
+
+@dataclass
+class ScreenResult:
+    universe: int
+    stages: list[StageReport] = field(default_factory=list)
+    candidates: pd.DataFrame | None = None   # Stage 1/2 scores for survivors
+    signals: list[Signal] = field(default_factory=list)  # Final ranking, best first
+
+
+def load_universe(path: Path) -> list[str]:
+    """Read tickers from a file: one per line or comma-separated, '#' starts a comment."""
+    tickers = []
+    for line in Path(path).read_text().splitlines():
+        line = line.split("#", 1)[0]
+        tickers.extend(t.strip().upper() for t in line.replace(",", " ").split() if t.strip())
+    return list(dict.fromkeys(tickers))
+
+
+def price_scores(closes: pd.DataFrame, volumes: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Vectorized stage-1 scoring for a (dates x tickers) universe.
+
+    Uses analyze_momentum's RSI and 52w-range thresholds, plus relative
+    strength vs the benchmark (or universe median). Tickers failing the
+    price/liquidity filters get NaN.
+    """
+    benchmark = BENCHMARK if BENCHMARK in closes.columns else None
+    frame = compute_indicators(closes, volumes, benchmark=benchmark).to_frame()
+
+    rsi = frame["rsi"].to_numpy()
+    position = frame["position_52w"].to_numpy()
+    score = (
+        np.where(rsi > 70, -0.5, 0.0) + np.where(rsi < 30, 0.5, 0.0)
+        + np.where(position > 90, -0.3, 0.0) + np.where(position < 10, 0.3, 0.0)
+        + np.clip((frame["relative_strength"].to_numpy() - 1.0) * 2, -0.5, 0.5)
+    )
+
+    passes = (frame["close"] >= MIN_PRICE).to_numpy() & ~np.isnan(frame["relative_strength"].to_numpy())
+    if volumes is not None:
+        dollar_volume = (closes * volumes.reindex_like(closes)).tail(20).mean()
+        frame["dollar_volume"] = dollar_volume.reindex(frame.index)
+        passes &= (frame["dollar_volume"] >= MIN_DOLLAR_VOLUME).to_numpy()
+
+    frame["price_score"] = np.where(passes, score, np.nan)
+    return frame
+
+
+def _fetch_fundamentals(ticker: str) -> float | None:
+    try:
+        info = CachedTicker(ticker).info
+        fundamentals = analyze_fundamentals(StockData(
+            ticker=ticker, info=info, earnings_history=None, analyst_info=None, price_history=None,
+        ))
+        return fundamentals.score if fundamentals else None
+    except Exception:
+        return None
+
+
+def screen_universe(
+    tickers: list[str],
+    top_k: int = DEFAULT_TOP_K,
+    survivors: int | None = None,
+    skip_insider: bool = False,
+    check_news: bool = True,
+    concurrency: int = 8,
+    verbose: bool = False,
+) -> ScreenResult:
+    """Screen a universe in three stages and return per-stage timing plus the top-K signals."""
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    survivors = survivors or max(MIN_SURVIVORS, top_k * 5)
+    result = ScreenResult(universe=len(tickers))
+
+    def _log(stage: StageReport):
+        result.stages.append(stage)
+        if verbose:
+            print(f"  [{stage.name}] {stage.tickers_in} → {stage.tickers_out} in {stage.seconds:.1f}s", file=sys.stderr)
+
+    # Stage 1: bulk prices + vectorized indicators
+    start = time.perf_counter()
+    history = download_history([*tickers, BENCHMARK], period="1y")
+    closes = get_field(history, "Close")
+    volumes = get_field(history, "Volume", list(closes.columns)) if not closes.empty else None
+    if closes.empty:
+        _log(StageReport("prices", len(tickers), 0, time.perf_counter() - start))
+        return result
+    scores = price_scores(closes, volumes).reindex(tickers)
+    candidates = scores.dropna(subset=["price_score"]).nlargest(survivors, "price_score")
+    _log(StageReport("prices", len(tickers), len(candidates), time.perf_counter() - start))
+
+    # Stage 2: fundamentals for survivors only
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=FUNDAMENTALS_WORKERS) as executor:
+        fundamentals = list(executor.map(_fetch_fundamentals, candidates.index))
+    candidates = candidates.assign(
+        fundamentals_score=pd.Series(fundamentals, index=candidates.index, dtype="float64")
+    )
+    candidates["screen_score"] = candidates["price_score"] + candidates["fundamentals_score"].fillna(0.0)
+    candidates = candidates.sort_values("screen_score", ascending=False)
+    result.candidates = candidates
+    finalists = list(candidates.index[:top_k])
+    _log(StageReport("fundamentals", len(fundamentals), len(finalists), time.perf_counter() - start))
+
+    # Stage 3: full pipeline for the top K
+    start = time.perf_counter()
+    breaking_news = check_breaking_news(verbose=verbose) if check_news else None
+    signals = asyncio.run(analyze_tickers_async(
+        finalists,
+        concurrency=concurrency,
+        breaking_news=breaking_news,
+        skip_insider=skip_insider,
+        verbose=verbose,
+    ))
+    result.signals = sorted(
+        (signal for _, signal in signals if signal is not None),
+        key=lambda signal: signal.final_score,
+        reverse=True,
+    )
+    _log(StageReport("full", len(finalists), len(result.signals), time.perf_counter() - start))
+
+    return result
+
+
+def format_screen_text(result: ScreenResult) -> str:
+    """Format a screen as a stage summary plus the ranked signals."""
+    lines = [
+        "=" * 77,
+        f"UNIVERSE SCREEN: {result.universe} tickers",
+        "=" * 77,
+        "",
+        "STAGES:",
+    ]
+    for stage in result.stages:
+        lines.append(f"  {stage.name:<13} {stage.tickers_in:>6} → {stage.tickers_out:<6} {stage.seconds:>7.1f}s")
+    lines.append(f"  {'total':<13} {'':>15} {sum(s.seconds for s in result.stages):>7.1f}s")
+    lines.extend(["", "TOP SIGNALS:"])
+    if not result.signals:
+        lines.append("  (none)")
+    for i, signal in enumerate(result.signals, 1):
+        lines.append(
+            f"  {i:2}. {signal.ticker:<8} {signal.recommendation:<5} "
+            f"score {signal.final_score:+.2f}  confidence {signal.confidence * 100:.0f}%  {signal.company_name[:30]}"
+        )
+    lines.extend(["", "=" * 77])
+    return "\n".join(lines)
+
+
+def screen_to_dict(result: ScreenResult) -> dict:
+    """JSON-serializable screen result."""
+    candidates = []
+    if result.candidates is not None:
+        columns = ["price_score", "fundamentals_score", "screen_score", "rsi", "position_52w", "relative_strength"]
+        frame = result.candidates[columns].round(4).astype(object)
+        frame = frame.where(frame.notna(), None)
+        candidates = [{"ticker": ticker, **row} for ticker, row in frame.to_dict(orient="index").items()]
+    return {
+        "universe": result.universe,
+        "stages": [
+            {"name": s.name, "tickers_in": s.tickers_in, "tickers_out": s.tickers_out, "seconds": round(s.seconds, 3)}
+            for s in result.stages
+        ],
+        "candidates": candidates,
+        "signals": [
+            {
+                "ticker": s.ticker,
+                "company_name": s.company_name,
+                "recommendation": s.recommendation,
+                "confidence": s.confidence,
+                "final_score": s.final_score,
+            }
+            for s in result.signals
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen a ticker universe in stages")
+    parser.add_argument("universe", type=Path, help="File with tickers (one per line or comma-separated)")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help=f"Tickers given the full analysis (default: {DEFAULT_TOP_K})")
+    parser.add_argument("--survivors", type=int, help="Tickers kept after the price stage (default: max(50, 5 x top-k))")
+    parser.add_argument("--output", choices=["text", "json"], default="text", help="Output format (default: text)")
+    parser.add_argument("--fast", action="store_true", help="Skip insider trading and breaking news")
+    parser.add_argument("--verbose", action="store_true", help="Verbose output to stderr")
+    args = parser.parse_args()
+
+    result = screen_universe(
+        load_universe(args.universe),
+        top_k=args.top_k,
+        survivors=args.survivors,
+        skip_insider=args.fast,
+        check_news=not args.fast,
+        verbose=args.verbose,
+    )
+    if args.output == "json":
+        print(json.dumps(screen_to_dict(result), indent=2))
+    else:
+        print(format_screen_text(result))
+
+
+if __name__ == "__main__":
+    main()
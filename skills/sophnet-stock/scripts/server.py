@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "yfinance>=0.2.40",
+#     "pandas>=2.0.0",
+#     "numpy>=1.24",
+#     "fear-and-greed>=0.4",
+#     "edgartools>=2.0.0",
+#     "feedparser>=6.0.0",
+# ]
+# ///
+"""
+Long-running analysis daemon with a local HTTP/JSON API.
+
+Every analyze_stock.py run pays for the pandas/yfinance imports and starts
+with empty in-process caches. The daemon keeps one warm process instead:
+imports, the sentiment/breaking-news cache, the market snapshot (rebuilt
+when older than an hour) and yfinance's HTTP session all survive between
+requests. Concurrent requests for the same ticker share a single analysis.
+
+Endpoints (GET, JSON responses):
+    /health                          Liveness, uptime, snapshot age
+    /analyze?tickers=AAPL,MSFT       Signals (same fields as --output json)
+    /dividends?tickers=JNJ,PG        Dividend analyses (same fields as dividends.py --output json)
+    /portfolio/{name}?period=weekly  Portfolio signals plus summary
+
+/analyze and /portfolio accept fast=1 (skip insider + breaking news) and
+no_insider=1. Tickers that can't be analyzed come back as {"ticker", "error"}.
+
+While the daemon runs, analyze_stock.py routes ticker/portfolio analyses to it
+automatically (see --server / --local).
+
+Usage:
+    uv run server.py                     # Serve on 127.0.0.1:8765
+    uv run server.py --port 9000 --verbose
+    uv run analyze_stock.py --serve      # Same thing
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.parse import parse_qs, unquote, urlencode, urlparse
+from urllib.request import urlopen
+
+from data_cache import get_cache_path
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+REQUEST_TIMEOUT = 300.0       # Seconds a request waits for an analysis started by another request
+HEALTH_TIMEOUT = 0.5          # Seconds the client waits when probing for a running daemon
+DIVIDEND_WORKERS = 8
+
+
+class ServerError(Exception):
+    """The daemon could not be reached or returned an error."""
+
+
+def get_server_file() -> Path:
+    """Where a running daemon advertises its URL (next to the response cache)."""
+    return get_cache_path().parent / "server.json"
+
+
+# ============================================================================
+# Request coalescing
+# ============================================================================
+
+class SingleFlight:
+    """
+    Share one in-flight computation per key between concurrent callers.
+
+    A caller claims a batch of keys and gets a future for each; the keys
+    nobody else is computing are returned as its own to compute and resolve.
+    Finished keys are forgotten, so later calls compute afresh (the response
+    cache makes those cheap).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict = {}
+
+    def claim(self, keys: list) -> tuple[dict, list]:
+        """Return ({key: future} for all keys, keys this caller must compute)."""
+        futures, owned = {}, []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                future = self._calls.get(key)
+                if future is None:
+                    future = self._calls[key] = Future()
+                    owned.append(key)
+                futures[key] = future
+        return futures, owned
+
+    def resolve(self, key, result=None, error: BaseException | None = None) -> None:
+        with self._lock:
+            future = self._calls.pop(key, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+# ============================================================================
+# Warm analysis state
+# ============================================================================
+
+class AnalysisService:
+    """Warm analysis state shared by all request threads."""
+
+    def __init__(self, concurrency: int | None = None, verbose: bool = False):
+        from analyze_stock import DEFAULT_CONCURRENCY, _CACHE_TTL_SECONDS
+
+        self.concurrency = concurrency or DEFAULT_CONCURRENCY
+        self.snapshot_max_age = _CACHE_TTL_SECONDS
+        self.verbose = verbose
+        self.started_at = time.time()
+        self.flights = SingleFlight()
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
+
+    def snapshot(self):
+        """The current market snapshot, rebuilt once it's older than the cache TTL."""
+        from market_data import load_or_build_snapshot
+
+        with self._snapshot_lock:
+            if self._snapshot is None or self._snapshot.age_seconds >= self.snapshot_max_age:
+                if self.verbose:
+                    print("Refreshing market snapshot...", file=sys.stderr)
+                self._snapshot = load_or_build_snapshot(max_age_seconds=self.snapshot_max_age) or self._snapshot
+            return self._snapshot
+
+    def _coalesced(self, keys: list, compute) -> list:
+        """Results for `keys`, computing (via `compute(owned_keys)`) only keys nobody else is."""
+        futures, owned = self.flights.claim(keys)
+        if owned:
+            try:
+                results = list(compute(owned))
+            except BaseException as e:
+                for key in owned:
+                    self.flights.resolve(key, error=e)
+                raise
+            for key, result in zip(owned, results):
+                self.flights.resolve(key, result)
+            for key in owned[len(results):]:
+                self.flights.resolve(key, error=ServerError(f"No result for {key[-1]}"))
+        return [futures[key].result(timeout=REQUEST_TIMEOUT) for key in keys]
+
+    def analyze(self, tickers: list[str], skip_insider: bool = False, fast: bool = False) -> list:
+        """Signals (or None) for tickers, in order."""
+        from analyze_stock import analyze_tickers_async, check_breaking_news
+
+        skip_insider = skip_insider or fast
+        tickers = [t.strip().upper() for t in tickers if t.strip()]
+
+        def compute(keys):
+            breaking_news = None if fast else check_breaking_news(verbose=self.verbose)
+            results = asyncio.run(analyze_tickers_async(
+                [ticker for _, ticker, _, _ in keys],
+                concurrency=self.concurrency,
+                breaking_news=breaking_news,
+                skip_insider=skip_insider,
+                verbose=self.verbose,
+                snapshot=self.snapshot(),
+            ))
+            return [signal for _, signal in results]
+
+        return self._coalesced([("analyze", t, skip_insider, fast) for t in tickers], compute)
+
+    def dividends(self, tickers: list[str]) -> list:
+        """Dividend analyses (or None) for tickers, in order."""
+        from dividends import analyze_dividends
+
+        tickers = [t.strip().upper() for t in tickers if t.strip()]
+
+        def compute(keys):
+            with ThreadPoolExecutor(max_workers=DIVIDEND_WORKERS) as executor:
+                return list(executor.map(lambda key: analyze_dividends(key[-1], verbose=self.verbose), keys))
+
+        return self._coalesced([("dividends", t) for t in tickers], compute)
+
+    def portfolio(self, name: str, period: str | None = None,
+                  skip_insider: bool = False, fast: bool = False) -> dict | None:
+        """Portfolio signals plus summary, or None if the portfolio doesn't exist."""
+        from analyze_stock import generate_portfolio_summary
+        from portfolio import PortfolioStore
+
+        store = PortfolioStore()
+        portfolio = store.get_portfolio(name)
+        if portfolio is None and name.lower() == "default":
+            default_name = store.get_default_portfolio_name()
+            portfolio = store.get_portfolio(default_name) if default_name else None
+        if portfolio is None:
+            return None
+
+        assets = [(a.ticker, a.quantity, a.cost_basis, a.type) for a in portfolio.assets]
+        tickers = [a.ticker for a in portfolio.assets]
+        signals = self.analyze(tickers, skip_insider=skip_insider, fast=fast)
+        results = [signal for signal in signals if signal is not None]
+        return {
+            "portfolio": portfolio.name,
+            "assets": _results_json(tickers, signals, "Invalid ticker '{}' or data unavailable"),
+            "summary": generate_portfolio_summary(results, assets, portfolio.name, period) if assets else None,
+        }
+
+    def health(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "snapshot_age_seconds": round(snapshot.age_seconds, 1) if snapshot is not None else None,
+            "in_flight": self.flights.in_flight(),
+        }
+
+
+def _results_json(tickers: list[str], results: list, error: str) -> list[dict]:
+    return [
+        asdict(result) if result is not None else {"ticker": ticker.upper(), "error": error.format(ticker.upper())}
+        for ticker, result in zip(tickers, results)
+    ]
+
+
+# ============================================================================
+# HTTP server
+# ============================================================================
+
+def _flag(params: dict, name: str) -> bool:
+    return params.get(name, [""])[-1].lower() in ("1", "true", "yes")
+
+
+def _tickers(params: dict) -> list[str]:
+    return [t for value in params.get("tickers", []) for t in value.split(",") if t.strip()]
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    server_version = "StockAnalysis/1.0"
+
+    @property
+    def service(self) -> AnalysisService:
+        return self.server.service
+
+    def _send_json(self, status: int, payload) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        path = url.path.rstrip("/") or "/"
+        options = {"skip_insider": _flag(params, "no_insider"), "fast": _flag(params, "fast")}
+
+        try:
+            if path == "/health":
+                self._send_json(200, self.service.health())
+            elif path == "/analyze":
+                tickers = _tickers(params)
+                if not tickers:
+                    self._send_json(400, {"error": "Missing 'tickers' parameter"})
+                    return
+                signals = self.service.analyze(tickers, **options)
+                self._send_json(200, _results_json(tickers, signals, "Invalid ticker '{}' or data unavailable"))
+            elif path == "/dividends":
+                tickers = _tickers(params)
+                if not tickers:
+                    self._send_json(400, {"error": "Missing 'tickers' parameter"})
+                    return
+                analyses = self.service.dividends(tickers)
+                self._send_json(200, _results_json(tickers, analyses, "No dividend data for '{}'"))
+            elif path.startswith("/portfolio/"):
+                name = unquote(path[len("/portfolio/"):])
+                result = self.service.portfolio(name, period=params.get("period", [None])[-1], **options)
+                if result is None:
+                    self._send_json(404, {"error": f"Portfolio '{name}' not found"})
+                else:
+                    self._send_json(200, result)
+            else:
+                self._send_json(404, {"error": f"Unknown endpoint '{path}'"})
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format, *args):
+        if self.service.verbose:
+            print(f"{self.address_string()} {format % args}", file=sys.stderr)
+
+
+class AnalysisServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: AnalysisService):
+        super().__init__(address, AnalysisHandler)
+        self.service = service
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          concurrency: int | None = None, verbose: bool = False) -> None:
+    """Run the daemon until interrupted, advertising its URL in the server file."""
+    server = AnalysisServer((host, port), AnalysisService(concurrency=concurrency, verbose=verbose))
+    server_file = get_server_file()
+    try:
+        server_file.parent.mkdir(parents=True, exist_ok=True)
+        server_file.write_text(json.dumps({"url": server.url, "pid": os.getpid(), "started_at": time.time()}))
+    except OSError:
+        pass
+
+    print(f"Stock analysis server listening on {server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            if json.loads(server_file.read_text()).get("pid") == os.getpid():
+                server_file.unlink()
+        except (OSError, ValueError):
+            pass
+
+
+# ============================================================================
+# Client
+# ============================================================================
+
+def request_json(base_url: str, path: str, params: dict | None = None, timeout: float = REQUEST_TIMEOUT):
+    """GET a daemon endpoint and decode its JSON; raises ServerError on failure."""
+    query = urlencode({k: v for k, v in (params or {}).items() if v not in (None, False)})
+    url = base_url.rstrip("/") + path + (f"?{query}" if query else "")
+    try:
+        with urlopen(url, timeout=timeout) as response:
+            return json.loads(response.read())
+    except HTTPError as e:
+        try:
+            message = json.loads(e.read()).get("error", str(e))
+        except ValueError:
+            message = str(e)
+        raise ServerError(message) from e
+    except (URLError, OSError, ValueError) as e:
+        raise ServerError(f"Analysis server at {base_url} unreachable: {e}") from e
+
+
+def find_server() -> str | None:
+    """URL of a running daemon (from STOCK_ANALYSIS_SERVER or the server file), or None."""
+    url = os.environ.get("STOCK_ANALYSIS_SERVER")
+    if not url:
+        try:
+            url = json.loads(get_server_file().read_text())["url"]
+        except (OSError, ValueError, KeyError):
+            return None
+    try:
+        request_json(url, "/health", timeout=HEALTH_TIMEOUT)
+    except ServerError:
+        return None
+    return url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stock analysis daemon with a local HTTP/JSON API")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to bind (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--concurrency", "-j", type=int, help="Max tickers analyzed in parallel per request")
+    parser.add_argument("--verbose", action="store_true", help="Log requests and analysis progress to stderr")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, concurrency=args.concurrency, verbose=args.verbose)
+
+
+if __name__ == "__main__":
+    main()
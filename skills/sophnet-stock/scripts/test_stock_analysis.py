@@ -13,10 +13,18 @@ Tests for Stock Analysis Skill v6.0
 Run with: uv run pytest test_stock_analysis.py -v
 """
 
+import argparse
+import asyncio
 import json
+import subprocess
+import sys
+import threading
+import time
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
 import pandas as pd
 
 # Import modules to test
@@ -29,11 +37,24 @@ from analyze_stock import (
     analyze_earnings_surprise,
     analyze_fundamentals,
     analyze_momentum,
+    analyze_analyst_sentiment,
     synthesize_signal,
+    analyze_tickers_async,
+    generate_portfolio_summary,
+    _analyze_remote,
+    _choose_server,
+    DEFAULT_CONCURRENCY,
+    StageExecutor,
+    calculate_portfolio_period_return,
+    analyze_market_context,
+    analyze_sector_performance,
+    get_insider_activity,
+    score_insider_activity,
     EarningsSurprise,
     Fundamentals,
     MomentumAnalysis,
     MarketContext,
+    Signal,
     StockData,
 )
 from dividends import analyze_dividends
@@ -41,9 +62,30 @@ from watchlist import (
     add_to_watchlist,
     remove_from_watchlist,
     list_watchlist,
+    check_alerts,
     WatchlistItem,
 )
 from portfolio import PortfolioStore
+import data_cache
+from data_cache import CachedTicker, YFinanceCache
+from market_data import MarketSnapshot, download_history, latest_prices
+import price_store
+import insider_index
+from insider_index import InsiderIndex, parse_form4
+from price_store import PriceStore
+from screener import load_universe, screen_to_dict, screen_universe
+from server import AnalysisServer, AnalysisService, ServerError, find_server, get_server_file, request_json
+from indicators import IndicatorEngine, compute_indicators, rsi as rsi_matrix
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Keep tests off the user's on-disk yfinance cache and price store."""
+    cache = YFinanceCache(tmp_path / "yfinance_cache.sqlite3")
+    monkeypatch.setattr(data_cache, "_default_cache", cache)
+    monkeypatch.setattr(price_store, "_default_store", PriceStore(tmp_path / "prices"))
+    monkeypatch.setattr(insider_index, "_default_index", InsiderIndex(tmp_path / "insider_index.sqlite3"))
+    return cache
 
 
 class TestAssetTypeDetection:
@@ -118,6 +160,62 @@ class TestRSICalculation:
         assert rsi is None
 
 
+class TestIndicators:
+    """Test the vectorized indicator engine."""
+
+    @staticmethod
+    def _random_walk(rows, cols, seed=0):
+        rng = np.random.default_rng(seed)
+        return pd.DataFrame(100 + rng.standard_normal((rows, cols)).cumsum(axis=0))
+
+    def test_simple_rsi_matches_pandas(self):
+        closes = self._random_walk(100, 4)
+        delta = closes.diff()
+        avg_gain = delta.where(delta > 0, 0).rolling(14).mean()
+        avg_loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+        expected = 100 - 100 / (1 + avg_gain / avg_loss)
+        np.testing.assert_allclose(rsi_matrix(closes)[15:], expected.to_numpy()[15:])
+
+    def test_wilder_rsi(self):
+        closes = self._random_walk(100, 1)[0]
+        delta = closes.diff().dropna()
+        gains, losses = delta.clip(lower=0), -delta.clip(upper=0)
+        avg_gain, avg_loss = gains.iloc[:14].mean(), losses.iloc[:14].mean()
+        for gain, loss in zip(gains.iloc[14:], losses.iloc[14:]):
+            avg_gain = (avg_gain * 13 + gain) / 14
+            avg_loss = (avg_loss * 13 + loss) / 14
+        expected = 100 - 100 / (1 + avg_gain / avg_loss)
+        assert calculate_rsi(closes, method="wilder") == pytest.approx(expected)
+
+    def test_rsi_edge_cases(self):
+        closes = np.column_stack([np.arange(30.0), np.full(30, 5.0), np.arange(30.0)[::-1]])
+        assert list(rsi_matrix(closes)[-1]) == [100.0, 50.0, 0.0]
+
+    def test_append_matches_full_compute(self):
+        closes = self._random_walk(300, 6, seed=1)
+        volumes = self._random_walk(300, 6, seed=2).abs() * 1000
+        full = compute_indicators(closes, volumes, benchmark=0)
+        engine = IndicatorEngine.from_frames(closes.iloc[:-1], volumes.iloc[:-1], benchmark=0)
+        incremental = engine.append(closes.iloc[-1], volumes.iloc[-1])
+        pd.testing.assert_frame_equal(incremental.to_frame(), full.to_frame())
+
+    def test_missing_history(self):
+        closes = self._random_walk(300, 2)
+        closes.iloc[:250, 1] = np.nan  # Listed 50 days ago
+        snapshot = compute_indicators(closes)
+        assert not np.isnan(snapshot.rsi[1])
+        assert np.isnan(snapshot.sma_200[1])
+        assert snapshot.high_52w[1] == closes[1].max()
+
+    def test_universe_performance(self):
+        closes = self._random_walk(252, 5000)
+        volumes = closes.abs() * 1000
+        start = time.perf_counter()
+        snapshot = compute_indicators(closes, volumes)
+        assert time.perf_counter() - start < 1.0
+        assert len(snapshot.tickers) == 5000
+
+
 class TestEarningsSurprise:
     """Test earnings surprise analysis."""
     
@@ -211,6 +309,7 @@ class TestMomentum:
             "fiftyTwoWeekLow": 80,
             "regularMarketPrice": 148,
         }
+        mock_data.current_price = 148
         
         result = analyze_momentum(mock_data)
         
@@ -219,6 +318,50 @@ class TestMomentum:
         assert result.near_52w_high == True
         assert result.score < 0  # Overbought = negative score
 
+    def test_prices_from_quote_not_info(self):
+        """info is cached for hours; the 52w position uses the quote."""
+        dates = pd.date_range(end=datetime.now(), periods=100)
+        data = StockData(
+            ticker="AAPL",
+            info={"fiftyTwoWeekHigh": 150, "fiftyTwoWeekLow": 50, "regularMarketPrice": 145},
+            earnings_history=None,
+            analyst_info=None,
+            price_history=pd.DataFrame({"Close": [100.0] * 100}, index=dates),
+            current_price=55.0,
+        )
+        result = analyze_momentum(data)
+        assert result.near_52w_low
+        assert not result.near_52w_high
+
+
+class TestAnalystSentiment:
+    """Test analyst upside against the current price."""
+
+    @staticmethod
+    def _data(current_price=None, closes=None):
+        dates = pd.date_range(end=datetime.now(), periods=len(closes or [1]))
+        return StockData(
+            ticker="AAPL",
+            info={"regularMarketPrice": 100.0, "targetMeanPrice": 132.0, "recommendationKey": "buy"},
+            earnings_history=None,
+            analyst_info=None,
+            price_history=pd.DataFrame({"Close": closes}, index=dates) if closes else None,
+            current_price=current_price,
+        )
+
+    def test_upside_from_quote(self):
+        result = analyze_analyst_sentiment(self._data(current_price=120.0))
+        assert result.current_price == 120.0
+        assert result.upside_pct == pytest.approx(10.0)
+
+    def test_upside_from_last_close_without_quote(self):
+        result = analyze_analyst_sentiment(self._data(closes=[100.0, 110.0]))
+        assert result.current_price == 110.0
+        assert result.upside_pct == pytest.approx(20.0)
+
+    def test_no_price_no_sentiment(self):
+        assert analyze_analyst_sentiment(self._data()) is None
+
 
 class TestSignalSynthesis:
     """Test signal synthesis."""
@@ -303,6 +446,684 @@ class TestSignalSynthesis:
         assert any("RISK-OFF" in c for c in signal.caveats)
 
 
+class TestConcurrentPipeline:
+    """Test the bounded-concurrency multi-ticker pipeline."""
+
+    STAGE_DELAY = 0.2
+
+    def _fake_fetch(self, ticker, verbose=False):
+        """Stand-in for a slow yfinance round trip."""
+        time.sleep(self.STAGE_DELAY)
+        if verbose:
+            print(f"Fetching data for {ticker}...", file=sys.stderr)
+        if ticker == "BAD":
+            return None
+        dates = pd.date_range(end=datetime.now(), periods=60)
+        return StockData(
+            ticker=ticker,
+            info={"longName": f"{ticker} Inc", "regularMarketPrice": 100.0, "trailingPE": 12},
+            earnings_history=None,
+            analyst_info=None,
+            price_history=pd.DataFrame({
+                "Close": [100 + i for i in range(60)],
+                "Volume": [1_000_000] * 60,
+            }, index=dates),
+        )
+
+    def _fake_sector(self, data, verbose=False, snapshot=None):
+        time.sleep(self.STAGE_DELAY)
+        if verbose:
+            print(f"  Sector for {data.ticker}", file=sys.stderr)
+        return None
+
+    def _fake_market(self, verbose=False, snapshot=None):
+        time.sleep(self.STAGE_DELAY)
+        if verbose:
+            print("  Market context", file=sys.stderr)
+        return None
+
+    def _run(self, tickers, concurrency, timeouts=None, verbose=False):
+        async def fake_sentiment(data, verbose=False, skip_insider=False, snapshot=None):
+            await asyncio.sleep(self.STAGE_DELAY)
+            return None
+
+        with patch("analyze_stock.load_or_build_snapshot", return_value=None), \
+             patch("analyze_stock.fetch_stock_data", side_effect=self._fake_fetch), \
+             patch("analyze_stock.analyze_sector_performance", side_effect=self._fake_sector), \
+             patch("analyze_stock.analyze_market_context", side_effect=self._fake_market), \
+             patch("analyze_stock.analyze_sentiment", side_effect=fake_sentiment):
+            start = time.perf_counter()
+            results = asyncio.run(analyze_tickers_async(
+                tickers, concurrency=concurrency, timeouts=timeouts, verbose=verbose,
+            ))
+            return results, time.perf_counter() - start
+
+    def test_results_in_input_order(self):
+        tickers = ["MSFT", "AAPL", "BAD", "NVDA"]
+        results, _ = self._run(tickers, concurrency=4)
+        assert [t for t, _ in results] == tickers
+        assert results[2][1] is None
+        assert results[0][1].company_name == "MSFT Inc"
+
+    def test_wall_time_sublinear(self):
+        """16 tickers at concurrency 16 should take far less than 16x one ticker."""
+        tickers = [f"T{i}" for i in range(16)]
+        results, elapsed = self._run(tickers, concurrency=16)
+        assert all(signal is not None for _, signal in results)
+        sequential = len(tickers) * 2 * self.STAGE_DELAY  # fetch, then sector/sentiment
+        assert elapsed < sequential / 4
+
+    def test_stage_timeout_drops_component(self):
+        results, elapsed = self._run(["AAPL"], concurrency=1, timeouts={"sector": 0.01, "sentiment": 0.01})
+        signal = results[0][1]
+        assert signal is not None
+        assert "sector_performance" not in signal.components
+
+    def test_verbose_reaches_stages(self, capsys):
+        """-v progress output from the threaded stages should reach stderr."""
+        self._run(["AAPL"], concurrency=1, verbose=True)
+        err = capsys.readouterr().err
+        assert "Fetching data for AAPL..." in err
+        assert "Sector for AAPL" in err
+        assert "Market context" in err
+
+    def test_quiet_stages_by_default(self, capsys):
+        self._run(["AAPL"], concurrency=1)
+        assert capsys.readouterr().err == ""
+
+    def test_stuck_stage_does_not_block_exit(self):
+        """A call hung past its stage timeout must not keep the process alive."""
+        script = """
+import asyncio, threading
+from unittest.mock import patch
+import analyze_stock
+
+def stuck_fetch(ticker, verbose=False):
+    threading.Event().wait()
+
+with patch("analyze_stock.load_or_build_snapshot", return_value=None), \\
+     patch("analyze_stock.analyze_market_context", return_value=None), \\
+     patch("analyze_stock.fetch_stock_data", side_effect=stuck_fetch):
+    results = asyncio.run(analyze_stock.analyze_tickers_async(["AAPL"], timeouts={"fetch": 0.2}))
+print(results)
+"""
+        completed = subprocess.run(
+            [sys.executable, "-c", script], cwd=Path(__file__).parent,
+            capture_output=True, text=True, timeout=30,
+        )
+        assert completed.returncode == 0, completed.stderr
+        assert completed.stdout.strip() == "[('AAPL', None)]"
+
+
+class TestStageExecutor:
+    """Test the daemon-thread pool the pipeline stages run in."""
+
+    def test_results_and_exceptions(self):
+        executor = StageExecutor(max_workers=2)
+        ok = executor.submit(lambda a, b=0: a + b, 1, b=2)
+        failing = executor.submit(lambda: 1 / 0)
+        assert ok.result(timeout=5) == 3
+        with pytest.raises(ZeroDivisionError):
+            failing.result(timeout=5)
+        executor.shutdown()
+
+    def test_bounded_daemon_workers(self):
+        executor = StageExecutor(max_workers=3, thread_name_prefix="stage-test")
+        release = threading.Event()
+        futures = [executor.submit(release.wait, 5) for _ in range(6)]
+        time.sleep(0.1)
+        workers = [t for t in threading.enumerate() if t.name.startswith("stage-test_")]
+        assert len(workers) == 3
+        assert all(t.daemon for t in workers)
+        release.set()
+        assert all(f.result(timeout=5) for f in futures)
+        executor.shutdown()
+        assert not any(t.name.startswith("stage-test_") for t in threading.enumerate())
+
+    def test_idle_workers_reused(self):
+        executor = StageExecutor(max_workers=4, thread_name_prefix="reuse-test")
+        for i in range(10):
+            assert executor.submit(lambda x: x * 2, i).result(timeout=5) == i * 2
+            time.sleep(0.01)
+        assert len([t for t in threading.enumerate() if t.name.startswith("reuse-test_")]) == 1
+        executor.shutdown()
+
+    def test_shutdown_without_wait_abandons_stuck_call(self):
+        executor = StageExecutor(max_workers=1)
+        stuck = threading.Event()
+        running = executor.submit(stuck.wait)
+        queued = executor.submit(lambda: "never")
+        time.sleep(0.05)
+
+        start = time.perf_counter()
+        executor.shutdown(wait=False, cancel_futures=True)
+        assert time.perf_counter() - start < 1
+        assert queued.cancelled()
+        assert not running.done()
+        with pytest.raises(RuntimeError):
+            executor.submit(lambda: None)
+        stuck.set()
+        assert running.result(timeout=5) is True
+
+
+class TestYFinanceCache:
+    """Test the persistent yfinance response cache."""
+
+    def test_fetch_hits_after_first_load(self, isolated_cache):
+        loader = Mock(return_value={"regularMarketPrice": 150.0})
+        assert isolated_cache.fetch("AAPL", "info", loader) == {"regularMarketPrice": 150.0}
+        assert isolated_cache.fetch("AAPL", "info", loader) == {"regularMarketPrice": 150.0}
+        assert loader.call_count == 1
+
+    def test_shared_across_instances(self, isolated_cache):
+        """A second process opening the same file sees the entry."""
+        isolated_cache.set("AAPL", "history", pd.DataFrame({"Close": [1.0, 2.0]}), params={"period": "1y"})
+        other = YFinanceCache(isolated_cache.path)
+        hit, value = other.get("AAPL", "history", params={"period": "1y"})
+        assert hit
+        assert list(value["Close"]) == [1.0, 2.0]
+        # Different params are a different entry
+        assert other.get("AAPL", "history", params={"period": "1mo"}) == (False, None)
+
+    def test_per_endpoint_ttl(self, tmp_path):
+        cache = YFinanceCache(tmp_path / "c.sqlite3", ttls={"quote": 0.05})
+        cache.set("AAPL", "quote", 150.0)
+        cache.set("AAPL", "info", {"sector": "Technology"})
+        time.sleep(0.1)
+        assert cache.get("AAPL", "quote") == (False, None)
+        assert cache.get("AAPL", "info") == (True, {"sector": "Technology"})
+
+    def test_lru_eviction(self, tmp_path):
+        cache = YFinanceCache(tmp_path / "c.sqlite3", max_bytes=3000)
+        payload = "x" * 900
+        cache.set("A", "info", {"v": payload})
+        cache.set("B", "info", {"v": payload})
+        time.sleep(0.01)
+        cache.get("A", "info")  # A is now more recently used than B
+        cache.set("C", "info", {"v": payload})
+        cache.set("D", "info", {"v": payload})
+        assert cache.get("B", "info")[0] is False
+        assert cache.get("D", "info")[0] is True
+        assert cache.stats()["bytes"] <= 3000
+
+    def test_empty_results_not_cached(self, isolated_cache):
+        isolated_cache.set("AAPL", "earnings_dates", pd.DataFrame())
+        isolated_cache.set("AAPL", "info", None)
+        assert isolated_cache.stats()["entries"] == 0
+
+    def test_disabled_cache_always_loads(self, tmp_path):
+        cache = YFinanceCache(tmp_path / "c.sqlite3", enabled=False)
+        loader = Mock(return_value={"a": 1})
+        cache.fetch("AAPL", "info", loader)
+        cache.fetch("AAPL", "info", loader)
+        assert loader.call_count == 2
+
+    def test_eviction_sums_sizes_rarely(self, tmp_path):
+        cache = YFinanceCache(tmp_path / "c.sqlite3", max_bytes=10_000_000)
+        statements = []
+        cache._connect().set_trace_callback(statements.append)
+        for i in range(100):
+            cache.set(f"T{i}", "info", {"v": i})
+        assert sum("SUM(size)" in sql for sql in statements) == 1
+
+    def test_eviction_after_running_total_exceeds_limit(self, tmp_path):
+        cache = YFinanceCache(tmp_path / "c.sqlite3", max_bytes=5000)
+        for i in range(20):
+            cache.set(f"T{i}", "info", {"v": "x" * 900})
+        assert cache.stats()["bytes"] <= 5000
+        assert cache.get("T19", "info")[0] is True
+
+    @patch("yfinance.Ticker")
+    def test_current_price_reuses_fresh_info(self, mock_ticker):
+        mock_ticker.return_value.info = {"regularMarketPrice": 123.45}
+        ticker = CachedTicker("AAPL")
+        assert ticker.info["regularMarketPrice"] == 123.45
+        assert ticker.current_price() == 123.45
+        assert mock_ticker.call_count == 1
+
+    @patch("yfinance.Ticker")
+    def test_current_price_refreshes_cached_info(self, mock_ticker, isolated_cache):
+        isolated_cache.set("AAPL", "info", {"regularMarketPrice": 100.0})
+        mock_ticker.return_value.info = {"regularMarketPrice": 123.45}
+        ticker = CachedTicker("AAPL")
+        assert ticker.info["regularMarketPrice"] == 100.0  # fundamentals may be hours old
+        assert ticker.current_price() == 123.45
+        assert CachedTicker("AAPL").info["regularMarketPrice"] == 123.45
+
+    @patch("yfinance.Ticker")
+    def test_cached_ticker_current_price(self, mock_ticker):
+        mock_ticker.return_value.info = {"regularMarketPrice": 123.45, "sector": "Technology"}
+        assert CachedTicker("AAPL").current_price() == 123.45
+        assert CachedTicker("AAPL").current_price() == 123.45
+        # Quote miss also warms the info entry
+        assert CachedTicker("AAPL").info["sector"] == "Technology"
+        assert mock_ticker.call_count == 1
+
+
+def fake_download(closes: dict[str, list[float]], end=None):
+    """Build a yf.download stand-in serving the given close series (ending today by default)."""
+    def _download(tickers, **kwargs):
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        length = max(len(v) for v in closes.values())
+        index = pd.date_range(end=end or pd.Timestamp.today().normalize(), periods=length, freq="B")
+        data = {}
+        for ticker in tickers:
+            series = closes.get(ticker, [float("nan")] * length)
+            data[("Close", ticker)] = series
+            data[("Volume", ticker)] = [1_000_000] * length
+        frame = pd.DataFrame(data, index=index)
+        frame.columns = pd.MultiIndex.from_tuples(frame.columns, names=["Price", "Ticker"])
+        return frame
+    return _download
+
+
+class TestBulkPrices:
+    """Test batched price downloads and the valuations built on them."""
+
+    def test_chunked_download(self):
+        tickers = [f"T{i}" for i in range(250)]
+        download = Mock(side_effect=fake_download({t: [1.0, 2.0] for t in tickers}))
+        with patch("market_data.yf.download", download):
+            history = download_history(tickers, period="5d", chunk_size=100)
+        assert download.call_count == 3
+        assert history["Close"].shape == (2, 250)
+
+    def test_latest_prices_skips_trailing_gaps(self):
+        closes = {"AAA": [10.0, 11.0, float("nan")], "BBB": [5.0, 6.0, 7.0]}
+        with patch("market_data.yf.download", side_effect=fake_download(closes)):
+            prices = latest_prices(["AAA", "BBB", "MISSING"])
+        assert prices["AAA"] == 11.0
+        assert prices["BBB"] == 7.0
+        assert pd.isna(prices["MISSING"])
+
+    def test_portfolio_summary_single_request(self):
+        closes = {"AAPL": [100.0, 200.0], "MSFT": [50.0, 50.0]}
+        assets = [("AAPL", 10, 150.0, "stock"), ("MSFT", 4, 50.0, "stock")]
+        download = Mock(side_effect=fake_download(closes))
+        with patch("market_data.yf.download", download):
+            summary = generate_portfolio_summary([], assets, "Test")
+        assert download.call_count == 1
+        assert summary["total_value"] == 2200.0
+        assert summary["total_cost"] == 1700.0
+        assert summary["concentration_warnings"] == ["AAPL: 90.9%"]
+
+    def test_period_return(self):
+        closes = {"AAPL": [100.0, 110.0, 120.0], "MSFT": [float("nan"), 50.0, 40.0]}
+        assets = [("AAPL", 1, 0.0, "stock"), ("MSFT", 2, 0.0, "stock")]
+        with patch("market_data.yf.download", side_effect=fake_download(closes)):
+            result = calculate_portfolio_period_return(assets, 7)
+        # (120 + 80) vs (100 + 100)
+        assert result == pytest.approx(0.0)
+
+    @patch("watchlist.save_watchlist")
+    @patch("watchlist.load_watchlist")
+    def test_check_alerts_target_and_stop(self, mock_load, mock_save):
+        mock_load.return_value = [
+            WatchlistItem(ticker="AAPL", added_at="2024-01-01T00:00:00+00:00", target_price=150.0),
+            WatchlistItem(ticker="TSLA", added_at="2024-01-01T00:00:00+00:00", stop_price=200.0),
+            WatchlistItem(ticker="MSFT", added_at="2024-01-01T00:00:00+00:00", target_price=500.0, stop_price=300.0),
+        ]
+        closes = {"AAPL": [140.0, 155.0], "TSLA": [210.0, 190.0], "MSFT": [400.0, 410.0]}
+        download = Mock(side_effect=fake_download(closes))
+        with patch("market_data.yf.download", download):
+            result = check_alerts()
+        assert download.call_count == 1
+        assert [(a["ticker"], a["alert_type"]) for a in result["alerts"]] == [
+            ("AAPL", "target_hit"),
+            ("TSLA", "stop_hit"),
+        ]
+
+
+def make_snapshot(days: int = 60) -> MarketSnapshot:
+    """Snapshot with rising SPY/QQQ, flat safe-havens and VIX at 15."""
+    index = pd.date_range(end="2024-06-28", periods=days, freq="B")
+    closes = pd.DataFrame({
+        "^VIX": [15.0] * days,
+        "SPY": [500.0 + 2 * i for i in range(days)],
+        "QQQ": [400.0 + 2 * i for i in range(days)],
+        "GLD": [200.0] * days,
+        "TLT": [90.0] * days,
+        "UUP": [28.0] * days,
+        "XLK": [200.0 + i for i in range(days)],
+    }, index=index)
+    return MarketSnapshot(closes=closes)
+
+
+class TestMarketSnapshot:
+    """Test the shared per-run market snapshot."""
+
+    def test_build_is_one_download(self):
+        download = Mock(side_effect=fake_download({"SPY": [1.0, 2.0], "^VIX": [14.0, 15.0]}))
+        with patch("market_data.yf.download", download):
+            snapshot = MarketSnapshot.build()
+        assert download.call_count == 1
+        assert snapshot.last("SPY") == 2.0
+        assert snapshot.history("XLK") is None  # all-NaN series are treated as missing
+
+    def test_json_round_trip(self, tmp_path):
+        snapshot = make_snapshot()
+        path = tmp_path / "snapshot.json"
+        snapshot.save(path)
+        loaded = MarketSnapshot.load(path)
+        pd.testing.assert_frame_equal(loaded.closes, snapshot.closes, check_freq=False)
+        assert loaded.created_at == snapshot.created_at
+
+    def test_market_context_without_fetches(self):
+        with patch("analyze_stock.CachedTicker", side_effect=AssertionError("unexpected fetch")), \
+             patch.dict("analyze_stock._SENTIMENT_CACHE", clear=True):
+            context = analyze_market_context(snapshot=make_snapshot())
+        assert context.vix_level == 15.0
+        assert context.vix_status == "calm"
+        assert context.spy_trend_10d > 0
+        assert context.gld_change_5d == pytest.approx(0.0)
+        assert not context.risk_off_detected
+
+    def test_sector_performance_without_fetches(self):
+        dates = pd.date_range(end="2024-06-28", periods=60, freq="B", tz="America/New_York")
+        data = StockData(
+            ticker="AAPL",
+            info={"sector": "Technology"},
+            earnings_history=None,
+            analyst_info=None,
+            price_history=pd.DataFrame({"Close": [100.0 + i for i in range(60)]}, index=dates),
+        )
+        with patch("analyze_stock.CachedTicker", side_effect=AssertionError("unexpected fetch")):
+            sector = analyze_sector_performance(data, snapshot=make_snapshot())
+        assert sector is not None
+        assert sector.sector_name == "Technology"
+
+
+class TestPriceStore:
+    """Test the local price store and its delta fetches."""
+
+    @staticmethod
+    def _download(closes: pd.DataFrame):
+        """yf.download stand-in that honours `start` against a (dates x tickers) frame."""
+        def _download(tickers, start=None, **kwargs):
+            tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+            frame = closes.loc[closes.index >= pd.Timestamp(start), tickers] if start else closes[tickers]
+            data = {("Close", t): frame[t] for t in tickers}
+            data.update({("Volume", t): pd.Series(1_000_000.0, index=frame.index) for t in tickers})
+            result = pd.DataFrame(data)
+            result.columns = pd.MultiIndex.from_tuples(result.columns, names=["Price", "Ticker"])
+            return result
+        return _download
+
+    @staticmethod
+    def _closes(days=120):
+        index = pd.date_range(end=pd.Timestamp.today().normalize(), periods=days, freq="B")
+        return pd.DataFrame({"AAPL": np.linspace(100, 160, days), "MSFT": np.linspace(300, 240, days)}, index=index)
+
+    def test_fresh_store_serves_without_download(self, tmp_path):
+        store = PriceStore(tmp_path)
+        closes = self._closes()
+        download = Mock(side_effect=self._download(closes))
+        with patch("market_data.yf.download", download):
+            first = store.history_many(["AAPL", "MSFT"], closes.index[0])
+            second = store.history_many(["AAPL", "MSFT"], closes.index[20])
+        assert download.call_count == 1  # One batched request, then served from disk
+        assert len(first["AAPL"]) == 120
+        assert len(second["MSFT"]) == 100
+        assert second["MSFT"]["Close"].iloc[-1] == pytest.approx(240.0)
+
+    def test_delta_fetch_appends_new_bar(self, tmp_path):
+        closes = self._closes()
+        store = PriceStore(tmp_path, refresh_seconds=0)
+        with patch("market_data.yf.download", side_effect=self._download(closes.iloc[:-1])):
+            store.history_many(["AAPL"], closes.index[0])
+
+        download = Mock(side_effect=self._download(closes))
+        with patch("market_data.yf.download", download), \
+             patch.object(data_cache.get_cache(), "enabled", False):
+            history = store.history_many(["AAPL"], closes.index[0])["AAPL"]
+        requested_start = pd.Timestamp(download.call_args.kwargs["start"])
+        assert requested_start == closes.index[-6]  # Only the last few stored bars are refetched
+        assert len(history) == 120
+        assert history["Close"].iloc[-1] == pytest.approx(160.0)
+        assert store.load("AAPL").frame.index[-1] == closes.index[-1]
+
+    def test_readjusted_prices_trigger_full_refetch(self, tmp_path):
+        closes = self._closes()
+        store = PriceStore(tmp_path, refresh_seconds=0)
+        with patch("market_data.yf.download", side_effect=self._download(closes)):
+            store.history_many(["AAPL"], closes.index[0])
+
+        split = closes / 2  # e.g. a 2:1 split re-adjusts the whole series
+        download = Mock(side_effect=self._download(split))
+        with patch("market_data.yf.download", download), \
+             patch.object(data_cache.get_cache(), "enabled", False):
+            history = store.history_many(["AAPL"], closes.index[0])["AAPL"]
+        assert download.call_count == 2
+        assert history["Close"].iloc[0] == pytest.approx(50.0)
+        assert len(history) == 120
+
+    def test_dividend_readjustment_triggers_full_refetch(self, tmp_path):
+        closes = self._closes()
+        store = PriceStore(tmp_path, refresh_seconds=0)
+        with patch("market_data.yf.download", side_effect=self._download(closes)):
+            store.history_many(["AAPL"], closes.index[0])
+
+        # An ex-dividend date two bars ago scales every earlier close by 0.3%
+        adjusted = closes.copy()
+        adjusted.iloc[:-2] *= 0.997
+        download = Mock(side_effect=self._download(adjusted))
+        with patch("market_data.yf.download", download), \
+             patch.object(data_cache.get_cache(), "enabled", False):
+            history = store.history_many(["AAPL"], closes.index[0])["AAPL"]
+        assert download.call_count == 2
+        pd.testing.assert_series_equal(history["Close"], adjusted["AAPL"], check_names=False, check_freq=False)
+
+    def test_float_noise_is_not_a_readjustment(self, tmp_path):
+        closes = self._closes()
+        store = PriceStore(tmp_path, refresh_seconds=0)
+        with patch("market_data.yf.download", side_effect=self._download(closes)):
+            store.history_many(["AAPL"], closes.index[0])
+
+        download = Mock(side_effect=self._download(closes * (1 + 1e-9)))
+        with patch("market_data.yf.download", download), \
+             patch.object(data_cache.get_cache(), "enabled", False):
+            store.history_many(["AAPL"], closes.index[0])
+        assert download.call_count == 1
+
+    def test_period_return_from_store(self):
+        closes = self._closes()
+        assets = [("AAPL", 2, 0.0, "stock"), ("MSFT", 1, 0.0, "stock")]
+        download = Mock(side_effect=self._download(closes))
+        with patch("market_data.yf.download", download):
+            monthly = calculate_portfolio_period_return(assets, 30)
+            weekly = calculate_portfolio_period_return(assets, 7)
+        assert download.call_count == 1  # The shorter period is served from the store
+        assert 0 < weekly < monthly
+
+
+FORM4_FIXTURES = Path(__file__).parent / "fixtures" / "form4"
+
+
+class TestInsiderIndex:
+    """Test the local Form 4 insider index against fixture filings."""
+
+    def test_parse_form4(self):
+        path = FORM4_FIXTURES / "0000320193-24-000071.xml"
+        filing = parse_form4(path.read_bytes(), accession=path.stem)
+        assert filing.ticker == "AAPL"
+        assert [(t.code, t.shares, t.price) for t in filing.transactions] == [
+            ("S", 120000.0, 172.5),
+            ("F", 40000.0, 172.5),
+        ]
+        assert filing.transactions[0].owner == "COOK TIMOTHY D"
+
+    def test_parse_malformed(self):
+        assert parse_form4((FORM4_FIXTURES / "malformed.xml").read_bytes(), "x") is None
+        assert parse_form4("<html/>", "x") is None
+
+    def test_import_dir_and_query(self, tmp_path):
+        index = InsiderIndex(tmp_path / "index.sqlite3")
+        paths = sorted(FORM4_FIXTURES.glob("*.xml"))
+        assert index.import_files(paths, jobs=2) == 3
+        assert index.import_files(paths, jobs=1) == 3  # Re-import replaces, never double counts
+
+        as_of = datetime(2024, 6, 1).date()
+        net_shares, net_value = index.net_activity("AAPL", period_days=90, as_of=as_of)
+        assert net_shares == -115_000  # The tax-withholding (F) row is not a sale
+        assert net_value == pytest.approx((5000 * 190.0 - 120_000 * 172.5) / 1e6)
+        assert score_insider_activity(net_shares, net_value) == -0.8
+
+        net_shares, net_value = index.net_activity("MSFT", period_days=90, as_of=as_of)
+        assert (net_shares, score_insider_activity(net_shares, net_value)) == (3000, 0.8)
+        assert index.net_activity("NVDA") is None
+
+    def test_insider_activity_is_local_query(self):
+        index = insider_index.get_insider_index()
+        index.import_files(sorted(FORM4_FIXTURES.glob("*.xml")), jobs=1)
+        with patch.object(InsiderIndex, "refresh", side_effect=AssertionError("unexpected EDGAR call")):
+            result = asyncio.run(get_insider_activity("AAPL", period_days=90))
+        assert result == (0.0, 0, 0.0)  # Fixture filings are older than 90 days
+
+
+class TestScreener:
+    """Test the staged universe screener."""
+
+    def test_stages_narrow_the_universe(self):
+        rng = np.random.default_rng(3)
+        universe = [f"T{i:02d}" for i in range(30)]
+        closes = {t: list(50 + rng.standard_normal(260).cumsum()) for t in [*universe, "SPY"]}
+        closes["T00"] = [0.5] * 260  # Penny stock, filtered out in the price stage
+        analyzed = []
+
+        async def fake_pipeline(tickers, **kwargs):
+            analyzed.extend(tickers)
+            return [(t, Signal(t, t, "BUY", 0.6, 0.1 * i, [], [], "", {})) for i, t in enumerate(tickers)]
+
+        download = Mock(side_effect=fake_download(closes))
+        with patch("market_data.yf.download", download), \
+             patch("screener._fetch_fundamentals", side_effect=lambda t: 0.5 if t in ("T05", "T07") else 0.0), \
+             patch("screener.analyze_tickers_async", side_effect=fake_pipeline):
+            result = screen_universe(universe, top_k=3, survivors=10, check_news=False)
+
+        assert download.call_count == 1
+        assert [(s.name, s.tickers_in, s.tickers_out) for s in result.stages] == [
+            ("prices", 30, 10), ("fundamentals", 10, 3), ("full", 3, 3),
+        ]
+        assert "T00" not in result.candidates.index
+        assert analyzed == list(result.candidates.index[:3])
+        assert [s.ticker for s in result.signals] == analyzed[::-1]  # Ranked by final score
+        assert screen_to_dict(result)["stages"][0]["tickers_out"] == 10
+
+    def test_load_universe(self, tmp_path):
+        path = tmp_path / "universe.txt"
+        path.write_text("# S&P sample\naapl, msft\nNVDA  # chips\n\nAAPL\n")
+        assert load_universe(path) == ["AAPL", "MSFT", "NVDA"]
+
+
+@pytest.fixture
+def analysis_server():
+    """Daemon on an ephemeral port with a warm (empty) market snapshot."""
+    service = AnalysisService()
+    service._snapshot = MarketSnapshot(closes=pd.DataFrame())
+    server = AnalysisServer(("127.0.0.1", 0), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestAnalysisServer:
+    """Test the analysis daemon and its client."""
+
+    def test_concurrent_requests_share_one_analysis(self, analysis_server):
+        release = threading.Event()
+        calls = []
+
+        async def fake_pipeline(tickers, **kwargs):
+            calls.append(list(tickers))
+            await asyncio.to_thread(release.wait, 5)
+            return [(t, Signal(t, t, "BUY", 0.6, 0.5, [], [], "", {})) for t in tickers]
+
+        responses = {}
+
+        def get(name, tickers):
+            responses[name] = request_json(analysis_server.url, "/analyze", {"tickers": tickers})
+
+        with patch("analyze_stock.analyze_tickers_async", side_effect=fake_pipeline), \
+             patch("analyze_stock.check_breaking_news", return_value=None):
+            first = threading.Thread(target=get, args=("first", "AAPL"))
+            first.start()
+            while analysis_server.service.flights.in_flight() < 1:
+                time.sleep(0.01)
+            second = threading.Thread(target=get, args=("second", "aapl,MSFT"))
+            second.start()
+            while analysis_server.service.flights.in_flight() < 2:
+                time.sleep(0.01)
+            release.set()
+            first.join(5)
+            second.join(5)
+
+        assert sorted(calls) == [["AAPL"], ["MSFT"]]  # AAPL analyzed once for both requests
+        assert [s["ticker"] for s in responses["second"]] == ["AAPL", "MSFT"]
+        assert responses["first"][0] == responses["second"][0]
+        assert analysis_server.service.flights.in_flight() == 0
+
+    def test_endpoints_and_errors(self, analysis_server):
+        async def fake_pipeline(tickers, **kwargs):
+            return [(t, None) for t in tickers]
+
+        assert request_json(analysis_server.url, "/health")["status"] == "ok"
+        with patch("analyze_stock.analyze_tickers_async", side_effect=fake_pipeline), \
+             patch("analyze_stock.check_breaking_news", return_value=None):
+            assert request_json(analysis_server.url, "/analyze", {"tickers": "XYZ"}) == [
+                {"ticker": "XYZ", "error": "Invalid ticker 'XYZ' or data unavailable"}
+            ]
+        with patch("portfolio.PortfolioStore.get_portfolio", return_value=None):
+            with pytest.raises(ServerError, match="not found"):
+                request_json(analysis_server.url, "/portfolio/missing")
+        with pytest.raises(ServerError, match="Missing 'tickers'"):
+            request_json(analysis_server.url, "/analyze")
+        with pytest.raises(ServerError, match="Unknown endpoint"):
+            request_json(analysis_server.url, "/nope")
+
+    def test_cli_routes_to_running_daemon(self, analysis_server, tmp_path, monkeypatch):
+        monkeypatch.delenv("STOCK_ANALYSIS_SERVER", raising=False)
+        monkeypatch.setenv("CLAWDBOT_STATE_DIR", str(tmp_path))
+        assert find_server() is None
+
+        get_server_file().parent.mkdir(parents=True, exist_ok=True)
+        get_server_file().write_text(json.dumps({"url": analysis_server.url}))
+        assert find_server() == analysis_server.url
+
+        async def fake_pipeline(tickers, skip_insider=False, **kwargs):
+            assert skip_insider
+            return [(t, Signal(t, t, "SELL", 0.7, -0.4, ["p"], ["c"], "", {})) for t in tickers]
+
+        args = argparse.Namespace(tickers=["AAPL"], fast=True, no_insider=True, verbose=False,
+                                  server=None, output="json")
+        with patch("analyze_stock.analyze_tickers_async", side_effect=fake_pipeline):
+            results = _analyze_remote(analysis_server.url, args)
+
+        assert results == [("AAPL", Signal("AAPL", "AAPL", "SELL", 0.7, -0.4, ["p"], ["c"], "", {}))]
+        assert _analyze_remote("http://127.0.0.1:1", args) is None  # Daemon gone: analyze locally
+
+    @staticmethod
+    def _cli_args(**overrides):
+        args = dict(local=False, server=None, market_snapshot=None, concurrency=DEFAULT_CONCURRENCY,
+                    verbose=False)
+        return argparse.Namespace(**{**args, **overrides})
+
+    def test_auto_routing_skipped_for_local_only_options(self, capsys):
+        with patch("server.find_server", return_value="http://127.0.0.1:9"):
+            assert _choose_server(self._cli_args()) == "http://127.0.0.1:9"
+            assert _choose_server(self._cli_args(local=True)) is None
+            assert _choose_server(self._cli_args(market_snapshot=Path("snap.json"))) is None
+            assert _choose_server(self._cli_args(concurrency=DEFAULT_CONCURRENCY + 1)) is None
+            assert _choose_server(self._cli_args(verbose=True)) is None
+        assert "--verbose" in capsys.readouterr().err
+
+    def test_explicit_server_warns_about_ignored_options(self, capsys):
+        args = self._cli_args(server="http://127.0.0.1:9", market_snapshot=Path("snap.json"))
+        assert _choose_server(args) == "http://127.0.0.1:9"
+        assert "--market-snapshot not applied" in capsys.readouterr().err
+
+
 class TestWatchlist:
     """Test watchlist functionality."""
     
@@ -336,6 +1157,43 @@ class TestWatchlist:
         assert result["success"] == True
         assert result["removed"] == "AAPL"
 
+    @patch('watchlist.save_watchlist')
+    @patch('watchlist.load_watchlist')
+    def test_check_alerts_signal_change_in_process(self, mock_load, mock_save):
+        """Signal-watch tickers are analyzed in one concurrent in-process pass."""
+        mock_load.return_value = [
+            WatchlistItem(ticker="AAPL", added_at="2024-01-01T00:00:00+00:00",
+                          alert_on_signal=True, last_signal="HOLD"),
+            WatchlistItem(ticker="MSFT", added_at="2024-01-01T00:00:00+00:00",
+                          alert_on_signal=True, last_signal="BUY"),
+            WatchlistItem(ticker="TSLA", added_at="2024-01-01T00:00:00+00:00"),
+        ]
+        calls = []
+
+        async def fake_pipeline(tickers, concurrency=8, breaking_news=None, timings=None, **kwargs):
+            calls.append(list(tickers))
+            recommendations = {"AAPL": "BUY", "MSFT": "BUY"}
+            for ticker in tickers:
+                timings[ticker] = 0.5
+            return [
+                (t, Signal(t, t, recommendations[t], 0.7, 0.4, [], [], "", {}))
+                for t in tickers
+            ]
+
+        closes = {"AAPL": [150.0, 151.0], "MSFT": [400.0, 401.0], "TSLA": [200.0, 201.0]}
+        with patch("market_data.yf.download", side_effect=fake_download(closes)), \
+             patch("analyze_stock.check_breaking_news", return_value=None), \
+             patch("analyze_stock.analyze_tickers_async", side_effect=fake_pipeline), \
+             patch("subprocess.run", side_effect=AssertionError("unexpected subprocess")):
+            result = check_alerts()
+
+        assert calls == [["AAPL", "MSFT"]]
+        assert [(a["ticker"], a["alert_type"]) for a in result["alerts"]] == [("AAPL", "signal_change")]
+        assert result["alerts"][0]["current_price"] == 151.0
+        assert result["signal_checks"]["timings"] == {"AAPL": 0.5, "MSFT": 0.5}
+        saved = mock_save.call_args[0][0]
+        assert [item.last_signal for item in saved] == ["BUY", "BUY", None]
+
 
 class TestDividendAnalysis:
     """Test dividend analysis."""
@@ -3,6 +3,10 @@
 # requires-python = ">=3.10"
 # dependencies = [
 #     "yfinance>=0.2.40",
+#     "pandas>=2.0.0",
+#     "fear-and-greed>=0.4",
+#     "edgartools>=2.0.0",
+#     "feedparser>=6.0.0",
 # ]
 # ///
 """
@@ -20,14 +24,19 @@ Usage:
 """
 
 import argparse
+import asyncio
 import json
 import sys
+import time
 from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Literal
 
-import yfinance as yf
+import pandas as pd
+
+from data_cache import CachedTicker
+from market_data import latest_prices
 
 # Storage
 WATCHLIST_DIR = Path.home() / ".clawdbot" / "skills" / "stock-analysis"
@@ -80,13 +89,25 @@ def save_watchlist(items: list[WatchlistItem]):
 def get_current_price(ticker: str) -> float | None:
     """Get current price for a ticker."""
     try:
-        stock = yf.Ticker(ticker)
-        price = stock.info.get("regularMarketPrice") or stock.info.get("currentPrice")
-        return float(price) if price else None
+        return CachedTicker(ticker).current_price()
     except Exception:
         return None
 
 
+def get_current_prices(tickers: list[str]) -> dict[str, float | None]:
+    """Get current prices for many tickers in one bulk request."""
+    if not tickers:
+        return {}
+    try:
+        prices = latest_prices(tickers)
+    except Exception:
+        return {ticker: None for ticker in tickers}
+    return {
+        ticker: (float(prices[ticker]) if pd.notna(prices.get(ticker)) else None)
+        for ticker in tickers
+    }
+
+
 def add_to_watchlist(
     ticker: str,
     target_price: float | None = None,
@@ -170,9 +191,11 @@ def list_watchlist() -> dict:
     if not watchlist:
         return {"success": True, "items": [], "count": 0}
     
+    prices = get_current_prices([item.ticker for item in watchlist])
+
     items = []
     for item in watchlist:
-        current_price = get_current_price(item.ticker)
+        current_price = prices.get(item.ticker)
         
         # Calculate change since added
         change_pct = None
@@ -206,19 +229,65 @@ def list_watchlist() -> dict:
     return {"success": True, "items": items, "count": len(items)}
 
 
-def check_alerts(notify_format: bool = False) -> dict:
+def check_signals(tickers: list[str], concurrency: int = 8) -> tuple[dict[str, str | None], dict[str, float]]:
+    """
+    Run the full analysis for signal-watch tickers in this process.
+    Returns ({ticker: recommendation or None}, {ticker: seconds}).
+    """
+    if not tickers:
+        return {}, {}
+
+    from analyze_stock import analyze_tickers_async, check_breaking_news
+
+    # Market-wide inputs (breaking news, market snapshot) are fetched once for all tickers
+    breaking_news = check_breaking_news()
+    timings: dict[str, float] = {}
+    results = asyncio.run(analyze_tickers_async(
+        tickers,
+        concurrency=concurrency,
+        breaking_news=breaking_news,
+        timings=timings,
+    ))
+    signals = {ticker: (signal.recommendation if signal else None) for ticker, signal in results}
+    return signals, timings
+
+
+def check_alerts(notify_format: bool = False, concurrency: int = 8) -> dict:
     """Check watchlist for triggered alerts."""
     watchlist = load_watchlist()
     alerts: list[Alert] = []
     now = datetime.now(timezone.utc).isoformat()
     
-    for item in watchlist:
-        current_price = get_current_price(item.ticker)
+    # Evaluate target/stop levels for the whole watchlist at once
+    prices = get_current_prices([item.ticker for item in watchlist])
+    levels = pd.DataFrame({
+        "price": [prices.get(item.ticker) for item in watchlist],
+        "target": [item.target_price or None for item in watchlist],
+        "stop": [item.stop_price or None for item in watchlist],
+    }, dtype=float)
+    target_hit = (levels["price"] >= levels["target"]).to_numpy()
+    stop_hit = (levels["price"] <= levels["stop"]).to_numpy()
+
+    # Signal changes: analyze every signal-watch ticker concurrently in one pass
+    signal_tickers = [
+        item.ticker for item in watchlist
+        if item.alert_on_signal and prices.get(item.ticker) is not None
+    ]
+    signals_start = time.perf_counter()
+    try:
+        signals, timings = check_signals(signal_tickers, concurrency=concurrency)
+    except Exception as e:
+        print(f"Signal check failed: {e}", file=sys.stderr)
+        signals, timings = {}, {}
+    signals_elapsed = time.perf_counter() - signals_start
+    
+    for i, item in enumerate(watchlist):
+        current_price = prices.get(item.ticker)
         if current_price is None:
             continue
         
         # Check target price
-        if item.target_price and current_price >= item.target_price:
+        if target_hit[i]:
             alerts.append(Alert(
                 ticker=item.ticker,
                 alert_type="target_hit",
@@ -229,7 +298,7 @@ def check_alerts(notify_format: bool = False) -> dict:
             ))
         
         # Check stop price
-        if item.stop_price and current_price <= item.stop_price:
+        if stop_hit[i]:
             alerts.append(Alert(
                 ticker=item.ticker,
                 alert_type="stop_hit",
@@ -239,49 +308,52 @@ def check_alerts(notify_format: bool = False) -> dict:
                 timestamp=now,
             ))
         
-        # Check signal change (requires running analyze_stock)
-        if item.alert_on_signal:
-            try:
-                import subprocess
-                result = subprocess.run(
-                    ["uv", "run", str(Path(__file__).parent / "analyze_stock.py"), item.ticker, "--output", "json"],
-                    capture_output=True,
-                    text=True,
-                    timeout=60,
-                )
-                if result.returncode == 0:
-                    analysis = json.loads(result.stdout)
-                    new_signal = analysis.get("recommendation")
-                    
-                    if item.last_signal and new_signal and new_signal != item.last_signal:
-                        alerts.append(Alert(
-                            ticker=item.ticker,
-                            alert_type="signal_change",
-                            message=f"📊 {item.ticker} signal changed: {item.last_signal} → {new_signal}",
-                            current_price=current_price,
-                            trigger_value=f"{item.last_signal} → {new_signal}",
-                            timestamp=now,
-                        ))
-                    
-                    # Update last signal
-                    item.last_signal = new_signal
-            except Exception:
-                pass
+        # Check signal change
+        new_signal = signals.get(item.ticker)
+        if item.alert_on_signal and new_signal:
+            if item.last_signal and new_signal != item.last_signal:
+                alerts.append(Alert(
+                    ticker=item.ticker,
+                    alert_type="signal_change",
+                    message=f"📊 {item.ticker} signal changed: {item.last_signal} → {new_signal}",
+                    current_price=current_price,
+                    trigger_value=f"{item.last_signal} → {new_signal}",
+                    timestamp=now,
+                ))
+
+            # Update last signal
+            item.last_signal = new_signal
         
         item.last_check = now
     
     # Save updated watchlist (with last_signal updates)
     save_watchlist(watchlist)
     
+    signal_checks = {
+        "count": len(signal_tickers),
+        "elapsed_seconds": round(signals_elapsed, 3),
+        "timings": timings,
+    }
+
     # Format output
     if notify_format and alerts:
         # Format for Telegram notification
         lines = ["📢 **Stock Alerts**\n"]
         for alert in alerts:
             lines.append(alert.message)
-        return {"success": True, "alerts": [asdict(a) for a in alerts], "notification": "\n".join(lines)}
-    
-    return {"success": True, "alerts": [asdict(a) for a in alerts], "count": len(alerts)}
+        return {
+            "success": True,
+            "alerts": [asdict(a) for a in alerts],
+            "notification": "\n".join(lines),
+            "signal_checks": signal_checks,
+        }
+
+    return {
+        "success": True,
+        "alerts": [asdict(a) for a in alerts],
+        "count": len(alerts),
+        "signal_checks": signal_checks,
+    }
 
 
 def main():
@@ -306,6 +378,8 @@ def main():
     # Check
     check_parser = subparsers.add_parser("check", help="Check for triggered alerts")
     check_parser.add_argument("--notify", action="store_true", help="Format for notification")
+    check_parser.add_argument("--concurrency", "-j", type=int, default=8,
+                              help="Max signal-watch tickers analyzed in parallel (default: 8)")
     
     args = parser.parse_args()
     
@@ -328,7 +402,7 @@ def main():
         print(json.dumps(result, indent=2))
     
     elif args.command == "check":
-        result = check_alerts(notify_format=args.notify)
+        result = check_alerts(notify_format=args.notify, concurrency=args.concurrency)
         print(json.dumps(result, indent=2))
 
 
@@ -1,9 +1,11 @@
 """Pack a directory into a DOCX, PPTX, or XLSX file.
 
 Validates with auto-repair, condenses XML formatting, and creates the Office file.
+Each part is read once and written straight into the archive; media that is
+already compressed is stored as-is.
 
 Usage:
-    python pack.py <input_directory> <output_file> [--original <file>] [--validate true|false]
+    python pack.py <input_directory> <output_file> [--original <file>] [--validate true|false] [--jobs N]
 
 Examples:
     python pack.py unpacked/ output.docx --original input.docx
@@ -12,14 +14,25 @@ Examples:
 
 import argparse
 import sys
-import shutil
-import tempfile
 import zipfile
 from pathlib import Path
 
 import defusedxml.minidom
 
-from validators import DOCXSchemaValidator, PPTXSchemaValidator, RedliningValidator
+from validators import (
+    DOCXSchemaValidator,
+    OriginalBaseline,
+    PPTXSchemaValidator,
+    RedliningValidator,
+)
+
+XML_SUFFIXES = (".xml", ".rels")
+
+PRECOMPRESSED_SUFFIXES = {
+    ".png", ".jpg", ".jpeg", ".gif", ".wdp", ".webp",
+    ".mp3", ".m4a", ".mp4", ".m4v", ".mov", ".wmv", ".avi",
+    ".zip", ".gz",
+}
 
 def pack(
     input_directory: str,
@@ -27,6 +40,7 @@ def pack(
     original_file: str | None = None,
     validate: bool = True,
     infer_author_func=None,
+    jobs: int = 1,
 ) -> tuple[None, str]:
     input_dir = Path(input_directory)
     output_path = Path(output_file)
@@ -42,26 +56,28 @@ def pack(
         original_path = Path(original_file)
         if original_path.exists():
             success, output = _run_validation(
-                input_dir, original_path, suffix, infer_author_func
+                input_dir, original_path, suffix, infer_author_func, jobs
             )
             if output:
                 print(output)
             if not success:
                 return None, f"Error: Validation failed for {input_dir}"
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_content_dir = Path(temp_dir) / "content"
-        shutil.copytree(input_dir, temp_content_dir)
-
-        for pattern in ["*.xml", "*.rels"]:
-            for xml_file in temp_content_dir.rglob(pattern):
-                _condense_xml(xml_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for f in input_dir.rglob("*"):
+            if not f.is_file():
+                continue
 
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
-            for f in temp_content_dir.rglob("*"):
-                if f.is_file():
-                    zf.write(f, f.relative_to(temp_content_dir))
+            arcname = f.relative_to(input_dir)
+            if f.name.endswith(XML_SUFFIXES):
+                zinfo = zipfile.ZipInfo.from_file(f, arcname)
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+                zf.writestr(zinfo, _condense_xml(f.read_bytes(), f.name))
+            elif f.suffix.lower() in PRECOMPRESSED_SUFFIXES:
+                zf.write(f, arcname, compress_type=zipfile.ZIP_STORED)
+            else:
+                zf.write(f, arcname)
 
     return None, f"Successfully packed {input_dir} to {output_file}"
 
@@ -71,6 +87,7 @@ def _run_validation(
     original_file: Path,
     suffix: str,
     infer_author_func=None,
+    jobs: int = 1,
 ) -> tuple[bool, str | None]:
     output_lines = []
     validators = []
@@ -83,12 +100,17 @@ def _run_validation(
             except ValueError as e:
                 print(f"Warning: {e} Using default author 'Claude'.", file=sys.stderr)
 
+        baseline = OriginalBaseline(original_file)
         validators = [
-            DOCXSchemaValidator(unpacked_dir, original_file),
-            RedliningValidator(unpacked_dir, original_file, author=author),
+            DOCXSchemaValidator(unpacked_dir, original_file, baseline=baseline, jobs=jobs),
+            RedliningValidator(unpacked_dir, original_file, author=author, baseline=baseline),
         ]
     elif suffix == ".pptx":
-        validators = [PPTXSchemaValidator(unpacked_dir, original_file)]
+        validators = [
+            PPTXSchemaValidator(
+                unpacked_dir, original_file, baseline=OriginalBaseline(original_file), jobs=jobs
+            )
+        ]
 
     if not validators:
         return True, None
@@ -105,10 +127,9 @@ def _run_validation(
     return success, "\n".join(output_lines) if output_lines else None
 
 
-def _condense_xml(xml_file: Path) -> None:
+def _condense_xml(content: bytes, name: str) -> bytes:
     try:
-        with open(xml_file, encoding="utf-8") as f:
-            dom = defusedxml.minidom.parse(f)
+        dom = defusedxml.minidom.parseString(content.decode("utf-8"))
 
         for element in dom.getElementsByTagName("*"):
             if element.tagName.endswith(":t"):
@@ -122,9 +143,9 @@ def _condense_xml(xml_file: Path) -> None:
                 ) or child.nodeType == child.COMMENT_NODE:
                     element.removeChild(child)
 
-        xml_file.write_bytes(dom.toxml(encoding="UTF-8"))
+        return dom.toxml(encoding="UTF-8")
     except Exception as e:
-        print(f"ERROR: Failed to parse {xml_file.name}: {e}", file=sys.stderr)
+        print(f"ERROR: Failed to parse {name}: {e}", file=sys.stderr)
         raise
 
 
@@ -145,6 +166,13 @@ if __name__ == "__main__":
         metavar="true|false",
         help="Run validation with auto-repair (default: true)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Validate parts in N parallel processes (default: 1)",
+    )
     args = parser.parse_args()
 
     _, message = pack(
@@ -152,6 +180,7 @@ if __name__ == "__main__":
         args.output_file,
         original_file=args.original,
         validate=args.validate,
+        jobs=args.jobs,
     )
     print(message)
 
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pytest>=8.0.0",
+#     "lxml>=5.0.0",
+#     "defusedxml>=0.7.0",
+# ]
+# ///
+"""
+Tests for the shared Office helpers
+
+Run with: uv run pytest test_office.py -v
+"""
+
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import zipfile
+from pathlib import Path
+
+import defusedxml.minidom
+import lxml.etree
+import pytest
+
+import soffice
+from bench_validate import WORD_NS, make_docx, make_pptx
+from helpers.merge_runs import merge_runs
+from helpers.simplify_redlines import simplify_redlines
+from pack import PRECOMPRESSED_SUFFIXES, pack
+from unpack import SMART_QUOTE_REPLACEMENTS, unpack
+from validators import DOCXSchemaValidator, PPTXSchemaValidator, schema_cache
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+REDLINES_DIR = FIXTURES_DIR / "redlines"
+REDLINE_CASES = sorted(p.name for p in REDLINES_DIR.iterdir() if p.is_dir())
+
+
+class TestRedlineHelpers:
+    """Golden-file tests for simplify_redlines and merge_runs.
+
+    Each case under fixtures/redlines holds an input document.xml and the
+    output of the original minidom implementation after simplify_redlines
+    (simplified.xml) and then merge_runs (expected.xml), the order unpack.py
+    runs them in. counts.json records the counts each helper reported.
+    """
+
+    @pytest.fixture
+    def counts(self):
+        return json.loads((REDLINES_DIR / "counts.json").read_text())
+
+    def _unpacked(self, tmp_path, xml_file):
+        (tmp_path / "word").mkdir()
+        shutil.copy(xml_file, tmp_path / "word" / "document.xml")
+        return tmp_path
+
+    @pytest.mark.parametrize("case", REDLINE_CASES)
+    def test_simplify_redlines(self, tmp_path, counts, case):
+        unpacked = self._unpacked(tmp_path, REDLINES_DIR / case / "input.xml")
+        count, message = simplify_redlines(str(unpacked))
+        assert not message.startswith("Error"), message
+        assert count == counts[case]["simplified"]
+        assert (unpacked / "word" / "document.xml").read_bytes() == (REDLINES_DIR / case / "simplified.xml").read_bytes()
+
+    @pytest.mark.parametrize("case", REDLINE_CASES)
+    def test_merge_runs(self, tmp_path, counts, case):
+        unpacked = self._unpacked(tmp_path, REDLINES_DIR / case / "simplified.xml")
+        count, message = merge_runs(str(unpacked))
+        assert not message.startswith("Error"), message
+        assert count == counts[case]["merged"]
+        assert (unpacked / "word" / "document.xml").read_bytes() == (REDLINES_DIR / case / "expected.xml").read_bytes()
+
+    def test_corpus_covers_required_cases(self):
+        assert {
+            "proof_err", "rsid", "xml_space", "tracked_runs", "tracked_whitespace", "foreign_author",
+        } <= set(REDLINE_CASES)
+
+    def test_missing_document(self, tmp_path):
+        assert simplify_redlines(str(tmp_path))[0] == 0
+        assert merge_runs(str(tmp_path))[1].startswith("Error")
+
+
+class TestParsedPackage:
+    """Test that a validation run parses each package part once."""
+
+    @pytest.fixture
+    def parse_counts(self, monkeypatch):
+        counts = {}
+        original = lxml.etree.parse
+
+        def counting_parse(source, *args, **kwargs):
+            path = Path(str(source)).resolve()
+            counts[path] = counts.get(path, 0) + 1
+            return original(source, *args, **kwargs)
+
+        monkeypatch.setattr(lxml.etree, "parse", counting_parse)
+        return counts
+
+    def _unpacked(self, tmp_path, kind):
+        packed = tmp_path / f"doc.{kind}"
+        if kind == "docx":
+            make_docx(packed, 50)
+        else:
+            make_pptx(packed, 12, shapes=3)
+        with zipfile.ZipFile(packed) as zf:
+            zf.extractall(tmp_path / "unpacked")
+        return tmp_path / "unpacked", packed
+
+    def _validate(self, validator):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return validator.validate()
+
+    @pytest.mark.parametrize("kind, validator_class", [
+        ("docx", DOCXSchemaValidator), ("pptx", PPTXSchemaValidator),
+    ])
+    def test_each_part_parsed_once(self, tmp_path, parse_counts, kind, validator_class):
+        unpacked, packed = self._unpacked(tmp_path, kind)
+        validator = validator_class(unpacked, packed)
+
+        assert self._validate(validator)
+
+        parts = {f.resolve() for f in validator.xml_files}
+        part_counts = {path: n for path, n in parse_counts.items() if path.is_relative_to(unpacked.resolve())}
+        assert part_counts == dict.fromkeys(parts, 1)
+        assert validator.package.parse_count == len(parts)
+
+    def test_invalidate_reparses(self, tmp_path, parse_counts):
+        unpacked, packed = self._unpacked(tmp_path, "docx")
+        validator = DOCXSchemaValidator(unpacked, packed)
+        document = (unpacked / "word" / "document.xml").resolve()
+
+        validator.package.root(document)
+        validator.package.root(document)
+        assert parse_counts[document] == 1
+        validator.package.invalidate(document)
+        validator.package.root(document)
+        assert parse_counts[document] == 2
+
+
+class TestSchemaCache:
+    """Test that compiled XSD schemas are shared across validators."""
+
+    @pytest.fixture
+    def compiled(self, tmp_path, monkeypatch):
+        """Fresh cache; every XMLSchema construction is logged as "<pid> <schema path>"."""
+        monkeypatch.setattr(schema_cache, "_schemas", {})
+        log = tmp_path / "compiled.log"
+        original = lxml.etree.XMLSchema
+
+        def logging_schema(doc, *args, **kwargs):
+            with open(log, "a") as f:
+                f.write(f"{os.getpid()} {doc.docinfo.URL}\n")
+            return original(doc, *args, **kwargs)
+
+        monkeypatch.setattr(lxml.etree, "XMLSchema", logging_schema)
+        return lambda: [line.split(" ", 1) for line in log.read_text().splitlines()] if log.exists() else []
+
+    def _validator(self, tmp_path, validator_class, kind, name=None, jobs=1):
+        name = name or kind
+        packed = tmp_path / f"{name}.{kind}"
+        if kind == "docx":
+            make_docx(packed, 5)
+        else:
+            make_pptx(packed, 4, shapes=2)
+        with zipfile.ZipFile(packed) as zf:
+            zf.extractall(tmp_path / name)
+        return validator_class(tmp_path / name, packed, jobs=jobs)
+
+    def _xsd(self, validator):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return validator.validate_against_xsd()
+
+    def test_same_schema_object_across_validators(self, tmp_path, compiled):
+        docx = self._validator(tmp_path, DOCXSchemaValidator, "docx")
+        pptx = self._validator(tmp_path, PPTXSchemaValidator, "pptx")
+        docx_rels = docx._get_schema_path(docx.unpacked_dir / "_rels" / ".rels")
+        pptx_rels = pptx._get_schema_path(pptx.unpacked_dir / "_rels" / ".rels")
+
+        assert schema_cache.get_schema(docx_rels) is schema_cache.get_schema(pptx_rels)
+        assert schema_cache.get_schema(docx_rels) is schema_cache.get_schema(str(docx_rels))
+        assert type(schema_cache.get_schema(docx_rels)).__name__ == "XMLSchema"
+
+    def test_each_schema_compiled_once(self, tmp_path, compiled):
+        for validator_class, kind, name in [
+            (DOCXSchemaValidator, "docx", "first"),
+            (PPTXSchemaValidator, "pptx", "deck"),
+            (DOCXSchemaValidator, "docx", "second"),
+        ]:
+            assert self._xsd(self._validator(tmp_path, validator_class, kind, name))
+
+        urls = [url for _, url in compiled()]
+        assert urls and len(urls) == len(set(urls))
+        assert any(url.endswith("opc-relationships.xsd") for url in urls)
+
+    def test_forked_workers_inherit_schemas(self, tmp_path, compiled):
+        validator = self._validator(tmp_path, DOCXSchemaValidator, "docx", jobs=2)
+        assert self._xsd(validator)
+        assert {pid for pid, _ in compiled()} == {str(os.getpid())}
+
+
+class TestSofficePool:
+    """Test the warm-worker pool setup (no LibreOffice needed)."""
+
+    @pytest.fixture
+    def pool_env(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(soffice, "_shared_pool", None)
+        monkeypatch.setattr(soffice.shutil, "which", lambda name: f"/usr/bin/{name}")
+        monkeypatch.setattr(soffice, "_import_uno", lambda: object())
+        monkeypatch.setattr(soffice, "POOL_BASE_PORT", None)
+        monkeypatch.delenv("SOFFICE_POOL", raising=False)
+        return tmp_path
+
+    def test_pool_dir_is_per_user(self):
+        assert soffice.POOL_DIR.name == f"soffice_pool_{os.getuid()}"
+
+    def test_get_pool_creates_private_dir(self, pool_env, monkeypatch):
+        monkeypatch.setattr(soffice, "POOL_DIR", pool_env / "pool")
+        pool = soffice.get_pool()
+        assert pool is not None
+        assert pool.idle_timeout == 0
+        assert (pool_env / "pool").stat().st_mode & 0o777 == 0o700
+
+    def test_get_pool_falls_back_when_dir_unusable(self, pool_env, monkeypatch):
+        (pool_env / "elsewhere").mkdir()
+        (pool_env / "pool").symlink_to(pool_env / "elsewhere")
+        monkeypatch.setattr(soffice, "POOL_DIR", pool_env / "pool")
+        assert soffice.get_pool() is None
+
+    def test_worker_ports(self, pool_env, monkeypatch):
+        monkeypatch.setattr(soffice, "POOL_DIR", pool_env)
+        worker = soffice._Worker(1)
+        assert worker.port is None
+        worker.port_file.write_text(str(soffice._free_port()))
+        assert worker.port == int(worker.port_file.read_text())
+        monkeypatch.setattr(soffice, "POOL_BASE_PORT", "30000")
+        assert worker.port == 30001
+
+
+def legacy_unpack(input_file, output_directory, merge_runs_=True, simplify_redlines_=True):
+    """unpack() as it was before streaming: extract, then rewrite XML on disk."""
+    output_path = Path(output_directory)
+    output_path.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(input_file) as zf:
+        zf.extractall(output_path)
+
+    xml_files = list(output_path.rglob("*.xml")) + list(output_path.rglob("*.rels"))
+    for xml_file in xml_files:
+        try:
+            dom = defusedxml.minidom.parseString(xml_file.read_text(encoding="utf-8"))
+            xml_file.write_bytes(dom.toprettyxml(indent="  ", encoding="utf-8"))
+        except Exception:
+            pass
+
+    message = f"Unpacked {input_file} ({len(xml_files)} XML files)"
+    if Path(input_file).suffix.lower() == ".docx":
+        if simplify_redlines_:
+            message += f", simplified {simplify_redlines(str(output_path))[0]} tracked changes"
+        if merge_runs_:
+            message += f", merged {merge_runs(str(output_path))[0]} runs"
+
+    for xml_file in xml_files:
+        try:
+            content = xml_file.read_text(encoding="utf-8")
+            for char, entity in SMART_QUOTE_REPLACEMENTS.items():
+                content = content.replace(char, entity)
+            xml_file.write_text(content, encoding="utf-8")
+        except Exception:
+            pass
+    return message
+
+
+def legacy_pack(input_directory, output_file):
+    """pack() as it was before streaming: condense a temporary copy, then zip it."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        content_dir = Path(temp_dir) / "content"
+        shutil.copytree(input_directory, content_dir)
+        for pattern in ["*.xml", "*.rels"]:
+            for xml_file in content_dir.rglob(pattern):
+                with open(xml_file, encoding="utf-8") as f:
+                    dom = defusedxml.minidom.parse(f)
+                for element in dom.getElementsByTagName("*"):
+                    if element.tagName.endswith(":t"):
+                        continue
+                    for child in list(element.childNodes):
+                        if (
+                            child.nodeType == child.TEXT_NODE
+                            and child.nodeValue
+                            and child.nodeValue.strip() == ""
+                        ) or child.nodeType == child.COMMENT_NODE:
+                            element.removeChild(child)
+                xml_file.write_bytes(dom.toxml(encoding="UTF-8"))
+
+        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
+            for f in content_dir.rglob("*"):
+                if f.is_file():
+                    zf.write(f, f.relative_to(content_dir))
+
+
+def tree_contents(directory):
+    return {
+        str(f.relative_to(directory)): f.read_bytes()
+        for f in sorted(Path(directory).rglob("*"))
+        if f.is_file()
+    }
+
+
+def add_parts(source, target, parts):
+    """Copy a package, replacing or adding the given parts."""
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zout:
+        for item in zin.infolist():
+            if item.filename not in parts:
+                zout.writestr(item, zin.read(item))
+        for name, data in parts.items():
+            zout.writestr(name, data)
+    return target
+
+
+class TestUnpackPack:
+    """Test that streaming unpack/pack match the copy-based implementation.
+
+    Trees and archive parts are compared byte for byte against the old code
+    (legacy_unpack/legacy_pack above); only the compression of media that
+    is already compressed is allowed to differ.
+    """
+
+    QUOTES = "“quoted” and ‘single’"
+
+    @pytest.fixture(params=["docx-generated_42", "docx-tracked_runs", "pptx"])
+    def document(self, request, tmp_path):
+        rng = random.Random(request.param)
+        media = {"image1.png": rng.randbytes(4000), "photo.JPEG": rng.randbytes(3000)}
+        base = tmp_path / "base"
+        if request.param == "pptx":
+            make_pptx(base, 3, shapes=2)
+            slide = zipfile.ZipFile(base).read("ppt/slides/slide1.xml").decode()
+            parts = {
+                "ppt/slides/slide1.xml": slide.replace("Slide 1 shape 0", self.QUOTES),
+                "ppt/media/clip.mp4": rng.randbytes(5000),
+                "ppt/media/image3.emf": b"EMF record " * 500,
+                **{f"ppt/media/{name}": data for name, data in media.items()},
+            }
+            return add_parts(base, tmp_path / "input.pptx", parts)
+
+        make_docx(base, 1)
+        case = request.param.split("-", 1)[1]
+        document = (REDLINES_DIR / case / "input.xml").read_text().replace(
+            "<w:body>", f"<w:body><w:p><w:r><w:t>{self.QUOTES}</w:t></w:r></w:p>", 1
+        )
+        parts = {
+            "word/document.xml": document,
+            "word/comments.xml": f'<?xml version="1.0"?><w:comments xmlns:w="{WORD_NS}">'
+                                 f"<w:comment><w:p><w:r><w:t>{self.QUOTES}</w:t></w:r></w:p></w:comment>"
+                                 "</w:comments>",
+            "word/embeddings/oleObject1.bin": b"OLE stream " * 500,
+            **{f"word/media/{name}": data for name, data in media.items()},
+        }
+        return add_parts(base, tmp_path / "input.docx", parts)
+
+    OPTIONS = pytest.mark.parametrize("merge, simplify", [
+        (True, True), (False, False), (True, False), (False, True),
+    ])
+
+    @OPTIONS
+    def test_unpack_matches_legacy(self, tmp_path, document, merge, simplify):
+        _, message = unpack(str(document), str(tmp_path / "new"), merge_runs=merge, simplify_redlines=simplify)
+        legacy_message = legacy_unpack(str(document), str(tmp_path / "old"), merge, simplify)
+
+        assert message == legacy_message
+        new, old = tree_contents(tmp_path / "new"), tree_contents(tmp_path / "old")
+        assert new == old
+        escaped = [name for name, data in new.items() if b"&#x201C;quoted&#x201D;" in data]
+        assert len(escaped) == (2 if document.suffix == ".docx" else 1)
+
+    @OPTIONS
+    def test_pack_matches_legacy(self, tmp_path, document, merge, simplify):
+        unpack(str(document), str(tmp_path / "unpacked"), merge_runs=merge, simplify_redlines=simplify)
+        packed, legacy = tmp_path / f"new{document.suffix}", tmp_path / f"old{document.suffix}"
+
+        _, message = pack(str(tmp_path / "unpacked"), str(packed), validate=False)
+        legacy_pack(tmp_path / "unpacked", legacy)
+
+        assert not message.startswith("Error"), message
+        with zipfile.ZipFile(packed) as new, zipfile.ZipFile(legacy) as old:
+            assert new.namelist() == old.namelist()
+            for name in new.namelist():
+                assert new.read(name) == old.read(name), name
+
+    def test_precompressed_media_stored(self, tmp_path, document):
+        unpack(str(document), str(tmp_path / "unpacked"))
+        packed = tmp_path / f"out{document.suffix}"
+        pack(str(tmp_path / "unpacked"), str(packed), validate=False)
+
+        with zipfile.ZipFile(packed) as zf:
+            compression = {Path(info.filename).name: info.compress_type for info in zf.infolist()}
+        stored = {name for name, kind in compression.items() if kind == zipfile.ZIP_STORED}
+        assert stored == {
+            name for name in compression if Path(name).suffix.lower() in PRECOMPRESSED_SUFFIXES
+        }
+        assert {"image1.png", "photo.JPEG"} <= stored
+        assert set(compression.values()) == {zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED}
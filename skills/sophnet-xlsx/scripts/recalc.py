@@ -3,20 +3,36 @@ Excel Formula Recalculation Script
 Recalculates all formulas in an Excel file using LibreOffice
 """
 
+import glob
 import json
 import os
 import platform
 import subprocess
 import sys
+import zipfile
 from pathlib import Path
 
-from office.soffice import get_soffice_env
+import lxml.etree
+from office.soffice import SofficeError, get_pool, get_soffice_env
 
-from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string, get_column_letter
 
 MACRO_DIR_MACOS = "~/Library/Application Support/LibreOffice/4/user/basic/Standard"
 MACRO_DIR_LINUX = "~/.config/libreoffice/4/user/basic/Standard"
 MACRO_FILENAME = "Module1.xba"
+BATCH_SUFFIXES = {".xlsx", ".xlsm"}
+
+EXCEL_ERRORS = [
+    "#VALUE!",
+    "#DIV/0!",
+    "#REF!",
+    "#NAME?",
+    "#NULL!",
+    "#NUM!",
+    "#N/A",
+]
+
+_PARSER = lxml.etree.XMLParser(resolve_entities=False, no_network=True)
 
 RECALCULATE_MACRO = """<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE script:module PUBLIC "-//OpenOffice.org//DTD OfficeDocument 1.0//EN" "module.dtd">
@@ -73,6 +89,24 @@ def recalc(filename, timeout=30):
 
     abs_path = str(Path(filename).absolute())
 
+    pool = get_pool()
+    if pool is not None:
+        try:
+            pool.recalc(abs_path, timeout=timeout)
+        except SofficeError as e:
+            return {"error": str(e)}
+        except OSError:
+            # Pool directory unusable; run soffice once instead
+            pool = None
+    if pool is None:
+        error = _recalc_with_macro(abs_path, timeout)
+        if error:
+            return error
+
+    return _scan_workbook(filename)
+
+
+def _recalc_with_macro(abs_path, timeout):
     if not setup_libreoffice_macro():
         return {"error": "Failed to setup LibreOffice macro"}
 
@@ -97,35 +131,23 @@ def recalc(filename, timeout=30):
             return {"error": "LibreOffice macro not configured properly"}
         return {"error": error_msg}
 
+    return None
+
+
+def _scan_workbook(filename):
     try:
-        wb = load_workbook(filename, data_only=True)
-
-        excel_errors = [
-            "#VALUE!",
-            "#DIV/0!",
-            "#REF!",
-            "#NAME?",
-            "#NULL!",
-            "#NUM!",
-            "#N/A",
-        ]
-        error_details = {err: [] for err in excel_errors}
-        total_errors = 0
-
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            for row in ws.iter_rows():
-                for cell in row:
-                    if cell.value is not None and isinstance(cell.value, str):
-                        for err in excel_errors:
-                            if err in cell.value:
-                                location = f"{sheet_name}!{cell.coordinate}"
-                                error_details[err].append(location)
-                                total_errors += 1
-                                break
-
-        wb.close()
+        error_details = {err: [] for err in EXCEL_ERRORS}
+        formula_count = 0
 
+        with zipfile.ZipFile(filename) as zf:
+            shared_errors = _shared_string_errors(zf)
+            for sheet_name, sheet_path in _worksheet_parts(zf):
+                with zf.open(sheet_path) as sheet_xml:
+                    formula_count += _scan_sheet(
+                        sheet_xml, sheet_name, shared_errors, error_details
+                    )
+
+        total_errors = sum(len(locations) for locations in error_details.values())
         result = {
             "status": "success" if total_errors == 0 else "errors_found",
             "total_errors": total_errors,
@@ -139,20 +161,6 @@ def recalc(filename, timeout=30):
                     "locations": locations[:20],  
                 }
 
-        wb_formulas = load_workbook(filename, data_only=False)
-        formula_count = 0
-        for sheet_name in wb_formulas.sheetnames:
-            ws = wb_formulas[sheet_name]
-            for row in ws.iter_rows():
-                for cell in row:
-                    if (
-                        cell.value
-                        and isinstance(cell.value, str)
-                        and cell.value.startswith("=")
-                    ):
-                        formula_count += 1
-        wb_formulas.close()
-
         result["total_formulas"] = formula_count
 
         return result
@@ -161,9 +169,163 @@ def recalc(filename, timeout=30):
         return {"error": str(e)}
 
 
+def _iterparse(source, tag):
+    return lxml.etree.iterparse(
+        source,
+        events=("end",),
+        tag=tag,
+        resolve_entities=False,
+        no_network=True,
+    )
+
+
+def _find_error(text):
+    if "#" in text:
+        for err in EXCEL_ERRORS:
+            if err in text:
+                return err
+    return None
+
+
+def _shared_string_errors(zf):
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return {}
+
+    errors = {}
+    with zf.open("xl/sharedStrings.xml") as f:
+        for index, (_, si) in enumerate(_iterparse(f, "{*}si")):
+            text = "".join(
+                t.text or ""
+                for t in si.iter("{*}t")
+                if lxml.etree.QName(t.getparent()).localname != "rPh"
+            )
+            err = _find_error(text)
+            if err:
+                errors[index] = err
+            si.clear()
+    return errors
+
+
+def _worksheet_parts(zf):
+    workbook = lxml.etree.fromstring(zf.read("xl/workbook.xml"), _PARSER)
+    rels = lxml.etree.fromstring(zf.read("xl/_rels/workbook.xml.rels"), _PARSER)
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels}
+
+    for sheet in workbook.iter("{*}sheet"):
+        r_id = next(
+            (value for name, value in sheet.attrib.items() if name.endswith("}id")),
+            None,
+        )
+        target = targets.get(r_id, "")
+        path = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+        if "worksheets/" in path and path in zf.namelist():
+            yield sheet.get("name"), path
+
+
+def _scan_sheet(sheet_xml, sheet_name, shared_errors, error_details):
+    formula_count = 0
+    row_index = 0
+
+    for _, row in _iterparse(sheet_xml, "{*}row"):
+        row_index = int(row.get("r") or row_index + 1)
+        col_index = 0
+
+        for cell in row:
+            ref = cell.get("r")
+            if ref is not None:
+                col_index = None
+            elif col_index is not None:
+                col_index += 1
+
+            value = None
+            for child in cell:
+                name = child.tag.rsplit("}", 1)[-1]
+                if name == "f":
+                    formula_count += 1
+                elif name == "v":
+                    value = child.text
+                elif name == "is":
+                    value = "".join(t.text or "" for t in child.iter("{*}t"))
+
+            if not value:
+                continue
+            cell_type = cell.get("t")
+            if cell_type == "s":
+                err = shared_errors.get(int(value))
+            elif cell_type in ("e", "str", "inlineStr"):
+                err = _find_error(value)
+            else:
+                continue
+
+            if err:
+                if ref is None:
+                    ref = f"{get_column_letter(_cell_column(cell, col_index))}{row_index}"
+                error_details[err].append(f"{sheet_name}!{ref}")
+
+        row.clear()
+        while row.getprevious() is not None:
+            del row.getparent()[0]
+
+    return formula_count
+
+
+def _cell_column(cell, col_index):
+    if col_index is not None:
+        return col_index
+    column = 0
+    for sibling in cell.itersiblings(preceding=True):
+        column += 1
+        ref = sibling.get("r")
+        if ref is not None:
+            return column + column_index_from_string(ref.rstrip("0123456789"))
+    return column + 1
+
+
+def _expand_inputs(pattern):
+    path = Path(pattern)
+    if path.is_dir():
+        files = [p for p in path.iterdir() if p.suffix.lower() in BATCH_SUFFIXES]
+    elif any(ch in pattern for ch in "*?["):
+        files = [Path(p) for p in glob.glob(pattern, recursive=True)]
+    else:
+        return [path]
+    return sorted(p for p in files if not p.name.startswith("~$"))
+
+
+def recalc_batch(filenames, timeout=30):
+    """Recalculate several workbooks, yielding (filename, result) in input order.
+
+    With the warm LibreOffice pool all files go through one set of
+    workers, and each finished workbook is scanned while the rest are
+    still recalculating. Without it, falls back to recalc() per file.
+    """
+    pool = get_pool()
+    if pool is None:
+        for filename in filenames:
+            yield filename, recalc(filename, timeout)
+        return
+
+    futures = [
+        pool.submit("recalc", str(Path(filename).absolute()), timeout=timeout)
+        for filename in filenames
+    ]
+    for filename, future in zip(filenames, futures):
+        try:
+            future.result()
+        except SofficeError as e:
+            yield filename, {"error": str(e)}
+            continue
+        except OSError:
+            error = _recalc_with_macro(str(Path(filename).absolute()), timeout)
+            if error:
+                yield filename, error
+                continue
+        yield filename, _scan_workbook(filename)
+
+
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python recalc.py <excel_file> [timeout_seconds]")
+        print("Usage: python recalc.py <excel_file|directory|glob> [timeout_seconds]")
         print("\nRecalculates all formulas in an Excel file using LibreOffice")
         print("\nReturns JSON with error details:")
         print("  - status: 'success' or 'errors_found'")
@@ -171,13 +333,24 @@ def main():
         print("  - total_formulas: Number of formulas in the file")
         print("  - error_summary: Breakdown by error type with locations")
         print("    - #VALUE!, #DIV/0!, #REF!, #NAME?, #NULL!, #NUM!, #N/A")
+        print("\nWith a directory or glob, prints one JSON line per workbook")
+        print("(the same fields plus 'file').")
         sys.exit(1)
 
-    filename = sys.argv[1]
+    target = sys.argv[1]
     timeout = int(sys.argv[2]) if len(sys.argv) > 2 else 30
 
-    result = recalc(filename, timeout)
-    print(json.dumps(result, indent=2))
+    filenames = _expand_inputs(target)
+    if filenames == [Path(target)] and not Path(target).is_dir():
+        result = recalc(target, timeout)
+        print(json.dumps(result, indent=2))
+        return
+    if not filenames:
+        print(json.dumps({"error": f"No workbooks match {target}"}))
+        sys.exit(1)
+
+    for filename, result in recalc_batch([str(f) for f in filenames], timeout):
+        print(json.dumps({"file": filename, **result}), flush=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pytest>=8.0.0",
+#     "lxml>=5.0.0",
+#     "openpyxl>=3.1.0",
+# ]
+# ///
+"""
+Tests for the streaming error scan and batch mode of recalc.py
+
+Run with: uv run pytest test_recalc.py -v
+"""
+
+import json
+import random
+import sys
+import zipfile
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import recalc
+from office.soffice import SofficeError
+from recalc import EXCEL_ERRORS, _expand_inputs, _scan_workbook
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+XML_HEAD = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+
+def write_workbook(path, sheets, shared_strings=None):
+    """Write an .xlsx from raw sheetData XML, so cell attributes are exactly as given.
+
+    `sheets` is a list of (name, sheetData inner XML); `shared_strings` a list
+    of raw <si> inner XML. The second sheet's relationship uses an absolute
+    target, as some writers do.
+    """
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, len(sheets) + 1)
+    )
+    sheet_entries = "".join(
+        f'<sheet name="{name}" sheetId="{i}" r:id="rId{i}"/>'
+        for i, (name, _) in enumerate(sheets, 1)
+    )
+    sheet_rels = "".join(
+        f'<Relationship Id="rId{i}" Type="{REL_NS}/worksheet" '
+        f'Target="{"/xl/" if i == 2 else ""}worksheets/sheet{i}.xml"/>'
+        for i in range(1, len(sheets) + 1)
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", (
+            f'{XML_HEAD}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            f"{overrides}</Types>"
+        ))
+        zf.writestr("_rels/.rels", (
+            f'{XML_HEAD}<Relationships xmlns="{PKG_REL_NS}">'
+            f'<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            "</Relationships>"
+        ))
+        zf.writestr("xl/workbook.xml", (
+            f'{XML_HEAD}<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+            f"<sheets>{sheet_entries}</sheets></workbook>"
+        ))
+        shared_rel = (
+            f'<Relationship Id="rId{len(sheets) + 1}" Type="{REL_NS}/sharedStrings" '
+            'Target="sharedStrings.xml"/>'
+        )
+        zf.writestr("xl/_rels/workbook.xml.rels",
+                    f'{XML_HEAD}<Relationships xmlns="{PKG_REL_NS}">{sheet_rels}{shared_rel}</Relationships>')
+        strings = shared_strings or []
+        zf.writestr("xl/sharedStrings.xml", (
+            f'{XML_HEAD}<sst xmlns="{MAIN_NS}" count="{len(strings)}" uniqueCount="{len(strings)}">'
+            + "".join(f"<si>{si}</si>" for si in strings)
+            + "</sst>"
+        ))
+        for i, (_, sheet_data) in enumerate(sheets, 1):
+            zf.writestr(f"xl/worksheets/sheet{i}.xml",
+                        f'{XML_HEAD}<worksheet xmlns="{MAIN_NS}"><sheetData>{sheet_data}</sheetData></worksheet>')
+    return path
+
+
+def openpyxl_scan(filename):
+    """The scan recalc.py used before streaming: two openpyxl loads."""
+    error_details = {err: [] for err in EXCEL_ERRORS}
+    wb = load_workbook(filename, data_only=True)
+    for ws in wb.worksheets:
+        for row in ws.iter_rows():
+            for cell in row:
+                if isinstance(cell.value, str):
+                    for err in EXCEL_ERRORS:
+                        if err in cell.value:
+                            error_details[err].append(f"{ws.title}!{cell.coordinate}")
+                            break
+    wb.close()
+
+    wb = load_workbook(filename, data_only=False)
+    formula_count = sum(
+        1
+        for ws in wb.worksheets
+        for row in ws.iter_rows()
+        for cell in row
+        if isinstance(cell.value, str) and cell.value.startswith("=")
+    )
+    wb.close()
+
+    total = sum(len(locations) for locations in error_details.values())
+    return {
+        "status": "success" if total == 0 else "errors_found",
+        "total_errors": total,
+        "error_summary": {
+            err: {"count": len(locations), "locations": locations[:20]}
+            for err, locations in error_details.items() if locations
+        },
+        "total_formulas": formula_count,
+    }
+
+
+SHARED_STRINGS = [
+    "<t>#DIV/0!</t>",
+    "<t>ok</t>",
+    "<r><t>#NA</t></r><r><rPr><b/></rPr><t>ME? in two runs</t></r>",
+    "<t>plain</t><rPh sb=\"0\" eb=\"1\"><t>#NUM!</t></rPh>",
+]
+
+MAIN_SHEET = (
+    # Cells with r: shared string error, formula error, inline string error
+    '<row r="1">'
+    '<c r="A1" t="s"><v>0</v></c>'
+    '<c r="B1" t="e"><f>1/0</f><v>#DIV/0!</v></c>'
+    '<c r="C1" t="inlineStr"><is><t>bad #REF! here</t></is></c>'
+    '<c r="D1"><f>SUM(1,2)</f><v>3</v></c>'
+    "</row>"
+    # Row and cells without r
+    "<row>"
+    '<c t="e"><f>NA()</f><v>#N/A</v></c>'
+    '<c t="s"><v>1</v></c>'
+    '<c t="str"><f>"x"&amp;A1</f><v>#VALUE! x</v></c>'
+    "</row>"
+    # Mixed: a positioned cell followed by unpositioned ones
+    '<row r="5">'
+    '<c r="B5" t="s"><v>2</v></c>'
+    '<c t="s"><v>3</v></c>'
+    '<c t="e"><v>#NULL!</v></c>'
+    "</row>"
+    # After a gap, a cell without r starts at column A
+    '<row r="10"><c t="inlineStr"><is><r><t>#NUM</t></r><r><t>!</t></r></is></c></row>'
+)
+
+OTHER_SHEET = (
+    '<row r="1"><c r="AA1" t="e"><f>1/0</f><v>#DIV/0!</v></c><c r="AB1"><v>5</v></c></row>'
+    '<row r="2"><c r="A2" t="s"><v>0</v></c><c r="B2" t="e"><v>#REF!</v></c></row>'
+)
+
+
+class TestScanWorkbook:
+    """Test the streaming scan against the old openpyxl scan."""
+
+    @pytest.fixture
+    def workbook(self, tmp_path):
+        return write_workbook(
+            tmp_path / "cases.xlsx",
+            [("Main", MAIN_SHEET), ("Data &amp; More", OTHER_SHEET)],
+            SHARED_STRINGS,
+        )
+
+    def test_cell_kinds(self, workbook):
+        result = _scan_workbook(str(workbook))
+
+        assert result["total_formulas"] == 5
+        assert {err: summary["locations"] for err, summary in result["error_summary"].items()} == {
+            "#DIV/0!": ["Main!A1", "Main!B1", "Data & More!AA1", "Data & More!A2"],
+            "#REF!": ["Main!C1", "Data & More!B2"],
+            "#N/A": ["Main!A2"],
+            "#VALUE!": ["Main!C2"],
+            "#NAME?": ["Main!B5"],
+            "#NULL!": ["Main!D5"],
+            "#NUM!": ["Main!A10"],
+        }
+        assert result["total_errors"] == 11
+        assert result["status"] == "errors_found"
+
+    def test_matches_openpyxl_scan(self, workbook):
+        assert _scan_workbook(str(workbook)) == openpyxl_scan(workbook)
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_generated_workbooks_match_openpyxl_scan(self, tmp_path, seed):
+        rng = random.Random(seed)
+        wb = Workbook()
+        wb.remove(wb.active)
+        for s in range(3):
+            ws = wb.create_sheet(f"Sheet {s}")
+            for row in range(1, 120):
+                for col in range(1, 9):
+                    kind = rng.random()
+                    if kind < 0.3:
+                        ws.cell(row, col, rng.random() * 100)
+                    elif kind < 0.5:
+                        ws.cell(row, col, f"=A{row}*{col}")
+                    elif kind < 0.6:
+                        ws.cell(row, col, rng.choice(EXCEL_ERRORS))
+                    elif kind < 0.7:
+                        ws.cell(row, col, f"note {rng.choice(EXCEL_ERRORS)} {row}")
+                    elif kind < 0.8:
+                        ws.cell(row, col, f"text {rng.randint(0, 20)}")
+        path = tmp_path / f"generated{seed}.xlsx"
+        wb.save(path)
+
+        result = _scan_workbook(str(path))
+        assert result == openpyxl_scan(path)
+        assert result["total_errors"] > 20
+
+    def test_clean_workbook(self, tmp_path):
+        path = write_workbook(tmp_path / "clean.xlsx", [("Only", '<row r="1"><c r="A1"><f>1+1</f><v>2</v></c></row>')])
+        assert _scan_workbook(str(path)) == {
+            "status": "success", "total_errors": 0, "error_summary": {}, "total_formulas": 1,
+        }
+
+    def test_unreadable_workbook(self, tmp_path):
+        path = tmp_path / "broken.xlsx"
+        path.write_text("not a zip")
+        assert "error" in _scan_workbook(str(path))
+
+
+class FakePool:
+    """Stands in for the LibreOffice pool: recalculating is a no-op."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.submitted = []
+
+    def submit(self, method, path, **kwargs):
+        self.submitted.append(Path(path).name)
+        future = Future()
+        if Path(path).name in self.failing:
+            future.set_exception(SofficeError("recalculation failed"))
+        else:
+            future.set_result(None)
+        return future
+
+
+class TestBatchMode:
+    """Test directory and glob inputs and their JSON-lines output."""
+
+    @pytest.fixture
+    def folder(self, tmp_path):
+        folder = tmp_path / "books"
+        folder.mkdir()
+        for name in ["b.xlsx", "a.xlsm", "~$a.xlsx"]:
+            write_workbook(folder / name, [("Main", MAIN_SHEET)], SHARED_STRINGS)
+        write_workbook(folder / "c.xlsx", [("Only", '<row r="1"><c r="A1"><v>1</v></c></row>')])
+        (folder / "notes.txt").write_text("not a workbook")
+        return folder
+
+    def _run(self, monkeypatch, capsys, target, pool):
+        monkeypatch.setattr(recalc, "get_pool", lambda: pool)
+        monkeypatch.setattr(sys, "argv", ["recalc.py", str(target)])
+        recalc.main()
+        return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    def test_expand_inputs(self, folder):
+        assert [p.name for p in _expand_inputs(str(folder))] == ["a.xlsm", "b.xlsx", "c.xlsx"]
+        assert [p.name for p in _expand_inputs(str(folder / "*.xlsx"))] == ["b.xlsx", "c.xlsx"]
+        assert _expand_inputs(str(folder / "b.xlsx")) == [folder / "b.xlsx"]
+        assert _expand_inputs(str(folder / "*.xlsb")) == []
+
+    def test_directory_json_lines(self, folder, monkeypatch, capsys):
+        pool = FakePool()
+        lines = self._run(monkeypatch, capsys, folder, pool)
+
+        assert pool.submitted == ["a.xlsm", "b.xlsx", "c.xlsx"]
+        assert [Path(line["file"]).name for line in lines] == ["a.xlsm", "b.xlsx", "c.xlsx"]
+        expected = _scan_workbook(str(folder / "b.xlsx"))
+        assert {k: v for k, v in lines[1].items() if k != "file"} == expected
+        assert lines[2]["status"] == "success"
+
+    def test_glob_reports_failures_per_file(self, folder, monkeypatch, capsys):
+        lines = self._run(monkeypatch, capsys, folder / "*.xlsx", FakePool(failing={"b.xlsx"}))
+
+        assert [Path(line["file"]).name for line in lines] == ["b.xlsx", "c.xlsx"]
+        assert lines[0]["error"] == "recalculation failed"
+        assert lines[1]["status"] == "success"
+
+    @pytest.mark.parametrize("pattern", ["*.xlsb", "empty"])
+    def test_no_matches_is_an_error(self, tmp_path, monkeypatch, capsys, pattern):
+        (tmp_path / "empty").mkdir()
+        with pytest.raises(SystemExit) as exit_info:
+            self._run(monkeypatch, capsys, tmp_path / pattern, FakePool())
+        assert exit_info.value.code == 1
+        assert "No workbooks" in json.loads(capsys.readouterr().out)["error"]